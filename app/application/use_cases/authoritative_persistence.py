@@ -2,7 +2,8 @@ from __future__ import annotations
 
 import os
 from copy import deepcopy
-from typing import Any, Callable, Sequence, TypeVar
+from datetime import datetime, timezone
+from typing import Any, Callable, Mapping, Sequence, TypeVar
 
 from app.application.use_cases.authoritative_write_coordinator import (
     AuthoritativeWriteCoordinator,
@@ -89,7 +90,10 @@ from app.models.compensacao import Compensacao
 from app.services.audit_service import serialize_record, serialize_records_sample
 from app.services.access_service import AccessEnvironment, AppAccessSession, SupabaseAccessService
 from app.services.sqlite_session_backup_service import SqliteSessionBackupService
-from app.services.supabase_compensacoes_rpc_service import SupabaseCompensacoesRpcService
+from app.services.supabase_compensacoes_rpc_service import (
+    SupabaseCompensacoesConflictError,
+    SupabaseCompensacoesRpcService,
+)
 from app.utils.logger import get_logger
 
 
@@ -133,10 +137,6 @@ class AuthoritativePersistenceUseCases:
         self.recovery_use_cases = SessionRecoveryUseCases(workbook, audit_service)
         self.recovery_operations = RecoveryOperationsUseCases(self.recovery_use_cases, audit_service)
 
-    @staticmethod
-    def _clone_records(records: Sequence[Compensacao]) -> tuple[Compensacao, ...]:
-        return tuple(deepcopy(list(records)))
-
     @staticmethod
     def _normalized_issues(*issue_groups: Sequence[str]) -> tuple[str, ...]:
         merged: list[str] = []
@@ -482,7 +482,7 @@ class AuthoritativePersistenceUseCases:
     ) -> LocalMutationApplyResult:
         workbook_path = self.current_session_path()
         sync_service = getattr(self.access_service, "production_sync_service", None)
-        fallback_records = self._clone_records(projected_records)
+        fallback_records = tuple(projected_records)
         target_db_path = getattr(self.persistence_service, "db_path", None)
 
         if sync_service is None:
@@ -537,6 +537,96 @@ class AuthoritativePersistenceUseCases:
             source=fallback_result.source,
         )
 
+    def _refresh_remote_cache_after_conflict(self, client, *, operation: str) -> None:
+        sync_service = getattr(self.access_service, "production_sync_service", None)
+        if sync_service is None:
+            return
+        try:
+            sync_service.sync_authenticated_client(
+                client,
+                local_db_path=getattr(self.persistence_service, "db_path", None),
+                session_path=self.current_session_path(),
+            )
+        except Exception as exc:
+            logger.warning(
+                "Conflito na operacao '%s' e o cache local nao pode ser atualizado: %s",
+                operation,
+                exc,
+                exc_info=True,
+            )
+
+    def _apply_remote_write_locally(
+        self,
+        *,
+        operation: str,
+        remote_result: object,
+        upserts: Sequence[Compensacao],
+        deleted_uids: Sequence[str],
+        projected_records: Sequence[Compensacao],
+        audit_entry: Mapping[str, Any] | None,
+    ) -> LocalMutationApplyResult | None:
+        """Aplica no espelho local a linha devolvida pela RPC; ``None`` pede a sincronizacao completa."""
+        workbook_path = self.current_session_path()
+        apply_changes = getattr(self.persistence_service, "apply_workbook_changes", None)
+        if not workbook_path or not callable(apply_changes):
+            return None
+
+        try:
+            summary = apply_changes(workbook_path, tuple(upserts), deleted_uids=tuple(deleted_uids))
+        except Exception as exc:
+            logger.warning(
+                "Falha ao aplicar o resultado da operacao '%s' no cache local; sincronizando a base completa: %s",
+                operation,
+                exc,
+                exc_info=True,
+            )
+            return None
+
+        for field_name in ("record_count", "plantio_count"):
+            remote_count = getattr(remote_result, field_name, None)
+            local_count = getattr(summary, field_name, None)
+            if remote_count is None or local_count is None or int(remote_count or 0) == int(local_count or 0):
+                continue
+            logger.info(
+                "Cache local divergente apos '%s' (%s: %s local, %s remoto); sincronizando a base completa.",
+                operation,
+                field_name,
+                local_count,
+                remote_count,
+            )
+            return None
+
+        issues: tuple[str, ...] = ()
+        audit_event_id = str(getattr(remote_result, "audit_event_id", "") or "").strip()
+        mirror_audit_event = getattr(self.persistence_service, "mirror_audit_event", None)
+        if audit_event_id and audit_entry is not None and callable(mirror_audit_event):
+            try:
+                mirror_audit_event(
+                    event_id=audit_event_id,
+                    timestamp=datetime.now(timezone.utc).isoformat(),
+                    workbook_path=workbook_path,
+                    **audit_entry,
+                )
+            except Exception as exc:
+                issue = f"Base oficial gravada, mas a auditoria nao foi espelhada no cache local: {exc}"
+                logger.warning(issue, exc_info=True)
+                issues = (issue,)
+
+        records = tuple(projected_records)
+        return LocalMutationApplyResult(
+            status=LocalMutationSyncStatus(
+                status="sqlite",
+                operation=operation,
+                workbook_path=workbook_path,
+                strategy="remote_result_apply",
+                synced_at=str(getattr(summary, "synced_at", "") or ""),
+                record_count=int(getattr(summary, "record_count", 0) or 0) or len(records),
+                issues=issues,
+            ),
+            records=records,
+            source="projection",
+        )
+
     def _execute_remote_authoritative_write(
         self,
         *,
@@ -544,17 +634,35 @@ class AuthoritativePersistenceUseCases:
         remote_call: Callable[[object], object],
         projected_records_factory: Callable[[object], Sequence[Compensacao]],
         fallback_local_apply: Callable[[object], LocalMutationApplyResult],
+        local_changes_factory: Callable[[object], tuple[Sequence[Compensacao], Sequence[str]]] | None = None,
+        audit_entry: Mapping[str, Any] | None = None,
     ) -> CoordinatedWriteResult[None]:
         workbook_path = self.current_session_path()
         client = self._create_remote_compensacoes_client()
-        remote_result = remote_call(client)
-        projected_records = self._clone_records(projected_records_factory(remote_result))
-        local_result = self._sync_remote_cache_after_write(
-            client=client,
-            operation=operation,
-            projected_records=projected_records,
-            fallback_local_apply=lambda: fallback_local_apply(remote_result),
-        )
+        try:
+            remote_result = remote_call(client)
+        except SupabaseCompensacoesConflictError:
+            self._refresh_remote_cache_after_conflict(client, operation=operation)
+            raise
+        projected_records = tuple(projected_records_factory(remote_result))
+        local_result = None
+        if local_changes_factory is not None:
+            upserts, deleted_uids = local_changes_factory(remote_result)
+            local_result = self._apply_remote_write_locally(
+                operation=operation,
+                remote_result=remote_result,
+                upserts=upserts,
+                deleted_uids=deleted_uids,
+                projected_records=projected_records,
+                audit_entry=audit_entry,
+            )
+        if local_result is None:
+            local_result = self._sync_remote_cache_after_write(
+                client=client,
+                operation=operation,
+                projected_records=projected_records,
+                fallback_local_apply=lambda: fallback_local_apply(remote_result),
+            )
         write_status = build_remote_authoritative_status(
             workbook_path=workbook_path,
             operation=operation,
@@ -1175,22 +1283,30 @@ class AuthoritativePersistenceUseCases:
         backup_path = self.create_operation_backup("add")
         self.assign_provisional_add_identity(record, existing_records=authoritative_records)
         if self._can_use_remote_compensacoes_write():
+            audit_entry = {
+                "action": "add",
+                "summary": f"Registro cadastrado: {record.av_tec or record.oficio_processo}",
+                "backup_path": backup_path,
+                "metadata": {"authority": "supabase_remote", "environment": "production"},
+                "after": serialize_record(record),
+            }
             return self._execute_remote_authoritative_write(
                 operation="add",
                 remote_call=lambda client: self.remote_compensacoes_service.save_record(
                     client,
                     workbook_path=self.current_session_path(),
                     record=record,
-                    action="add",
-                    summary=f"Registro cadastrado: {record.av_tec or record.oficio_processo}",
-                    backup_path=backup_path,
-                    metadata={"authority": "supabase_remote", "environment": "production"},
-                    after=serialize_record(record),
+                    **audit_entry,
                 ),
                 projected_records_factory=lambda remote_result: self.local_mutation_sync.project_after_add(
                     authoritative_records,
                     self._apply_remote_record_identity(record, remote_result),
                 ),
+                local_changes_factory=lambda remote_result: (
+                    (self._apply_remote_record_identity(record, remote_result),),
+                    (),
+                ),
+                audit_entry=audit_entry,
                 fallback_local_apply=lambda remote_result: self.local_mutation_sync.apply_after_add(
                     workbook_path=self.current_session_path(),
                     existing_records=authoritative_records,
@@ -1225,24 +1341,32 @@ class AuthoritativePersistenceUseCases:
     ) -> CoordinatedWriteResult[None]:
         backup_path = self.create_operation_backup("edit")
         if self._can_use_remote_compensacoes_write():
+            audit_entry = {
+                "action": "edit",
+                "summary": f"Registro alterado: {record.av_tec or record.oficio_processo}",
+                "backup_path": backup_path,
+                "metadata": {"authority": "supabase_remote", "environment": "production"},
+                "before": serialize_record(before_record) if before_record is not None else None,
+                "after": serialize_record(record),
+            }
             return self._execute_remote_authoritative_write(
                 operation="edit",
                 remote_call=lambda client: self.remote_compensacoes_service.save_record(
                     client,
                     workbook_path=self.current_session_path(),
                     record=record,
-                    action="edit",
-                    summary=f"Registro alterado: {record.av_tec or record.oficio_processo}",
-                    backup_path=backup_path,
                     expected_updated_at=str(getattr(before_record, "updated_at", "") or "").strip(),
-                    metadata={"authority": "supabase_remote", "environment": "production"},
-                    before=serialize_record(before_record) if before_record is not None else None,
-                    after=serialize_record(record),
+                    **audit_entry,
                 ),
                 projected_records_factory=lambda remote_result: self.local_mutation_sync.project_after_edit(
                     authoritative_records,
                     self._apply_remote_record_identity(record, remote_result),
                 ),
+                local_changes_factory=lambda remote_result: (
+                    (self._apply_remote_record_identity(record, remote_result),),
+                    (),
+                ),
+                audit_entry=audit_entry,
                 fallback_local_apply=lambda remote_result: self.local_mutation_sync.apply_after_edit(
                     workbook_path=self.current_session_path(),
                     existing_records=authoritative_records,
@@ -1273,27 +1397,35 @@ class AuthoritativePersistenceUseCases:
     ) -> CoordinatedWriteResult[None]:
         backup_path = self.create_operation_backup("delete")
         if self._can_use_remote_compensacoes_write():
+            audit_entry = {
+                "action": "delete",
+                "summary": f"Registro excluido: {deleted_record.av_tec or deleted_record.oficio_processo}",
+                "backup_path": backup_path,
+                "metadata": {"authority": "supabase_remote", "environment": "production"},
+                "before": serialize_record(deleted_record),
+            }
             return self._execute_remote_authoritative_write(
                 operation="delete",
                 remote_call=lambda client: self.remote_compensacoes_service.delete_record(
                     client,
                     workbook_path=self.current_session_path(),
                     uid=deleted_record.uid,
-                    action="delete",
-                    summary=f"Registro excluido: {deleted_record.av_tec or deleted_record.oficio_processo}",
-                    backup_path=backup_path,
                     expected_updated_at=str(getattr(deleted_record, "updated_at", "") or "").strip(),
-                    metadata={"authority": "supabase_remote", "environment": "production"},
-                    before=serialize_record(deleted_record),
+                    **audit_entry,
                 ),
+                # A RPC remota nao renumera as linhas abaixo do registro excluido.
                 projected_records_factory=lambda _remote_result: self.local_mutation_sync.project_after_delete(
                     authoritative_records,
                     deleted_record,
+                    shift_rows=False,
                 ),
+                local_changes_factory=lambda _remote_result: ((), (deleted_record.uid,)),
+                audit_entry=audit_entry,
                 fallback_local_apply=lambda _remote_result: self.local_mutation_sync.apply_after_delete(
                     workbook_path=self.current_session_path(),
                     existing_records=authoritative_records,
                     deleted_record=deleted_record,
+                    shift_rows=False,
                 ),
             )
         return self._execute_coordinated_write(
@@ -1324,11 +1456,6 @@ class AuthoritativePersistenceUseCases:
             imported_records,
             existing_records=base_records,
         )
-        if progress_callback is not None:
-            total = len(imported_records)
-            for index, _record in enumerate(imported_records, start=1):
-                progress_callback(index, total)
-
         if self._can_use_remote_compensacoes_write():
             result = self._execute_remote_authoritative_write(
                 operation="import",
@@ -1352,6 +1479,7 @@ class AuthoritativePersistenceUseCases:
                         "environment": "production",
                     },
                     after=build_import_audit_after_payload(imported_records),
+                    progress_callback=progress_callback,
                 ),
                 projected_records_factory=lambda _remote_result: self.local_mutation_sync.project_after_import(
                     base_records,
@@ -1377,6 +1505,11 @@ class AuthoritativePersistenceUseCases:
                 finalized=result.finalized,
             )
 
+        if progress_callback is not None:
+            total = len(imported_records)
+            for index, _record in enumerate(imported_records, start=1):
+                progress_callback(index, total)
+
         result = self._execute_coordinated_import(
             analysis=analysis,
             base_records=base_records,
@@ -1417,7 +1550,7 @@ class AuthoritativePersistenceUseCases:
             )
             return LocalMutationApplyResult(
                 status=status,
-                records=self._clone_records(projected_records),
+                records=tuple(projected_records),
                 source="sqlite" if getattr(status, "uses_sqlite", False) else "projection",
             )
 
@@ -7,7 +7,6 @@ from app.application.use_cases.authoritative_write_support import (
     AuthoritativeWriteStatus,
     build_authoritative_only_status,
     build_write_status,
-    clone_records,
     identity_signature,
     normalized_issues,
     resolve_finalized_records,
@@ -47,10 +46,6 @@ class AuthoritativeWriteCoordinator:
     def __init__(self, local_mutation_sync: LocalMutationSyncUseCases):
         self.local_mutation_sync = local_mutation_sync
 
-    @staticmethod
-    def _clone_records(records: Sequence[Compensacao]) -> tuple[Compensacao, ...]:
-        return clone_records(records)
-
     @staticmethod
     def _identity_signature(records: Sequence[Compensacao]) -> tuple[tuple[str, int], ...]:
         return identity_signature(records)
@@ -143,9 +138,8 @@ class AuthoritativeWriteCoordinator:
             raise AuthoritativeWriteError(str(exc), write_status=write_status) from exc
 
         status = mutation_result.status
-        records = self._clone_records(mutation_result.records)
         records, finalized = resolve_finalized_records(
-            current_records=records,
+            current_records=mutation_result.records,
             finalized_records_factory=finalized_records_factory,
         )
         if finalized and self._status_uses_sqlite(status):
@@ -184,9 +178,8 @@ class AuthoritativeWriteCoordinator:
     ) -> CoordinatedWriteResult[None]:
         mutation_result = sqlite_apply()
         status = mutation_result.status
-        records = self._clone_records(mutation_result.records)
         records, finalized = resolve_finalized_records(
-            current_records=records,
+            current_records=mutation_result.records,
             finalized_records_factory=finalized_records_factory,
         )
         if finalized and self._status_uses_sqlite(status):
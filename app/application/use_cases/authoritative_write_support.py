@@ -153,11 +153,13 @@ def resolve_finalized_records(
     current_records: Sequence[Compensacao],
     finalized_records_factory,
 ) -> tuple[tuple[Compensacao, ...], bool]:
-    records = clone_records(current_records)
+    # As projecoes ja devolvem colecoes novas que compartilham os registros
+    # inalterados (RecordSnapshot); basta congelar a sequencia.
+    records = tuple(current_records)
     finalized = False
     if finalized_records_factory is None:
         return records, finalized
-    finalized_records = clone_records(finalized_records_factory())
+    finalized_records = tuple(finalized_records_factory())
     if not finalized_records:
         return records, finalized
     if identity_signature(finalized_records) != identity_signature(records):
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from copy import deepcopy
-from typing import Sequence
+from typing import Mapping, Sequence
 
 from app.application.use_cases.local_mutation_sync_support import (
     LocalMutationApplyResult,
@@ -9,7 +9,6 @@ from app.application.use_cases.local_mutation_sync_support import (
     LocalMutationSyncStatus,
     build_apply_result,
     build_sync_status,
-    clone_records,
     extend_status_issues,
     list_session_records_dispatch,
     normalized_workbook_path,
@@ -22,6 +21,7 @@ from app.application.use_cases.local_mutation_sync_support import (
     sync_snapshot_dispatch,
 )
 from app.models.compensacao import Compensacao
+from app.models.record_snapshot import RecordSnapshot
 
 
 class LocalMutationSyncUseCases:
@@ -40,28 +40,30 @@ class LocalMutationSyncUseCases:
         self,
         existing_records: Sequence[Compensacao],
         added_record: Compensacao,
-    ) -> list[Compensacao]:
+    ) -> RecordSnapshot:
         return project_records_after_add(existing_records, added_record)
 
     def project_after_edit(
         self,
         existing_records: Sequence[Compensacao],
         updated_record: Compensacao,
-    ) -> list[Compensacao]:
+    ) -> RecordSnapshot:
         return project_records_after_edit(existing_records, updated_record)
 
     def project_after_delete(
         self,
         existing_records: Sequence[Compensacao],
         deleted_record: Compensacao,
-    ) -> list[Compensacao]:
-        return project_records_after_delete(existing_records, deleted_record)
+        *,
+        shift_rows: bool = True,
+    ) -> RecordSnapshot:
+        return project_records_after_delete(existing_records, deleted_record, shift_rows=shift_rows)
 
     def project_after_import(
         self,
         existing_records: Sequence[Compensacao],
         imported_records: Sequence[Compensacao],
-    ) -> list[Compensacao]:
+    ) -> RecordSnapshot:
         return project_records_after_import(existing_records, imported_records)
 
     def sync_projected_records(
@@ -77,10 +79,6 @@ class LocalMutationSyncUseCases:
             projected_records=records,
         )
 
-    @staticmethod
-    def _clone_records(records: Sequence[Compensacao]) -> tuple[Compensacao, ...]:
-        return clone_records(records)
-
     def _sync_snapshot(
         self,
         workbook_path: str,
@@ -150,6 +148,7 @@ class LocalMutationSyncUseCases:
         projected_records: Sequence[Compensacao],
         incremental_method_name: str | None = None,
         incremental_args: Sequence[object] = (),
+        incremental_kwargs: Mapping[str, object] | None = None,
     ) -> LocalMutationSyncStatus:
         normalized_path = self._normalized_path(workbook_path)
         if not normalized_path:
@@ -172,7 +171,7 @@ class LocalMutationSyncUseCases:
         try:
             incremental_method = resolve_incremental_method(self.snapshot_writer, incremental_method_name)
             if callable(incremental_method):
-                summary = incremental_method(normalized_path, *incremental_args)
+                summary = incremental_method(normalized_path, *incremental_args, **dict(incremental_kwargs or {}))
                 return build_sync_status(
                     status="sqlite",
                     operation=operation,
@@ -276,14 +275,16 @@ class LocalMutationSyncUseCases:
         workbook_path: str,
         existing_records: Sequence[Compensacao],
         deleted_record: Compensacao,
+        shift_rows: bool = True,
     ) -> LocalMutationSyncStatus:
-        projected_records = self.project_after_delete(existing_records, deleted_record)
+        projected_records = self.project_after_delete(existing_records, deleted_record, shift_rows=shift_rows)
         return self._sync_with_fallback(
             workbook_path=workbook_path,
             operation="delete",
             projected_records=projected_records,
             incremental_method_name="delete_record_from_workbook",
             incremental_args=(deepcopy(deleted_record),),
+            incremental_kwargs=None if shift_rows else {"shift_rows": False},
         )
 
     def apply_after_delete(
@@ -292,12 +293,14 @@ class LocalMutationSyncUseCases:
         workbook_path: str,
         existing_records: Sequence[Compensacao],
         deleted_record: Compensacao,
+        shift_rows: bool = True,
     ) -> LocalMutationApplyResult:
-        projected_records = self.project_after_delete(existing_records, deleted_record)
+        projected_records = self.project_after_delete(existing_records, deleted_record, shift_rows=shift_rows)
         status = self.sync_after_delete(
             workbook_path=workbook_path,
             existing_records=existing_records,
             deleted_record=deleted_record,
+            shift_rows=shift_rows,
         )
         return self._build_apply_result(status=status, projected_records=projected_records)
 
@@ -5,6 +5,7 @@ from dataclasses import dataclass
 from typing import Protocol, Sequence
 
 from app.models.compensacao import Compensacao
+from app.models.record_snapshot import RecordSnapshot
 from app.services.sqlite_mirror_service import WorkbookSnapshotSummary
 
 
@@ -69,52 +70,31 @@ def sort_records(records: Sequence[Compensacao]) -> list[Compensacao]:
 def project_records_after_add(
     existing_records: Sequence[Compensacao],
     added_record: Compensacao,
-) -> list[Compensacao]:
-    return sort_records([*(deepcopy(list(existing_records))), deepcopy(added_record)])
+) -> RecordSnapshot:
+    return RecordSnapshot.from_records(existing_records).with_added((added_record,))
 
 
 def project_records_after_edit(
     existing_records: Sequence[Compensacao],
     updated_record: Compensacao,
-) -> list[Compensacao]:
-    updated: list[Compensacao] = []
-    matched = False
-    for record in deepcopy(list(existing_records)):
-        same_uid = bool(updated_record.uid) and record.uid == updated_record.uid
-        same_row = int(record.excel_row or 0) == int(updated_record.excel_row or 0)
-        if same_uid or same_row:
-            updated.append(deepcopy(updated_record))
-            matched = True
-        else:
-            updated.append(record)
-    if not matched:
-        updated.append(deepcopy(updated_record))
-    return sort_records(updated)
+) -> RecordSnapshot:
+    return RecordSnapshot.from_records(existing_records).with_replaced(updated_record)
 
 
 def project_records_after_delete(
     existing_records: Sequence[Compensacao],
     deleted_record: Compensacao,
-) -> list[Compensacao]:
-    deleted_uid = str(getattr(deleted_record, "uid", "") or "").strip()
-    deleted_row = int(getattr(deleted_record, "excel_row", 0) or 0)
-    projected: list[Compensacao] = []
-    for record in sort_records(deepcopy(list(existing_records))):
-        same_uid = bool(deleted_uid) and record.uid == deleted_uid
-        same_row = int(record.excel_row or 0) == deleted_row
-        if same_uid or same_row:
-            continue
-        if deleted_row and int(record.excel_row or 0) > deleted_row:
-            record.excel_row = max(int(record.excel_row or 0) - 1, 0)
-        projected.append(record)
-    return projected
+    *,
+    shift_rows: bool = True,
+) -> RecordSnapshot:
+    return RecordSnapshot.from_records(existing_records).without(deleted_record, shift_rows=shift_rows)
 
 
 def project_records_after_import(
     existing_records: Sequence[Compensacao],
     imported_records: Sequence[Compensacao],
-) -> list[Compensacao]:
-    return sort_records([*(deepcopy(list(existing_records))), *(deepcopy(list(imported_records)))])
+) -> RecordSnapshot:
+    return RecordSnapshot.from_records(existing_records).with_added(imported_records)
 
 
 def sync_snapshot_dispatch(
@@ -207,7 +187,9 @@ def build_apply_result(
     selected_records = sqlite_records if source == "sqlite" and sqlite_records is not None else projected_records
     return LocalMutationApplyResult(
         status=status,
-        records=clone_records(selected_records),
+        # Registros projetados compartilham os objetos nao alterados com a base
+        # (RecordSnapshot); os lidos do SQLite ja sao instancias novas.
+        records=tuple(selected_records),
         source=source,
     )
 
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import Mapping, Protocol, Sequence
+from typing import Any, Mapping, Protocol, Sequence
 
 from app.models.compensacao import Compensacao
 from app.services.records_service import compute_metrics, filter_records
@@ -176,6 +176,13 @@ class LocalRecordQueriesUseCases:
             return reader.query_records_for_session(workbook_path, **kwargs)
         return reader.query_records_for_workbook(workbook_path, **kwargs)
 
+    def _record_page_source(self, workbook_path: str, **filters: Any) -> Any:
+        reader = self.snapshot_reader
+        factory = getattr(reader, "record_page_source_for_workbook", None)
+        if not callable(factory):
+            return None
+        return factory(workbook_path, **filters)
+
     def _query_metrics(
         self,
         workbook_path: str,
@@ -453,34 +460,42 @@ class LocalRecordQueriesUseCases:
         caixa_all_selected: bool = True,
         selected_year: str = "Todos",
         fallback_search_index: Mapping[str, str] | None = None,
+        materialize_records: bool = True,
     ) -> LocalRecordReadResult:
+        """Resolve os registros filtrados.
+
+        Com ``materialize_records=False`` a consulta no espelho devolve apenas as
+        metricas agregadas e a fonte paginada; ``records`` fica vazio.
+        """
         normalized_path, fallback, snapshot, early_result = self._resolve_snapshot_context(
             workbook_path,
             fallback_records=fallback_records,
         )
 
-        filtered_fallback = tuple(
-            filter_records(
-                fallback,
-                text=text,
-                status=status,
-                selected_micros=selected_micros,
-                selected_eletronicos=selected_eletronicos,
-                micro_all_selected=micro_all_selected,
-                eletronico_all_selected=eletronico_all_selected,
-                selected_caixas=selected_caixas,
-                caixa_all_selected=caixa_all_selected,
-                selected_year=selected_year,
-                search_index=dict(fallback_search_index or {}),
+        def filter_fallback() -> tuple[Compensacao, ...]:
+            return tuple(
+                filter_records(
+                    fallback,
+                    text=text,
+                    status=status,
+                    selected_micros=selected_micros,
+                    selected_eletronicos=selected_eletronicos,
+                    micro_all_selected=micro_all_selected,
+                    eletronico_all_selected=eletronico_all_selected,
+                    selected_caixas=selected_caixas,
+                    caixa_all_selected=caixa_all_selected,
+                    selected_year=selected_year,
+                    search_index=dict(fallback_search_index or {}),
+                )
             )
-        )
-        fallback_metrics = compute_metrics(filtered_fallback)
+
         if early_result is not None:
+            filtered_fallback = filter_fallback()
             return LocalRecordReadResult(
                 source="session",
                 records=filtered_fallback,
                 strategy="session_filter",
-                metrics=fallback_metrics,
+                metrics=compute_metrics(filtered_fallback),
                 workbook_path=early_result.workbook_path,
                 synced_at=early_result.synced_at,
                 mirrored_records=early_result.mirrored_records,
@@ -491,27 +506,56 @@ class LocalRecordQueriesUseCases:
         assert reader is not None
         assert snapshot is not None
 
-        try:
-            filtered_records = tuple(
-                self._query_records(
-                    normalized_path,
-                    search_text=text,
-                    status=status,
-                    selected_micros=selected_micros,
-                    selected_eletronicos=selected_eletronicos,
-                    micro_all_selected=micro_all_selected,
-                    eletronico_all_selected=eletronico_all_selected,
-                    selected_caixas=selected_caixas,
-                    caixa_all_selected=caixa_all_selected,
-                    selected_year=selected_year,
+        query_filters: dict[str, Any] = {
+            "search_text": text,
+            "status": status,
+            "selected_micros": selected_micros,
+            "selected_eletronicos": selected_eletronicos,
+            "micro_all_selected": micro_all_selected,
+            "eletronico_all_selected": eletronico_all_selected,
+            "selected_caixas": selected_caixas,
+            "caixa_all_selected": caixa_all_selected,
+            "selected_year": selected_year,
+        }
+        page_source = self._record_page_source(
+            normalized_path,
+            **{
+                **query_filters,
+                "selected_micros": tuple(selected_micros),
+                "selected_eletronicos": tuple(selected_eletronicos),
+                "selected_caixas": tuple(selected_caixas),
+            },
+        )
+        filtered_metrics: dict[str, object] | None = None
+        if not materialize_records and page_source is not None:
+            # Modo paginado: as metricas vem dos agregados SQL e a tabela le as
+            # paginas sob demanda, sem materializar a lista filtrada.
+            try:
+                filtered_metrics = self._query_metrics(normalized_path, **query_filters)
+            except Exception:
+                filtered_metrics = None
+            if filtered_metrics is not None:
+                return LocalRecordReadResult(
+                    source="sqlite",
+                    records=(),
+                    strategy="sqlite_query",
+                    metrics=filtered_metrics,
+                    workbook_path=normalized_path,
+                    synced_at=str(snapshot.synced_at or ""),
+                    mirrored_records=int(snapshot.record_count),
+                    session_records=len(fallback),
+                    page_source=page_source,
                 )
-            )
+
+        try:
+            filtered_records = tuple(self._query_records(normalized_path, **query_filters))
         except Exception as exc:
+            filtered_fallback = filter_fallback()
             return LocalRecordReadResult(
                 source="session",
                 records=filtered_fallback,
                 strategy="session_filter",
-                metrics=fallback_metrics,
+                metrics=compute_metrics(filtered_fallback),
                 workbook_path=normalized_path,
                 synced_at=str(snapshot.synced_at or ""),
                 mirrored_records=int(snapshot.record_count),
@@ -520,18 +564,7 @@ class LocalRecordQueriesUseCases:
             )
 
         try:
-            filtered_metrics = self._query_metrics(
-                normalized_path,
-                search_text=text,
-                status=status,
-                selected_micros=selected_micros,
-                selected_eletronicos=selected_eletronicos,
-                micro_all_selected=micro_all_selected,
-                eletronico_all_selected=eletronico_all_selected,
-                selected_caixas=selected_caixas,
-                caixa_all_selected=caixa_all_selected,
-                selected_year=selected_year,
-            )
+            filtered_metrics = self._query_metrics(normalized_path, **query_filters)
         except Exception:
             filtered_metrics = compute_metrics(filtered_records)
 
@@ -544,6 +577,7 @@ class LocalRecordQueriesUseCases:
             synced_at=str(snapshot.synced_at or ""),
             mirrored_records=int(snapshot.record_count),
             session_records=len(fallback),
+            page_source=page_source,
         )
 
     def resolve_filter_facets(
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Mapping, Sequence
+from dataclasses import dataclass, field
+from typing import Any, Mapping, Sequence
 
 from app.models.compensacao import Compensacao
 from app.services.records_service import STANDARD_TIPO_OPTIONS, compute_metrics, extract_year, unique_non_empty
@@ -20,6 +20,8 @@ class LocalRecordReadResult:
     mirrored_records: int = 0
     session_records: int = 0
     issues: tuple[str, ...] = ()
+    # Fonte paginada do mesmo recorte, quando o espelho SQLite sabe servir paginas.
+    page_source: Any = field(default=None, compare=False, repr=False)
 
     @property
     def uses_sqlite(self) -> bool:
@@ -62,7 +62,7 @@ class MapFullscreenOperationsUseCases:
         self,
         *,
         theme: str,
-        geojson_data: dict | None,
+        geojson_data: dict | str | None,
         current_layer: str,
         marker_coords: tuple[float, float] | None,
         heatmap_enabled: bool,
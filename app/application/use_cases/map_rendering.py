@@ -45,10 +45,16 @@ class MapRenderingUseCases:
         )
 
     @staticmethod
-    def build_microbacias_command(geojson_obj: dict[str, Any], *, context: str = "load-microbacias") -> MapJsCommand:
+    def build_microbacias_command(
+        geojson_obj: dict[str, Any] | str,
+        *,
+        context: str = "load-microbacias",
+    ) -> MapJsCommand:
+        # A camada em cache ja chega serializada; so dicts passam pelo json.dumps.
+        payload = geojson_obj if isinstance(geojson_obj, str) else json.dumps(geojson_obj)
         return MapJsCommand(
             context=context,
-            script=f"if(window.setMicrobacias) window.setMicrobacias({json.dumps(geojson_obj)});",
+            script=f"if(window.setMicrobacias) window.setMicrobacias({payload});",
         )
 
     @staticmethod
@@ -102,7 +108,7 @@ class MapRenderingUseCases:
         self,
         *,
         theme: str = "",
-        geojson_data: dict[str, Any] | None = None,
+        geojson_data: dict[str, Any] | str | None = None,
         current_layer: str = "",
         marker_coords: tuple[float, float] | None = None,
         heatmap_points: Sequence[Sequence[float]] | None = None,
@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+
+@dataclass(frozen=True)
+class StartupTimingSnapshot:
+    first_paint_ms: Optional[float]
+    gis_ready_ms: Optional[float]
+    gis_load_ms: Optional[float]
+    gis_source: str
+    gis_error: str
+
+
+class StartupTimeline:
+    """Marcos da abertura da janela, medidos a partir da criacao da MainWindow."""
+
+    def __init__(self, clock: Callable[[], float] = time.perf_counter):
+        self._clock = clock
+        self._started_at = float(clock())
+        self.first_paint_ms: Optional[float] = None
+        self.gis_ready_ms: Optional[float] = None
+        self.gis_load_ms: Optional[float] = None
+        self.gis_source = ""
+        self.gis_error = ""
+
+    def _elapsed_ms(self) -> float:
+        return round((float(self._clock()) - self._started_at) * 1000.0, 1)
+
+    @property
+    def first_paint_done(self) -> bool:
+        return self.first_paint_ms is not None
+
+    def mark_first_paint(self) -> bool:
+        if self.first_paint_ms is not None:
+            return False
+        self.first_paint_ms = self._elapsed_ms()
+        return True
+
+    def mark_gis_ready(self, *, load_seconds: float, source: str) -> None:
+        # So a primeira carga conta como abertura; recargas nao mexem no marco.
+        if self.gis_ready_ms is None:
+            self.gis_ready_ms = self._elapsed_ms()
+            self.gis_load_ms = round(float(load_seconds) * 1000.0, 1)
+            self.gis_source = str(source or "")
+            self.gis_error = ""
+
+    def mark_gis_failed(self, message: str) -> None:
+        if self.gis_ready_ms is None:
+            self.gis_error = str(message or "")
+
+    def snapshot(self) -> StartupTimingSnapshot:
+        return StartupTimingSnapshot(
+            first_paint_ms=self.first_paint_ms,
+            gis_ready_ms=self.gis_ready_ms,
+            gis_load_ms=self.gis_load_ms,
+            gis_source=self.gis_source,
+            gis_error=self.gis_error,
+        )
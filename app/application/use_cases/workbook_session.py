@@ -49,7 +49,10 @@ class SessionRuntimeUseCases:
         import_path: str,
     ) -> ImportSessionAnalysis:
         temp_workbook = self.loader_factory()
-        incoming_records = temp_workbook.load(import_path)
+        # A analise so le o arquivo: usa a leitura em streaming quando o
+        # adaptador oferece, sem montar a planilha editavel.
+        read_records = getattr(temp_workbook, "read_records", None)
+        incoming_records = read_records(import_path) if callable(read_records) else temp_workbook.load(import_path)
         return analyze_import_records(
             current_records=current_records,
             incoming_records=incoming_records,
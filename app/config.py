@@ -23,7 +23,15 @@ MAP_PROVIDER = os.getenv("COMP_MAP_PROVIDER", "osm_esri").strip().lower() or "os
 GEOCODER_PROVIDER = os.getenv("COMP_GEOCODER_PROVIDER", "nominatim").strip().lower() or "nominatim"
 GEOCODER_FALLBACK_PROVIDER = os.getenv("COMP_GEOCODER_FALLBACK_PROVIDER", "arcgis").strip().lower() or "arcgis"
 GEOCODER_RATE_LIMIT_SECONDS = float(os.getenv("COMP_GEOCODER_RATE_LIMIT_SECONDS", "1.0") or 1.0)
+GEOCODER_MAX_WORKERS = int(os.getenv("COMP_GEOCODER_MAX_WORKERS", "4") or 4)
+GEOCODER_ARCGIS_RATE_PER_SECOND = float(os.getenv("COMP_GEOCODER_ARCGIS_RATE_PER_SECOND", "5.0") or 5.0)
+GEOCODER_MAX_RETRIES = int(os.getenv("COMP_GEOCODER_MAX_RETRIES", "2") or 0)
+GEOCODER_RETRY_BACKOFF_SECONDS = float(os.getenv("COMP_GEOCODER_RETRY_BACKOFF_SECONDS", "1.0") or 1.0)
 GEOCODER_USER_AGENT = "PlataformaGestaoAmbiental/1.0 (contato: davidwilian2014@gmail.com)"
+TILE_SEED_MIN_ZOOM = int(os.getenv("COMP_TILE_SEED_MIN_ZOOM", "10") or 10)
+TILE_SEED_MAX_ZOOM = int(os.getenv("COMP_TILE_SEED_MAX_ZOOM", "15") or 15)
+TILE_SEED_MAX_WORKERS = int(os.getenv("COMP_TILE_SEED_MAX_WORKERS", "4") or 4)
+TILE_SEED_RATE_PER_SECOND = float(os.getenv("COMP_TILE_SEED_RATE_PER_SECOND", "8.0") or 8.0)
 UPDATE_URL_ENV_VAR = "COMPENSACOES_UPDATE_URL"
 DEFAULT_UPDATE_MANIFEST_URL = f"{APP_RELEASES_URL}/latest/download/latest.json"
 SUPABASE_PRODUCTION_URL_ENV_VAR = "COMPENSACOES_SUPABASE_PROD_URL"
@@ -37,6 +45,11 @@ DEFAULT_CORPORATE_EMAIL_SUFFIX = f"@{DEFAULT_CORPORATE_EMAIL_DOMAIN}"
 
 SEARCH_FILTER_DEBOUNCE_MS = 180
 
+SQLITE_READER_POOL_SIZE = int(os.getenv("COMP_SQLITE_READER_POOL_SIZE", "4") or 4)
+SQLITE_CACHE_SIZE_KIB = int(os.getenv("COMP_SQLITE_CACHE_SIZE_KIB", "16384") or 16384)
+SQLITE_MMAP_SIZE_BYTES = int(os.getenv("COMP_SQLITE_MMAP_SIZE_BYTES", str(64 * 1024 * 1024)) or 0)
+SQLITE_CACHED_STATEMENTS = int(os.getenv("COMP_SQLITE_CACHED_STATEMENTS", "256") or 256)
+
 
 def resolve_update_manifest_url(explicit_url: str = "") -> str:
     return str(explicit_url or os.getenv(UPDATE_URL_ENV_VAR, "") or DEFAULT_UPDATE_MANIFEST_URL).strip()
@@ -1,9 +1,10 @@
 from dataclasses import dataclass, field
-from typing import List, Optional
+from typing import Any, List, Optional
 
+from app.models.copy_support import clone_model, scalar_field_names
 from app.models.plantio_item import PlantioItem
 
-@dataclass
+@dataclass(slots=True)
 class Compensacao:
     excel_row: int
     oficio_processo: str
@@ -23,3 +24,9 @@ class Compensacao:
     uid: str = ""
     updated_at: str = ""
     plantios: List[PlantioItem] = field(default_factory=list)
+
+    def __deepcopy__(self, memo: dict[int, Any]) -> "Compensacao":
+        return clone_model(self, memo, scalar_fields=_COMPENSACAO_SCALAR_FIELDS, nested_lists=("plantios",))
+
+
+_COMPENSACAO_SCALAR_FIELDS = scalar_field_names(Compensacao, nested=("plantios",))
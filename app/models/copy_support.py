@@ -0,0 +1,34 @@
+from __future__ import annotations
+
+from copy import deepcopy
+from dataclasses import fields
+from typing import Any, TypeVar
+
+T = TypeVar("T")
+
+
+def scalar_field_names(cls: type, *, nested: tuple[str, ...] = ()) -> tuple[str, ...]:
+    return tuple(item.name for item in fields(cls) if item.name not in nested)
+
+
+def clone_model(
+    source: T,
+    memo: dict[int, Any],
+    *,
+    scalar_fields: tuple[str, ...],
+    nested_lists: tuple[str, ...] = (),
+) -> T:
+    """Copia profunda de um modelo cujos campos simples sao imutaveis.
+
+    Strings, numeros e datas sao compartilhados; apenas as listas aninhadas
+    (plantios, eventos) ganham copias novas. Evita o caminho generico do
+    deepcopy, que serializa cada instancia via __reduce_ex__.
+    """
+    cls = type(source)
+    clone = cls.__new__(cls)
+    memo[id(source)] = clone
+    for name in scalar_fields:
+        setattr(clone, name, getattr(source, name))
+    for name in nested_lists:
+        setattr(clone, name, [deepcopy(item, memo) for item in getattr(source, name)])
+    return clone
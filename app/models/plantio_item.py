@@ -1,11 +1,19 @@
 from dataclasses import dataclass
-from typing import Optional
+from typing import Any, Optional
 
+from app.models.copy_support import clone_model, scalar_field_names
 
-@dataclass
+
+@dataclass(slots=True)
 class PlantioItem:
     sequence: int = 1
     endereco: str = ""
     qtd_mudas: str = ""
     latitude: Optional[str] = ""
     longitude: Optional[str] = ""
+
+    def __deepcopy__(self, memo: dict[int, Any]) -> "PlantioItem":
+        return clone_model(self, memo, scalar_fields=_PLANTIO_ITEM_SCALAR_FIELDS)
+
+
+_PLANTIO_ITEM_SCALAR_FIELDS = scalar_field_names(PlantioItem)
@@ -0,0 +1,186 @@
+from __future__ import annotations
+
+from bisect import bisect_left, insort
+from copy import copy, deepcopy
+from typing import Iterable, Iterator, Sequence, overload
+
+from app.models.compensacao import Compensacao
+
+
+def _record_uid(record: Compensacao) -> str:
+    return str(getattr(record, "uid", "") or "").strip()
+
+
+def _record_row(record: Compensacao) -> int:
+    return int(getattr(record, "excel_row", 0) or 0)
+
+
+def record_sort_key(record: Compensacao) -> tuple[int, str]:
+    return _record_row(record), str(getattr(record, "uid", "") or "")
+
+
+class RecordSnapshot(Sequence[Compensacao]):
+    """Colecao imutavel de registros ordenada por (excel_row, uid).
+
+    As operacoes devolvem um novo snapshot que reaproveita os objetos de todos
+    os registros que nao mudaram; so o registro incluido ou editado e copiado,
+    e na exclusao apenas os registros cuja linha desloca ganham uma copia rasa.
+    Cada uid carrega uma versao que sobe a cada alteracao desse registro.
+
+    Os registros de um snapshot sao compartilhados com os snapshots vizinhos e
+    devem ser tratados como somente leitura; quem precisar altera-los trabalha
+    sobre uma copia.
+    """
+
+    __slots__ = ("_records", "_versions", "_positions")
+
+    def __init__(self, records: Iterable[Compensacao] = ()):
+        self._records: tuple[Compensacao, ...] = tuple(sorted(records, key=record_sort_key))
+        self._versions: dict[str, int] = {}
+        self._positions: dict[str, int] | None = None
+
+    @classmethod
+    def from_records(cls, records: Iterable[Compensacao]) -> RecordSnapshot:
+        if isinstance(records, RecordSnapshot):
+            return records
+        return cls(records)
+
+    @classmethod
+    def _derive(
+        cls,
+        records: tuple[Compensacao, ...],
+        versions: dict[str, int],
+        positions: dict[str, int] | None = None,
+    ) -> RecordSnapshot:
+        snapshot = cls.__new__(cls)
+        snapshot._records = records
+        snapshot._versions = versions
+        snapshot._positions = positions
+        return snapshot
+
+    @property
+    def records(self) -> tuple[Compensacao, ...]:
+        return self._records
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __iter__(self) -> Iterator[Compensacao]:
+        return iter(self._records)
+
+    @overload
+    def __getitem__(self, index: int) -> Compensacao: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> tuple[Compensacao, ...]: ...
+
+    def __getitem__(self, index):
+        return self._records[index]
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, RecordSnapshot):
+            return self._records == other._records
+        if isinstance(other, (list, tuple)):
+            return self._records == tuple(other)
+        return NotImplemented
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        return f"RecordSnapshot({len(self._records)} registros)"
+
+    def get(self, uid: str) -> Compensacao | None:
+        index = self._index_positions().get(str(uid or "").strip())
+        return None if index is None else self._records[index]
+
+    def version_of(self, uid: str) -> int:
+        """Versao do registro com esse uid: 1 ao entrar no snapshot, 0 se ausente."""
+        normalized_uid = str(uid or "").strip()
+        if normalized_uid not in self._index_positions():
+            return 0
+        return self._versions.get(normalized_uid, 1)
+
+    def with_added(self, records: Iterable[Compensacao]) -> RecordSnapshot:
+        added = [deepcopy(record) for record in records]
+        if not added:
+            return self
+        added.sort(key=record_sort_key)
+        versions = dict(self._versions)
+        for record in added:
+            uid = _record_uid(record)
+            if uid:
+                versions[uid] = self.version_of(uid) + 1
+        if not self._records or record_sort_key(added[0]) >= record_sort_key(self._records[-1]):
+            # Caso comum (novo registro no fim da planilha): basta estender a tupla.
+            return self._derive(self._records + tuple(added), versions)
+        # Duas sequencias ja ordenadas: o sort estavel as intercala em tempo linear.
+        return self._derive(tuple(sorted(self._records + tuple(added), key=record_sort_key)), versions)
+
+    def with_replaced(self, record: Compensacao) -> RecordSnapshot:
+        """Troca o registro de mesmo uid ou mesma linha; sem correspondencia, inclui."""
+        matches = self._matching_indexes(record)
+        if not matches:
+            return self.with_added((record,))
+        replacement = deepcopy(record)
+        versions = dict(self._versions)
+        for index in matches:
+            versions.pop(_record_uid(self._records[index]), None)
+        uid = _record_uid(replacement)
+        if uid:
+            versions[uid] = self.version_of(uid) + 1
+        if len(matches) == 1 and record_sort_key(self._records[matches[0]]) == record_sort_key(replacement):
+            index = matches[0]
+            records = self._records[:index] + (replacement,) + self._records[index + 1 :]
+            return self._derive(records, versions, self._positions)
+        remaining = [item for index, item in enumerate(self._records) if index not in matches]
+        insort(remaining, replacement, key=record_sort_key)
+        return self._derive(tuple(remaining), versions)
+
+    def without(self, record: Compensacao, *, shift_rows: bool = True) -> RecordSnapshot:
+        """Remove o registro e, se ``shift_rows``, sobe uma linha todos os que vinham abaixo dele."""
+        matches = set(self._matching_indexes(record))
+        deleted_row = _record_row(record)
+        versions = dict(self._versions)
+        for index in matches:
+            versions.pop(_record_uid(self._records[index]), None)
+        shift_from = (
+            bisect_left(self._records, (deleted_row + 1,), key=record_sort_key)
+            if deleted_row and shift_rows
+            else len(self._records)
+        )
+        kept = [item for index, item in enumerate(self._records[:shift_from]) if index not in matches]
+        for index in range(shift_from, len(self._records)):
+            if index in matches:
+                continue
+            shifted = copy(self._records[index])
+            shifted.excel_row = max(_record_row(shifted) - 1, 0)
+            uid = _record_uid(shifted)
+            if uid:
+                versions[uid] = self.version_of(uid) + 1
+            kept.append(shifted)
+        return self._derive(tuple(kept), versions)
+
+    def _matching_indexes(self, record: Compensacao) -> list[int]:
+        matches: set[int] = set()
+        uid = _record_uid(record)
+        if uid:
+            position = self._index_positions().get(uid)
+            if position is not None:
+                matches.add(position)
+        row = _record_row(record)
+        start = bisect_left(self._records, (row,), key=record_sort_key)
+        stop = bisect_left(self._records, (row + 1,), key=record_sort_key)
+        matches.update(range(start, stop))
+        return sorted(matches)
+
+    def _index_positions(self) -> dict[str, int]:
+        # Montado sob demanda e herdado pelos snapshots derivados enquanto a
+        # ordem dos registros nao muda.
+        if self._positions is None:
+            positions: dict[str, int] = {}
+            for index, record in enumerate(self._records):
+                uid = _record_uid(record)
+                if uid:
+                    positions.setdefault(uid, index)
+            self._positions = positions
+        return self._positions
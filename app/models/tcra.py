@@ -2,11 +2,13 @@ from __future__ import annotations
 
 from dataclasses import dataclass, field
 from datetime import date
+from typing import Any
 
+from app.models.copy_support import clone_model, scalar_field_names
 from app.models.tcra_evento import TcraEvento
 
 
-@dataclass
+@dataclass(slots=True)
 class Tcra:
     uid: str = ""
     numero_processo: str = ""
@@ -29,3 +31,9 @@ class Tcra:
     mpsp_relacionado: str = ""
     inquerito_civil: str = ""
     eventos: list[TcraEvento] = field(default_factory=list)
+
+    def __deepcopy__(self, memo: dict[int, Any]) -> "Tcra":
+        return clone_model(self, memo, scalar_fields=_TCRA_SCALAR_FIELDS, nested_lists=("eventos",))
+
+
+_TCRA_SCALAR_FIELDS = scalar_field_names(Tcra, nested=("eventos",))
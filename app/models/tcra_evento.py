@@ -2,9 +2,12 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from datetime import date
+from typing import Any
 
+from app.models.copy_support import clone_model, scalar_field_names
 
-@dataclass
+
+@dataclass(slots=True)
 class TcraEvento:
     sequence: int = 1
     data_evento: date | None = None
@@ -14,3 +17,9 @@ class TcraEvento:
     status_resultante: str = ""
     protocolo: str = ""
     documento_ref: str = ""
+
+    def __deepcopy__(self, memo: dict[int, Any]) -> "TcraEvento":
+        return clone_model(self, memo, scalar_fields=_TCRA_EVENTO_SCALAR_FIELDS)
+
+
+_TCRA_EVENTO_SCALAR_FIELDS = scalar_field_names(TcraEvento)
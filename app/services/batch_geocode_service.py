@@ -0,0 +1,329 @@
+from __future__ import annotations
+
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Callable, Iterable, Mapping, Optional, Sequence, Tuple
+
+import requests
+
+from app.config import (
+    GEOCODER_ARCGIS_RATE_PER_SECOND,
+    GEOCODER_MAX_RETRIES,
+    GEOCODER_MAX_WORKERS,
+    GEOCODER_RATE_LIMIT_SECONDS,
+    GEOCODER_RETRY_BACKOFF_SECONDS,
+)
+from app.services.geocode_service import (
+    ARCGIS_GEOCODE_URL,
+    NOMINATIM_SEARCH_URL,
+    address_dedupe_key,
+    geocode_address,
+)
+from app.services.plantio_service import record_plantio_items
+from app.utils.logger import get_logger
+
+logger = get_logger("Services.BatchGeocode")
+
+Coords = Tuple[float, float]
+RETRYABLE_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+_CANCEL_POLL_SECONDS = 0.2
+
+
+class BatchGeocodeCancelled(RuntimeError):
+    pass
+
+
+class TokenBucket:
+    """Limitador de taxa compartilhado pelas threads de um provedor.
+
+    Cada chamada a acquire consome um token; sem token disponivel, a chamada
+    reserva o proximo e dorme fora do lock ate ele ser reposto, de modo que
+    as threads saem na ordem em que pediram.
+    """
+
+    def __init__(
+        self,
+        rate_per_second: float,
+        *,
+        capacity: float = 1.0,
+        clock: Callable[[], float] = time.monotonic,
+        sleeper: Callable[[float], None] = time.sleep,
+    ):
+        self.rate_per_second = max(float(rate_per_second), 1e-6)
+        self.capacity = max(float(capacity), 1.0)
+        self._clock = clock
+        self._sleeper = sleeper
+        self._lock = threading.Lock()
+        self._tokens = self.capacity
+        self._updated_at = float(clock())
+
+    def acquire(self) -> float:
+        with self._lock:
+            now = float(self._clock())
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate_per_second)
+            self._updated_at = now
+            self._tokens -= 1.0
+            wait_seconds = -self._tokens / self.rate_per_second if self._tokens < 0 else 0.0
+        if wait_seconds > 0:
+            self._sleeper(wait_seconds)
+        return wait_seconds
+
+
+def default_provider_limiters() -> dict[str, TokenBucket]:
+    # A politica de uso do Nominatim permite uma requisicao por segundo.
+    return {
+        "nominatim": TokenBucket(1.0 / max(GEOCODER_RATE_LIMIT_SECONDS, 1e-3)),
+        "arcgis": TokenBucket(GEOCODER_ARCGIS_RATE_PER_SECOND, capacity=GEOCODER_ARCGIS_RATE_PER_SECOND),
+    }
+
+
+def provider_for_url(url: str) -> str:
+    text = str(url or "")
+    if text.startswith(NOMINATIM_SEARCH_URL):
+        return "nominatim"
+    if text.startswith(ARCGIS_GEOCODE_URL):
+        return "arcgis"
+    return ""
+
+
+class RateLimitedRequester:
+    """Envolve o requester HTTP com o limitador do provedor e novas tentativas.
+
+    Respostas 429/5xx e falhas de rede sao repetidas com espera exponencial
+    (respeitando Retry-After quando o servidor informa); a ultima resposta ou
+    excecao volta para o geocodificador, que ja sabe tratar ambas.
+    """
+
+    def __init__(
+        self,
+        requester: Callable = requests.get,
+        *,
+        limiters: Mapping[str, TokenBucket] | None = None,
+        max_retries: int = GEOCODER_MAX_RETRIES,
+        backoff_seconds: float = GEOCODER_RETRY_BACKOFF_SECONDS,
+        sleeper: Callable[[float], None] = time.sleep,
+        cancel_event: threading.Event | None = None,
+    ):
+        self.requester = requester
+        self.limiters = dict(default_provider_limiters() if limiters is None else limiters)
+        self.max_retries = max(int(max_retries), 0)
+        self.backoff_seconds = max(float(backoff_seconds), 0.0)
+        self._sleeper = sleeper
+        self._cancel_event = cancel_event or threading.Event()
+
+    def __call__(self, url: str, **kwargs):
+        limiter = self.limiters.get(provider_for_url(url))
+        attempt = 0
+        while True:
+            if self._cancel_event.is_set():
+                raise BatchGeocodeCancelled("Geocodificacao em lote cancelada.")
+            if limiter is not None:
+                limiter.acquire()
+            try:
+                response = self.requester(url, **kwargs)
+            except Exception:
+                if attempt >= self.max_retries:
+                    raise
+                self._sleeper(self._retry_delay(attempt, None))
+                attempt += 1
+                continue
+            if getattr(response, "status_code", 200) not in RETRYABLE_STATUS_CODES or attempt >= self.max_retries:
+                return response
+            self._sleeper(self._retry_delay(attempt, response))
+            attempt += 1
+
+    def _retry_delay(self, attempt: int, response: object) -> float:
+        headers = getattr(response, "headers", None) or {}
+        try:
+            retry_after = float(headers.get("Retry-After", ""))
+        except (TypeError, ValueError, AttributeError):
+            retry_after = 0.0
+        return max(retry_after, self.backoff_seconds * (2**attempt))
+
+
+@dataclass(frozen=True)
+class BatchGeocodeProgress:
+    completed: int
+    total: int
+    address: str
+    coords: Optional[Coords]
+
+
+@dataclass(frozen=True)
+class BatchGeocodeOutcome:
+    results: dict[str, Optional[Coords]] = field(default_factory=dict)
+    cancelled: bool = False
+
+    def coords_for(self, address: str) -> Optional[Coords]:
+        return self.results.get(address_dedupe_key(address))
+
+
+class BatchGeocodeEngine:
+    """Geocodifica um lote de enderecos em paralelo, uma vez por endereco distinto.
+
+    Os enderecos sao deduplicados pela forma normalizada antes de sair para a
+    rede. O progresso e entregue na thread que chamou geocode_many, na ordem
+    em que as respostas chegam.
+    """
+
+    def __init__(
+        self,
+        *,
+        geocoder: Callable[..., Optional[Coords]] = geocode_address,
+        requester: Callable = requests.get,
+        limiters: Mapping[str, TokenBucket] | None = None,
+        max_workers: int = GEOCODER_MAX_WORKERS,
+        max_retries: int = GEOCODER_MAX_RETRIES,
+        backoff_seconds: float = GEOCODER_RETRY_BACKOFF_SECONDS,
+        timeout: int = 8,
+    ):
+        self._cancel_event = threading.Event()
+        self.requester = RateLimitedRequester(
+            requester,
+            limiters=limiters,
+            max_retries=max_retries,
+            backoff_seconds=backoff_seconds,
+            cancel_event=self._cancel_event,
+        )
+        self._geocoder = geocoder
+        self.max_workers = max(int(max_workers), 1)
+        self.timeout = timeout
+
+    def cancel(self) -> None:
+        self._cancel_event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel_event.is_set()
+
+    def geocode(self, address: str) -> Optional[Coords]:
+        # O intervalo global do Nominatim fica desligado: o TokenBucket do
+        # requester ja controla a taxa entre as threads.
+        return self._geocoder(address, timeout=self.timeout, requester=self.requester, rate_limit_seconds=0.0)
+
+    def geocode_many(
+        self,
+        addresses: Iterable[str],
+        *,
+        on_progress: Callable[[BatchGeocodeProgress], None] | None = None,
+    ) -> BatchGeocodeOutcome:
+        unique: dict[str, str] = {}
+        for address in addresses:
+            text = str(address or "").strip()
+            key = address_dedupe_key(text) if text else ""
+            if key and key not in unique:
+                unique[key] = text
+
+        results: dict[str, Optional[Coords]] = {}
+        total = len(unique)
+        if not total:
+            return BatchGeocodeOutcome(results=results, cancelled=self.cancelled)
+
+        executor = ThreadPoolExecutor(max_workers=min(self.max_workers, total), thread_name_prefix="geocode")
+        try:
+            pending: dict[Future, str] = {
+                executor.submit(self.geocode, address): key for key, address in unique.items()
+            }
+            while pending and not self.cancelled:
+                done, _ = wait(tuple(pending), timeout=_CANCEL_POLL_SECONDS, return_when=FIRST_COMPLETED)
+                for future in done:
+                    key = pending.pop(future)
+                    coords = self._future_coords(future, unique[key])
+                    results[key] = coords
+                    if on_progress is not None:
+                        on_progress(BatchGeocodeProgress(len(results), total, unique[key], coords))
+        finally:
+            executor.shutdown(wait=not self.cancelled, cancel_futures=True)
+        return BatchGeocodeOutcome(results=results, cancelled=self.cancelled)
+
+    @staticmethod
+    def _future_coords(future: Future, address: str) -> Optional[Coords]:
+        try:
+            return future.result()
+        except BatchGeocodeCancelled:
+            return None
+        except Exception as exc:
+            logger.error(f"[GEOCODE] Erro ao buscar endereco {address[:60]!r}: {exc}")
+            return None
+
+
+@dataclass(frozen=True)
+class BatchGeocodeTarget:
+    excel_row: int
+    address: str
+    plantio_sequence: int | None = None
+
+
+@dataclass(frozen=True)
+class BatchGeocodePlan:
+    targets: tuple[BatchGeocodeTarget, ...]
+    existing_main: dict[int, Coords]
+    existing_plantios: dict[int, dict[int, Coords]]
+
+    @property
+    def addresses(self) -> list[str]:
+        return [target.address for target in self.targets]
+
+
+def plan_batch_geocode(records: Sequence[object]) -> BatchGeocodePlan:
+    """Separa o que precisa ir para a rede do que ja tem coordenada.
+
+    Enderecos principais e de plantio sem coordenada viram alvos. Quando o
+    registro ainda nao tem microbacia, as coordenadas ja existentes voltam no
+    resultado para que ela seja calculada; as de plantio so entram se o
+    registro terminar sem coordenada principal.
+    """
+    targets: list[BatchGeocodeTarget] = []
+    existing_main: dict[int, Coords] = {}
+    existing_plantios: dict[int, dict[int, Coords]] = {}
+    for record in records:
+        excel_row = int(getattr(record, "excel_row", 0) or 0)
+        lat_m = str(getattr(record, "latitude", "")).strip()
+        lon_m = str(getattr(record, "longitude", "")).strip()
+        micro = str(getattr(record, "microbacia", "")).strip()
+
+        endereco = str(getattr(record, "endereco", "") or "").strip()
+        if endereco:
+            if not (lat_m and lon_m):
+                targets.append(BatchGeocodeTarget(excel_row, endereco))
+            elif not micro:
+                existing_main[excel_row] = (float(lat_m), float(lon_m))
+
+        for plantio in record_plantio_items(record):
+            plantio_endereco = str(plantio.endereco or "").strip()
+            if not plantio_endereco:
+                continue
+            lat_p = str(getattr(plantio, "latitude", "")).strip()
+            lon_p = str(getattr(plantio, "longitude", "")).strip()
+            if not (lat_p and lon_p):
+                targets.append(BatchGeocodeTarget(excel_row, plantio_endereco, int(plantio.sequence)))
+            elif not micro:
+                existing_plantios.setdefault(excel_row, {})[int(plantio.sequence)] = (float(lat_p), float(lon_p))
+    return BatchGeocodePlan(
+        targets=tuple(targets),
+        existing_main=existing_main,
+        existing_plantios=existing_plantios,
+    )
+
+
+def assemble_batch_geocode_results(plan: BatchGeocodePlan, outcome: BatchGeocodeOutcome) -> dict[int, dict]:
+    """Monta {excel_row: {"main": (lat, lon), "plantios": {sequencia: (lat, lon)}}}."""
+    results: dict[int, dict] = {row: {"main": coords} for row, coords in plan.existing_main.items()}
+    for target in plan.targets:
+        coords = outcome.coords_for(target.address)
+        if not coords:
+            continue
+        entry = results.setdefault(target.excel_row, {})
+        if target.plantio_sequence is None:
+            entry["main"] = coords
+        else:
+            entry.setdefault("plantios", {})[target.plantio_sequence] = coords
+    for row, plantios in plan.existing_plantios.items():
+        entry = results.setdefault(row, {})
+        if entry.get("main"):
+            continue
+        for sequence, coords in plantios.items():
+            entry.setdefault("plantios", {}).setdefault(sequence, coords)
+    return {row: values for row, values in results.items() if values}
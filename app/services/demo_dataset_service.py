@@ -7,6 +7,7 @@ from app.models.compensacao import Compensacao
 from app.models.plantio_item import PlantioItem
 from app.models.tcra import Tcra
 from app.models.tcra_evento import TcraEvento
+from app.services.sqlite_connection_manager import close_connection_manager
 from app.services.sqlite_mirror_service import DEFAULT_SINGLETON_SESSION_PATH, SqliteMirrorService
 from app.services.tcra_sqlite_service import TcraSqliteService
 from app.utils.app_paths import ensure_dir, resolve_data_path
@@ -297,6 +298,7 @@ def build_demo_tcras() -> list[Tcra]:
 def reset_demo_database(db_path: str | Path | None = None) -> Path:
     target_path = Path(db_path) if db_path else resolve_demo_db_path()
     ensure_dir(target_path.parent)
+    close_connection_manager(target_path)
     if target_path.exists():
         target_path.unlink()
 
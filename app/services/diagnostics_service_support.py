@@ -129,9 +129,17 @@ def build_window_session_snapshot(
         "local_mutation_sync": serializer(getattr(window, "_local_mutation_sync_status", None)),
         "local_record_read": serializer(getattr(window, "_local_record_read_status", None)),
         "record_integrity": serializer(integrity_report),
+        "startup_timing": serializer(resolve_startup_timing(window)),
     }
 
 
+def resolve_startup_timing(window: Any) -> Any:
+    timeline = getattr(window, "startup_timeline", None)
+    if timeline is None or not hasattr(timeline, "snapshot"):
+        return None
+    return timeline.snapshot()
+
+
 def build_persistence_snapshot(
     window: Any,
     *,
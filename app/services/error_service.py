@@ -6,6 +6,7 @@ from app.services.access_service import AccessAuthError
 from app.services.excel_service import WorkbookModifiedExternallyError
 from app.services.supabase_compensacoes_rpc_service import (
     SupabaseCompensacoesConflictError,
+    SupabaseCompensacoesImportInterruptedError,
     SupabaseCompensacoesRpcError,
 )
 
@@ -47,6 +48,16 @@ def friendly_error_message(exc: Exception, action: str = "processar") -> Tuple[s
             ),
         )
 
+    if isinstance(exc, SupabaseCompensacoesImportInterruptedError):
+        return (
+            "Importação Interrompida",
+            (
+                f"A importação parou após {exc.acked_chunks} de {exc.total_chunks} lote(s) enviados "
+                "à base oficial, que continua sem alterações. "
+                "Repita a importação para retomar do ponto em que parou."
+            ),
+        )
+
     if isinstance(exc, SupabaseCompensacoesRpcError):
         return (
             "Falha na Base Oficial",
@@ -5,8 +5,11 @@ import shutil
 import tempfile
 import time
 import uuid
+from contextlib import contextmanager
+from copy import copy
 from datetime import datetime
-from typing import Callable, Dict, List, Optional, cast
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, cast
+from zipfile import BadZipFile
 
 import openpyxl
 from openpyxl.cell.cell import MergedCell
@@ -23,6 +26,7 @@ from app.services.plantio_service import (
     sync_legacy_plantio_fields,
 )
 from app.services.records_service import storage_tipo_value
+from app.services.xlsx_stream_reader import XlsxStreamError, XlsxStreamReader
 from app.utils.logger import get_logger
 
 
@@ -54,6 +58,9 @@ EXPECTED_PLANTIO_HEADERS = {
     "longitude": "Lon_Plantio",
 }
 
+# Uma linha so vira registro quando ao menos uma destas colunas esta preenchida.
+RECORD_KEY_COLUMNS = ("oficio_processo", "eletronico", "caixa", "av_tec")
+
 
 class InvalidFileError(Exception):
     """Excecao levantada quando o arquivo nao e um Excel valido."""
@@ -76,6 +83,9 @@ class ExcelService:
         self.merged_cells_warning = False
         self.loaded_source_mtime_ns = 0
         self.loaded_source_size = 0
+        # Desfazer das alteracoes da gravacao em andamento; None fora de write_batch.
+        self._undo_log: Optional[List[Callable[[], None]]] = None
+        self._append_hint = 2
 
     @staticmethod
     def _read_file_identity(path: str) -> tuple[int, int]:
@@ -137,7 +147,7 @@ class ExcelService:
                 logger.warning(f"[EXCEL] Nao foi possivel remover arquivo temporario: {tmp_path}")
             raise
 
-    def load(self, path: str) -> List[Compensacao]:
+    def _validate_source(self, path: str) -> None:
         if not os.path.exists(path):
             raise FileNotFoundError(f"Arquivo nao encontrado: {path}")
 
@@ -146,16 +156,25 @@ class ExcelService:
                 f"O arquivo nao parece ser uma planilha Excel valida (.xlsx corrompido ou formato incorreto): {path}"
             )
 
-        self.path = path
-        from zipfile import BadZipFile
-
+    def _open_workbook(self, path: str, *, read_only: bool = False) -> openpyxl.Workbook:
+        self._validate_source(path)
         try:
-            self.wb = openpyxl.load_workbook(path, data_only=False)
+            return openpyxl.load_workbook(path, read_only=read_only, data_only=False)
         except BadZipFile:
             raise InvalidFileError("O arquivo Excel esta corrompido ou nao pode ser lido (Erro interno de ZIP).")
         except Exception as exc:
             raise RuntimeError(f"Erro inesperado ao abrir a planilha: {exc}")
 
+    def load(self, path: str) -> List[Compensacao]:
+        """Carga editavel da planilha, usada pela sessao e pelos caminhos de escrita.
+
+        Monta a planilha inteira em memoria, completa cabecalhos faltantes e grava
+        UIDs novos no arquivo. Para importacao e pre-visualizacao use read_records.
+        """
+        workbook = self._open_workbook(path)
+        self.path = path
+        self.wb = workbook
+
         if SHEET_NAME in self.wb.sheetnames:
             self.ws = self.wb[SHEET_NAME]
         else:
@@ -178,18 +197,11 @@ class ExcelService:
         self.merged_cells_warning = False
         seen_uids = set()
 
-        for row_idx, row_cells in enumerate(self.ws.iter_rows(min_row=2, values_only=False), start=2):
-            def get_val(key: str):
-                col = self.col_map.get(key)
-                if col and col <= len(row_cells):
-                    return row_cells[col - 1].value
-                return None
-
-            main_vals = [get_val(key) for key in ["oficio_processo", "eletronico", "caixa", "av_tec"]]
-            if all(value is None or str(value).strip() == "" for value in main_vals):
+        for row_idx, values in enumerate(self.ws.iter_rows(min_row=2, values_only=True), start=2):
+            if not self._row_has_record_values(values, self.col_map):
                 continue
 
-            uid_val = self._str(get_val("uid"))
+            uid_val = self._str(self._row_value(values, self.col_map, "uid"))
             if not uid_val or uid_val in seen_uids:
                 uid_val = uuid.uuid4().hex
                 col_uid = self.col_map.get("uid")
@@ -199,27 +211,7 @@ class ExcelService:
 
             seen_uids.add(uid_val)
             self.uid_to_row[uid_val] = row_idx
-
-            record = Compensacao(
-                excel_row=row_idx,
-                oficio_processo=self._str(get_val("oficio_processo")),
-                eletronico=storage_tipo_value(self._str(get_val("eletronico"))),
-                caixa=self._str(get_val("caixa")),
-                av_tec=self._str(get_val("av_tec")),
-                compensacao=get_val("compensacao"),
-                endereco=self._str(get_val("endereco")),
-                microbacia=self._str(get_val("microbacia")),
-                compensado=self._str(get_val("compensado")),
-                endereco_plantio=self._str(get_val("endereco_plantio")),
-                latitude_plantio=self._str(get_val("latitude_plantio")),
-                longitude_plantio=self._str(get_val("longitude_plantio")),
-                latitude=self._str(get_val("latitude")),
-                longitude=self._str(get_val("longitude")),
-                uid=uid_val,
-            )
-            record.plantios = clone_plantios(plantios_by_uid.get(uid_val) or legacy_plantios_from_record(record))
-            sync_legacy_plantio_fields(record)
-            records.append(record)
+            records.append(self._record_from_values(row_idx, values, self.col_map, uid_val, plantios_by_uid))
 
         if needs_save:
             try:
@@ -231,44 +223,172 @@ class ExcelService:
 
         return records
 
-    def _build_column_map(self):
-        self.col_map.clear()
-        if not self.ws:
-            return
+    def read_records(self, path: str) -> List[Compensacao]:
+        """Leitura em streaming para importacao e pre-visualizacao.
 
-        headers = [str(cell.value).strip() if cell.value else "" for cell in self.ws[1]]
+        Percorre o XML das abas direto do arquivo, sem montar a planilha editavel
+        e sem tocar no disco: registros sem UID recebem um UID novo apenas em
+        memoria. O estado do servico (wb, ws, path) nao muda. Planilhas fora do
+        recorte do leitor em streaming caem no openpyxl em modo read_only.
+        """
+        self._validate_source(path)
+        try:
+            with XlsxStreamReader(path) as reader:
+                return self._records_from_rows(reader.sheetnames, reader.active_sheet, reader.iter_rows)
+        except BadZipFile:
+            raise InvalidFileError("O arquivo Excel esta corrompido ou nao pode ser lido (Erro interno de ZIP).")
+        except XlsxStreamError as exc:
+            logger.info(f"[EXCEL] Leitura em streaming indisponivel ({exc}); usando openpyxl.")
+
+        workbook = self._open_workbook(path, read_only=True)
+        try:
+            return self._records_from_rows(
+                workbook.sheetnames,
+                workbook.active.title,
+                lambda sheet_name: workbook[sheet_name].iter_rows(values_only=True),
+            )
+        finally:
+            workbook.close()
+
+    def _records_from_rows(
+        self,
+        sheet_names: Sequence[str],
+        active_sheet: str,
+        iter_sheet_rows: Callable[[str], Iterable[Sequence[object]]],
+    ) -> List[Compensacao]:
+        rows = iter(iter_sheet_rows(SHEET_NAME if SHEET_NAME in sheet_names else active_sheet))
+        col_map = self._match_record_columns(next(rows, ()))
 
+        plantios_by_uid: Dict[str, List[PlantioItem]] = {}
+        if PLANTIOS_SHEET_NAME in sheet_names:
+            plantio_rows = iter(iter_sheet_rows(PLANTIOS_SHEET_NAME))
+            plantio_col_map = self._exact_column_map(next(plantio_rows, ()), EXPECTED_PLANTIO_HEADERS)
+            if plantio_col_map:
+                plantios_by_uid = self._plantios_from_rows(plantio_rows, plantio_col_map)
+
+        records: List[Compensacao] = []
+        seen_uids = set()
+        for row_idx, values in enumerate(rows, start=2):
+            if not self._row_has_record_values(values, col_map):
+                continue
+            uid_val = self._str(self._row_value(values, col_map, "uid"))
+            if not uid_val or uid_val in seen_uids:
+                uid_val = uuid.uuid4().hex
+            seen_uids.add(uid_val)
+            records.append(self._record_from_values(row_idx, values, col_map, uid_val, plantios_by_uid))
+        return records
+
+    @staticmethod
+    def _exact_column_map(header_row: Sequence[object], expected_headers: Dict[str, str]) -> Dict[str, int]:
+        # Na leitura sem edicao uma coluna ausente so fica sem valor; load() a
+        # criaria vazia, entao nao ha aviso aqui.
+        from app.services.records_service import remove_accents
+
+        positions: Dict[str, int] = {}
+        for index, header in enumerate(header_row, start=1):
+            normalized = remove_accents(str(header)).strip().upper() if header else ""
+            if normalized and normalized not in positions:
+                positions[normalized] = index
+
+        col_map: Dict[str, int] = {}
+        for key, expected_name in expected_headers.items():
+            column = positions.get(remove_accents(expected_name).strip().upper())
+            if column is not None:
+                col_map[key] = column
+        return col_map
+
+    @staticmethod
+    def _match_record_columns(header_row: Sequence[object]) -> Dict[str, int]:
+        """Mapeia as colunas da aba de registros, aceitando cabecalhos aproximados.
+
+        Nomes exatos (e aliases) tem prioridade; so depois um cabecalho que contem
+        o nome esperado, ou esta contido nele, e aceito. Colunas ja atribuidas e
+        cabecalhos vazios ficam de fora da busca aproximada, senao "Endereco"
+        tambem serviria para "Endereco do Plantio".
+        """
         from app.services.records_service import remove_accents
 
         def normalize(text: str) -> str:
             return remove_accents(str(text)).strip().upper()
 
-        normalized_headers = [normalize(header) for header in headers]
+        normalized_headers = [normalize(str(header)) if header else "" for header in header_row]
+        expected_names = {
+            key: [normalize(name) for name in EXPECTED_HEADER_ALIASES.get(key, (expected_name,))]
+            for key, expected_name in EXPECTED_HEADERS.items()
+        }
+
+        col_map: Dict[str, int] = {}
+        for key, names in expected_names.items():
+            for name in names:
+                if name in normalized_headers:
+                    col_map[key] = normalized_headers.index(name) + 1
+                    break
+
+        claimed = set(col_map.values())
+        for key, names in expected_names.items():
+            if key in col_map:
+                continue
+            for index, header in enumerate(normalized_headers, start=1):
+                if not header or index in claimed:
+                    continue
+                if any(name in header or header in name for name in names):
+                    col_map[key] = index
+                    claimed.add(index)
+                    break
+        return col_map
+
+    @staticmethod
+    def _row_value(values: Sequence[object], col_map: Dict[str, int], key: str):
+        col = col_map.get(key)
+        if col and col <= len(values):
+            return values[col - 1]
+        return None
+
+    def _row_has_record_values(self, values: Sequence[object], col_map: Dict[str, int]) -> bool:
+        return any(self._str(self._row_value(values, col_map, key)) for key in RECORD_KEY_COLUMNS)
+
+    def _record_from_values(
+        self,
+        row_idx: int,
+        values: Sequence[object],
+        col_map: Dict[str, int],
+        uid: str,
+        plantios_by_uid: Dict[str, List[PlantioItem]],
+    ) -> Compensacao:
+        def get_val(key: str):
+            return self._row_value(values, col_map, key)
+
+        record = Compensacao(
+            excel_row=row_idx,
+            oficio_processo=self._str(get_val("oficio_processo")),
+            eletronico=storage_tipo_value(self._str(get_val("eletronico"))),
+            caixa=self._str(get_val("caixa")),
+            av_tec=self._str(get_val("av_tec")),
+            compensacao=get_val("compensacao"),
+            endereco=self._str(get_val("endereco")),
+            microbacia=self._str(get_val("microbacia")),
+            compensado=self._str(get_val("compensado")),
+            endereco_plantio=self._str(get_val("endereco_plantio")),
+            latitude_plantio=self._str(get_val("latitude_plantio")),
+            longitude_plantio=self._str(get_val("longitude_plantio")),
+            latitude=self._str(get_val("latitude")),
+            longitude=self._str(get_val("longitude")),
+            uid=uid,
+        )
+        record.plantios = clone_plantios(plantios_by_uid.get(uid) or legacy_plantios_from_record(record))
+        sync_legacy_plantio_fields(record)
+        return record
+
+    def _build_column_map(self):
+        self.col_map.clear()
+        if not self.ws:
+            return
+
+        headers = [str(cell.value).strip() if cell.value else "" for cell in self.ws[1]]
+        self.col_map.update(self._match_record_columns(headers))
         for key, expected_name in EXPECTED_HEADERS.items():
-            expected_names = EXPECTED_HEADER_ALIASES.get(key, (expected_name,))
-            normalized_expected_names = [normalize(name) for name in expected_names]
-            direct_match = next(
-                (
-                    normalized_headers.index(expected_name_candidate) + 1
-                    for expected_name_candidate in normalized_expected_names
-                    if expected_name_candidate in normalized_headers
-                ),
-                None,
-            )
-            if direct_match is not None:
-                self.col_map[key] = direct_match
-            else:
-                found = False
-                for index, header in enumerate(normalized_headers):
-                    for normalized_expected_name in normalized_expected_names:
-                        if normalized_expected_name in header or header in normalized_expected_name:
-                            self.col_map[key] = index + 1
-                            found = True
-                            break
-                    if found:
-                        break
-                if not found:
-                    logger.warning(f"[EXCEL] Coluna '{expected_name}' nao mapeada.")
+            if key not in self.col_map:
+                logger.warning(f"[EXCEL] Coluna '{expected_name}' nao mapeada.")
 
     def _build_plantio_column_map(self):
         self.plantio_col_map.clear()
@@ -368,35 +488,125 @@ class ExcelService:
             return True
         return False
 
-    def add_new(self, c: Compensacao) -> int:
+    @contextmanager
+    def write_batch(self) -> Iterator["ExcelService"]:
+        """Agrupa gravacoes na planilha ja carregada em um unico backup e save.
+
+        As alteracoes vao direto para a planilha em memoria, com um registro do
+        que desfazer: se algo falhar (inclusive o save), tudo volta ao estado de
+        antes do lote e o arquivo em disco fica intacto. A verificacao de
+        alteracao externa roda na abertura e de novo antes de salvar.
+        """
+        if self._undo_log is not None:
+            yield self
+            return
+        if not self.path:
+            raise ValueError("Nenhuma planilha carregada para salvar.")
+
         self.ensure_workbook_is_current()
+        if self.wb is None:
+            self.load(self.path)
         self._create_rotating_backup()
-        new_row = self._append_new_without_save(c)
-        self._save_workbook()
-        return new_row
+        saved_state = (
+            dict(self.uid_to_row),
+            dict(self.col_map),
+            dict(self.plantio_col_map),
+            self.plantio_ws,
+            self.merged_cells_warning,
+        )
+        self._undo_log = []
+        try:
+            yield self
+            self.ensure_workbook_is_current()
+            self._save_workbook()
+        except BaseException:
+            undo_log, self._undo_log = self._undo_log, None
+            for undo in reversed(undo_log):
+                undo()
+            (
+                self.uid_to_row,
+                self.col_map,
+                self.plantio_col_map,
+                self.plantio_ws,
+                self.merged_cells_warning,
+            ) = saved_state
+            raise
+        finally:
+            self._undo_log = None
+            self._append_hint = 2
+
+    def _commit_mutation(self, mutation: Callable[[], object]) -> object:
+        with self.write_batch():
+            return mutation()
+
+    def _remember_undo(self, undo: Callable[[], None]) -> None:
+        if self._undo_log is not None:
+            self._undo_log.append(undo)
+
+    def _set_cell_value(self, ws: Worksheet, row: int, column: int, value) -> None:
+        cell = ws.cell(row=row, column=column)
+        if self._undo_log is not None:
+            previous = cell.value
+            # Pela coordenada: linhas excluidas depois trocam o objeto da celula.
+            self._undo_log.append(lambda: setattr(ws.cell(row=row, column=column), "value", previous))
+        cell.value = value
+
+    def _delete_row(self, ws: Worksheet, row_idx: int) -> None:
+        if self._undo_log is not None:
+            # Formatacao, links e mesclagens voltam junto com o valor no rollback.
+            saved = [
+                (cell.column, cell.value, copy(cell._style), copy(cell.hyperlink))
+                for cell in ws[row_idx]
+                if not isinstance(cell, MergedCell)
+                and (cell.value is not None or cell.has_style or cell.hyperlink is not None)
+            ]
+            saved_ranges = [
+                merged.coord for merged in ws.merged_cells.ranges if merged.min_row <= row_idx <= merged.max_row
+            ]
+
+            def undo() -> None:
+                ws.insert_rows(row_idx, 1)
+                for column, value, style, hyperlink in saved:
+                    cell = ws.cell(row=row_idx, column=column)
+                    cell.value = value
+                    cell._style = copy(style)
+                    cell.hyperlink = copy(hyperlink)
+                for merged in saved_ranges:
+                    # Remesclar recria as MergedCell que a exclusao da linha levou.
+                    if merged in {existing.coord for existing in ws.merged_cells.ranges}:
+                        ws.merged_cells.remove(merged)
+                    ws.merge_cells(merged)
+
+            self._undo_log.append(undo)
+        ws.delete_rows(row_idx, 1)
+        if ws is self.ws:
+            self._append_hint = 2
+
+    def add_new(self, c: Compensacao) -> int:
+        return cast(int, self._commit_mutation(lambda: self._append_new_without_save(c)))
 
     def save_edit(self, c: Compensacao):
-        def mutate(shadow: "ExcelService") -> None:
-            target_row = shadow._resolve_target_row(c, require_uid_match=True)
-            shadow._write_row(target_row, c)
-            shadow._sync_plantio_rows(c)
+        def mutate() -> None:
+            target_row = self._resolve_target_row(c, require_uid_match=True)
+            self._write_row(target_row, c)
+            self._sync_plantio_rows(c)
 
-        self._commit_shadow_mutation(mutate)
+        self._commit_mutation(mutate)
 
     def save_batch_edits(self, records: List[Compensacao]) -> int:
         if not records:
             return 0
 
-        def mutate(shadow: "ExcelService") -> int:
+        def mutate() -> int:
             updated = 0
             for record in records:
-                target_row = shadow._resolve_target_row(record, require_uid_match=True)
-                shadow._write_row(target_row, record)
-                shadow._sync_plantio_rows(record)
+                target_row = self._resolve_target_row(record, require_uid_match=True)
+                self._write_row(target_row, record)
+                self._sync_plantio_rows(record)
                 updated += 1
             return updated
 
-        return cast(int, self._commit_shadow_mutation(mutate))
+        return cast(int, self._commit_mutation(mutate))
 
     def import_records_atomic(
         self,
@@ -407,42 +617,44 @@ class ExcelService:
         if not records:
             return 0
 
-        def mutate(shadow: "ExcelService") -> int:
+        def mutate() -> int:
             total = len(records)
             imported = 0
             for record in records:
-                shadow._append_new_without_save(record)
+                self._append_new_without_save(record)
                 imported += 1
                 if progress_callback:
                     progress_callback(imported, total)
             return imported
 
-        return cast(int, self._commit_shadow_mutation(mutate))
+        return cast(int, self._commit_mutation(mutate))
 
     def delete_record_shift_up(self, row_idx: int, uid: str = ""):
-        self.ensure_workbook_is_current()
-        self._create_rotating_backup()
-        ws = self.ws
-        if ws is None:
-            raise ValueError("Nenhuma planilha carregada para excluir registros.")
-        target_row = row_idx
-        target_uid = uid
-        if uid:
-            found_row = self._find_row_by_uid(uid)
-            if not found_row:
-                raise LookupError("Nao foi possivel localizar o registro pelo UID. Recarregue a planilha e tente novamente.")
-            target_row = found_row
-            if uid in self.uid_to_row:
-                del self.uid_to_row[uid]
-        else:
-            col_uid = self.col_map.get("uid")
-            if col_uid:
-                target_uid = self._str(ws.cell(row=target_row, column=col_uid).value)
+        def mutate() -> None:
+            ws = self.ws
+            if ws is None:
+                raise ValueError("Nenhuma planilha carregada para excluir registros.")
+            target_row = row_idx
+            target_uid = uid
+            if uid:
+                found_row = self._find_row_by_uid(uid)
+                if not found_row:
+                    raise LookupError(
+                        "Nao foi possivel localizar o registro pelo UID. Recarregue a planilha e tente novamente."
+                    )
+                target_row = found_row
+                if uid in self.uid_to_row:
+                    del self.uid_to_row[uid]
+            else:
+                col_uid = self.col_map.get("uid")
+                if col_uid:
+                    target_uid = self._str(ws.cell(row=target_row, column=col_uid).value)
 
-        self._delete_plantio_rows_for_uid(target_uid)
-        ws.delete_rows(target_row, 1)
-        self.uid_to_row.clear()
-        self._save_workbook()
+            self._delete_plantio_rows_for_uid(target_uid)
+            self._delete_row(ws, target_row)
+            self.uid_to_row.clear()
+
+        self._commit_mutation(mutate)
 
     def read_all(self) -> List[Compensacao]:
         if not self.path:
@@ -478,12 +690,13 @@ class ExcelService:
 
             cell = ws.cell(row=row, column=col_idx)
             if not isinstance(cell, MergedCell):
-                cell.value = value
+                self._set_cell_value(ws, row, col_idx, value)
             else:
                 self.merged_cells_warning = True
 
     def _append_new_without_save(self, c: Compensacao) -> int:
-        new_row = 2
+        # Dentro de um lote as linhas ja preenchidas nao sao revistas a cada inclusao.
+        new_row = self._append_hint if self._undo_log is not None else 2
         while self._row_has_values(new_row):
             new_row += 1
 
@@ -493,6 +706,7 @@ class ExcelService:
         self._write_row(new_row, c)
         self._sync_plantio_rows(c)
         self.uid_to_row[c.uid] = new_row
+        self._append_hint = new_row + 1
         return new_row
 
     def _resolve_target_row(self, c: Compensacao, *, require_uid_match: bool = False) -> int:
@@ -508,56 +722,18 @@ class ExcelService:
             raise LookupError("Nao foi possivel localizar o registro pelo UID. Recarregue a planilha e tente novamente.")
         return target_row
 
-    def _adopt_runtime_state(self, other: "ExcelService") -> None:
-        self.path = other.path
-        self.wb = other.wb
-        self.ws = other.ws
-        self.plantio_ws = other.plantio_ws
-        self.col_map = dict(other.col_map)
-        self.plantio_col_map = dict(other.plantio_col_map)
-        self.uid_to_row = dict(other.uid_to_row)
-        self.last_backup_time = other.last_backup_time
-        self.merged_cells_warning = other.merged_cells_warning
-        self.loaded_source_mtime_ns = other.loaded_source_mtime_ns
-        self.loaded_source_size = other.loaded_source_size
-
-    def _build_shadow_service(self) -> "ExcelService":
-        if not self.path:
-            raise ValueError("Nenhuma planilha carregada para salvar.")
-
-        self.ensure_workbook_is_current()
-        shadow = ExcelService()
-        shadow.load(self.path)
-        shadow.last_backup_time = self.last_backup_time
-        return shadow
-
-    def _commit_shadow_mutation(self, mutation: Callable[["ExcelService"], object]) -> object:
-        shadow = self._build_shadow_service()
-        shadow._create_rotating_backup()
-        result = mutation(shadow)
-        shadow._save_workbook()
-        self._adopt_runtime_state(shadow)
-        return result
-
     def _ensure_tracking_headers(self):
         if not self.ws:
             return
 
         headers = [str(cell.value).strip() if cell.value else "" for cell in self.ws[1]]
-
-        from app.services.records_service import remove_accents
-
-        def normalize(text: str) -> str:
-            return remove_accents(str(text)).strip().upper()
-
-        normalized_headers = {normalize(header) for header in headers if header}
+        # Cabecalho aproximado ja mapeia a coluna; so o que falta de fato e criado.
+        mapped = self._match_record_columns(headers)
         for key, label in EXPECTED_HEADERS.items():
-            alias_names = EXPECTED_HEADER_ALIASES.get(key, (label,))
-            if not any(normalize(alias_name) in normalized_headers for alias_name in alias_names):
+            if key not in mapped:
                 new_col = len(headers) + 1
-                self.ws.cell(row=1, column=new_col).value = label
+                self._set_cell_value(self.ws, 1, new_col, label)
                 headers.append(label)
-                normalized_headers.add(normalize(label))
 
     def _ensure_plantio_headers(self):
         if not self.plantio_ws:
@@ -576,44 +752,52 @@ class ExcelService:
         for key, label in EXPECTED_PLANTIO_HEADERS.items():
             if normalize(label) not in normalized_headers:
                 new_col = len(headers) + 1
-                self.plantio_ws.cell(row=1, column=new_col).value = label
+                self._set_cell_value(self.plantio_ws, 1, new_col, label)
                 headers.append(label)
                 normalized_headers.add(normalize(label))
-        self.plantio_ws.sheet_state = "hidden"
+        if self.plantio_ws.sheet_state != "hidden":
+            sheet, previous_state = self.plantio_ws, self.plantio_ws.sheet_state
+            self._remember_undo(lambda: setattr(sheet, "sheet_state", previous_state))
+            sheet.sheet_state = "hidden"
 
     def _ensure_plantio_sheet(self):
         if not self.wb:
             return
         if self.plantio_ws is None:
-            self.plantio_ws = (
-                self.wb[PLANTIOS_SHEET_NAME]
-                if PLANTIOS_SHEET_NAME in self.wb.sheetnames
-                else self.wb.create_sheet(PLANTIOS_SHEET_NAME)
-            )
+            if PLANTIOS_SHEET_NAME in self.wb.sheetnames:
+                self.plantio_ws = self.wb[PLANTIOS_SHEET_NAME]
+            else:
+                workbook, sheet = self.wb, self.wb.create_sheet(PLANTIOS_SHEET_NAME)
+                self._remember_undo(lambda: workbook.remove(sheet))
+                self.plantio_ws = sheet
         self._ensure_plantio_headers()
         self._build_plantio_column_map()
 
     def _load_plantios_by_uid(self) -> Dict[str, List[PlantioItem]]:
-        plantios_by_uid: Dict[str, List[PlantioItem]] = {}
         if not self.plantio_ws or not self.plantio_col_map:
-            return plantios_by_uid
+            return {}
+        return self._plantios_from_rows(self.plantio_ws.iter_rows(min_row=2, values_only=True), self.plantio_col_map)
 
-        def get_val(row_cells, key: str):
-            col = self.plantio_col_map.get(key)
-            if col and col <= len(row_cells):
-                return row_cells[col - 1].value
-            return None
+    def _plantios_from_rows(
+        self,
+        rows: Iterable[Sequence[object]],
+        col_map: Dict[str, int],
+    ) -> Dict[str, List[PlantioItem]]:
+        plantios_by_uid: Dict[str, List[PlantioItem]] = {}
+
+        def get_val(values, key: str):
+            return self._row_value(values, col_map, key)
 
-        for row_cells in self.plantio_ws.iter_rows(min_row=2, values_only=False):
-            uid = self._str(get_val(row_cells, "uid_registro"))
-            endereco = self._str(get_val(row_cells, "endereco"))
-            qtd_mudas = self._str(get_val(row_cells, "qtd_mudas"))
-            latitude = self._str(get_val(row_cells, "latitude"))
-            longitude = self._str(get_val(row_cells, "longitude"))
+        for values in rows:
+            uid = self._str(get_val(values, "uid_registro"))
+            endereco = self._str(get_val(values, "endereco"))
+            qtd_mudas = self._str(get_val(values, "qtd_mudas"))
+            latitude = self._str(get_val(values, "latitude"))
+            longitude = self._str(get_val(values, "longitude"))
             if not uid or not any([endereco, qtd_mudas, latitude, longitude]):
                 continue
 
-            sequence_raw = get_val(row_cells, "sequence")
+            sequence_raw = get_val(values, "sequence")
             try:
                 sequence = int(sequence_raw)
             except (TypeError, ValueError):
@@ -633,24 +817,28 @@ class ExcelService:
             plantios_by_uid[uid] = normalize_plantios(sorted(items, key=lambda item: item.sequence))
         return plantios_by_uid
 
-    def _delete_plantio_rows_for_uid(self, uid: str):
+    def _plantio_rows_for_uid(self, uid: str) -> List[int]:
         if not uid or not self.plantio_ws or not self.plantio_col_map:
-            return
+            return []
 
         col_uid = self.plantio_col_map.get("uid_registro")
         if not col_uid:
-            return
+            return []
 
-        rows_to_delete = []
+        rows = []
         for row_idx, row_cells in enumerate(
             self.plantio_ws.iter_rows(min_row=2, min_col=col_uid, max_col=col_uid, values_only=True),
             start=2,
         ):
             if self._str(row_cells[0]) == uid:
-                rows_to_delete.append(row_idx)
+                rows.append(row_idx)
+        return rows
 
-        for row_idx in reversed(rows_to_delete):
-            self.plantio_ws.delete_rows(row_idx, 1)
+    def _delete_plantio_rows_for_uid(self, uid: str):
+        if not self.plantio_ws:
+            return
+        for row_idx in reversed(self._plantio_rows_for_uid(uid)):
+            self._delete_row(self.plantio_ws, row_idx)
 
     def _sync_plantio_rows(self, record: Compensacao):
         if not self.wb:
@@ -664,12 +852,14 @@ class ExcelService:
         if not self.plantio_ws:
             return
 
-        self._delete_plantio_rows_for_uid(record.uid)
-        if not normalized:
-            return
+        # Reaproveita as linhas que o registro ja tem: so sobras sao excluidas,
+        # porque excluir desloca todas as linhas abaixo na aba.
+        existing_rows = self._plantio_rows_for_uid(record.uid)
+        for row_idx in reversed(existing_rows[len(normalized):]):
+            self._delete_row(self.plantio_ws, row_idx)
 
-        for item in normalized:
-            row_idx = self.plantio_ws.max_row + 1
+        for index, item in enumerate(normalized):
+            row_idx = existing_rows[index] if index < len(existing_rows) else self.plantio_ws.max_row + 1
             data_map = {
                 "uid_registro": record.uid,
                 "sequence": item.sequence,
@@ -681,7 +871,7 @@ class ExcelService:
             for key, value in data_map.items():
                 col_idx = self.plantio_col_map.get(key)
                 if col_idx:
-                    self.plantio_ws.cell(row=row_idx, column=col_idx).value = value
+                    self._set_cell_value(self.plantio_ws, row_idx, col_idx, value)
 
     def _str(self, value) -> str:
         return "" if value is None else str(value).strip()
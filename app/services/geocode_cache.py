@@ -1,93 +1,275 @@
+import atexit
 import json
 import os
+import threading
 import time
-from typing import Any, Dict, Optional, Tuple
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
 
+from app.services.sqlite_connection_manager import (
+    SqliteConnectionManager,
+    close_connection_manager,
+    get_connection_manager,
+)
 from app.utils.app_paths import resolve_data_path
 from app.utils.logger import logger
+from app.utils.text_normalization import normalized_text_key
 
-CACHE_FILE = str(resolve_data_path("geocode_cache.json"))
+CACHE_FILE = str(resolve_data_path("geocode_cache.db"))
+LEGACY_CACHE_FILE = str(resolve_data_path("geocode_cache.json"))
 
 # Expiracao de 30 dias (30 * 24 * 60 * 60 segundos)
 EXPIRATION_SECONDS = 2592000
+DEFAULT_WRITE_BATCH_SIZE = 32
+DEFAULT_MAX_PENDING_SECONDS = 5.0
+_SCHEMA_VERSION = 1
+
+
+@dataclass(frozen=True)
+class GeocodeCacheStats:
+    hits: int = 0
+    misses: int = 0
+    expired: int = 0
+    writes: int = 0
+    flushes: int = 0
+    evicted: int = 0
+    migrated: int = 0
 
 
 class GeocodeCache:
-    def __init__(self, cache_file: str):
+    """Cache de coordenadas por endereco em SQLite.
+
+    O banco so e aberto no primeiro uso. As gravacoes ficam num buffer em
+    memoria e vao para o disco em lote (ao encher, ao envelhecer, ao confirmar
+    um endereco ou em flush()), cada uma como upsert pela chave normalizada do
+    endereco. Entradas nao confirmadas expiram apos EXPIRATION_SECONDS e sao
+    removidas em bloco a cada abertura e flush. Na primeira abertura, o antigo
+    geocode_cache.json (nos dois formatos conhecidos) e importado uma unica vez.
+    """
+
+    def __init__(
+        self,
+        cache_file: str,
+        *,
+        legacy_json_file: Optional[str] = None,
+        expiration_seconds: float = EXPIRATION_SECONDS,
+        write_batch_size: int = DEFAULT_WRITE_BATCH_SIZE,
+        max_pending_seconds: float = DEFAULT_MAX_PENDING_SECONDS,
+        clock: Callable[[], float] = time.time,
+    ):
         self.cache_file = cache_file
-        self._cache: Dict[str, Dict[str, Any]] = {}
-        self._load()
+        self.legacy_json_file = legacy_json_file
+        self.expiration_seconds = float(expiration_seconds)
+        self.write_batch_size = max(int(write_batch_size), 1)
+        self.max_pending_seconds = max(float(max_pending_seconds), 0.0)
+        self._clock = clock
+        self._lock = threading.RLock()
+        self._manager: Optional[SqliteConnectionManager] = None
+        self._pending: Dict[str, Tuple[Any, ...]] = {}
+        self._pending_since: Optional[float] = None
+        self._counters = {name: 0 for name in GeocodeCacheStats.__dataclass_fields__}
 
-    def _load(self):
-        """Carrega o cache do arquivo JSON com suporte a retrocompatibilidade."""
-        if not os.path.exists(self.cache_file):
-            return
+    @staticmethod
+    def cache_key(address: str) -> str:
+        return normalized_text_key(address)
+
+    def _connection_manager(self) -> SqliteConnectionManager:
+        with self._lock:
+            if self._manager is None:
+                Path(self.cache_file).parent.mkdir(parents=True, exist_ok=True)
+                manager = get_connection_manager(self.cache_file)
+                with manager.writer() as conn:
+                    self._create_schema(conn)
+                    if int(conn.execute("PRAGMA user_version").fetchone()[0] or 0) < _SCHEMA_VERSION:
+                        self._counters["migrated"] += self._migrate_legacy_json(conn)
+                        conn.execute(f"PRAGMA user_version = {_SCHEMA_VERSION}")
+                    self._counters["evicted"] += self._evict_expired(conn)
+                self._manager = manager
+            return self._manager
 
+    @staticmethod
+    def _create_schema(conn) -> None:
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS geocode_cache (
+                cache_key TEXT PRIMARY KEY,
+                address TEXT NOT NULL,
+                lat REAL NOT NULL,
+                lon REAL NOT NULL,
+                confirmed INTEGER NOT NULL DEFAULT 0,
+                label TEXT NOT NULL DEFAULT '',
+                updated_at REAL NOT NULL
+            ) WITHOUT ROWID
+            """
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_geocode_cache_expiry ON geocode_cache (confirmed, updated_at)"
+        )
+
+    def _migrate_legacy_json(self, conn) -> int:
+        """Importa o geocode_cache.json com suporte a retrocompatibilidade."""
+        legacy_file = self.legacy_json_file
+        if not legacy_file or not os.path.exists(legacy_file):
+            return 0
         try:
-            with open(self.cache_file, "r", encoding="utf-8") as f:
+            with open(legacy_file, "r", encoding="utf-8") as f:
                 data = json.load(f)
-                self._cache = {}
-                for key, value in data.items():
-                    # Formato antigo: { address: [lat, lon] }
-                    if isinstance(value, list) and len(value) == 2:
-                        self._cache[key] = {
-                            "coords": tuple(value),
-                            "timestamp": time.time(),
-                            "confirmed": False,
-                            "label": "",
-                        }
-                    # Formato novo: { address: {"coords": [lat, lon], "timestamp": float} }
-                    elif isinstance(value, dict) and "coords" in value and "timestamp" in value:
-                        self._cache[key] = {
-                            "coords": tuple(value["coords"]),
-                            "timestamp": value["timestamp"],
-                            "confirmed": bool(value.get("confirmed", False)),
-                            "label": str(value.get("label", "") or ""),
-                        }
         except Exception as exc:
-            logger.error(f"[GeocodeCache] Erro ao carregar cache: {exc}")
-            self._cache = {}
+            logger.error(f"[GeocodeCache] Erro ao migrar cache legado: {exc}")
+            return 0
 
-    def _save(self):
-        """Salva o cache no arquivo JSON."""
-        try:
-            os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
-            with open(self.cache_file, "w", encoding="utf-8") as f:
-                json.dump(self._cache, f, indent=4, ensure_ascii=False)
-        except Exception as exc:
-            logger.error(f"[GeocodeCache] Erro ao salvar cache: {exc}")
+        now = float(self._clock())
+        rows = []
+        for address, value in (data or {}).items():
+            # Formato antigo: { address: [lat, lon] }
+            if isinstance(value, list) and len(value) == 2:
+                coords, timestamp, confirmed, label = value, now, False, ""
+            # Formato novo: { address: {"coords": [lat, lon], "timestamp": float} }
+            elif isinstance(value, dict) and "coords" in value and "timestamp" in value:
+                coords = value["coords"]
+                timestamp = value["timestamp"]
+                confirmed = bool(value.get("confirmed", False))
+                label = str(value.get("label", "") or "")
+            else:
+                continue
+            try:
+                rows.append(self._row(address, float(coords[0]), float(coords[1]), confirmed, label, float(timestamp)))
+            except (TypeError, ValueError, IndexError):
+                continue
+        self._upsert(conn, rows)
+        if rows:
+            logger.info(f"[GeocodeCache] {len(rows)} endereco(s) migrados de {legacy_file}.")
+        return len(rows)
+
+    def _row(self, address: str, lat: float, lon: float, confirmed: bool, label: str, updated_at: float):
+        return (self.cache_key(address), str(address), lat, lon, 1 if confirmed else 0, str(label or ""), updated_at)
+
+    @staticmethod
+    def _upsert(conn, rows) -> None:
+        # Uma busca automatica nao sobrescreve coordenadas confirmadas manualmente.
+        conn.executemany(
+            """
+            INSERT INTO geocode_cache (cache_key, address, lat, lon, confirmed, label, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(cache_key) DO UPDATE SET
+                address = excluded.address,
+                lat = excluded.lat,
+                lon = excluded.lon,
+                confirmed = excluded.confirmed,
+                label = excluded.label,
+                updated_at = excluded.updated_at
+            WHERE excluded.confirmed >= geocode_cache.confirmed
+            """,
+            rows,
+        )
+
+    def _evict_expired(self, conn) -> int:
+        cursor = conn.execute(
+            "DELETE FROM geocode_cache WHERE confirmed = 0 AND updated_at < ?",
+            (float(self._clock()) - self.expiration_seconds,),
+        )
+        return max(int(cursor.rowcount or 0), 0)
+
+    def _is_expired(self, confirmed: object, updated_at: object) -> bool:
+        return not confirmed and float(self._clock()) - float(updated_at) > self.expiration_seconds
 
     def get(self, address: str) -> Optional[Tuple[float, float]]:
         """Busca um endereco no cache se nao estiver expirado."""
-        entry = self._cache.get(address)
-        if not entry:
+        key = self.cache_key(address)
+        if not key:
             return None
+        with self._lock:
+            pending = self._pending.get(key)
+            if pending is not None and pending[4]:
+                self._counters["hits"] += 1
+                return pending[2], pending[3]
+        with self._connection_manager().reader() as conn:
+            row = conn.execute(
+                "SELECT lat, lon, confirmed, updated_at FROM geocode_cache WHERE cache_key = ?",
+                (key,),
+            ).fetchone()
+        with self._lock:
+            if pending is not None and (row is None or not row["confirmed"]):
+                # Busca automatica ainda no buffer; so perde para uma confirmacao ja gravada.
+                self._counters["hits"] += 1
+                return pending[2], pending[3]
+            if row is None:
+                self._counters["misses"] += 1
+                return None
+            if self._is_expired(row["confirmed"], row["updated_at"]):
+                # A linha sai na proxima limpeza em bloco.
+                self._counters["expired"] += 1
+                return None
+            self._counters["hits"] += 1
+        return float(row["lat"]), float(row["lon"])
 
-        if not entry.get("confirmed") and time.time() - entry["timestamp"] > EXPIRATION_SECONDS:
-            del self._cache[address]
-            return None
+    def set(self, address: str, lat: float, lon: float, *, confirmed: bool = False, label: str = ""):
+        """Guarda um endereco; a gravacao em disco acontece no proximo lote."""
+        if not self.cache_key(address):
+            return
+        now = float(self._clock())
+        with self._lock:
+            row = self._row(address, float(lat), float(lon), confirmed, label, now)
+            previous = self._pending.get(row[0])
+            self._counters["writes"] += 1
+            if previous is not None and previous[4] and not confirmed:
+                # Mesma regra do upsert: a confirmacao pendente fica com suas coordenadas.
+                return
+            self._pending[row[0]] = row
+            if self._pending_since is None:
+                self._pending_since = now
+            should_flush = (
+                confirmed
+                or len(self._pending) >= self.write_batch_size
+                or now - self._pending_since >= self.max_pending_seconds
+            )
+        if should_flush:
+            self.flush()
 
-        return entry["coords"]
+    def flush(self) -> None:
+        """Grava o buffer pendente numa unica transacao."""
+        with self._lock:
+            if not self._pending:
+                return
+            try:
+                with self._connection_manager().writer() as conn:
+                    self._upsert(conn, list(self._pending.values()))
+                    self._counters["evicted"] += self._evict_expired(conn)
+            except Exception as exc:
+                logger.error(f"[GeocodeCache] Erro ao salvar cache: {exc}")
+                return
+            self._pending.clear()
+            self._pending_since = None
+            self._counters["flushes"] += 1
 
-    def set(self, address: str, lat: float, lon: float, *, confirmed: bool = False, label: str = ""):
-        """Salva um endereco no cache e persiste no disco."""
-        self._cache[address] = {
-            "coords": (lat, lon),
-            "timestamp": time.time(),
-            "confirmed": bool(confirmed),
-            "label": str(label or ""),
-        }
-        self._save()
+    def close(self) -> None:
+        """Grava o pendente, incorpora o WAL ao banco e fecha as conexoes."""
+        with self._lock:
+            self.flush()
+            if self._manager is None:
+                return
+            try:
+                with self._manager.writer() as conn:
+                    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            except Exception as exc:
+                logger.error(f"[GeocodeCache] Erro ao consolidar o WAL do cache: {exc}")
+            close_connection_manager(self.cache_file)
+            self._manager = None
+
+    def stats(self) -> GeocodeCacheStats:
+        with self._lock:
+            return GeocodeCacheStats(**self._counters)
 
     def clear(self):
-        """Limpa o cache em memoria e no disco."""
-        self._cache = {}
-        if os.path.exists(self.cache_file):
-            try:
-                os.remove(self.cache_file)
-            except Exception:
-                pass
+        """Limpa o cache pendente e o armazenado em disco."""
+        with self._lock:
+            self._pending.clear()
+            self._pending_since = None
+            with self._connection_manager().writer() as conn:
+                conn.execute("DELETE FROM geocode_cache")
 
 
 # Instancia unica global para o sistema
-geocode_cache = GeocodeCache(CACHE_FILE)
+geocode_cache = GeocodeCache(CACHE_FILE, legacy_json_file=LEGACY_CACHE_FILE)
+atexit.register(geocode_cache.close)
@@ -2,7 +2,6 @@ from __future__ import annotations
 
 import math
 import re
-import unicodedata
 from dataclasses import dataclass
 from typing import Callable, Optional, Tuple
 from urllib.parse import unquote, urlparse
@@ -16,6 +15,7 @@ from app.config import (
     GEOCODER_USER_AGENT,
 )
 from app.services.geocode_cache import geocode_cache
+from app.utils.text_normalization import normalized_text_key
 
 ARCGIS_GEOCODE_URL = "https://geocode.arcgis.com/arcgis/rest/services/World/GeocodeServer/findAddressCandidates"
 NOMINATIM_SEARCH_URL = "https://nominatim.openstreetmap.org/search"
@@ -63,14 +63,8 @@ class GeocodeCandidate:
         return " | ".join(details)
 
 
-def _strip_accents(value: object) -> str:
-    text = str(value or "")
-    normalized = unicodedata.normalize("NFD", text)
-    return "".join(ch for ch in normalized if unicodedata.category(ch) != "Mn")
-
-
 def _normalize_key(value: object) -> str:
-    return " ".join(_strip_accents(value).casefold().split())
+    return normalized_text_key(value)
 
 
 def _valid_coords(lat: float, lon: float) -> bool:
@@ -194,6 +188,11 @@ def normalize_address(address: str) -> str:
     return clean
 
 
+def address_dedupe_key(address: str) -> str:
+    """Chave que identifica o mesmo endereco escrito com abreviacoes, acentos ou caixa diferentes."""
+    return _normalize_key(normalize_address(address))
+
+
 def address_search_variants(address: str) -> list[str]:
     clean = _expand_address_abbreviations(address)
     if not clean:
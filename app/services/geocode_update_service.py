@@ -1,4 +1,4 @@
-from typing import Callable, Dict, Iterable, Optional, Tuple
+from typing import Callable, Dict, Iterable, Optional, Sequence, Tuple
 
 from app.models.compensacao import Compensacao
 
@@ -11,11 +11,26 @@ def build_cached_microbacia_finder(
     find_microbacia: Optional[Callable[[float, float], str]],
     *,
     precision: int = 6,
+    find_microbacias: Optional[Callable[[Sequence[float], Sequence[float]], Sequence[str]]] = None,
+    prefetch: Iterable[Tuple[float, float]] = (),
 ) -> Optional[Callable[[float, float], str]]:
     if not find_microbacia:
         return None
 
     cache: Dict[Tuple[float, float], str] = {}
+    if find_microbacias is not None:
+        # Resolve todos os pontos conhecidos numa unica consulta em lote; o
+        # que ficar de fora continua caindo na busca ponto a ponto.
+        keys = list(
+            dict.fromkeys((round(float(lat), precision), round(float(lon), precision)) for lat, lon in prefetch)
+        )
+        if keys:
+            try:
+                names = find_microbacias([key[0] for key in keys], [key[1] for key in keys])
+            except Exception:
+                names = None
+            if names is not None:
+                cache.update((key, str(name or "")) for key, name in zip(keys, names))
 
     def cached(lat: float, lon: float) -> str:
         key = (round(float(lat), precision), round(float(lon), precision))
@@ -26,6 +41,19 @@ def build_cached_microbacia_finder(
     return cached
 
 
+def batch_geocode_result_coords(results: Dict[int, Dict[str, object]]) -> list[Tuple[float, float]]:
+    """Coordenadas principais e de plantio de um resultado de geocodificacao em lote."""
+    coords: list[Tuple[float, float]] = []
+    for values in (results or {}).values():
+        main = values.get("main")
+        if main:
+            coords.append((float(main[0]), float(main[1])))
+        for plantio_coords in (values.get("plantios") or {}).values():
+            if plantio_coords:
+                coords.append((float(plantio_coords[0]), float(plantio_coords[1])))
+    return coords
+
+
 def apply_geocode_to_record(
     record: Compensacao,
     lat: float,
@@ -0,0 +1,122 @@
+import json
+import os
+import struct
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+from app.services.gis_layer_cache import SHAPEFILE_PARTS, default_cache_dir
+from app.utils.logger import get_logger
+
+
+logger = get_logger("GIS.DatasetCache")
+
+DATASET_CACHE_FILE = "microbacias-dataset.bin"
+DATASET_FORMAT_VERSION = 1
+_MAGIC = b"MBGIS"
+# magic, versao do formato, tamanho do cabecalho JSON
+_PREAMBLE = struct.Struct("<5sHI")
+
+
+@dataclass(frozen=True)
+class GisDataset:
+    """Microbacias ja lidas e reprojetadas, prontas para montar os GeoDataFrames."""
+
+    name_field: str
+    names: tuple[Optional[str], ...]
+    file_names: tuple[Optional[str], ...]
+    metric_crs: str
+    wgs84_wkb: tuple[bytes, ...]
+    metric_wkb: tuple[bytes, ...]
+
+
+def shapefile_signature(folder: str) -> list[list]:
+    """Nome, tamanho e mtime de cada arquivo que compoe os shapefiles da pasta."""
+    signature = []
+    for entry in sorted(os.scandir(folder), key=lambda item: item.name):
+        if not entry.is_file() or os.path.splitext(entry.name)[1].lower() not in SHAPEFILE_PARTS:
+            continue
+        stat = entry.stat()
+        signature.append([entry.name, int(stat.st_size), int(stat.st_mtime_ns)])
+    return signature
+
+
+def dataset_cache_path(cache_dir: str | Path | None = None) -> Path:
+    return Path(cache_dir or default_cache_dir()) / DATASET_CACHE_FILE
+
+
+def read_gis_dataset(
+    signature: list[list],
+    name_field: str,
+    *,
+    cache_dir: str | Path | None = None,
+) -> Optional[GisDataset]:
+    path = dataset_cache_path(cache_dir)
+    try:
+        data = path.read_bytes()
+    except FileNotFoundError:
+        return None
+    except OSError as exc:
+        logger.warning(f"Falha ao ler cache binario das microbacias: {exc}")
+        return None
+
+    try:
+        magic, version, header_size = _PREAMBLE.unpack_from(data, 0)
+        if magic != _MAGIC or version != DATASET_FORMAT_VERSION:
+            return None
+        offset = _PREAMBLE.size
+        header = json.loads(data[offset : offset + header_size].decode("utf-8"))
+        if header.get("signature") != signature or header.get("name_field") != name_field:
+            return None
+        offset += header_size
+        blobs = []
+        for size in list(header["wgs84_sizes"]) + list(header["metric_sizes"]):
+            blobs.append(bytes(data[offset : offset + size]))
+            offset += size
+        if offset != len(data):
+            raise ValueError("tamanho inesperado")
+    except (struct.error, ValueError, KeyError, TypeError) as exc:
+        logger.warning(f"Cache binario das microbacias invalido, sera refeito: {exc}")
+        return None
+
+    total = len(header["wgs84_sizes"])
+    return GisDataset(
+        name_field=name_field,
+        names=tuple(header["names"]),
+        file_names=tuple(header["file_names"]),
+        metric_crs=str(header["metric_crs"]),
+        wgs84_wkb=tuple(blobs[:total]),
+        metric_wkb=tuple(blobs[total:]),
+    )
+
+
+def write_gis_dataset(
+    dataset: GisDataset,
+    signature: list[list],
+    *,
+    cache_dir: str | Path | None = None,
+) -> None:
+    header = json.dumps(
+        {
+            "signature": signature,
+            "name_field": dataset.name_field,
+            "names": list(dataset.names),
+            "file_names": list(dataset.file_names),
+            "metric_crs": dataset.metric_crs,
+            "wgs84_sizes": [len(blob) for blob in dataset.wgs84_wkb],
+            "metric_sizes": [len(blob) for blob in dataset.metric_wkb],
+        },
+        separators=(",", ":"),
+    ).encode("utf-8")
+    path = dataset_cache_path(cache_dir)
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = path.with_suffix(".tmp")
+        with open(temp_path, "wb") as handle:
+            handle.write(_PREAMBLE.pack(_MAGIC, DATASET_FORMAT_VERSION, len(header)))
+            handle.write(header)
+            for blob in dataset.wgs84_wkb + dataset.metric_wkb:
+                handle.write(blob)
+        os.replace(temp_path, path)
+    except OSError as exc:
+        logger.warning(f"Falha ao gravar cache binario das microbacias: {exc}")
@@ -0,0 +1,191 @@
+import glob
+import hashlib
+import json
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Optional, Sequence
+
+from app.utils.app_paths import resolve_data_path
+from app.utils.logger import get_logger
+
+
+logger = get_logger("GIS.LayerCache")
+
+LAYER_CACHE_DIR = resolve_data_path("gis_cache")
+LAYER_FORMAT_VERSION = 1
+SHAPEFILE_PARTS = (".shp", ".shx", ".dbf", ".prj", ".cpg")
+
+
+@dataclass(frozen=True)
+class LayerLevel:
+    """Nivel de detalhe da camada: vale a partir de min_zoom no mapa."""
+
+    min_zoom: int
+    tolerance_m: float
+    precision: int
+
+
+# Tolerancia de cerca de meio pixel na latitude de Sao Carlos em cada zoom.
+DEFAULT_LAYER_LEVELS = (
+    LayerLevel(min_zoom=0, tolerance_m=60.0, precision=4),
+    LayerLevel(min_zoom=12, tolerance_m=8.0, precision=5),
+    LayerLevel(min_zoom=15, tolerance_m=1.0, precision=6),
+)
+
+
+def shapefile_fingerprint(
+    folder: str,
+    name_field: str,
+    *,
+    levels: Sequence[LayerLevel] = DEFAULT_LAYER_LEVELS,
+) -> str:
+    """Hash do conteudo dos shapefiles da pasta e dos parametros da camada."""
+    digest = hashlib.sha256(f"v{LAYER_FORMAT_VERSION}|{name_field}|{list(levels)!r}".encode("utf-8"))
+    for path in sorted(glob.glob(os.path.join(folder, "*"))):
+        if os.path.splitext(path)[1].lower() not in SHAPEFILE_PARTS:
+            continue
+        digest.update(os.path.basename(path).encode("utf-8"))
+        with open(path, "rb") as handle:
+            digest.update(handle.read())
+    return digest.hexdigest()[:24]
+
+
+def default_cache_dir() -> Path:
+    return Path(LAYER_CACHE_DIR)
+
+
+def layer_cache_path(fingerprint: str, cache_dir: str | Path | None = None) -> Path:
+    return Path(cache_dir or default_cache_dir()) / f"microbacias-{fingerprint}.json"
+
+
+def read_cached_layer(fingerprint: str, cache_dir: str | Path | None = None) -> Optional[str]:
+    path = layer_cache_path(fingerprint, cache_dir)
+    try:
+        return path.read_text(encoding="utf-8")
+    except FileNotFoundError:
+        return None
+    except OSError as exc:
+        logger.warning(f"Falha ao ler camada de microbacias em cache: {exc}")
+        return None
+
+
+def write_cached_layer(fingerprint: str, text: str, cache_dir: str | Path | None = None) -> None:
+    path = layer_cache_path(fingerprint, cache_dir)
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = path.with_suffix(".tmp")
+        temp_path.write_text(text, encoding="utf-8")
+        os.replace(temp_path, path)
+        # Versoes antigas da camada ficam obsoletas assim que os shapefiles mudam.
+        for stale in path.parent.glob("microbacias-*.json"):
+            if stale != path:
+                stale.unlink(missing_ok=True)
+    except OSError as exc:
+        logger.warning(f"Falha ao gravar camada de microbacias em cache: {exc}")
+
+
+def load_cached_microbacia_layer(
+    folder: str,
+    name_field: str,
+    *,
+    cache_dir: str | Path | None = None,
+    levels: Sequence[LayerLevel] = DEFAULT_LAYER_LEVELS,
+) -> Optional[str]:
+    """Camada pronta para o mapa, sem abrir os shapefiles com geopandas."""
+    if not os.path.isdir(folder):
+        return None
+    try:
+        fingerprint = shapefile_fingerprint(folder, name_field, levels=levels)
+    except OSError as exc:
+        logger.warning(f"Falha ao calcular hash das microbacias: {exc}")
+        return None
+    return read_cached_layer(fingerprint, cache_dir)
+
+
+def _round_coords(coords: Any, precision: int) -> Any:
+    if coords and isinstance(coords[0], (int, float)):
+        return [round(float(value), precision) for value in coords[:2]]
+    return [_round_coords(item, precision) for item in coords]
+
+
+def _property_text(value: Any) -> Optional[str]:
+    # NaN vindo do .dbf vira null, como no to_json do geopandas.
+    if value is None or value != value:
+        return None
+    return str(value)
+
+
+def _simplify_coverage(geometries, tolerance: float):
+    import shapely
+
+    geometries = shapely.force_2d(geometries)
+    if tolerance <= 0:
+        return geometries
+    # coverage_simplify mantem as divisas compartilhadas entre microbacias
+    # vizinhas; sem GEOS 3.12 ou com cobertura invalida, cada poligono e
+    # simplificado sozinho preservando a propria topologia.
+    if hasattr(shapely, "coverage_simplify"):
+        try:
+            if shapely.coverage_is_valid(geometries):
+                return shapely.coverage_simplify(geometries, tolerance)
+        except Exception as exc:
+            logger.debug(f"coverage_simplify indisponivel: {exc}")
+    return shapely.simplify(geometries, tolerance, preserve_topology=True)
+
+
+def build_microbacia_layer(
+    gdf_metric,
+    name_field: str,
+    *,
+    levels: Sequence[LayerLevel] = DEFAULT_LAYER_LEVELS,
+) -> dict:
+    """Monta o FeatureCollection em EPSG:4326 com os niveis de detalhe.
+
+    features traz o nivel mais grosso; lods traz os demais, cada um com o
+    zoom a partir do qual deve substituir o anterior.
+    """
+    import geopandas as gpd
+    import shapely
+    from shapely.geometry import mapping as geometry_mapping
+
+    names = gdf_metric[name_field].to_numpy(dtype=object)
+    file_names = (
+        gdf_metric["Nome_Do_Arquivo"].to_numpy(dtype=object) if "Nome_Do_Arquivo" in gdf_metric.columns else names
+    )
+    geometries = gdf_metric.geometry.values
+    built_levels = []
+    for level in sorted(levels, key=lambda item: item.min_zoom):
+        simplified = gpd.GeoSeries(
+            _simplify_coverage(geometries, level.tolerance_m),
+            crs=gdf_metric.crs,
+        ).to_crs(epsg=4326)
+        features = []
+        for geometry, name, file_name in zip(simplified.values, names, file_names):
+            if geometry is None or shapely.is_empty(geometry):
+                continue
+            mapping = geometry_mapping(geometry)
+            properties = {name_field: _property_text(name)}
+            properties.setdefault("Nome_Do_Arquivo", _property_text(file_name))
+            features.append(
+                {
+                    "type": "Feature",
+                    "properties": properties,
+                    "geometry": {
+                        "type": mapping["type"],
+                        "coordinates": _round_coords(mapping["coordinates"], level.precision),
+                    },
+                }
+            )
+        built_levels.append((level.min_zoom, features))
+
+    base_features = built_levels[0][1] if built_levels else []
+    return {
+        "type": "FeatureCollection",
+        "features": base_features,
+        "lods": [{"min_zoom": min_zoom, "features": features} for min_zoom, features in built_levels[1:]],
+    }
+
+
+def serialize_layer(layer: dict) -> str:
+    return json.dumps(layer, separators=(",", ":"))
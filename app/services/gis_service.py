@@ -6,9 +6,25 @@ import unicodedata
 from typing import Dict, List, Optional
 
 import geopandas as gpd
+import numpy as np
+import pandas as pd
+import shapely
+from pyproj import CRS
 from shapely.geometry import Point
-from shapely import force_2d
 
+from app.services.gis_dataset_cache import (
+    GisDataset,
+    read_gis_dataset,
+    shapefile_signature,
+    write_gis_dataset,
+)
+from app.services.gis_layer_cache import (
+    build_microbacia_layer,
+    read_cached_layer,
+    serialize_layer,
+    shapefile_fingerprint,
+    write_cached_layer,
+)
 from app.utils.app_paths import resolve_resource_path
 from app.utils.logger import get_logger
 
@@ -25,7 +41,14 @@ class GisService:
         "JOCKEY": "Jockey", "ARACY": "Aracy", "CHIBARRO": "Chibarro"
     }
 
-    def __init__(self, microbacias_dir: str, name_field: str):
+    def __init__(
+        self,
+        microbacias_dir: str,
+        name_field: str,
+        *,
+        layer_cache_dir: Optional[str] = None,
+        dataset_cache_dir: Optional[str] = None,
+    ):
         # Se for caminho absoluto (ex.: C:\...), usa direto
         if os.path.isabs(microbacias_dir):
             self.microbacias_dir = microbacias_dir
@@ -34,12 +57,31 @@ class GisService:
             self.microbacias_dir = resolve_resource_path(microbacias_dir)
 
         self.name_field = name_field
+        self.layer_cache_dir = layer_cache_dir
 
         # Log de depuração essencial para ver o caminho final no executável
         if not os.path.isdir(self.microbacias_dir):
             logger.error(f"ERRO GIS: Pasta nao encontrada em: {self.microbacias_dir}")
             raise ValueError(f"Diretório de microbacias não encontrado: {self.microbacias_dir}")
 
+        signature = shapefile_signature(self.microbacias_dir)
+        dataset = read_gis_dataset(signature, self.name_field, cache_dir=dataset_cache_dir)
+        if dataset is not None:
+            # Geometrias ja reprojetadas nas duas projecoes: sem pyogrio nem to_crs.
+            self._restore_dataset(dataset)
+            self.load_source = "cache"
+        else:
+            self._load_from_shapefiles()
+            write_gis_dataset(self._build_dataset(), signature, cache_dir=dataset_cache_dir)
+            self.load_source = "shapefiles"
+
+        self.sindex = self.gdf.sindex
+        self._geojson_obj = None
+        self._geojson_text = None
+        self._centroid_cache: Dict[str, tuple] = {}
+        self._build_name_lookup_cache()
+
+    def _load_from_shapefiles(self) -> None:
         # Carrega os arquivos .shp encontrados na pasta resolvida
         self.gdf = self._load_folder(self.microbacias_dir)
 
@@ -49,14 +91,37 @@ class GisService:
         self.gdf = self.gdf.to_crs(epsg=4326)
 
         if self.name_field not in self.gdf.columns:
-            raise ValueError(f"Campo '{name_field}' não existe nas microbacias.")
+            raise ValueError(f"Campo '{self.name_field}' não existe nas microbacias.")
 
-        self.sindex = self.gdf.sindex
         self.metric_crs = self.gdf.estimate_utm_crs()
         self.gdf_metric = self.gdf.to_crs(self.metric_crs)
-        self._geojson_obj = None
-        self._centroid_cache: Dict[str, tuple] = {}
-        self._build_name_lookup_cache()
+
+    def _build_dataset(self) -> GisDataset:
+        def _texts(column: str) -> tuple:
+            values = self.gdf[column] if column in self.gdf.columns else self.gdf[self.name_field]
+            return tuple(None if pd.isna(value) else str(value) for value in values)
+
+        return GisDataset(
+            name_field=self.name_field,
+            names=_texts(self.name_field),
+            file_names=_texts("Nome_Do_Arquivo"),
+            metric_crs=self.metric_crs.to_string(),
+            wgs84_wkb=tuple(shapely.to_wkb(self.gdf.geometry.values)),
+            metric_wkb=tuple(shapely.to_wkb(self.gdf_metric.geometry.values)),
+        )
+
+    def _restore_dataset(self, dataset: GisDataset) -> None:
+        columns = {self.name_field: list(dataset.names)}
+        columns.setdefault("Nome_Do_Arquivo", list(dataset.file_names))
+        self.metric_crs = CRS.from_user_input(dataset.metric_crs)
+        self.gdf = gpd.GeoDataFrame(
+            columns,
+            geometry=gpd.GeoSeries.from_wkb(list(dataset.wgs84_wkb), crs="EPSG:4326"),
+        )
+        self.gdf_metric = gpd.GeoDataFrame(
+            dict(columns),
+            geometry=gpd.GeoSeries.from_wkb(list(dataset.metric_wkb), crs=self.metric_crs),
+        )
 
     def _padronizar_nome(self, nome_arquivo_raw: str) -> str:
         nome = nome_arquivo_raw.replace('.shp', '').replace('_', ' ')
@@ -108,15 +173,29 @@ class GisService:
             gdfs.append(g)
 
         if not gdfs: raise ValueError("Nenhuma feição válida encontrada nos shapefiles.")
-        import pandas as pd
         merged = gpd.GeoDataFrame(pd.concat(gdfs, ignore_index=True), crs=crs_ref)
         return merged
 
+    def to_geojson_text(self) -> str:
+        """Camada simplificada por zoom, ja serializada para o mapa.
+
+        O resultado fica em disco sob o hash dos shapefiles; nas aberturas
+        seguintes ele e lido direto, sem gerar o GeoJSON de novo.
+        """
+        if getattr(self, "_geojson_text", None) is None:
+            cache_dir = getattr(self, "layer_cache_dir", None)
+            fingerprint = shapefile_fingerprint(self.microbacias_dir, self.name_field)
+            text = read_cached_layer(fingerprint, cache_dir)
+            if text is None:
+                text = serialize_layer(build_microbacia_layer(self.gdf_metric, self.name_field))
+                write_cached_layer(fingerprint, text, cache_dir)
+                logger.info(f"Camada de microbacias gerada e salva em cache ({len(text)} bytes).")
+            self._geojson_text = text
+        return self._geojson_text
+
     def to_geojson_obj(self) -> dict:
         if self._geojson_obj is None:
-            gdf_2d = self.gdf.copy()
-            gdf_2d['geometry'] = gdf_2d['geometry'].apply(force_2d)
-            self._geojson_obj = json.loads(gdf_2d.to_json())
+            self._geojson_obj = json.loads(self.to_geojson_text())
         return self._geojson_obj
 
     def find_microbacia(self, lat: float, lng: float) -> str:
@@ -146,6 +225,52 @@ class GisService:
             return "" if val is None else str(val)
         return ""
 
+    def find_microbacias(self, lats, lons) -> np.ndarray:
+        """Versao em lote de find_microbacia, alinhada a entrada.
+
+        Os pontos sao testados de uma vez contra a STRtree dos poligonos; os
+        que caem fora de todos sao reprojetados juntos e ligados ao poligono
+        mais proximo quando ele esta a menos de 500 m. Coordenadas invalidas
+        resultam em "".
+        """
+        lat_values = np.asarray(lats, dtype=float).ravel()
+        lon_values = np.asarray(lons, dtype=float).ravel()
+        if lat_values.shape != lon_values.shape:
+            raise ValueError("Latitudes e longitudes precisam ter o mesmo tamanho.")
+
+        result = np.full(lat_values.shape, "", dtype=object)
+        valid = np.isfinite(lat_values) & np.isfinite(lon_values)
+        if not valid.any() or self.gdf.empty:
+            return result
+
+        names = self.gdf[self.name_field].to_numpy(dtype=object)
+        valid_idx = np.flatnonzero(valid)
+        points = shapely.points(lon_values[valid_idx], lat_values[valid_idx])
+
+        point_pos, polygon_idx = self.gdf.sindex.query(points, predicate="within")
+        # Com poligonos sobrepostos vale o primeiro na ordem do GeoDataFrame,
+        # como na consulta ponto a ponto.
+        order = np.lexsort((polygon_idx, point_pos))
+        point_pos, polygon_idx = point_pos[order], polygon_idx[order]
+        first = np.unique(point_pos, return_index=True)[1]
+        matched = np.zeros(len(valid_idx), dtype=bool)
+        matched[point_pos[first]] = True
+        result[valid_idx[point_pos[first]]] = names[polygon_idx[first]]
+
+        missing = np.flatnonzero(~matched)
+        if missing.size:
+            missing_metric = gpd.GeoSeries(points[missing], crs="EPSG:4326").to_crs(self.metric_crs)
+            (near_pos, near_idx), distances = self.gdf_metric.sindex.nearest(
+                missing_metric.values,
+                max_distance=500,
+                return_distance=True,
+                return_all=False,
+            )
+            close = distances < 500
+            result[valid_idx[missing[near_pos[close]]]] = names[near_idx[close]]
+
+        return np.array(["" if pd.isna(value) else str(value) for value in result], dtype=object)
+
     def _resolve_name_field_value(self, nome: str) -> Optional[str]:
         if not hasattr(self, "_known_names") or not hasattr(self, "_name_field_keys"):
             self._build_name_lookup_cache()
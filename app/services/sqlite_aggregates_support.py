@@ -0,0 +1,225 @@
+from __future__ import annotations
+
+import sqlite3
+from typing import Sequence
+
+WORKBOOK_AGGREGATES_TABLE = "workbook_aggregates"
+AGGREGATE_DIMENSION_TOTAL = "total"
+AGGREGATE_DIMENSION_MICROBACIA = "microbacia"
+AGGREGATE_DIMENSION_TIPO = "tipo"
+# Somas de compensacao ficam em centesimos inteiros: deltas REAL somados e
+# subtraidos a cada edicao acumulariam erro de arredondamento.
+AGGREGATE_VALUE_SCALE = 100
+
+_AGGREGATE_TRIGGER_NAMES = (
+    "records_aggregates_ai",
+    "records_aggregates_ad",
+    "records_aggregates_au",
+)
+# Colunas de records que alteram algum agregado; atualizacoes que so mexem em
+# outras colunas (excel_row, synced_at, busca) nao tocam a tabela.
+_AGGREGATE_SOURCE_COLUMNS = (
+    "workbook_id",
+    "microbacia",
+    "tipo_key",
+    "is_compensado",
+    "compensacao_value",
+    "latitude",
+    "longitude",
+)
+_AGGREGATE_VALUE_COLUMNS = (
+    "record_count",
+    "compensados_count",
+    "compensado_cents",
+    "pendente_cents",
+    "without_coordinates_count",
+)
+
+
+def _dimension_labels(row_ref: str) -> tuple[tuple[str, str], ...]:
+    prefix = f"{row_ref}." if row_ref else ""
+    return (
+        (AGGREGATE_DIMENSION_TOTAL, "''"),
+        (AGGREGATE_DIMENSION_MICROBACIA, f"TRIM(COALESCE({prefix}microbacia, ''))"),
+        (AGGREGATE_DIMENSION_TIPO, f"TRIM(COALESCE({prefix}tipo_key, ''))"),
+    )
+
+
+def _value_expressions(row_ref: str) -> tuple[str, ...]:
+    prefix = f"{row_ref}." if row_ref else ""
+    cents = f"CAST(ROUND({prefix}compensacao_value * {AGGREGATE_VALUE_SCALE}) AS INTEGER)"
+    return (
+        "1",
+        f"{prefix}is_compensado",
+        f"(CASE WHEN {prefix}is_compensado = 1 THEN {cents} ELSE 0 END)",
+        f"(CASE WHEN {prefix}is_compensado = 1 THEN 0 ELSE {cents} END)",
+        (
+            f"(CASE WHEN TRIM(COALESCE({prefix}latitude, '')) = '' "
+            f"OR TRIM(COALESCE({prefix}longitude, '')) = '' THEN 1 ELSE 0 END)"
+        ),
+    )
+
+
+def _apply_delta_sql(row_ref: str, *, sign: str) -> str:
+    values = [
+        f"({row_ref}.workbook_id, '{dimension}', {label}, "
+        + ", ".join(f"{sign}{expression}" for expression in _value_expressions(row_ref))
+        + ")"
+        for dimension, label in _dimension_labels(row_ref)
+    ]
+    updates = ", ".join(f"{column} = {column} + excluded.{column}" for column in _AGGREGATE_VALUE_COLUMNS)
+    return f"""
+            INSERT INTO {WORKBOOK_AGGREGATES_TABLE} (workbook_id, dimension, label, {", ".join(_AGGREGATE_VALUE_COLUMNS)})
+            VALUES {", ".join(values)}
+            ON CONFLICT(workbook_id, dimension, label) DO UPDATE SET {updates};
+    """
+
+
+def _prune_empty_sql(row_ref: str) -> str:
+    return f"""
+            DELETE FROM {WORKBOOK_AGGREGATES_TABLE}
+            WHERE workbook_id = {row_ref}.workbook_id AND record_count <= 0;
+    """
+
+
+def workbook_aggregates_table_exists(conn: sqlite3.Connection) -> bool:
+    row = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+        (WORKBOOK_AGGREGATES_TABLE,),
+    ).fetchone()
+    return row is not None
+
+
+def _drop_legacy_real_aggregates(conn: sqlite3.Connection) -> None:
+    # A primeira versao guardava as somas em REAL; tabela e gatilhos sao refeitos.
+    columns = {str(row[1]) for row in conn.execute(f"PRAGMA table_info({WORKBOOK_AGGREGATES_TABLE})").fetchall()}
+    if not columns or "compensado_cents" in columns:
+        return
+    for trigger_name in _AGGREGATE_TRIGGER_NAMES:
+        conn.execute(f"DROP TRIGGER IF EXISTS {trigger_name}")
+    conn.execute(f"DROP TABLE {WORKBOOK_AGGREGATES_TABLE}")
+
+
+def aggregate_value(cents: object) -> float:
+    return int(cents or 0) / AGGREGATE_VALUE_SCALE
+
+
+def ensure_workbook_aggregates(conn: sqlite3.Connection) -> bool:
+    """Cria a tabela de agregados por planilha e os gatilhos que a mantem.
+
+    Cada insert, update ou delete em records aplica a diferenca nas linhas de
+    total, microbacia e tipo da planilha. Devolve True quando a tabela acabou
+    de ser criada e foi preenchida a partir dos registros existentes.
+    """
+    _drop_legacy_real_aggregates(conn)
+    created = not workbook_aggregates_table_exists(conn)
+    conn.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS {WORKBOOK_AGGREGATES_TABLE} (
+            workbook_id INTEGER NOT NULL,
+            dimension TEXT NOT NULL,
+            label TEXT NOT NULL,
+            record_count INTEGER NOT NULL DEFAULT 0,
+            compensados_count INTEGER NOT NULL DEFAULT 0,
+            compensado_cents INTEGER NOT NULL DEFAULT 0,
+            pendente_cents INTEGER NOT NULL DEFAULT 0,
+            without_coordinates_count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (workbook_id, dimension, label)
+        ) WITHOUT ROWID
+        """
+    )
+    changed_columns = " OR ".join(f"old.{column} IS NOT new.{column}" for column in _AGGREGATE_SOURCE_COLUMNS)
+    conn.execute(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {_AGGREGATE_TRIGGER_NAMES[0]} AFTER INSERT ON records BEGIN
+            {_apply_delta_sql("new", sign="")}
+        END
+        """
+    )
+    conn.execute(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {_AGGREGATE_TRIGGER_NAMES[1]} AFTER DELETE ON records BEGIN
+            {_apply_delta_sql("old", sign="-")}
+            {_prune_empty_sql("old")}
+        END
+        """
+    )
+    conn.execute(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {_AGGREGATE_TRIGGER_NAMES[2]}
+        AFTER UPDATE OF {", ".join(_AGGREGATE_SOURCE_COLUMNS)} ON records
+        WHEN {changed_columns}
+        BEGIN
+            {_apply_delta_sql("old", sign="-")}
+            {_apply_delta_sql("new", sign="")}
+            {_prune_empty_sql("old")}
+        END
+        """
+    )
+    if created:
+        rebuild_workbook_aggregates(conn)
+    return created
+
+
+def rebuild_workbook_aggregates(conn: sqlite3.Connection, workbook_id: int | None = None) -> None:
+    where_clause = "" if workbook_id is None else "WHERE workbook_id = ?"
+    params: tuple[object, ...] = () if workbook_id is None else (int(workbook_id),)
+    conn.execute(f"DELETE FROM {WORKBOOK_AGGREGATES_TABLE} {where_clause}", params)
+    value_sums = ", ".join(f"SUM({expression})" for expression in _value_expressions(""))
+    selects = [
+        f"""
+        SELECT workbook_id, '{dimension}', {label}, {value_sums}
+        FROM records
+        {where_clause}
+        GROUP BY workbook_id, {label}
+        """
+        for dimension, label in _dimension_labels("")
+    ]
+    conn.execute(
+        f"""
+        INSERT INTO {WORKBOOK_AGGREGATES_TABLE} (workbook_id, dimension, label, {", ".join(_AGGREGATE_VALUE_COLUMNS)})
+        {" UNION ALL ".join(selects)}
+        """,
+        params * len(selects),
+    )
+
+
+def filtered_aggregates_sql(where_clause: str) -> str:
+    """Agrupa o recorte filtrado por microbacia e tipo numa unica leitura.
+
+    O resultado tem poucas linhas (uma por combinacao presente) e
+    rollup_filtered_aggregates deriva dele as linhas de total, microbacia e
+    tipo no mesmo formato de workbook_aggregates.
+    """
+    value_sums = ", ".join(
+        f"SUM({expression}) AS {column}"
+        for expression, column in zip(_value_expressions(""), _AGGREGATE_VALUE_COLUMNS)
+    )
+    return f"""
+        SELECT
+            TRIM(COALESCE(microbacia, '')) AS microbacia_label,
+            TRIM(COALESCE(tipo_key, '')) AS tipo_label,
+            {value_sums}
+        FROM records
+        WHERE {where_clause}
+        GROUP BY microbacia_label, tipo_label
+    """
+
+
+def rollup_filtered_aggregates(rows: Sequence[sqlite3.Row]) -> list[dict[str, object]]:
+    def empty_bucket(dimension: str, label: str) -> dict[str, object]:
+        return {"dimension": dimension, "label": label, **{column: 0 for column in _AGGREGATE_VALUE_COLUMNS}}
+
+    totals = {(AGGREGATE_DIMENSION_TOTAL, ""): empty_bucket(AGGREGATE_DIMENSION_TOTAL, "")}
+    for row in rows:
+        for dimension, label in (
+            (AGGREGATE_DIMENSION_TOTAL, ""),
+            (AGGREGATE_DIMENSION_MICROBACIA, str(row["microbacia_label"] or "")),
+            (AGGREGATE_DIMENSION_TIPO, str(row["tipo_label"] or "")),
+        ):
+            bucket = totals.get((dimension, label))
+            if bucket is None:
+                bucket = totals[(dimension, label)] = empty_bucket(dimension, label)
+            for column in _AGGREGATE_VALUE_COLUMNS:
+                bucket[column] += row[column] or 0
+    return list(totals.values())
@@ -0,0 +1,282 @@
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator
+
+from app.config import (
+    SQLITE_CACHE_SIZE_KIB,
+    SQLITE_CACHED_STATEMENTS,
+    SQLITE_MMAP_SIZE_BYTES,
+    SQLITE_READER_POOL_SIZE,
+)
+from app.utils.logger import get_logger
+
+
+logger = get_logger("Persistence.SQLite")
+
+
+@dataclass(frozen=True)
+class SqliteConnectionSettings:
+    timeout_seconds: float = 30.0
+    reader_pool_size: int = SQLITE_READER_POOL_SIZE
+    cache_size_kib: int = SQLITE_CACHE_SIZE_KIB
+    mmap_size_bytes: int = SQLITE_MMAP_SIZE_BYTES
+    cached_statements: int = SQLITE_CACHED_STATEMENTS
+    journal_mode: str = "WAL"
+    synchronous: str = "NORMAL"
+
+
+@dataclass(frozen=True)
+class SqliteConnectionStats:
+    acquisitions: int = 0
+    reader_acquisitions: int = 0
+    writer_acquisitions: int = 0
+    reused_acquisitions: int = 0
+    connections_opened: int = 0
+    wait_seconds_total: float = 0.0
+    wait_seconds_max: float = 0.0
+
+
+class SqliteConnectionManager:
+    """Pool de leitores e conexao unica de escrita para um arquivo SQLite.
+
+    As conexoes ficam abertas entre chamadas, com os PRAGMAs aplicados uma vez
+    e o cache de statements do sqlite3 preservado. Dentro de uma mesma thread,
+    pedidos aninhados reaproveitam a conexao ja em uso; uma leitura feita
+    enquanto a thread segura a escrita enxerga as alteracoes ainda nao gravadas.
+    """
+
+    def __init__(self, db_path: str | Path, *, settings: SqliteConnectionSettings | None = None):
+        self.db_path = Path(db_path)
+        self.settings = settings or SqliteConnectionSettings()
+        self._condition = threading.Condition()
+        self._writer_lock = threading.Lock()
+        self._local = threading.local()
+        self._idle_readers: list[sqlite3.Connection] = []
+        self._open_readers = 0
+        self._writer: sqlite3.Connection | None = None
+        self._writer_in_use = False
+        self._generation = 0
+        self._file_identity: tuple[int, int] | None = None
+        self._acquisitions = 0
+        self._reader_acquisitions = 0
+        self._writer_acquisitions = 0
+        self._reused_acquisitions = 0
+        self._connections_opened = 0
+        self._wait_seconds_total = 0.0
+        self._wait_seconds_max = 0.0
+
+    @contextmanager
+    def reader(self) -> Iterator[sqlite3.Connection]:
+        held = self._held_connection()
+        if held is not None:
+            self._record_acquisition(kind="reused", waited=0.0)
+            yield held
+            return
+
+        conn, generation, waited = self._checkout_reader()
+        self._record_acquisition(kind="reader", waited=waited)
+        self._local.connection = conn
+        try:
+            yield conn
+            if conn.in_transaction:
+                conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            self._local.connection = None
+            self._checkin_reader(conn, generation)
+
+    @contextmanager
+    def writer(self) -> Iterator[sqlite3.Connection]:
+        held = getattr(self._local, "writer", None)
+        if held is not None:
+            self._record_acquisition(kind="reused", waited=0.0)
+            yield held
+            return
+
+        started_at = time.perf_counter()
+        if not self._writer_lock.acquire(timeout=self.settings.timeout_seconds):
+            raise sqlite3.OperationalError(f"Tempo esgotado aguardando a conexao de escrita de {self.db_path}.")
+        waited = time.perf_counter() - started_at
+        try:
+            with self._condition:
+                self._refresh_if_file_replaced()
+                if self._writer is None:
+                    self._writer = self._open_connection()
+                conn = self._writer
+                self._writer_in_use = True
+            self._record_acquisition(kind="writer", waited=waited)
+            self._local.writer = conn
+            try:
+                yield conn
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                self._local.writer = None
+                with self._condition:
+                    self._writer_in_use = False
+                    if self._writer is not conn:
+                        conn.close()
+        finally:
+            self._writer_lock.release()
+
+    def stats(self) -> SqliteConnectionStats:
+        with self._condition:
+            return SqliteConnectionStats(
+                acquisitions=self._acquisitions,
+                reader_acquisitions=self._reader_acquisitions,
+                writer_acquisitions=self._writer_acquisitions,
+                reused_acquisitions=self._reused_acquisitions,
+                connections_opened=self._connections_opened,
+                wait_seconds_total=self._wait_seconds_total,
+                wait_seconds_max=self._wait_seconds_max,
+            )
+
+    def close(self) -> None:
+        with self._writer_lock, self._condition:
+            self._discard_connections()
+
+    def _held_connection(self) -> sqlite3.Connection | None:
+        writer = getattr(self._local, "writer", None)
+        if writer is not None:
+            return writer
+        return getattr(self._local, "connection", None)
+
+    def _checkout_reader(self) -> tuple[sqlite3.Connection, int, float]:
+        started_at = time.perf_counter()
+        deadline = started_at + self.settings.timeout_seconds
+        pool_size = max(int(self.settings.reader_pool_size or 0), 1)
+        with self._condition:
+            self._refresh_if_file_replaced()
+            while not self._idle_readers and self._open_readers >= pool_size:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0 or not self._condition.wait(timeout=remaining):
+                    if not self._idle_readers and self._open_readers >= pool_size:
+                        raise sqlite3.OperationalError(
+                            f"Tempo esgotado aguardando uma conexao de leitura de {self.db_path}."
+                        )
+            if self._idle_readers:
+                conn = self._idle_readers.pop()
+            else:
+                conn = self._open_connection()
+                self._open_readers += 1
+            return conn, self._generation, time.perf_counter() - started_at
+
+    def _checkin_reader(self, conn: sqlite3.Connection, generation: int) -> None:
+        with self._condition:
+            if generation == self._generation:
+                self._idle_readers.append(conn)
+            else:
+                conn.close()
+            self._condition.notify()
+
+    def _open_connection(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            os.fspath(self.db_path),
+            timeout=self.settings.timeout_seconds,
+            check_same_thread=False,
+            cached_statements=max(int(self.settings.cached_statements or 0), 0),
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA foreign_keys = ON")
+        conn.execute(f"PRAGMA journal_mode = {self.settings.journal_mode}")
+        conn.execute(f"PRAGMA synchronous = {self.settings.synchronous}")
+        conn.execute(f"PRAGMA cache_size = {-abs(int(self.settings.cache_size_kib or 0))}")
+        conn.execute(f"PRAGMA mmap_size = {max(int(self.settings.mmap_size_bytes or 0), 0)}")
+        conn.execute("PRAGMA temp_store = MEMORY")
+        self._connections_opened += 1
+        if self._file_identity is None:
+            self._file_identity = self._current_file_identity()
+        return conn
+
+    def _current_file_identity(self) -> tuple[int, int] | None:
+        try:
+            stat = os.stat(self.db_path)
+        except OSError:
+            return None
+        return stat.st_dev, stat.st_ino
+
+    def _refresh_if_file_replaced(self) -> None:
+        # O banco local pode ser apagado e recriado (reset da demo, sincronizacao
+        # completa do Supabase); conexoes antigas apontariam para o arquivo velho.
+        if self._file_identity is None:
+            return
+        if self._current_file_identity() == self._file_identity:
+            return
+        logger.info(f"[SQLITE] Banco {self.db_path} foi substituido; reabrindo conexoes.")
+        self._discard_connections()
+
+    def _discard_connections(self) -> None:
+        self._generation += 1
+        for conn in self._idle_readers:
+            conn.close()
+        self._idle_readers.clear()
+        if self._writer is not None and not self._writer_in_use:
+            self._writer.close()
+        # A escrita em uso e fechada por writer() ao ser devolvida.
+        self._writer = None
+        self._file_identity = None
+        # Leitores em uso sao fechados por _checkin_reader ao voltar.
+        self._open_readers = 0
+        self._condition.notify_all()
+
+    def _record_acquisition(self, *, kind: str, waited: float) -> None:
+        with self._condition:
+            self._acquisitions += 1
+            if kind == "reader":
+                self._reader_acquisitions += 1
+            elif kind == "writer":
+                self._writer_acquisitions += 1
+            else:
+                self._reused_acquisitions += 1
+            self._wait_seconds_total += waited
+            self._wait_seconds_max = max(self._wait_seconds_max, waited)
+
+
+_MANAGERS: dict[str, SqliteConnectionManager] = {}
+_MANAGERS_LOCK = threading.Lock()
+
+
+def _manager_key(db_path: str | Path) -> str:
+    return os.path.normcase(os.path.abspath(os.fspath(db_path)))
+
+
+def get_connection_manager(
+    db_path: str | Path,
+    *,
+    settings: SqliteConnectionSettings | None = None,
+) -> SqliteConnectionManager:
+    key = _manager_key(db_path)
+    with _MANAGERS_LOCK:
+        manager = _MANAGERS.get(key)
+        if manager is None:
+            manager = SqliteConnectionManager(db_path, settings=settings)
+            _MANAGERS[key] = manager
+        return manager
+
+
+def close_connection_manager(db_path: str | Path) -> None:
+    # O gerenciador continua registrado: os servicos que ja o seguram e os que vierem
+    # depois precisam disputar a mesma conexao de escrita. So as conexoes sao fechadas
+    # e reabertas sob demanda no proximo uso.
+    with _MANAGERS_LOCK:
+        manager = _MANAGERS.get(_manager_key(db_path))
+    if manager is not None:
+        manager.close()
+
+
+def close_all_connection_managers() -> None:
+    with _MANAGERS_LOCK:
+        managers = list(_MANAGERS.values())
+    for manager in managers:
+        manager.close()
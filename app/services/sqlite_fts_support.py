@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+import sqlite3
+from typing import Sequence
+
+from app.services.records_service import remove_accents
+
+FTS_MIN_TERM_LENGTH = 3
+
+_TRIGRAM_SUPPORT_CACHE: dict[str, bool] = {}
+
+
+def fts5_trigram_available(conn: sqlite3.Connection) -> bool:
+    version = sqlite3.sqlite_version
+    cached = _TRIGRAM_SUPPORT_CACHE.get(version)
+    if cached is not None:
+        return cached
+    try:
+        conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS temp.fts5_trigram_probe USING fts5(value, tokenize='trigram')")
+        conn.execute("DROP TABLE IF EXISTS temp.fts5_trigram_probe")
+        available = True
+    except sqlite3.OperationalError:
+        available = False
+    _TRIGRAM_SUPPORT_CACHE[version] = available
+    return available
+
+
+def normalize_search_text(value: object) -> str:
+    return remove_accents(str(value or "").strip()).lower()
+
+
+def split_search_terms(value: object) -> tuple[str, ...]:
+    seen: set[str] = set()
+    terms: list[str] = []
+    for term in normalize_search_text(value).split():
+        if term in seen:
+            continue
+        seen.add(term)
+        terms.append(term)
+    return tuple(terms)
+
+
+def partition_search_terms(terms: Sequence[str]) -> tuple[tuple[str, ...], tuple[str, ...]]:
+    indexed = tuple(term for term in terms if len(term) >= FTS_MIN_TERM_LENGTH)
+    short = tuple(term for term in terms if len(term) < FTS_MIN_TERM_LENGTH)
+    return indexed, short
+
+
+def build_fts_match_query(terms: Sequence[str]) -> str:
+    return " AND ".join('"' + term.replace('"', '""') + '"' for term in terms)
+
+
+def escape_like_term(term: str) -> str:
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def fts_table_exists(conn: sqlite3.Connection, fts_table: str) -> bool:
+    row = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+        (fts_table,),
+    ).fetchone()
+    return row is not None
+
+
+def ensure_trigram_index(
+    conn: sqlite3.Connection,
+    *,
+    fts_table: str,
+    content_table: str,
+    content_rowid: str,
+    column: str,
+) -> bool:
+    trigger_names = (f"{fts_table}_ai", f"{fts_table}_ad", f"{fts_table}_au")
+    if not fts5_trigram_available(conn):
+        # Sem FTS5 os gatilhos quebrariam qualquer escrita na tabela de origem.
+        for trigger_name in trigger_names:
+            conn.execute(f"DROP TRIGGER IF EXISTS {trigger_name}")
+        return False
+
+    created = not fts_table_exists(conn, fts_table)
+    existing_triggers = {
+        row[0]
+        for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger' AND name IN (?, ?, ?)",
+            trigger_names,
+        )
+    }
+    # Uma sessao sem FTS5 derruba os gatilhos; o indice que sobrou ficou para tras e precisa ser refeito.
+    stale = not created and len(existing_triggers) < len(trigger_names)
+    if created:
+        conn.execute(
+            f"""
+            CREATE VIRTUAL TABLE {fts_table} USING fts5(
+                {column},
+                content='{content_table}',
+                content_rowid='{content_rowid}',
+                tokenize='trigram'
+            )
+            """
+        )
+    conn.execute(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {trigger_names[0]} AFTER INSERT ON {content_table} BEGIN
+            INSERT INTO {fts_table}(rowid, {column}) VALUES (new.{content_rowid}, new.{column});
+        END
+        """
+    )
+    conn.execute(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {trigger_names[1]} AFTER DELETE ON {content_table} BEGIN
+            INSERT INTO {fts_table}({fts_table}, rowid, {column}) VALUES ('delete', old.{content_rowid}, old.{column});
+        END
+        """
+    )
+    conn.execute(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {trigger_names[2]} AFTER UPDATE OF {column} ON {content_table} BEGIN
+            INSERT INTO {fts_table}({fts_table}, rowid, {column}) VALUES ('delete', old.{content_rowid}, old.{column});
+            INSERT INTO {fts_table}(rowid, {column}) VALUES (new.{content_rowid}, new.{column});
+        END
+        """
+    )
+    if created or stale:
+        conn.execute(f"INSERT INTO {fts_table}({fts_table}) VALUES ('rebuild')")
+    return True
+
+
+def build_search_clauses(
+    terms: Sequence[str],
+    *,
+    fts_table: str | None,
+    rowid_column: str,
+    blob_column: str = "search_blob_norm",
+) -> tuple[list[str], list[object]]:
+    clauses: list[str] = []
+    params: list[object] = []
+    indexed_terms, short_terms = partition_search_terms(terms)
+    if fts_table and indexed_terms:
+        clauses.append(f"{rowid_column} IN (SELECT rowid FROM {fts_table} WHERE {fts_table} MATCH ?)")
+        params.append(build_fts_match_query(indexed_terms))
+        like_terms = short_terms
+    else:
+        like_terms = tuple(terms)
+    for term in like_terms:
+        clauses.append(f"{blob_column} LIKE ? ESCAPE '\\'")
+        params.append(f"%{escape_like_term(term)}%")
+    return clauses, params
+
+
+def rank_fts_rowids(
+    conn: sqlite3.Connection,
+    terms: Sequence[str],
+    *,
+    fts_table: str | None,
+) -> dict[int, int]:
+    indexed_terms, _ = partition_search_terms(terms)
+    if not fts_table or not indexed_terms:
+        return {}
+    rows = conn.execute(
+        f"SELECT rowid FROM {fts_table} WHERE {fts_table} MATCH ? ORDER BY rank",
+        (build_fts_match_query(indexed_terms),),
+    ).fetchall()
+    return {int(row[0]): position for position, row in enumerate(rows)}
@@ -4,9 +4,9 @@ import json
 import os
 import sqlite3
 from contextlib import contextmanager
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from pathlib import Path
-from typing import Any, Iterator, Sequence
+from typing import Any, Iterator, Mapping, Sequence
 
 from app.models.compensacao import Compensacao
 from app.models.plantio_item import PlantioItem
@@ -16,10 +16,28 @@ from app.services.records_service import (
     display_tipo_value,
     extract_year,
     normalize_tipo_key,
-    remove_accents,
+    row_is_compensado,
+    safe_upper,
 )
 from app.utils.app_paths import ensure_dir, resolve_data_path
 from app.utils.logger import get_logger
+from app.services.sqlite_aggregates_support import (
+    AGGREGATE_DIMENSION_MICROBACIA,
+    AGGREGATE_DIMENSION_TIPO,
+    AGGREGATE_DIMENSION_TOTAL,
+    WORKBOOK_AGGREGATES_TABLE,
+    aggregate_value as _aggregate_value,
+    ensure_workbook_aggregates as _ensure_workbook_aggregates,
+    filtered_aggregates_sql as _filtered_aggregates_sql,
+    rollup_filtered_aggregates as _rollup_filtered_aggregates,
+)
+from app.services.sqlite_connection_manager import SqliteConnectionSettings, get_connection_manager
+from app.services.sqlite_fts_support import (
+    build_search_clauses as _build_search_clauses,
+    ensure_trigram_index as _ensure_trigram_index,
+    rank_fts_rowids as _rank_fts_rowids,
+    split_search_terms as _split_search_terms,
+)
 from app.services.sqlite_mirror_service_support import (
     build_unique_session_path as _build_unique_session_path_helper,
     decode_json_object as _decode_json_object_helper,
@@ -29,6 +47,8 @@ from app.services.sqlite_mirror_service_support import (
     microbacia_key as _microbacia_key,
     normalize_session_path as _normalize_path,
     read_source_file_identity as _read_workbook_file_identity,
+    record_content_hash as _record_content_hash,
+    sql_real_value as _sql_real_value,
     stringify as _stringify,
     utc_timestamp as _utc_timestamp,
 )
@@ -36,11 +56,52 @@ from app.services.sqlite_mirror_service_support import (
 
 logger = get_logger("Persistence.SQLite")
 
-SCHEMA_VERSION = 5
+SCHEMA_VERSION = 8
 DEFAULT_DB_NAME = "compensacoes.db"
 SESSION_SCHEME = "session://"
 DEFAULT_SINGLETON_SESSION_PATH = f"{SESSION_SCHEME}banco-local"
 DEFAULT_SINGLETON_SESSION_NAME = "Banco local"
+RECORDS_FTS_TABLE = "records_fts"
+DEFAULT_RECORD_PAGE_SIZE = 200
+# Expressao SQL de ordenacao por coluna da tabela de dados; o desempate e sempre excel_row.
+RECORD_SORT_EXPRESSIONS = {
+    "oficio_processo": "oficio_processo",
+    "eletronico": "tipo_key",
+    "caixa": "caixa",
+    "av_tec": "av_tec",
+    "compensacao": "compensacao_value",
+    "endereco": "endereco",
+    "microbacia": "microbacia",
+    "compensado": "compensado",
+    "endereco_plantio": "endereco_plantio",
+}
+RECORD_QUERY_INDEXES = (
+    ("idx_records_workbook_row", "records(workbook_id, excel_row)"),
+    ("idx_records_workbook_av_tec", "records(workbook_id, av_tec)"),
+    ("idx_records_workbook_year", "records(workbook_id, oficio_year)"),
+    ("idx_records_workbook_tipo_key", "records(workbook_id, tipo_key)"),
+    ("idx_records_workbook_micro_key", "records(workbook_id, microbacia_key)"),
+    ("idx_records_workbook_compensado", "records(workbook_id, is_compensado, compensacao_value)"),
+    ("idx_records_workbook_caixa_key", "records(workbook_id, caixa_key)"),
+)
+# Colunas tipadas derivadas de cada registro; metricas e filtros leem estas
+# colunas em vez de converter texto linha a linha no SQL.
+RECORD_TYPED_COLUMNS = (
+    ("compensacao_value", "REAL NOT NULL DEFAULT 0"),
+    ("is_compensado", "INTEGER NOT NULL DEFAULT 0"),
+    ("caixa_key", "TEXT NOT NULL DEFAULT ''"),
+)
+# Instante UTC da ultima escrita no espelho, com largura fixa para comparar como texto.
+# updated_at segue guardando a versao remota (vazia para planilhas Excel) e nao serve para isso.
+RECORD_MODIFIED_AT_SQL = "strftime('%Y-%m-%dT%H:%M:%f000+00:00', 'now')"
+
+
+def _record_typed_values(record: Compensacao) -> tuple[object, ...]:
+    return (
+        _sql_real_value(record.compensacao),
+        1 if row_is_compensado(record) else 0,
+        safe_upper(record.caixa),
+    )
 
 
 @dataclass(frozen=True)
@@ -151,10 +212,76 @@ class NamedSessionEntry:
 LocalWorkspaceEntry = NamedSessionEntry
 
 
+@dataclass(frozen=True)
+class SnapshotDiff:
+    inserts: tuple[tuple[Compensacao, str], ...] = ()
+    updates: tuple[tuple[int, Compensacao, str], ...] = ()
+    moves: tuple[tuple[int, int], ...] = ()
+    deleted_ids: tuple[int, ...] = ()
+    parked_ids: tuple[int, ...] = ()
+
+    @property
+    def is_empty(self) -> bool:
+        return not (self.inserts or self.updates or self.moves or self.deleted_ids)
+
+
+@dataclass(frozen=True)
+class WorkbookRecordPageSource:
+    """Leitura paginada de um recorte filtrado, usada pela tabela da aba de dados.
+
+    Sem ordenacao as paginas seguem excel_row (keyset); com uma coluna ordenada,
+    ou num salto, a consulta usa OFFSET. As paginas chegam sem plantios; o total
+    vem de uma contagem separada e os plantios sao carregados sob demanda.
+    """
+
+    service: "SqliteMirrorService"
+    workbook_path: str
+    filters: Mapping[str, Any]
+    sort_key: str = ""
+    descending: bool = False
+
+    def count(self) -> int:
+        return self.service.count_records_for_workbook(self.workbook_path, **self.filters)
+
+    def fetch_page(self, after_excel_row: int, limit: int) -> list[Compensacao]:
+        return self.service.query_record_page_for_workbook(
+            self.workbook_path,
+            after_excel_row=after_excel_row,
+            limit=limit,
+            **self.filters,
+        )
+
+    def fetch_page_at(self, offset: int, limit: int) -> list[Compensacao]:
+        return self.service.query_record_page_for_workbook(
+            self.workbook_path,
+            offset=offset,
+            limit=limit,
+            sort_key=self.sort_key,
+            descending=self.descending,
+            **self.filters,
+        )
+
+    def with_sort(self, sort_key: str, descending: bool = False) -> "WorkbookRecordPageSource":
+        return replace(self, sort_key=sort_key if sort_key in RECORD_SORT_EXPRESSIONS else "", descending=descending)
+
+    def uids(self) -> list[str]:
+        return self.service.query_record_uids_for_workbook(self.workbook_path, **self.filters)
+
+    def load_plantios(self, record: Compensacao) -> list[PlantioItem]:
+        return self.service.list_plantios_for_record(self.workbook_path, record.uid)
+
+
 class SqliteMirrorService:
-    def __init__(self, *, db_path: str | Path | None = None):
+    def __init__(
+        self,
+        *,
+        db_path: str | Path | None = None,
+        connection_settings: SqliteConnectionSettings | None = None,
+    ):
         self.db_path = Path(db_path) if db_path else resolve_data_path("state", DEFAULT_DB_NAME)
         ensure_dir(self.db_path.parent)
+        self.connection_manager = get_connection_manager(self.db_path, settings=connection_settings)
+        self.full_text_search_enabled = False
         self.initialize()
 
     def create_named_session(self, session_name: str) -> NamedSessionEntry:
@@ -194,7 +321,7 @@ class SqliteMirrorService:
         return self._row_to_named_session_entry(row)
 
     def list_named_sessions(self, *, limit: int = 200) -> list[NamedSessionEntry]:
-        with self._connect() as conn:
+        with self._connect(read_only=True) as conn:
             rows = conn.execute(
                 """
                 SELECT workbook_path, workbook_name, record_count, created_at, last_loaded_at, last_synced_at
@@ -211,7 +338,7 @@ class SqliteMirrorService:
         normalized_path = _normalize_path(session_path)
         if not normalized_path:
             return None
-        with self._connect() as conn:
+        with self._connect(read_only=True) as conn:
             row = conn.execute(
                 """
                 SELECT workbook_path, workbook_name, record_count, created_at, last_loaded_at, last_synced_at
@@ -392,6 +519,26 @@ class SqliteMirrorService:
                 current_version = 4
             if current_version == 4:
                 self._migrate_v4_to_v5(conn)
+                current_version = 5
+            if current_version == 5:
+                self._migrate_v5_to_v6(conn)
+                current_version = 6
+            if current_version == 6:
+                self._migrate_v6_to_v7(conn)
+                current_version = 7
+            if current_version == 7:
+                self._migrate_v7_to_v8(conn)
+            self.full_text_search_enabled = _ensure_trigram_index(
+                conn,
+                fts_table=RECORDS_FTS_TABLE,
+                content_table="records",
+                content_rowid="id",
+                column="search_blob_norm",
+            )
+            if not self.full_text_search_enabled:
+                logger.info("[SQLITE] FTS5 indisponivel; busca textual usara LIKE.")
+            if _ensure_workbook_aggregates(conn):
+                logger.info("[SQLITE] Tabela de agregados por planilha criada a partir dos registros existentes.")
             conn.execute(
                 """
                 INSERT INTO meta (key, value)
@@ -405,6 +552,8 @@ class SqliteMirrorService:
         self,
         workbook_path: str,
         records: Sequence[Compensacao],
+        *,
+        rebuild_indexes: bool = False,
     ) -> WorkbookSnapshotSummary:
         normalized_path = _normalize_path(workbook_path)
         if not normalized_path:
@@ -412,28 +561,15 @@ class SqliteMirrorService:
 
         synced_at = _utc_timestamp()
         source_mtime_ns, source_size = _read_workbook_file_identity(normalized_path)
-        inserted_records = 0
-        inserted_plantios = 0
 
         with self._connect() as conn:
             workbook_id = self._upsert_workbook(conn, normalized_path, synced_at)
-            conn.execute("DELETE FROM records WHERE workbook_id = ?", (workbook_id,))
-
-            for record in records:
-                cursor = conn.execute(
-                    self._record_insert_sql(),
-                    self._record_insert_params(
-                        workbook_id=workbook_id,
-                        record=record,
-                        synced_at=synced_at,
-                    ),
-                )
-                inserted_records += 1
-                record_id = int(cursor.lastrowid or 0)
-                if record_id <= 0:
-                    raise RuntimeError("Nao foi possivel persistir o registro no espelho SQLite.")
-
-                inserted_plantios += self._replace_record_plantios(conn, record_id=record_id, record=record)
+            diff = self._diff_workbook_snapshot(conn, workbook_id=workbook_id, records=records)
+            if rebuild_indexes:
+                self._drop_record_query_indexes(conn)
+            self._apply_snapshot_diff(conn, workbook_id=workbook_id, diff=diff, synced_at=synced_at)
+            if rebuild_indexes:
+                self._create_record_query_indexes(conn)
             summary = self._refresh_workbook_summary(
                 conn,
                 workbook_id=workbook_id,
@@ -444,13 +580,77 @@ class SqliteMirrorService:
             )
 
         logger.info(
-            "[SQLITE] Espelho sincronizado para %s com %s registro(s) e %s plantio(s).",
+            "[SQLITE] Espelho sincronizado para %s com %s registro(s) e %s plantio(s) "
+            "(%s inserido(s), %s atualizado(s), %s movido(s), %s removido(s)).",
+            normalized_path,
+            summary.record_count,
+            summary.plantio_count,
+            len(diff.inserts),
+            len(diff.updates),
+            len(diff.moves),
+            len(diff.deleted_ids),
+        )
+        return summary
+
+    def apply_workbook_changes(
+        self,
+        workbook_path: str,
+        upserts: Sequence[Compensacao],
+        deleted_uids: Sequence[str] = (),
+    ) -> WorkbookSnapshotSummary:
+        """Aplica no espelho apenas os registros alterados e removidos, sem tocar no resto."""
+        normalized_path = _normalize_path(workbook_path)
+        if not normalized_path:
+            raise ValueError("O caminho da planilha precisa ser informado para sincronizar o espelho local.")
+
+        synced_at = _utc_timestamp()
+        with self._connect() as conn:
+            workbook_id = self._upsert_workbook(conn, normalized_path, synced_at)
+            diff = self._diff_workbook_changes(
+                conn,
+                workbook_id=workbook_id,
+                records=upserts,
+                deleted_uids=deleted_uids,
+            )
+            self._apply_snapshot_diff(conn, workbook_id=workbook_id, diff=diff, synced_at=synced_at)
+            summary = self._refresh_workbook_summary(
+                conn,
+                workbook_id=workbook_id,
+                workbook_path=normalized_path,
+                synced_at=synced_at,
+            )
+
+        logger.info(
+            "[SQLITE] Alteracoes aplicadas em %s (%s inserido(s), %s atualizado(s), %s movido(s), %s removido(s)).",
             normalized_path,
-            inserted_records,
-            inserted_plantios,
+            len(diff.inserts),
+            len(diff.updates),
+            len(diff.moves),
+            len(diff.deleted_ids),
         )
         return summary
 
+    def read_meta_values(self, prefix: str) -> dict[str, str]:
+        with self._connect(read_only=True) as conn:
+            rows = conn.execute(
+                "SELECT key, value FROM meta WHERE substr(key, 1, ?) = ?",
+                (len(prefix), prefix),
+            ).fetchall()
+        return {str(row["key"]): str(row["value"] or "") for row in rows}
+
+    def write_meta_values(self, values: Mapping[str, str]) -> None:
+        if not values:
+            return
+        with self._connect() as conn:
+            conn.executemany(
+                """
+                INSERT INTO meta (key, value)
+                VALUES (?, ?)
+                ON CONFLICT(key) DO UPDATE SET value = excluded.value
+                """,
+                ((str(key), _stringify(value)) for key, value in values.items()),
+            )
+
     def append_record_to_workbook(
         self,
         workbook_path: str,
@@ -526,6 +726,8 @@ class SqliteMirrorService:
         self,
         workbook_path: str,
         record: Compensacao,
+        *,
+        shift_rows: bool = True,
     ) -> WorkbookSnapshotSummary:
         normalized_path = _normalize_path(workbook_path)
         if not normalized_path:
@@ -540,7 +742,7 @@ class SqliteMirrorService:
             record_id = int(record_row["id"] or 0)
             target_excel_row = int(record_row["excel_row"] or 0)
             conn.execute("DELETE FROM records WHERE id = ?", (record_id,))
-            if target_excel_row > 0:
+            if shift_rows and target_excel_row > 0:
                 conn.execute(
                     """
                     UPDATE records
@@ -618,7 +820,7 @@ class SqliteMirrorService:
         if not normalized_path:
             return []
 
-        with self._connect() as conn:
+        with self._connect(read_only=True) as conn:
             workbook_id = self._workbook_id_for_path(conn, normalized_path)
             if workbook_id is None:
                 return []
@@ -666,7 +868,7 @@ class SqliteMirrorService:
         if not normalized_path:
             return WorkbookSnapshotSummary("", "", 0, 0, 0)
 
-        with self._connect() as conn:
+        with self._connect(read_only=True) as conn:
             row = conn.execute(
                 """
                 SELECT id, last_synced_at, record_count, plantio_count, source_mtime_ns, source_size
@@ -694,7 +896,7 @@ class SqliteMirrorService:
         if not normalized_path:
             return []
 
-        with self._connect() as conn:
+        with self._connect(read_only=True) as conn:
             workbook_id = self._workbook_id_for_path(conn, normalized_path)
             if workbook_id is None:
                 return []
@@ -707,7 +909,7 @@ class SqliteMirrorService:
         if not normalized_path or not normalized_uid:
             return None
 
-        with self._connect() as conn:
+        with self._connect(read_only=True) as conn:
             workbook_id = self._workbook_id_for_path(conn, normalized_path)
             if workbook_id is None:
                 return None
@@ -731,7 +933,7 @@ class SqliteMirrorService:
         if not normalized_path or normalized_row <= 0:
             return None
 
-        with self._connect() as conn:
+        with self._connect(read_only=True) as conn:
             workbook_id = self._workbook_id_for_path(conn, normalized_path)
             if workbook_id is None:
                 return None
@@ -762,7 +964,7 @@ class SqliteMirrorService:
         if not normalized_path or not target_av_tec:
             return None
 
-        with self._connect() as conn:
+        with self._connect(read_only=True) as conn:
             workbook_id = self._workbook_id_for_path(conn, normalized_path)
             if workbook_id is None:
                 return None
@@ -789,7 +991,7 @@ class SqliteMirrorService:
             return WorkbookFilterFacets("", "", 0)
 
         snapshot = self.get_workbook_snapshot_summary(normalized_path)
-        with self._connect() as conn:
+        with self._connect(read_only=True) as conn:
             workbook_id = self._workbook_id_for_path(conn, normalized_path)
             if workbook_id is None:
                 return WorkbookFilterFacets(
@@ -840,12 +1042,13 @@ class SqliteMirrorService:
         selected_caixas: Sequence[str] = (),
         caixa_all_selected: bool = True,
         selected_year: str = "Todos",
+        rank_by_relevance: bool = False,
     ) -> list[Compensacao]:
         normalized_path = _normalize_path(workbook_path)
         if not normalized_path:
             return []
 
-        with self._connect() as conn:
+        with self._connect(read_only=True) as conn:
             workbook_id = self._workbook_id_for_path(conn, normalized_path)
             if workbook_id is None:
                 return []
@@ -870,8 +1073,193 @@ class SqliteMirrorService:
                 where_clause=where_clause,
                 params=params,
             )
+            if rank_by_relevance and record_rows:
+                positions = _rank_fts_rowids(
+                    conn,
+                    _split_search_terms(search_text),
+                    fts_table=self._records_fts_table(),
+                )
+                if positions:
+                    fallback_position = len(positions)
+                    record_rows.sort(key=lambda row: positions.get(int(row["id"]), fallback_position))
             return self._materialize_records(conn, record_rows)
 
+    def count_records_for_workbook(
+        self,
+        workbook_path: str,
+        *,
+        search_text: str = "",
+        status: str = "Todos",
+        selected_micros: Sequence[str] = (),
+        selected_eletronicos: Sequence[str] = (),
+        micro_all_selected: bool = True,
+        eletronico_all_selected: bool = True,
+        selected_caixas: Sequence[str] = (),
+        caixa_all_selected: bool = True,
+        selected_year: str = "Todos",
+    ) -> int:
+        normalized_path = _normalize_path(workbook_path)
+        if not normalized_path:
+            return 0
+
+        with self._connect(read_only=True) as conn:
+            workbook_id = self._workbook_id_for_path(conn, normalized_path)
+            if workbook_id is None:
+                return 0
+
+            where_clause, params = self._build_filtered_record_where_clause(
+                workbook_id=workbook_id,
+                search_text=search_text,
+                status=status,
+                selected_micros=selected_micros,
+                selected_eletronicos=selected_eletronicos,
+                micro_all_selected=micro_all_selected,
+                eletronico_all_selected=eletronico_all_selected,
+                selected_caixas=selected_caixas,
+                caixa_all_selected=caixa_all_selected,
+                selected_year=selected_year,
+            )
+            if where_clause is None:
+                return 0
+            if where_clause == "workbook_id = ?":
+                total_row = self._workbook_aggregate_total(conn, workbook_id)
+                return int((total_row["record_count"] if total_row is not None else 0) or 0)
+            row = conn.execute(f"SELECT COUNT(*) AS total FROM records WHERE {where_clause}", params).fetchone()
+        return int((row["total"] if row is not None else 0) or 0)
+
+    def query_record_page_for_workbook(
+        self,
+        workbook_path: str,
+        *,
+        after_excel_row: int = 0,
+        limit: int = DEFAULT_RECORD_PAGE_SIZE,
+        offset: int = 0,
+        sort_key: str = "",
+        descending: bool = False,
+        include_plantios: bool = False,
+        search_text: str = "",
+        status: str = "Todos",
+        selected_micros: Sequence[str] = (),
+        selected_eletronicos: Sequence[str] = (),
+        micro_all_selected: bool = True,
+        eletronico_all_selected: bool = True,
+        selected_caixas: Sequence[str] = (),
+        caixa_all_selected: bool = True,
+        selected_year: str = "Todos",
+    ) -> list[Compensacao]:
+        normalized_path = _normalize_path(workbook_path)
+        if not normalized_path or int(limit) <= 0:
+            return []
+
+        with self._connect(read_only=True) as conn:
+            workbook_id = self._workbook_id_for_path(conn, normalized_path)
+            if workbook_id is None:
+                return []
+
+            where_clause, params = self._build_filtered_record_where_clause(
+                workbook_id=workbook_id,
+                search_text=search_text,
+                status=status,
+                selected_micros=selected_micros,
+                selected_eletronicos=selected_eletronicos,
+                micro_all_selected=micro_all_selected,
+                eletronico_all_selected=eletronico_all_selected,
+                selected_caixas=selected_caixas,
+                caixa_all_selected=caixa_all_selected,
+                selected_year=selected_year,
+            )
+            if where_clause is None:
+                return []
+            sort_expression = RECORD_SORT_EXPRESSIONS.get(sort_key)
+            if sort_expression:
+                # Ordenado por coluna nao ha chave de excel_row; o salto vai direto pelo OFFSET.
+                direction = "DESC" if descending else "ASC"
+                record_rows = self._fetch_record_rows(
+                    conn,
+                    workbook_id=workbook_id,
+                    where_clause=where_clause,
+                    params=params,
+                    limit=int(limit),
+                    offset=int(offset),
+                    order_by=f"{sort_expression} {direction}, excel_row {direction}",
+                )
+            else:
+                record_rows = self._fetch_record_rows(
+                    conn,
+                    workbook_id=workbook_id,
+                    where_clause=f"{where_clause} AND excel_row > ?",
+                    params=(*params, int(after_excel_row)),
+                    limit=int(limit),
+                    offset=int(offset),
+                )
+            return self._materialize_records(conn, record_rows, include_plantios=include_plantios)
+
+    def query_record_uids_for_workbook(
+        self,
+        workbook_path: str,
+        *,
+        search_text: str = "",
+        status: str = "Todos",
+        selected_micros: Sequence[str] = (),
+        selected_eletronicos: Sequence[str] = (),
+        micro_all_selected: bool = True,
+        eletronico_all_selected: bool = True,
+        selected_caixas: Sequence[str] = (),
+        caixa_all_selected: bool = True,
+        selected_year: str = "Todos",
+    ) -> list[str]:
+        normalized_path = _normalize_path(workbook_path)
+        if not normalized_path:
+            return []
+
+        with self._connect(read_only=True) as conn:
+            workbook_id = self._workbook_id_for_path(conn, normalized_path)
+            if workbook_id is None:
+                return []
+
+            where_clause, params = self._build_filtered_record_where_clause(
+                workbook_id=workbook_id,
+                search_text=search_text,
+                status=status,
+                selected_micros=selected_micros,
+                selected_eletronicos=selected_eletronicos,
+                micro_all_selected=micro_all_selected,
+                eletronico_all_selected=eletronico_all_selected,
+                selected_caixas=selected_caixas,
+                caixa_all_selected=caixa_all_selected,
+                selected_year=selected_year,
+            )
+            if where_clause is None:
+                return []
+            rows = conn.execute(
+                f"SELECT uid FROM records WHERE {where_clause} ORDER BY excel_row ASC",
+                params,
+            ).fetchall()
+        return [str(row["uid"] or "") for row in rows]
+
+    def record_page_source_for_workbook(self, workbook_path: str, **filters: Any) -> WorkbookRecordPageSource:
+        return WorkbookRecordPageSource(service=self, workbook_path=workbook_path, filters=dict(filters))
+
+    def list_plantios_for_record(self, workbook_path: str, uid: str) -> list[PlantioItem]:
+        normalized_path = _normalize_path(workbook_path)
+        normalized_uid = _stringify(uid)
+        if not normalized_path or not normalized_uid:
+            return []
+
+        with self._connect(read_only=True) as conn:
+            rows = conn.execute(
+                """
+                SELECT plantios.sequence, plantios.endereco, plantios.qtd_mudas, plantios.latitude, plantios.longitude
+                FROM plantios
+                JOIN records ON records.id = plantios.record_id
+                JOIN workbooks ON workbooks.id = records.workbook_id
+                WHERE workbooks.workbook_path = ? AND records.uid = ?
+                ORDER BY plantios.sequence ASC
+                """,
+                (normalized_path, normalized_uid),
+            ).fetchall()
+        return [self._row_to_plantio(row) for row in rows]
+
     def query_metrics_for_workbook(
         self,
         workbook_path: str,
@@ -890,7 +1278,7 @@ class SqliteMirrorService:
         if not normalized_path:
             return self._empty_metrics()
 
-        with self._connect() as conn:
+        with self._connect(read_only=True) as conn:
             workbook_id = self._workbook_id_for_path(conn, normalized_path)
             if workbook_id is None:
                 return self._empty_metrics()
@@ -910,68 +1298,15 @@ class SqliteMirrorService:
             if where_clause is None:
                 return self._empty_metrics()
 
-            value_expr = "CAST(REPLACE(TRIM(COALESCE(compensacao, '0')), ',', '.') AS REAL)"
-            counts_row = conn.execute(
-                f"""
-                SELECT
-                    COALESCE(SUM({value_expr}), 0.0) AS total_geral,
-                    COUNT(*) AS count_total,
-                    COALESCE(SUM(CASE WHEN UPPER(TRIM(compensado)) = 'SIM' THEN {value_expr} ELSE 0.0 END), 0.0) AS total_compensado,
-                    COALESCE(SUM(CASE WHEN UPPER(TRIM(compensado)) = 'SIM' THEN 0.0 ELSE {value_expr} END), 0.0) AS total_pendente,
-                    SUM(CASE WHEN UPPER(TRIM(compensado)) = 'SIM' THEN 1 ELSE 0 END) AS count_comp,
-                    SUM(CASE WHEN UPPER(TRIM(compensado)) = 'SIM' THEN 0 ELSE 1 END) AS count_pend
-                FROM records
-                WHERE {where_clause}
-                """,
-                params,
-            ).fetchone()
-            pend_micro_rows = conn.execute(
-                f"""
-                SELECT
-                    CASE
-                        WHEN TRIM(COALESCE(microbacia, '')) = '' THEN '(Sem microbacia)'
-                        ELSE TRIM(microbacia)
-                    END AS label,
-                    COALESCE(SUM({value_expr}), 0.0) AS total
-                FROM records
-                WHERE {where_clause} AND UPPER(TRIM(compensado)) != 'SIM'
-                GROUP BY label
-                ORDER BY total DESC, label ASC
-                """,
-                params,
-            ).fetchall()
-            pend_tipo_rows = conn.execute(
-                f"""
-                SELECT
-                    CASE
-                        WHEN TRIM(COALESCE(tipo_key, '')) = '' THEN 'NULO'
-                        ELSE TRIM(tipo_key)
-                    END AS tipo_key_value,
-                    COALESCE(SUM({value_expr}), 0.0) AS total
-                FROM records
-                WHERE {where_clause} AND UPPER(TRIM(compensado)) != 'SIM'
-                GROUP BY tipo_key_value
-                ORDER BY total DESC, tipo_key_value ASC
-                """,
-                params,
-            ).fetchall()
+            if where_clause == "workbook_id = ?":
+                # Sem filtros o painel sai direto da tabela de agregados.
+                aggregate_rows = self._workbook_aggregate_rows(conn, workbook_id)
+            else:
+                aggregate_rows = _rollup_filtered_aggregates(
+                    conn.execute(_filtered_aggregates_sql(where_clause), params).fetchall()
+                )
 
-        return {
-            "total_geral": float((counts_row["total_geral"] if counts_row is not None else 0.0) or 0.0),
-            "total_pendente": float((counts_row["total_pendente"] if counts_row is not None else 0.0) or 0.0),
-            "total_compensado": float((counts_row["total_compensado"] if counts_row is not None else 0.0) or 0.0),
-            "count_total": int((counts_row["count_total"] if counts_row is not None else 0) or 0),
-            "count_comp": int((counts_row["count_comp"] if counts_row is not None else 0) or 0),
-            "count_pend": int((counts_row["count_pend"] if counts_row is not None else 0) or 0),
-            "pend_micro_sorted": [
-                (str(row["label"] or ""), float(row["total"] or 0.0))
-                for row in pend_micro_rows
-            ],
-            "pend_ele_sorted": [
-                (display_tipo_value(str(row["tipo_key_value"] or "")), float(row["total"] or 0.0))
-                for row in pend_tipo_rows
-            ],
-        }
+        return self._metrics_from_aggregate_rows(aggregate_rows)
 
     def build_workbook_diagnostics(
         self,
@@ -994,7 +1329,7 @@ class SqliteMirrorService:
             )
 
         snapshot = self.get_workbook_snapshot_summary(normalized_path)
-        with self._connect() as conn:
+        with self._connect(read_only=True) as conn:
             workbook_id = self._workbook_id_for_path(conn, normalized_path)
             if workbook_id is None:
                 return WorkbookMirrorDiagnostics(
@@ -1008,32 +1343,12 @@ class SqliteMirrorService:
                     pendentes_count=0,
                 )
 
-            counts_row = conn.execute(
-                """
-                SELECT
-                    SUM(CASE WHEN UPPER(TRIM(compensado)) = 'SIM' THEN 1 ELSE 0 END) AS compensados_count,
-                    SUM(CASE WHEN UPPER(TRIM(compensado)) = 'SIM' THEN 0 ELSE 1 END) AS pendentes_count
-                FROM records
-                WHERE workbook_id = ?
-                """,
-                (workbook_id,),
-            ).fetchone()
-            microbacias_rows = conn.execute(
-                """
-                SELECT
-                    CASE
-                        WHEN TRIM(COALESCE(microbacia, '')) = '' THEN '(sem microbacia)'
-                        ELSE TRIM(microbacia)
-                    END AS microbacia_label,
-                    COUNT(*) AS total
-                FROM records
-                WHERE workbook_id = ?
-                GROUP BY microbacia_label
-                ORDER BY total DESC, microbacia_label ASC
-                LIMIT ?
-                """,
-                (workbook_id, max(int(top_microbacias_limit), 0)),
-            ).fetchall()
+            counts_row = self._workbook_aggregate_total(conn, workbook_id)
+            microbacias_rows = self._top_microbacia_aggregate_rows(
+                conn,
+                workbook_id,
+                limit=top_microbacias_limit,
+            )
             recent_audit_rows = conn.execute(
                 """
                 SELECT timestamp, action, summary
@@ -1091,7 +1406,7 @@ class SqliteMirrorService:
             )
 
         snapshot = self.get_workbook_snapshot_summary(normalized_path)
-        with self._connect() as conn:
+        with self._connect(read_only=True) as conn:
             workbook_id = self._workbook_id_for_path(conn, normalized_path)
             if workbook_id is None:
                 return WorkbookRecordOverview(
@@ -1105,25 +1420,7 @@ class SqliteMirrorService:
                     records_without_coordinates_count=0,
                 )
 
-            counts_row = conn.execute(
-                """
-                SELECT
-                    COUNT(*) AS total_records,
-                    SUM(CASE WHEN UPPER(TRIM(compensado)) = 'SIM' THEN 1 ELSE 0 END) AS compensados_count,
-                    SUM(CASE WHEN UPPER(TRIM(compensado)) = 'SIM' THEN 0 ELSE 1 END) AS pendentes_count,
-                    SUM(CASE WHEN TRIM(COALESCE(microbacia, '')) = '' THEN 1 ELSE 0 END) AS without_microbacia_count,
-                    SUM(
-                        CASE
-                            WHEN TRIM(COALESCE(latitude, '')) = '' OR TRIM(COALESCE(longitude, '')) = ''
-                            THEN 1
-                            ELSE 0
-                        END
-                    ) AS without_coordinates_count
-                FROM records
-                WHERE workbook_id = ?
-                """,
-                (workbook_id,),
-            ).fetchone()
+            counts_row = self._workbook_aggregate_total(conn, workbook_id)
             records_with_plantios_row = conn.execute(
                 """
                 SELECT COUNT(DISTINCT records.id) AS total
@@ -1133,22 +1430,11 @@ class SqliteMirrorService:
                 """,
                 (workbook_id,),
             ).fetchone()
-            microbacias_rows = conn.execute(
-                """
-                SELECT
-                    CASE
-                        WHEN TRIM(COALESCE(microbacia, '')) = '' THEN '(sem microbacia)'
-                        ELSE TRIM(microbacia)
-                    END AS microbacia_label,
-                    COUNT(*) AS total
-                FROM records
-                WHERE workbook_id = ?
-                GROUP BY microbacia_label
-                ORDER BY total DESC, microbacia_label ASC
-                LIMIT ?
-                """,
-                (workbook_id, max(int(top_microbacias_limit), 0)),
-            ).fetchall()
+            microbacias_rows = self._top_microbacia_aggregate_rows(
+                conn,
+                workbook_id,
+                limit=top_microbacias_limit,
+            )
             sample_rows = conn.execute(
                 """
                 SELECT
@@ -1189,7 +1475,7 @@ class SqliteMirrorService:
         return WorkbookRecordOverview(
             workbook_path=snapshot.workbook_path or normalized_path,
             synced_at=snapshot.synced_at,
-            total_records=int((counts_row["total_records"] if counts_row is not None else 0) or 0),
+            total_records=int((counts_row["record_count"] if counts_row is not None else 0) or 0),
             compensados_count=int((counts_row["compensados_count"] if counts_row is not None else 0) or 0),
             pendentes_count=int((counts_row["pendentes_count"] if counts_row is not None else 0) or 0),
             records_with_plantios_count=int(
@@ -1265,15 +1551,19 @@ class SqliteMirrorService:
         self,
         session_path: str,
         record: Compensacao,
+        *,
+        shift_rows: bool = True,
     ) -> SessionSnapshotSummary:
-        return self.delete_record_from_workbook(session_path, record)
+        return self.delete_record_from_workbook(session_path, record, shift_rows=shift_rows)
 
     def delete_record_from_local_workspace(
         self,
         workspace_path: str,
         record: Compensacao,
+        *,
+        shift_rows: bool = True,
     ) -> LocalWorkspaceSnapshotSummary:
-        return self.delete_record_from_workbook(workspace_path, record)
+        return self.delete_record_from_workbook(workspace_path, record, shift_rows=shift_rows)
 
     def list_audit_event_payloads_for_session(
         self,
@@ -1540,16 +1830,19 @@ class SqliteMirrorService:
         clauses = ["workbook_id = ?"]
         params: list[object] = [workbook_id]
 
-        search_query = _stringify(search_text)
-        if search_query:
-            clauses.append("search_blob_norm LIKE ?")
-            params.append(f"%{remove_accents(search_query).lower()}%")
+        search_clauses, search_params = _build_search_clauses(
+            _split_search_terms(search_text),
+            fts_table=self._records_fts_table(),
+            rowid_column="id",
+        )
+        clauses.extend(search_clauses)
+        params.extend(search_params)
 
         normalized_status = _stringify(status)
         if normalized_status == "Compensados":
-            clauses.append("UPPER(TRIM(compensado)) = 'SIM'")
+            clauses.append("is_compensado = 1")
         elif normalized_status == "Pendentes":
-            clauses.append("UPPER(TRIM(compensado)) != 'SIM'")
+            clauses.append("is_compensado = 0")
 
         normalized_year = _stringify(selected_year)
         if normalized_year and normalized_year != "Todos":
@@ -1573,15 +1866,107 @@ class SqliteMirrorService:
             params.extend(tipo_keys)
 
         if not caixa_all_selected:
-            caixa_keys = sorted({str(item or "").strip().upper() for item in selected_caixas if _stringify(item)})
+            caixa_keys = sorted({safe_upper(item) for item in selected_caixas if _stringify(item)})
             if not caixa_keys:
                 return None, ()
             placeholders = ",".join("?" for _ in caixa_keys)
-            clauses.append(f"UPPER(TRIM(COALESCE(caixa, ''))) IN ({placeholders})")
+            clauses.append(f"caixa_key IN ({placeholders})")
             params.extend(caixa_keys)
 
         return " AND ".join(clauses), tuple(params)
 
+    def _records_fts_table(self) -> str | None:
+        return RECORDS_FTS_TABLE if getattr(self, "full_text_search_enabled", False) else None
+
+    @staticmethod
+    def _workbook_aggregate_rows(conn: sqlite3.Connection, workbook_id: int) -> list[sqlite3.Row]:
+        return conn.execute(
+            f"""
+            SELECT *
+            FROM {WORKBOOK_AGGREGATES_TABLE}
+            WHERE workbook_id = ?
+            """,
+            (workbook_id,),
+        ).fetchall()
+
+    @staticmethod
+    def _workbook_aggregate_total(conn: sqlite3.Connection, workbook_id: int) -> sqlite3.Row | None:
+        return conn.execute(
+            f"""
+            SELECT
+                total.record_count,
+                total.compensados_count,
+                total.record_count - total.compensados_count AS pendentes_count,
+                total.without_coordinates_count,
+                COALESCE(
+                    (
+                        SELECT micro.record_count
+                        FROM {WORKBOOK_AGGREGATES_TABLE} AS micro
+                        WHERE micro.workbook_id = total.workbook_id
+                          AND micro.dimension = ?
+                          AND micro.label = ''
+                    ),
+                    0
+                ) AS without_microbacia_count
+            FROM {WORKBOOK_AGGREGATES_TABLE} AS total
+            WHERE total.workbook_id = ? AND total.dimension = ? AND total.label = ''
+            """,
+            (AGGREGATE_DIMENSION_MICROBACIA, workbook_id, AGGREGATE_DIMENSION_TOTAL),
+        ).fetchone()
+
+    @staticmethod
+    def _top_microbacia_aggregate_rows(
+        conn: sqlite3.Connection,
+        workbook_id: int,
+        *,
+        limit: int,
+    ) -> list[sqlite3.Row]:
+        return conn.execute(
+            f"""
+            SELECT
+                CASE WHEN label = '' THEN '(sem microbacia)' ELSE label END AS microbacia_label,
+                record_count AS total
+            FROM {WORKBOOK_AGGREGATES_TABLE}
+            WHERE workbook_id = ? AND dimension = ?
+            ORDER BY total DESC, microbacia_label ASC
+            LIMIT ?
+            """,
+            (workbook_id, AGGREGATE_DIMENSION_MICROBACIA, max(int(limit), 0)),
+        ).fetchall()
+
+    @staticmethod
+    def _metrics_from_aggregate_rows(rows: Sequence[Any]) -> dict[str, object]:
+        metrics = SqliteMirrorService._empty_metrics()
+        pend_micro: list[tuple[str, float]] = []
+        pend_tipo: list[tuple[str, float]] = []
+        for row in rows:
+            record_count = int(row["record_count"] or 0)
+            compensados_count = int(row["compensados_count"] or 0)
+            compensado_value = _aggregate_value(row["compensado_cents"])
+            pendente_value = _aggregate_value(row["pendente_cents"])
+            dimension = str(row["dimension"] or "")
+            label = str(row["label"] or "")
+            if dimension == AGGREGATE_DIMENSION_TOTAL:
+                metrics.update(
+                    total_geral=compensado_value + pendente_value,
+                    total_pendente=pendente_value,
+                    total_compensado=compensado_value,
+                    count_total=record_count,
+                    count_comp=compensados_count,
+                    count_pend=record_count - compensados_count,
+                )
+            elif record_count <= compensados_count:
+                continue
+            elif dimension == AGGREGATE_DIMENSION_MICROBACIA:
+                pend_micro.append((label or "(Sem microbacia)", pendente_value))
+            elif dimension == AGGREGATE_DIMENSION_TIPO:
+                pend_tipo.append((label or "NULO", pendente_value))
+        pend_micro.sort(key=lambda item: (-item[1], item[0]))
+        pend_tipo.sort(key=lambda item: (-item[1], item[0]))
+        metrics["pend_micro_sorted"] = pend_micro
+        metrics["pend_ele_sorted"] = [(display_tipo_value(tipo_key), total) for tipo_key, total in pend_tipo]
+        return metrics
+
     @staticmethod
     def _empty_metrics() -> dict[str, object]:
         return {
@@ -1602,8 +1987,15 @@ class SqliteMirrorService:
         workbook_id: int,
         where_clause: str = "workbook_id = ?",
         params: Sequence[object] = (),
+        limit: int | None = None,
+        offset: int = 0,
+        order_by: str = "excel_row ASC",
     ) -> list[sqlite3.Row]:
         effective_params = tuple(params) if params else (workbook_id,)
+        limit_clause = ""
+        if limit is not None:
+            limit_clause = "LIMIT ? OFFSET ?"
+            effective_params = (*effective_params, int(limit), max(int(offset), 0))
         return list(
             conn.execute(
                 f"""
@@ -1627,7 +2019,8 @@ class SqliteMirrorService:
                     updated_at
                 FROM records
                 WHERE {where_clause}
-                ORDER BY excel_row ASC
+                ORDER BY {order_by}
+                {limit_clause}
                 """,
                 effective_params,
             ).fetchall()
@@ -1637,40 +2030,34 @@ class SqliteMirrorService:
         self,
         conn: sqlite3.Connection,
         record_rows: Sequence[sqlite3.Row],
+        *,
+        include_plantios: bool = True,
     ) -> list[Compensacao]:
         if not record_rows:
             return []
 
-        record_ids = [int(row["id"]) for row in record_rows]
-        placeholders = ",".join("?" for _ in record_ids)
-        plantio_rows = conn.execute(
-            f"""
-            SELECT
-                record_id,
-                sequence,
-                endereco,
-                qtd_mudas,
-                latitude,
-                longitude
-            FROM plantios
-            WHERE record_id IN ({placeholders})
-            ORDER BY record_id ASC, sequence ASC
-            """,
-            record_ids,
-        ).fetchall()
-
         plantios_by_record: dict[int, list[PlantioItem]] = {}
-        for row in plantio_rows:
-            record_id = int(row["record_id"] or 0)
-            plantios_by_record.setdefault(record_id, []).append(
-                PlantioItem(
-                    sequence=int(row["sequence"] or 0),
-                    endereco=_stringify(row["endereco"]),
-                    qtd_mudas=_stringify(row["qtd_mudas"]),
-                    latitude=_stringify(row["latitude"]),
-                    longitude=_stringify(row["longitude"]),
-                )
-            )
+        if include_plantios:
+            record_ids = [int(row["id"]) for row in record_rows]
+            placeholders = ",".join("?" for _ in record_ids)
+            plantio_rows = conn.execute(
+                f"""
+                SELECT
+                    record_id,
+                    sequence,
+                    endereco,
+                    qtd_mudas,
+                    latitude,
+                    longitude
+                FROM plantios
+                WHERE record_id IN ({placeholders})
+                ORDER BY record_id ASC, sequence ASC
+                """,
+                record_ids,
+            ).fetchall()
+            for row in plantio_rows:
+                record_id = int(row["record_id"] or 0)
+                plantios_by_record.setdefault(record_id, []).append(self._row_to_plantio(row))
 
         return [
             Compensacao(
@@ -1695,6 +2082,16 @@ class SqliteMirrorService:
             for row in record_rows
         ]
 
+    @staticmethod
+    def _row_to_plantio(row: sqlite3.Row) -> PlantioItem:
+        return PlantioItem(
+            sequence=int(row["sequence"] or 0),
+            endereco=_stringify(row["endereco"]),
+            qtd_mudas=_stringify(row["qtd_mudas"]),
+            latitude=_stringify(row["latitude"]),
+            longitude=_stringify(row["longitude"]),
+        )
+
     @staticmethod
     def _record_insert_sql() -> str:
         return """
@@ -1720,8 +2117,12 @@ class SqliteMirrorService:
                 longitude,
                 updated_at,
                 search_blob_norm,
+                compensacao_value,
+                is_compensado,
+                caixa_key,
+                content_hash,
                 synced_at
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
         """
 
     def _record_insert_params(
@@ -1730,9 +2131,66 @@ class SqliteMirrorService:
         workbook_id: int,
         record: Compensacao,
         synced_at: str,
+        content_hash: str | None = None,
     ) -> tuple[object, ...]:
         return (
             workbook_id,
+            *self._record_column_values(record),
+            content_hash if content_hash is not None else _record_content_hash(record),
+            synced_at,
+        )
+
+    @staticmethod
+    def _record_update_sql() -> str:
+        return """
+            UPDATE records
+            SET
+                uid = ?,
+                excel_row = ?,
+                oficio_processo = ?,
+                oficio_year = ?,
+                eletronico = ?,
+                tipo_key = ?,
+                caixa = ?,
+                av_tec = ?,
+                compensacao = ?,
+                endereco = ?,
+                microbacia = ?,
+                microbacia_key = ?,
+                compensado = ?,
+                endereco_plantio = ?,
+                latitude_plantio = ?,
+                longitude_plantio = ?,
+                latitude = ?,
+                longitude = ?,
+                updated_at = ?,
+                search_blob_norm = ?,
+                compensacao_value = ?,
+                is_compensado = ?,
+                caixa_key = ?,
+                content_hash = ?,
+                synced_at = ?
+            WHERE id = ?
+        """
+
+    def _record_update_params(
+        self,
+        *,
+        record_id: int,
+        record: Compensacao,
+        synced_at: str,
+        content_hash: str | None = None,
+    ) -> tuple[object, ...]:
+        return (
+            *self._record_column_values(record),
+            content_hash if content_hash is not None else _record_content_hash(record),
+            synced_at,
+            record_id,
+        )
+
+    @staticmethod
+    def _record_column_values(record: Compensacao) -> tuple[object, ...]:
+        return (
             _stringify(record.uid),
             int(record.excel_row),
             _stringify(record.oficio_processo),
@@ -1753,7 +2211,7 @@ class SqliteMirrorService:
             _stringify(record.longitude),
             _stringify(record.updated_at),
             build_search_blob(record),
-            synced_at,
+            *_record_typed_values(record),
         )
 
     def _insert_record(
@@ -1786,30 +2244,56 @@ class SqliteMirrorService:
         record: Compensacao,
     ) -> int:
         conn.execute("DELETE FROM plantios WHERE record_id = ?", (record_id,))
-        inserted = 0
-        for plantio in record_plantio_items(record):
-            conn.execute(
-                """
-                INSERT INTO plantios (
-                    record_id,
-                    sequence,
-                    endereco,
-                    qtd_mudas,
-                    latitude,
-                    longitude
-                ) VALUES (?, ?, ?, ?, ?, ?)
-                """,
-                (
-                    record_id,
-                    int(plantio.sequence),
-                    _stringify(plantio.endereco),
-                    _stringify(plantio.qtd_mudas),
-                    _stringify(plantio.latitude),
-                    _stringify(plantio.longitude),
-                ),
+        plantio_params = self._plantio_insert_params(record_id=record_id, record=record)
+        if plantio_params:
+            conn.executemany(self._plantio_insert_sql(), plantio_params)
+        return len(plantio_params)
+
+    @staticmethod
+    def _plantio_insert_sql() -> str:
+        return """
+            INSERT INTO plantios (
+                record_id,
+                sequence,
+                endereco,
+                qtd_mudas,
+                latitude,
+                longitude
+            ) VALUES (?, ?, ?, ?, ?, ?)
+        """
+
+    @staticmethod
+    def _plantio_insert_params(*, record_id: int, record: Compensacao) -> list[tuple[object, ...]]:
+        return [
+            (
+                record_id,
+                int(plantio.sequence),
+                _stringify(plantio.endereco),
+                _stringify(plantio.qtd_mudas),
+                _stringify(plantio.latitude),
+                _stringify(plantio.longitude),
             )
-            inserted += 1
-        return inserted
+            for plantio in record_plantio_items(record)
+        ]
+
+    @staticmethod
+    def _record_ids_inserted_after(conn: sqlite3.Connection, *, workbook_id: int, after_id: int) -> dict[str, int]:
+        # AUTOINCREMENT nunca reaproveita ids: o que passou de after_id acabou de entrar.
+        rows = conn.execute(
+            "SELECT id, uid FROM records WHERE id > ? AND workbook_id = ?",
+            (after_id, workbook_id),
+        ).fetchall()
+        return {str(row["uid"] or "").lower(): int(row["id"] or 0) for row in rows}
+
+    @staticmethod
+    def _drop_record_query_indexes(conn: sqlite3.Connection) -> None:
+        for index_name, _ in RECORD_QUERY_INDEXES:
+            conn.execute(f"DROP INDEX IF EXISTS {index_name}")
+
+    @staticmethod
+    def _create_record_query_indexes(conn: sqlite3.Connection) -> None:
+        for index_name, index_target in RECORD_QUERY_INDEXES:
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {index_name} ON {index_target}")
 
     def _update_record(
         self,
@@ -1820,59 +2304,187 @@ class SqliteMirrorService:
         synced_at: str,
     ) -> None:
         conn.execute(
-            """
-            UPDATE records
-            SET
-                uid = ?,
-                excel_row = ?,
-                oficio_processo = ?,
-                oficio_year = ?,
-                eletronico = ?,
-                tipo_key = ?,
-                caixa = ?,
-                av_tec = ?,
-                compensacao = ?,
-                endereco = ?,
-                microbacia = ?,
-                microbacia_key = ?,
-                compensado = ?,
-                endereco_plantio = ?,
-                latitude_plantio = ?,
-                longitude_plantio = ?,
-                latitude = ?,
-                longitude = ?,
-                updated_at = ?,
-                search_blob_norm = ?,
-                synced_at = ?
-            WHERE id = ?
-            """,
-            (
-                _stringify(record.uid),
-                int(record.excel_row),
-                _stringify(record.oficio_processo),
-                _stringify(extract_year(record.oficio_processo)),
-                _stringify(record.eletronico),
-                normalize_tipo_key(display_tipo_value(record.eletronico)),
-                _stringify(record.caixa),
-                _stringify(record.av_tec),
-                _stringify(record.compensacao),
-                _stringify(record.endereco),
-                _stringify(record.microbacia),
-                _microbacia_key(record.microbacia),
-                _stringify(record.compensado),
-                _stringify(record.endereco_plantio),
-                _stringify(record.latitude_plantio),
-                _stringify(record.longitude_plantio),
-                _stringify(record.latitude),
-                _stringify(record.longitude),
-                _stringify(record.updated_at),
-                build_search_blob(record),
-                synced_at,
-                record_id,
-            ),
+            self._record_update_sql(),
+            self._record_update_params(record_id=record_id, record=record, synced_at=synced_at),
         )
         self._replace_record_plantios(conn, record_id=record_id, record=record)
 
+    def _diff_workbook_snapshot(
+        self,
+        conn: sqlite3.Connection,
+        *,
+        workbook_id: int,
+        records: Sequence[Compensacao],
+    ) -> SnapshotDiff:
+        # uid e COLLATE NOCASE no schema; a chave do mapa precisa seguir a mesma regra.
+        existing_by_uid = {
+            str(row["uid"] or "").lower(): (
+                int(row["id"] or 0),
+                int(row["excel_row"] or 0),
+                str(row["content_hash"] or ""),
+            )
+            for row in conn.execute(
+                "SELECT id, uid, excel_row, content_hash FROM records WHERE workbook_id = ?",
+                (workbook_id,),
+            ).fetchall()
+        }
+
+        inserts: list[tuple[Compensacao, str]] = []
+        updates: list[tuple[int, Compensacao, str]] = []
+        moves: list[tuple[int, int]] = []
+        parked_ids: list[int] = []
+        for record in records:
+            content_hash = _record_content_hash(record)
+            existing = existing_by_uid.pop(_stringify(record.uid).lower(), None)
+            if existing is None:
+                inserts.append((record, content_hash))
+                continue
+            record_id, stored_excel_row, stored_hash = existing
+            target_excel_row = int(record.excel_row)
+            if target_excel_row != stored_excel_row:
+                parked_ids.append(record_id)
+            if stored_hash != content_hash:
+                updates.append((record_id, record, content_hash))
+            elif target_excel_row != stored_excel_row:
+                moves.append((target_excel_row, record_id))
+
+        return SnapshotDiff(
+            inserts=tuple(inserts),
+            updates=tuple(updates),
+            moves=tuple(moves),
+            deleted_ids=tuple(record_id for record_id, _, _ in existing_by_uid.values()),
+            parked_ids=tuple(parked_ids),
+        )
+
+    def _diff_workbook_changes(
+        self,
+        conn: sqlite3.Connection,
+        *,
+        workbook_id: int,
+        records: Sequence[Compensacao],
+        deleted_uids: Sequence[str],
+    ) -> SnapshotDiff:
+        upserts_by_uid = {_stringify(record.uid).lower(): record for record in records if _stringify(record.uid)}
+        lookup_uids = list(dict.fromkeys([*upserts_by_uid, *(_stringify(uid).lower() for uid in deleted_uids)]))
+        existing_by_uid: dict[str, tuple[int, int, str]] = {}
+        for start in range(0, len(lookup_uids), 500):
+            chunk = lookup_uids[start : start + 500]
+            rows = conn.execute(
+                f"""
+                SELECT id, uid, excel_row, content_hash
+                FROM records
+                WHERE workbook_id = ? AND uid IN ({", ".join("?" for _ in chunk)})
+                """,
+                (workbook_id, *chunk),
+            ).fetchall()
+            for row in rows:
+                existing_by_uid[str(row["uid"] or "").lower()] = (
+                    int(row["id"] or 0),
+                    int(row["excel_row"] or 0),
+                    str(row["content_hash"] or ""),
+                )
+
+        deleted_ids = [
+            existing_by_uid[uid][0]
+            for uid in dict.fromkeys(_stringify(uid).lower() for uid in deleted_uids)
+            if uid in existing_by_uid and uid not in upserts_by_uid
+        ]
+        inserts: list[tuple[Compensacao, str]] = []
+        updates: list[tuple[int, Compensacao, str]] = []
+        moves: list[tuple[int, int]] = []
+        parked_ids: list[int] = []
+        for uid, record in upserts_by_uid.items():
+            content_hash = _record_content_hash(record)
+            existing = existing_by_uid.get(uid)
+            if existing is None:
+                inserts.append((record, content_hash))
+                continue
+            record_id, stored_excel_row, stored_hash = existing
+            target_excel_row = int(record.excel_row)
+            if target_excel_row != stored_excel_row:
+                parked_ids.append(record_id)
+            if stored_hash != content_hash:
+                updates.append((record_id, record, content_hash))
+            elif target_excel_row != stored_excel_row:
+                moves.append((target_excel_row, record_id))
+
+        return SnapshotDiff(
+            inserts=tuple(inserts),
+            updates=tuple(updates),
+            moves=tuple(moves),
+            deleted_ids=tuple(deleted_ids),
+            parked_ids=tuple(parked_ids),
+        )
+
+    def _apply_snapshot_diff(
+        self,
+        conn: sqlite3.Connection,
+        *,
+        workbook_id: int,
+        diff: SnapshotDiff,
+        synced_at: str,
+    ) -> None:
+        if diff.is_empty:
+            return
+
+        if diff.deleted_ids:
+            conn.executemany("DELETE FROM records WHERE id = ?", ((record_id,) for record_id in diff.deleted_ids))
+        # Linhas que mudam de posicao saem temporariamente do intervalo valido
+        # para que a restricao (workbook_id, excel_row) nao colida no meio do deslocamento.
+        if diff.parked_ids:
+            conn.executemany(
+                "UPDATE records SET excel_row = -id WHERE id = ?",
+                ((record_id,) for record_id in diff.parked_ids),
+            )
+        if diff.moves:
+            conn.executemany(
+                "UPDATE records SET excel_row = ?, synced_at = ? WHERE id = ?",
+                ((excel_row, synced_at, record_id) for excel_row, record_id in diff.moves),
+            )
+        if diff.updates:
+            conn.executemany(
+                self._record_update_sql(),
+                (
+                    self._record_update_params(
+                        record_id=record_id,
+                        record=record,
+                        synced_at=synced_at,
+                        content_hash=content_hash,
+                    )
+                    for record_id, record, content_hash in diff.updates
+                ),
+            )
+            conn.executemany(
+                "DELETE FROM plantios WHERE record_id = ?",
+                ((record_id,) for record_id, _, _ in diff.updates),
+            )
+
+        plantio_params: list[tuple[object, ...]] = []
+        for record_id, record, _ in diff.updates:
+            plantio_params.extend(self._plantio_insert_params(record_id=record_id, record=record))
+        if diff.inserts:
+            last_id = int(conn.execute("SELECT COALESCE(MAX(id), 0) FROM records").fetchone()[0] or 0)
+            conn.executemany(
+                self._record_insert_sql(),
+                (
+                    self._record_insert_params(
+                        workbook_id=workbook_id,
+                        record=record,
+                        synced_at=synced_at,
+                        content_hash=content_hash,
+                    )
+                    for record, content_hash in diff.inserts
+                ),
+            )
+            record_ids = self._record_ids_inserted_after(conn, workbook_id=workbook_id, after_id=last_id)
+            for record, _ in diff.inserts:
+                record_id = record_ids.get(_stringify(record.uid).lower(), 0)
+                if record_id <= 0:
+                    raise RuntimeError("Nao foi possivel persistir o registro no espelho SQLite.")
+                plantio_params.extend(self._plantio_insert_params(record_id=record_id, record=record))
+        if plantio_params:
+            conn.executemany(self._plantio_insert_sql(), plantio_params)
+
     def _find_record_row_for_mutation(
         self,
         conn: sqlite3.Connection,
@@ -1979,20 +2591,10 @@ class SqliteMirrorService:
         )
 
     @contextmanager
-    def _connect(self) -> Iterator[sqlite3.Connection]:
-        conn = sqlite3.connect(str(self.db_path), timeout=30)
-        try:
-            conn.row_factory = sqlite3.Row
-            conn.execute("PRAGMA foreign_keys = ON")
-            conn.execute("PRAGMA journal_mode = WAL")
-            conn.execute("PRAGMA synchronous = NORMAL")
+    def _connect(self, *, read_only: bool = False) -> Iterator[sqlite3.Connection]:
+        connection = self.connection_manager.reader() if read_only else self.connection_manager.writer()
+        with connection as conn:
             yield conn
-            conn.commit()
-        except Exception:
-            conn.rollback()
-            raise
-        finally:
-            conn.close()
 
     def _schema_version(self, conn: sqlite3.Connection) -> int:
         row = conn.execute(
@@ -2047,7 +2649,12 @@ class SqliteMirrorService:
                 longitude TEXT NOT NULL DEFAULT '',
                 updated_at TEXT NOT NULL DEFAULT '',
                 search_blob_norm TEXT NOT NULL DEFAULT '',
+                compensacao_value REAL NOT NULL DEFAULT 0,
+                is_compensado INTEGER NOT NULL DEFAULT 0,
+                caixa_key TEXT NOT NULL DEFAULT '',
+                content_hash TEXT NOT NULL DEFAULT '',
                 synced_at TEXT NOT NULL,
+                modified_at TEXT NOT NULL DEFAULT '',
                 FOREIGN KEY (workbook_id) REFERENCES workbooks(id) ON DELETE CASCADE,
                 CONSTRAINT uq_records_workbook_uid UNIQUE (workbook_id, uid),
                 CONSTRAINT uq_records_workbook_row UNIQUE (workbook_id, excel_row)
@@ -2088,11 +2695,8 @@ class SqliteMirrorService:
             )
             """
         )
-        conn.execute("CREATE INDEX IF NOT EXISTS idx_records_workbook_row ON records(workbook_id, excel_row)")
-        conn.execute("CREATE INDEX IF NOT EXISTS idx_records_workbook_av_tec ON records(workbook_id, av_tec)")
-        conn.execute("CREATE INDEX IF NOT EXISTS idx_records_workbook_year ON records(workbook_id, oficio_year)")
-        conn.execute("CREATE INDEX IF NOT EXISTS idx_records_workbook_tipo_key ON records(workbook_id, tipo_key)")
-        conn.execute("CREATE INDEX IF NOT EXISTS idx_records_workbook_micro_key ON records(workbook_id, microbacia_key)")
+        self._create_record_query_indexes(conn)
+        self._create_record_modified_at_triggers(conn)
         conn.execute("CREATE INDEX IF NOT EXISTS idx_plantios_record_sequence ON plantios(record_id, sequence)")
         conn.execute("CREATE INDEX IF NOT EXISTS idx_audit_events_workbook_timestamp ON audit_events(workbook_id, timestamp DESC)")
 
@@ -2210,6 +2814,73 @@ class SqliteMirrorService:
         logger.info("[SQLITE] Migrando espelho local do schema v4 para v5.")
         conn.execute("ALTER TABLE records ADD COLUMN updated_at TEXT NOT NULL DEFAULT ''")
 
+    def _migrate_v5_to_v6(self, conn: sqlite3.Connection) -> None:
+        logger.info("[SQLITE] Migrando espelho local do schema v5 para v6.")
+        conn.execute("ALTER TABLE records ADD COLUMN content_hash TEXT NOT NULL DEFAULT ''")
+
+    def _migrate_v6_to_v7(self, conn: sqlite3.Connection) -> None:
+        logger.info("[SQLITE] Migrando espelho local do schema v6 para v7.")
+        existing_columns = {str(row["name"]) for row in conn.execute("PRAGMA table_info(records)").fetchall()}
+        for column_name, column_definition in RECORD_TYPED_COLUMNS:
+            if column_name not in existing_columns:
+                conn.execute(f"ALTER TABLE records ADD COLUMN {column_name} {column_definition}")
+        rows = conn.execute("SELECT id, compensacao, compensado, caixa FROM records").fetchall()
+        conn.executemany(
+            """
+            UPDATE records
+            SET compensacao_value = ?, is_compensado = ?, caixa_key = ?
+            WHERE id = ?
+            """,
+            [
+                (
+                    _sql_real_value(row["compensacao"]),
+                    1 if safe_upper(row["compensado"]) == "SIM" else 0,
+                    safe_upper(row["caixa"]),
+                    int(row["id"]),
+                )
+                for row in rows
+            ],
+        )
+        self._create_record_query_indexes(conn)
+
+    def _migrate_v7_to_v8(self, conn: sqlite3.Connection) -> None:
+        logger.info("[SQLITE] Migrando espelho local do schema v7 para v8.")
+        existing_columns = {str(row["name"]) for row in conn.execute("PRAGMA table_info(records)").fetchall()}
+        if "modified_at" not in existing_columns:
+            conn.execute("ALTER TABLE records ADD COLUMN modified_at TEXT NOT NULL DEFAULT ''")
+        # Sem historico melhor, a ultima sincronizacao da linha vale como ultima alteracao.
+        conn.execute(
+            f"""
+            UPDATE records
+            SET modified_at = COALESCE(
+                strftime('%Y-%m-%dT%H:%M:%f000+00:00', synced_at),
+                {RECORD_MODIFIED_AT_SQL}
+            )
+            WHERE modified_at = ''
+            """
+        )
+        self._create_record_modified_at_triggers(conn)
+
+    @staticmethod
+    def _create_record_modified_at_triggers(conn: sqlite3.Connection) -> None:
+        conn.execute(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS records_modified_at_ai AFTER INSERT ON records
+            WHEN new.modified_at = '' BEGIN
+                UPDATE records SET modified_at = {RECORD_MODIFIED_AT_SQL} WHERE id = new.id;
+            END
+            """
+        )
+        # Qualquer UPDATE que nao traga o proprio modified_at carimba a linha, inclusive as renumeracoes.
+        conn.execute(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS records_modified_at_au AFTER UPDATE ON records
+            WHEN new.modified_at = old.modified_at BEGIN
+                UPDATE records SET modified_at = {RECORD_MODIFIED_AT_SQL} WHERE id = new.id;
+            END
+            """
+        )
+
     @staticmethod
     def _display_name_for_path(workbook_path: str) -> str:
         return _display_name_for_path_helper(workbook_path, session_scheme=SESSION_SCHEME)
@@ -1,7 +1,9 @@
 from __future__ import annotations
 
+import hashlib
 import json
 import os
+import re
 from datetime import datetime, timezone
 from typing import Any, Iterable
 
@@ -32,6 +34,53 @@ def microbacia_key(value: object) -> str:
     return stringify(value).upper()
 
 
+_SQL_REAL_PREFIX = re.compile(r"\s*([+-]?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)")
+
+
+def sql_real_value(value: object) -> float:
+    # Mesma regra de CAST(REPLACE(TRIM(x), ',', '.') AS REAL) usada antes pelas metricas
+    # em SQL: vale o maior prefixo numerico do texto ('12abc' -> 12) e 0 sem prefixo.
+    if value is None:
+        return 0.0
+    if isinstance(value, (int, float)):
+        return float(value)
+    match = _SQL_REAL_PREFIX.match(str(value).replace(",", "."))
+    return float(match.group(1)) if match else 0.0
+
+
+_RECORD_HASH_FIELDS = (
+    "uid",
+    "oficio_processo",
+    "eletronico",
+    "caixa",
+    "av_tec",
+    "compensacao",
+    "endereco",
+    "microbacia",
+    "compensado",
+    "endereco_plantio",
+    "latitude_plantio",
+    "longitude_plantio",
+    "latitude",
+    "longitude",
+    "updated_at",
+)
+_PLANTIO_HASH_FIELDS = ("sequence", "endereco", "qtd_mudas", "latitude", "longitude")
+
+
+def record_content_hash(record: object) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    for field_name in _RECORD_HASH_FIELDS:
+        digest.update(stringify(getattr(record, field_name, "")).encode("utf-8"))
+        digest.update(b"\x1f")
+    for plantio in getattr(record, "plantios", None) or ():
+        digest.update(b"\x1e")
+        for field_name in _PLANTIO_HASH_FIELDS:
+            digest.update(stringify(getattr(plantio, field_name, "")).encode("utf-8"))
+            digest.update(b"\x1f")
+    return digest.hexdigest()
+
+
 def session_slug(value: str) -> str:
     normalized = remove_accents(stringify(value)).lower()
     slug = "".join(char.lower() if char.isalnum() else "-" for char in normalized).strip("-")
@@ -1,15 +1,26 @@
 from __future__ import annotations
 
+import hashlib
+import json
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dataclasses import dataclass
-from typing import Any, Mapping, Sequence
+from pathlib import Path
+from typing import Any, Callable, Mapping, Sequence
 
 from app.models.compensacao import Compensacao
 from app.services.audit_service_support import serialize_record, serialize_records_sample
+from app.utils.app_paths import resolve_data_path
 from app.utils.logger import get_logger
 
 
 logger = get_logger("Supabase.CompensacoesRPC")
 
+IMPORT_CHUNK_SIZE = 500
+IMPORT_UPLOAD_WORKERS = 4
+PENDING_IMPORTS_FILE_NAME = "supabase_pending_imports.json"
+
 
 @dataclass(frozen=True)
 class SupabaseCompensacoesRpcResult:
@@ -33,14 +44,48 @@ class SupabaseCompensacoesConflictError(SupabaseCompensacoesRpcError):
     pass
 
 
+class SupabaseCompensacoesImportInterruptedError(SupabaseCompensacoesRpcError):
+    def __init__(self, message: str, *, session_id: str, acked_chunks: int, total_chunks: int):
+        super().__init__(message)
+        self.session_id = session_id
+        self.acked_chunks = acked_chunks
+        self.total_chunks = total_chunks
+
+
+@dataclass(frozen=True)
+class _PendingImportSession:
+    session_id: str
+    fingerprint: str
+    acked_chunks: tuple[int, ...] = ()
+
+
 class SupabaseCompensacoesRpcService:
     SAVE_FUNCTION = "rpc_save_compensacao_record"
     DELETE_FUNCTION = "rpc_delete_compensacao_record"
     IMPORT_FUNCTION = "rpc_replace_compensacoes_snapshot"
+    IMPORT_BEGIN_FUNCTION = "rpc_begin_compensacoes_import"
+    IMPORT_CHUNK_FUNCTION = "rpc_stage_compensacoes_import_chunk"
+    IMPORT_COMMIT_FUNCTION = "rpc_commit_compensacoes_import"
 
-    def __init__(self) -> None:
+    def __init__(
+        self,
+        *,
+        import_chunk_size: int = IMPORT_CHUNK_SIZE,
+        import_upload_workers: int = IMPORT_UPLOAD_WORKERS,
+        pending_imports_path: str | Path | None = None,
+    ) -> None:
         self._legacy_save_signature_required: bool = False
         self._legacy_delete_signature_required: bool = False
+        self._legacy_import_required: bool = False
+        self.import_chunk_size = max(int(import_chunk_size), 1)
+        self.import_upload_workers = max(int(import_upload_workers), 1)
+        self.pending_imports_path = (
+            Path(pending_imports_path)
+            if pending_imports_path
+            else resolve_data_path("state", PENDING_IMPORTS_FILE_NAME)
+        )
+        # A sessao pendente sobrevive ao fechamento do app para a retomada continuar do mesmo ponto.
+        self._pending_imports: dict[str, _PendingImportSession] = self._load_pending_imports()
 
     def save_record(
         self,
@@ -118,29 +163,221 @@ class SupabaseCompensacoesRpcService:
         metadata: Mapping[str, object] | None = None,
         before: Mapping[str, object] | None = None,
         after: Mapping[str, object] | None = None,
+        progress_callback: Callable[[int, int], None] | None = None,
     ) -> SupabaseCompensacoesRpcResult:
+        normalized_path = str(workbook_path or "").strip()
         serialized_records = [serialize_record(record) for record in records]
+        audit_params = {
+            "p_action": str(action or "").strip(),
+            "p_summary": str(summary or "").strip(),
+            "p_backup_path": str(backup_path or "").strip(),
+            "p_metadata": self._json_object(metadata),
+            "p_before": self._json_object(before) if before is not None else None,
+            "p_after": self._json_object(after)
+            if after is not None
+            else {
+                "imported_count": len(serialized_records),
+                "sample_records": serialize_records_sample(records),
+            },
+        }
+        if len(serialized_records) > self.import_chunk_size and not self._legacy_import_required:
+            try:
+                payload = self._replace_records_in_chunks(
+                    client,
+                    workbook_path=normalized_path,
+                    serialized_records=serialized_records,
+                    audit_params=audit_params,
+                    progress_callback=progress_callback,
+                )
+                return self._build_result("replace", payload)
+            except SupabaseCompensacoesRpcError as exc:
+                if not self._is_missing_function(self.IMPORT_BEGIN_FUNCTION, exc):
+                    raise
+                self._legacy_import_required = True
+                logger.warning(
+                    "Funcao remota '%s' indisponivel; enviando a importacao em uma unica chamada.",
+                    self.IMPORT_BEGIN_FUNCTION,
+                )
+
         payload = self._execute_rpc(
             client,
             self.IMPORT_FUNCTION,
-            {
-                "p_workbook_path": str(workbook_path or "").strip(),
-                "p_records": serialized_records,
-                "p_action": str(action or "").strip(),
-                "p_summary": str(summary or "").strip(),
-                "p_backup_path": str(backup_path or "").strip(),
-                "p_metadata": self._json_object(metadata),
-                "p_before": self._json_object(before) if before is not None else None,
-                "p_after": self._json_object(after)
-                if after is not None
-                else {
-                    "imported_count": len(serialized_records),
-                    "sample_records": serialize_records_sample(records),
-                },
-            },
+            {"p_workbook_path": normalized_path, "p_records": serialized_records, **audit_params},
         )
+        if progress_callback is not None:
+            progress_callback(len(serialized_records), len(serialized_records))
         return self._build_result("replace", payload)
 
+    def _replace_records_in_chunks(
+        self,
+        client: Any,
+        *,
+        workbook_path: str,
+        serialized_records: Sequence[dict[str, object]],
+        audit_params: Mapping[str, object],
+        progress_callback: Callable[[int, int], None] | None,
+    ) -> dict[str, object]:
+        total_records = len(serialized_records)
+        chunks = [
+            list(serialized_records[start : start + self.import_chunk_size])
+            for start in range(0, total_records, self.import_chunk_size)
+        ]
+        fingerprint = self._import_fingerprint(workbook_path, chunks)
+        begin_params = {
+            "p_workbook_path": workbook_path,
+            "p_total_chunks": len(chunks),
+            "p_total_records": total_records,
+        }
+        pending = self._pending_imports.get(workbook_path)
+        begin_payload: dict[str, object] | None = None
+        if pending is not None and pending.fingerprint == fingerprint:
+            session_id = pending.session_id
+            try:
+                begin_payload = self._execute_rpc(
+                    client,
+                    self.IMPORT_BEGIN_FUNCTION,
+                    {"p_session_id": session_id, **begin_params},
+                )
+                logger.info(
+                    "Retomando a importacao remota pela sessao %s (%s lote(s) confirmados localmente).",
+                    session_id,
+                    len(pending.acked_chunks),
+                )
+            except SupabaseCompensacoesRpcError as exc:
+                logger.info("Sessao de importacao %s nao pode ser retomada; abrindo outra: %s", session_id, exc)
+        if begin_payload is None:
+            self._forget_pending_import(workbook_path)
+            session_id = uuid.uuid4().hex
+            begin_payload = self._execute_rpc(
+                client,
+                self.IMPORT_BEGIN_FUNCTION,
+                {"p_session_id": session_id, **begin_params},
+            )
+        acked = {
+            int(index)
+            for index in begin_payload.get("acked_chunks") or ()
+            if 0 <= int(index) < len(chunks)
+        }
+        self._remember_pending_import(
+            workbook_path,
+            _PendingImportSession(session_id, fingerprint, tuple(sorted(acked))),
+        )
+        sent_records = sum(len(chunks[index]) for index in acked)
+        if progress_callback is not None:
+            progress_callback(sent_records, total_records)
+
+        missing = [index for index in range(len(chunks)) if index not in acked]
+        failure: SupabaseCompensacoesRpcError | None = None
+        if missing:
+            with ThreadPoolExecutor(
+                max_workers=min(self.import_upload_workers, len(missing)),
+                thread_name_prefix="supabase-import",
+            ) as executor:
+                futures = {
+                    executor.submit(
+                        self._execute_rpc,
+                        client,
+                        self.IMPORT_CHUNK_FUNCTION,
+                        {"p_session_id": session_id, "p_chunk_index": index, "p_records": chunks[index]},
+                    ): index
+                    for index in missing
+                }
+                for future in as_completed(futures):
+                    index = futures[future]
+                    if future.cancelled():
+                        continue
+                    try:
+                        future.result()
+                    except SupabaseCompensacoesRpcError as exc:
+                        if failure is None:
+                            failure = exc
+                            # Lotes ainda na fila ficam para a retomada; os que ja sairam terminam.
+                            for queued in futures:
+                                queued.cancel()
+                        continue
+                    acked.add(index)
+                    self._remember_pending_import(
+                        workbook_path,
+                        _PendingImportSession(session_id, fingerprint, tuple(sorted(acked))),
+                    )
+                    sent_records += len(chunks[index])
+                    if progress_callback is not None:
+                        progress_callback(sent_records, total_records)
+
+        if failure is not None:
+            raise SupabaseCompensacoesImportInterruptedError(
+                f"Importacao remota interrompida apos {len(acked)} de {len(chunks)} lote(s); "
+                f"repita a operacao para retomar do ponto em que parou. {failure}",
+                session_id=session_id,
+                acked_chunks=len(acked),
+                total_chunks=len(chunks),
+            ) from failure
+
+        payload = self._execute_rpc(
+            client,
+            self.IMPORT_COMMIT_FUNCTION,
+            {"p_session_id": session_id, **audit_params},
+        )
+        self._forget_pending_import(workbook_path)
+        return payload
+
+    def _load_pending_imports(self) -> dict[str, _PendingImportSession]:
+        try:
+            payload = json.loads(self.pending_imports_path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as exc:
+            logger.warning(f"Falha ao ler importacoes remotas pendentes: {exc}")
+            return {}
+        pending: dict[str, _PendingImportSession] = {}
+        for workbook_path, item in dict(payload or {}).items():
+            if not isinstance(item, Mapping):
+                continue
+            session_id = str(item.get("session_id") or "").strip()
+            fingerprint = str(item.get("fingerprint") or "").strip()
+            if not session_id or not fingerprint:
+                continue
+            acked_chunks = tuple(sorted(int(index) for index in item.get("acked_chunks") or ()))
+            pending[str(workbook_path)] = _PendingImportSession(session_id, fingerprint, acked_chunks)
+        return pending
+
+    def _remember_pending_import(self, workbook_path: str, pending: _PendingImportSession) -> None:
+        self._pending_imports[workbook_path] = pending
+        self._save_pending_imports()
+
+    def _forget_pending_import(self, workbook_path: str) -> None:
+        if self._pending_imports.pop(workbook_path, None) is not None:
+            self._save_pending_imports()
+
+    def _save_pending_imports(self) -> None:
+        payload = {
+            workbook_path: {
+                "session_id": pending.session_id,
+                "fingerprint": pending.fingerprint,
+                "acked_chunks": list(pending.acked_chunks),
+            }
+            for workbook_path, pending in self._pending_imports.items()
+        }
+        path = self.pending_imports_path
+        try:
+            if not payload:
+                path.unlink(missing_ok=True)
+                return
+            path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = path.with_suffix(".tmp")
+            temp_path.write_text(json.dumps(payload, ensure_ascii=False, sort_keys=True), encoding="utf-8")
+            os.replace(temp_path, path)
+        except OSError as exc:
+            logger.warning(f"Falha ao gravar importacoes remotas pendentes: {exc}")
+
+    @staticmethod
+    def _import_fingerprint(workbook_path: str, chunks: Sequence[Sequence[dict[str, object]]]) -> str:
+        digest = hashlib.sha256(workbook_path.encode("utf-8"))
+        for chunk in chunks:
+            digest.update(json.dumps(chunk, ensure_ascii=False, sort_keys=True, default=str).encode("utf-8"))
+            digest.update(b"\x00")
+        return digest.hexdigest()
+
     @staticmethod
     def _json_object(mapping: Mapping[str, object] | None) -> dict[str, object]:
         return dict(mapping or {})
@@ -216,6 +453,11 @@ class SupabaseCompensacoesRpcService:
             and "p_expected_updated_at" in message
         )
 
+    @staticmethod
+    def _is_missing_function(function_name: str, exc: SupabaseCompensacoesRpcError) -> bool:
+        normalized_message = str(exc or "").lower()
+        return "pgrst202" in normalized_message and function_name.lower() in normalized_message
+
     @staticmethod
     def _map_rpc_exception(function_name: str, exc: Exception) -> SupabaseCompensacoesRpcError:
         message = str(exc or "").strip()
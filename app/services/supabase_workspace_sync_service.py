@@ -1,15 +1,17 @@
 from __future__ import annotations
 
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from dataclasses import dataclass
-from datetime import date
+from datetime import date, datetime, timedelta
 from pathlib import Path
 from types import SimpleNamespace
-from typing import Any, Sequence
+from typing import Any, Callable, Sequence
 
 from app.models.compensacao import Compensacao
 from app.models.plantio_item import PlantioItem
 from app.models.tcra import Tcra
 from app.models.tcra_evento import TcraEvento
+from app.services.sqlite_connection_manager import close_connection_manager
 from app.services.sqlite_mirror_service import DEFAULT_SINGLETON_SESSION_PATH, SqliteMirrorService
 from app.services.tcra_sqlite_service import TcraSqliteService
 from app.utils.app_paths import ensure_dir, resolve_data_path
@@ -21,6 +23,18 @@ logger = get_logger("Supabase.Sync")
 
 
 PRODUCTION_CACHE_SESSION_PATH = DEFAULT_SINGLETON_SESSION_PATH
+SYNC_STATE_PREFIX = "supabase_sync."
+WATERMARK_OVERLAP = timedelta(minutes=2)
+ID_WATERMARK_OVERLAP = 50
+IN_FILTER_CHUNK_SIZE = 200
+SNAPSHOT_FETCH_WORKERS = 6
+SNAPSHOT_TABLES = (
+    ("records", "id"),
+    ("plantios", "id"),
+    ("audit_events", "id"),
+    ("tcras", "uid"),
+    ("tcra_eventos", "id"),
+)
 
 
 class SupabaseWorkspaceSyncError(RuntimeError):
@@ -39,6 +53,7 @@ class SupabaseWorkspaceSyncResult:
     audit_event_count: int
     tcra_count: int
     tcra_event_count: int
+    strategy: str = "full"
 
 
 class SupabaseWorkspaceSyncService:
@@ -61,7 +76,15 @@ class SupabaseWorkspaceSyncService:
         *,
         local_db_path: str | Path | None = None,
         session_path: str | None = None,
+        full_refresh: bool = False,
     ) -> SupabaseWorkspaceSyncResult:
+        """Atualiza o cache local da producao a partir do Supabase.
+
+        Com um cache ja sincronizado, busca so as linhas alteradas depois das
+        marcas gravadas no proprio banco local e as exclusoes registradas na
+        tabela sync_tombstones, aplicando tudo no lugar. Sem marcas, com outra
+        sessao ou se o incremental falhar, refaz a copia completa.
+        """
         if client is None:
             raise SupabaseWorkspaceSyncError("Cliente Supabase ausente para sincronizacao da producao.")
 
@@ -70,27 +93,47 @@ class SupabaseWorkspaceSyncService:
         if not target_session_path:
             target_session_path = PRODUCTION_CACHE_SESSION_PATH
 
+        if not full_refresh:
+            state = self._read_sync_state(target_db_path, target_session_path)
+            if state:
+                try:
+                    return self._sync_incremental(client, target_db_path, target_session_path, state)
+                except Exception as exc:
+                    logger.warning(
+                        "Sincronizacao incremental do Supabase falhou; refazendo a copia completa: %s",
+                        exc,
+                        exc_info=True,
+                    )
+        return self._sync_full(client, target_db_path, target_session_path)
+
+    def _sync_full(self, client: Any, target_db_path: Path, target_session_path: str) -> SupabaseWorkspaceSyncResult:
+        # A marca das exclusoes e lida antes do snapshot: o que for apagado
+        # durante a copia fica acima dela e entra no proximo incremental.
+        tombstone_watermark = self._fetch_tombstone_watermark(client)
         snapshot = self._fetch_snapshot(client)
         self._reset_local_database(target_db_path)
 
         sqlite_service = SqliteMirrorService(db_path=target_db_path)
         sqlite_summary = sqlite_service.sync_workbook_snapshot(target_session_path, snapshot.records)
-        for audit_payload in snapshot.audit_events:
-            sqlite_service.mirror_audit_event(
-                event_id=str(audit_payload.get("event_id", "") or ""),
-                timestamp=str(audit_payload.get("timestamp", "") or ""),
-                workbook_path=target_session_path,
-                action=str(audit_payload.get("action", "") or ""),
-                summary=str(audit_payload.get("summary", "") or ""),
-                backup_path=str(audit_payload.get("backup_path", "") or ""),
-                metadata=dict(audit_payload.get("metadata_json") or {}),
-                before=dict(audit_payload.get("before_json") or {}) or None,
-                after=dict(audit_payload.get("after_json") or {}) or None,
-            )
+        self._mirror_audit_events(sqlite_service, target_session_path, snapshot.audit_events)
 
         tcra_service = TcraSqliteService(db_path=target_db_path)
         tcra_service.replace_all(snapshot.tcras)
 
+        if tombstone_watermark is not None:
+            sqlite_service.write_meta_values(
+                self._sync_state_values(
+                    session_path=target_session_path,
+                    workbook_name=snapshot.workbook_name,
+                    workbook_path=snapshot.workbook_path,
+                    watermarks={
+                        **snapshot.watermarks,
+                        "workbook_id": snapshot.workbook_id,
+                        "sync_tombstones_id": str(tombstone_watermark),
+                    },
+                )
+            )
+
         logger.info(
             "Snapshot remoto do Supabase sincronizado para %s com %s registro(s) e %s TCRA(s).",
             target_db_path,
@@ -110,22 +153,365 @@ class SupabaseWorkspaceSyncService:
             tcra_event_count=sum(len(record.eventos) for record in snapshot.tcras),
         )
 
+    def _sync_incremental(
+        self,
+        client: Any,
+        target_db_path: Path,
+        target_session_path: str,
+        state: dict[str, str],
+    ) -> SupabaseWorkspaceSyncResult:
+        sqlite_service = SqliteMirrorService(db_path=target_db_path)
+        tcra_service = TcraSqliteService(db_path=target_db_path)
+        changes = self._fetch_changes(
+            client,
+            state,
+            # A busca local de registros ignora caixa, como a chave lower(uid) das marcas.
+            local_record_uids=lambda uids: [
+                record.uid
+                for record in (
+                    sqlite_service.find_record_by_uid_for_workbook(target_session_path, uid) for uid in uids
+                )
+                if record is not None
+            ],
+            local_tcra_uids=lambda uids: [tcra.uid for tcra in tcra_service.get_tcras_by_uids(list(uids))],
+        )
+
+        self._mirror_audit_events(sqlite_service, target_session_path, changes.audit_events)
+        sqlite_summary = sqlite_service.apply_workbook_changes(
+            target_session_path,
+            changes.records,
+            changes.deleted_record_uids,
+        )
+        tcra_count, tcra_event_count = tcra_service.apply_changes(changes.tcras, changes.deleted_tcra_uids)
+        sqlite_service.write_meta_values(
+            self._sync_state_values(
+                session_path=target_session_path,
+                workbook_name=state.get("workbook_name", ""),
+                workbook_path=state.get("workbook_path", ""),
+                watermarks=changes.watermarks,
+            )
+        )
+
+        logger.info(
+            "Alteracoes do Supabase aplicadas em %s: %s registro(s), %s exclusao(oes), %s TCRA(s) e %s evento(s) "
+            "de auditoria.",
+            target_db_path,
+            len(changes.records),
+            len(changes.deleted_record_uids) + len(changes.deleted_tcra_uids),
+            len(changes.tcras),
+            len(changes.audit_events),
+        )
+        return SupabaseWorkspaceSyncResult(
+            local_db_path=str(target_db_path),
+            session_path=target_session_path,
+            workbook_name=state.get("workbook_name", ""),
+            workbook_path=state.get("workbook_path", ""),
+            synced_at=str(getattr(sqlite_summary, "synced_at", "") or ""),
+            record_count=sqlite_summary.record_count,
+            plantio_count=sqlite_summary.plantio_count,
+            audit_event_count=sqlite_summary.audit_event_count,
+            tcra_count=tcra_count,
+            tcra_event_count=tcra_event_count,
+            strategy="incremental",
+        )
+
+    def _read_sync_state(self, target_db_path: Path, target_session_path: str) -> dict[str, str]:
+        if not target_db_path.exists():
+            return {}
+        try:
+            stored = SqliteMirrorService(db_path=target_db_path).read_meta_values(SYNC_STATE_PREFIX)
+        except Exception as exc:
+            logger.warning("Estado da sincronizacao incremental ilegivel em %s: %s", target_db_path, exc)
+            return {}
+        state = {key[len(SYNC_STATE_PREFIX) :]: value for key, value in stored.items()}
+        if state.get("session_path") != target_session_path or not {"sync_tombstones_id", "workbook_id"} <= set(state):
+            return {}
+        return state
+
+    @staticmethod
+    def _sync_state_values(
+        *,
+        session_path: str,
+        workbook_name: str,
+        workbook_path: str,
+        watermarks: dict[str, str],
+    ) -> dict[str, str]:
+        values = {
+            "session_path": session_path,
+            "workbook_name": workbook_name,
+            "workbook_path": workbook_path,
+            **watermarks,
+        }
+        return {f"{SYNC_STATE_PREFIX}{key}": str(value or "") for key, value in values.items()}
+
+    @staticmethod
+    def _mirror_audit_events(
+        sqlite_service: SqliteMirrorService,
+        session_path: str,
+        audit_events: Sequence[dict[str, Any]],
+    ) -> None:
+        for audit_payload in audit_events:
+            sqlite_service.mirror_audit_event(
+                event_id=str(audit_payload.get("event_id", "") or ""),
+                timestamp=str(audit_payload.get("timestamp", "") or ""),
+                workbook_path=session_path,
+                action=str(audit_payload.get("action", "") or ""),
+                summary=str(audit_payload.get("summary", "") or ""),
+                backup_path=str(audit_payload.get("backup_path", "") or ""),
+                metadata=dict(audit_payload.get("metadata_json") or {}),
+                before=dict(audit_payload.get("before_json") or {}) or None,
+                after=dict(audit_payload.get("after_json") or {}) or None,
+            )
+
+    def _fetch_tombstone_watermark(self, client: Any) -> int | None:
+        try:
+            rows = self._fetch_table_rows(
+                client,
+                "sync_tombstones",
+                order_by="id",
+                columns="id",
+                descending=True,
+                limit=1,
+            )
+        except Exception as exc:
+            logger.info("Tabela de exclusoes do Supabase indisponivel; a proxima sincronizacao sera completa: %s", exc)
+            return None
+        return self._latest_id(rows, "")
+
+    def _fetch_changes(
+        self,
+        client: Any,
+        state: dict[str, str],
+        *,
+        local_record_uids: Callable[[Sequence[str]], Sequence[str]],
+        local_tcra_uids: Callable[[Sequence[str]], Sequence[str]],
+    ) -> SimpleNamespace:
+        # Exclusoes primeiro: uma remocao feita depois desta leitura fica acima
+        # da marca e aparece na proxima rodada.
+        tombstone_rows = self._fetch_table_rows(
+            client,
+            "sync_tombstones",
+            order_by="id",
+            apply_filter=self._tombstone_filter(state.get("sync_tombstones_id", ""), state.get("workbook_id", "")),
+        )
+        record_rows = self._fetch_table_rows(
+            client,
+            "records",
+            order_by="id",
+            apply_filter=self._updated_since_filter(state.get("records_updated_at", "")),
+        )
+        plantio_rows = self._fetch_rows_in(
+            client,
+            "plantios",
+            column="record_id",
+            values=[int(row.get("id") or 0) for row in record_rows if int(row.get("id") or 0) > 0],
+            order_by="id",
+        )
+        audit_rows = self._fetch_table_rows(
+            client,
+            "audit_events",
+            order_by="id",
+            apply_filter=self._after_id_filter(state.get("audit_events_id", "")),
+        )
+        tcra_rows = self._fetch_table_rows(
+            client,
+            "tcras",
+            order_by="uid",
+            apply_filter=self._updated_since_filter(state.get("tcras_updated_at", "")),
+        )
+        tcra_event_rows = self._fetch_rows_in(
+            client,
+            "tcra_eventos",
+            column="tcra_uid",
+            values=[str(row.get("uid", "") or "") for row in tcra_rows if str(row.get("uid", "") or "")],
+            order_by="id",
+        )
+
+        return SimpleNamespace(
+            records=self._build_records(record_rows, plantio_rows),
+            deleted_record_uids=self._confirmed_deletions(
+                client,
+                "records",
+                tombstone_rows,
+                changed_rows=record_rows,
+                local_uids=local_record_uids,
+            ),
+            audit_events=self._normalize_audit_payloads(audit_rows),
+            tcras=self._build_tcras(tcra_rows, tcra_event_rows),
+            deleted_tcra_uids=self._confirmed_deletions(
+                client,
+                "tcras",
+                tombstone_rows,
+                changed_rows=tcra_rows,
+                local_uids=local_tcra_uids,
+            ),
+            watermarks={
+                "records_updated_at": self._latest_timestamp(record_rows, state.get("records_updated_at", "")),
+                "tcras_updated_at": self._latest_timestamp(tcra_rows, state.get("tcras_updated_at", "")),
+                "audit_events_id": str(self._latest_id(audit_rows, state.get("audit_events_id", ""))),
+                "sync_tombstones_id": str(self._latest_id(tombstone_rows, state.get("sync_tombstones_id", ""))),
+                "workbook_id": state.get("workbook_id", ""),
+            },
+        )
+
+    def _confirmed_deletions(
+        self,
+        client: Any,
+        table_name: str,
+        tombstone_rows: Sequence[dict[str, Any]],
+        *,
+        changed_rows: Sequence[dict[str, Any]],
+        local_uids: Callable[[Sequence[str]], Sequence[str]],
+    ) -> tuple[str, ...]:
+        # Registros sao marcados por lower(uid); TCRAs pelo uid como esta.
+        fold = str.lower if table_name == "records" else str
+        changed_keys = {fold(str(row.get("uid", "") or "")) for row in changed_rows}
+        keys = [
+            key
+            for key in dict.fromkeys(
+                fold(str(row.get("row_key", "") or "")) for row in tombstone_rows if row.get("table_name") == table_name
+            )
+            if key and key not in changed_keys
+        ]
+        if not keys:
+            return ()
+        # A janela de seguranca relê exclusoes antigas; so consulta o Supabase
+        # para as chaves que ainda existem localmente, e mantem as recriadas.
+        wanted = set(keys)
+        candidates = list(dict.fromkeys(uid for uid in local_uids(keys) if fold(uid) in wanted))
+        if not candidates:
+            return ()
+        remote_rows = self._fetch_rows_in(
+            client,
+            table_name,
+            column="uid",
+            values=candidates,
+            order_by="uid",
+            columns="uid",
+        )
+        still_remote = {fold(str(row.get("uid", "") or "")) for row in remote_rows}
+        return tuple(uid for uid in candidates if fold(uid) not in still_remote)
+
     def _fetch_snapshot(self, client: Any) -> SimpleNamespace:
-        workbook_row = self._fetch_workbook_row(client)
-        record_rows = self._fetch_table_rows(client, "records", order_by="id")
-        plantio_rows = self._fetch_table_rows(client, "plantios", order_by="id")
-        audit_rows = self._fetch_table_rows(client, "audit_events", order_by="id")
-        tcra_rows = self._fetch_table_rows(client, "tcras", order_by="uid")
-        tcra_event_rows = self._fetch_table_rows(client, "tcra_eventos", order_by="id")
+        converters = {
+            "records": lambda rows: [self._record_from_row(row) for row in rows],
+            "plantios": lambda rows: [self._plantio_from_row(row) for row in rows],
+            "audit_events": lambda rows: [self._audit_payload_from_row(row) for row in rows],
+            "tcras": lambda rows: [self._tcra_from_row(row) for row in rows],
+            "tcra_eventos": lambda rows: [self._evento_from_row(row) for row in rows],
+        }
+        watermarks = {"records_updated_at": "", "tcras_updated_at": "", "audit_events_id": "0"}
+
+        def assemble(table_name: str, rows: list[dict[str, Any]]) -> list[Any]:
+            if table_name in {"records", "tcras"}:
+                key = f"{table_name}_updated_at"
+                watermarks[key] = self._latest_timestamp(rows, watermarks[key])
+            elif table_name == "audit_events":
+                watermarks["audit_events_id"] = str(self._latest_id(rows, watermarks["audit_events_id"]))
+            return converters[table_name](rows)
+
+        with ThreadPoolExecutor(max_workers=SNAPSHOT_FETCH_WORKERS, thread_name_prefix="supabase-sync") as executor:
+            workbook_future = executor.submit(self._fetch_workbook_row, client)
+            tables = self._fetch_tables_concurrently(
+                client,
+                executor,
+                {name: order_by for name, order_by in SNAPSHOT_TABLES},
+                on_page=assemble,
+            )
+            workbook_row = workbook_future.result()
 
         return SimpleNamespace(
             workbook_name=repair_mojibake_text(str(workbook_row.get("workbook_name", "") or "Base oficial")),
             workbook_path=repair_mojibake_text(str(workbook_row.get("workbook_path", "") or self.session_path)),
-            records=self._build_records(record_rows, plantio_rows),
-            audit_events=tuple(self._normalize_audit_payloads(audit_rows)),
-            tcras=self._build_tcras(tcra_rows, tcra_event_rows),
+            workbook_id=str(workbook_row.get("id", "") or ""),
+            records=self._attach_plantios(tables["records"], tables["plantios"]),
+            audit_events=tuple(tables["audit_events"]),
+            tcras=self._attach_eventos(tables["tcras"], tables["tcra_eventos"]),
+            watermarks=watermarks,
         )
 
+    def _fetch_tables_concurrently(
+        self,
+        client: Any,
+        executor: ThreadPoolExecutor,
+        order_by: dict[str, str],
+        *,
+        on_page: Callable[[str, list[dict[str, Any]]], list[Any]],
+        page_size: int = 1000,
+    ) -> dict[str, list[Any]]:
+        """Busca tabelas inteiras em paralelo, com as paginas de cada uma em voo ao mesmo tempo.
+
+        A primeira pagina de cada tabela pede a contagem exata; com ela as
+        demais faixas saem de uma vez. Se o servidor limitar a pagina (max-rows
+        do PostgREST), o tamanho devolvido vira o passo das faixas seguintes.
+        Sem contagem, a tabela segue pagina a pagina. Uma primeira pagina vazia
+        com contagem positiva nao da passo e interrompe a copia em vez de
+        truncar a tabela. Cada pagina e convertida
+        por on_page na thread chamadora assim que chega, e o resultado de cada
+        tabela sai na ordem das faixas.
+        """
+        pages: dict[str, dict[int, list[Any]]] = {name: {} for name in order_by}
+        pending: dict[Future, tuple[str, int, int, bool]] = {}
+
+        def submit(table_name: str, start: int, size: int, *, chained: bool) -> None:
+            future = executor.submit(
+                self._fetch_page,
+                client,
+                table_name,
+                order_by=order_by[table_name],
+                start=start,
+                size=size,
+                with_count=start == 0,
+            )
+            pending[future] = (table_name, start, size, chained)
+
+        for table_name in order_by:
+            submit(table_name, 0, page_size, chained=False)
+        try:
+            while pending:
+                done, _ = wait(tuple(pending), return_when=FIRST_COMPLETED)
+                for future in done:
+                    table_name, start, size, chained = pending.pop(future)
+                    batch, total = future.result()
+                    pages[table_name][start] = on_page(table_name, batch)
+                    if start == 0 and total is not None:
+                        step = len(batch)
+                        if not step and total > 0:
+                            raise SupabaseWorkspaceSyncError(
+                                f"O Supabase informou {total} linha(s) em {table_name}, mas a primeira pagina veio "
+                                "vazia. Tente sincronizar novamente."
+                            )
+                        for next_start in range(step, total, step) if step else ():
+                            submit(table_name, next_start, step, chained=False)
+                    elif (start == 0 or chained) and len(batch) >= size:
+                        submit(table_name, start + len(batch), size, chained=True)
+        except BaseException:
+            for future in pending:
+                future.cancel()
+            raise
+
+        return {
+            table_name: [item for start in sorted(table_pages) for item in table_pages[start]]
+            for table_name, table_pages in pages.items()
+        }
+
+    @staticmethod
+    def _fetch_page(
+        client: Any,
+        table_name: str,
+        *,
+        order_by: str,
+        start: int,
+        size: int,
+        with_count: bool = False,
+    ) -> tuple[list[dict[str, Any]], int | None]:
+        table = client.table(table_name)
+        query = table.select("*", count="exact") if with_count else table.select("*")
+        response = query.order(order_by).range(start, start + size - 1).execute()
+        batch = [dict(item or {}) for item in list(getattr(response, "data", []) or [])]
+        total = getattr(response, "count", None) if with_count else None
+        return batch, (int(total) if isinstance(total, int) else None)
+
     def _fetch_workbook_row(self, client: Any) -> dict[str, Any]:
         rows = self._fetch_table_rows(client, "workbooks", order_by="id", limit=1)
         if not rows:
@@ -142,12 +528,18 @@ class SupabaseWorkspaceSyncService:
         order_by: str,
         page_size: int = 1000,
         limit: int | None = None,
+        columns: str = "*",
+        descending: bool = False,
+        apply_filter: Callable[[Any], Any] | None = None,
     ) -> list[dict[str, Any]]:
         rows: list[dict[str, Any]] = []
         start = 0
         remaining = max(int(limit or 0), 0) if limit is not None else None
         while True:
-            query = client.table(table_name).select("*").order(order_by)
+            query = client.table(table_name).select(columns)
+            if apply_filter is not None:
+                query = apply_filter(query)
+            query = query.order(order_by, desc=True) if descending else query.order(order_by)
             if remaining is not None:
                 batch_limit = min(page_size, remaining)
                 query = query.limit(batch_limit)
@@ -164,54 +556,153 @@ class SupabaseWorkspaceSyncService:
             start += batch_limit
         return rows
 
+    def _fetch_rows_in(
+        self,
+        client: Any,
+        table_name: str,
+        *,
+        column: str,
+        values: Sequence[object],
+        order_by: str,
+        columns: str = "*",
+    ) -> list[dict[str, Any]]:
+        # Lotes pequenos para o filtro "in" nao estourar o tamanho da URL.
+        unique_values = list(dict.fromkeys(values))
+        rows: list[dict[str, Any]] = []
+        for start in range(0, len(unique_values), IN_FILTER_CHUNK_SIZE):
+            chunk = unique_values[start : start + IN_FILTER_CHUNK_SIZE]
+            rows.extend(
+                self._fetch_table_rows(
+                    client,
+                    table_name,
+                    order_by=order_by,
+                    columns=columns,
+                    apply_filter=lambda query, chunk=chunk: query.in_(column, chunk),
+                )
+            )
+        return rows
+
+    @staticmethod
+    def _updated_since_filter(watermark: str) -> Callable[[Any], Any] | None:
+        if not watermark:
+            return None
+        # updated_at vem do inicio da transacao remota; a janela de seguranca
+        # cobre escritas que confirmaram depois de uma leitura anterior.
+        try:
+            since = (datetime.fromisoformat(watermark) - WATERMARK_OVERLAP).isoformat()
+        except ValueError:
+            since = watermark
+        return lambda query: query.gte("updated_at", since)
+
+    @staticmethod
+    def _after_id_filter(watermark: str) -> Callable[[Any], Any] | None:
+        if not watermark:
+            return None
+        after_id = max(int(watermark) - ID_WATERMARK_OVERLAP, 0)
+        return lambda query: query.gt("id", after_id)
+
+    @classmethod
+    def _tombstone_filter(cls, watermark: str, workbook_id: str) -> Callable[[Any], Any]:
+        # Marcas sem workbook sao de TCRAs ou anteriores a coluna e valem para todos.
+        after_id = cls._after_id_filter(watermark)
+
+        def apply(query: Any) -> Any:
+            query = after_id(query) if after_id is not None else query
+            return query.or_(f"workbook_id.eq.{int(workbook_id)},workbook_id.is.null")
+
+        return apply
+
     @staticmethod
+    def _latest_timestamp(rows: Sequence[dict[str, Any]], previous: str) -> str:
+        latest_text = previous
+        latest = None
+        if previous:
+            try:
+                latest = datetime.fromisoformat(previous)
+            except ValueError:
+                latest = None
+        for row in rows:
+            text = str(row.get("updated_at", "") or "").strip()
+            if not text:
+                continue
+            try:
+                value = datetime.fromisoformat(text)
+            except ValueError:
+                continue
+            if latest is None or value > latest:
+                latest, latest_text = value, text
+        return latest_text
+
+    @staticmethod
+    def _latest_id(rows: Sequence[dict[str, Any]], previous: str) -> int:
+        latest = int(previous or 0)
+        for row in rows:
+            latest = max(latest, int(row.get("id") or 0))
+        return latest
+
+    @classmethod
     def _build_records(
+        cls,
         record_rows: Sequence[dict[str, Any]],
         plantio_rows: Sequence[dict[str, Any]],
     ) -> tuple[Compensacao, ...]:
-        plantios_by_record_id: dict[int, list[PlantioItem]] = {}
-        for row in plantio_rows:
-            record_id = int(row.get("record_id") or 0)
-            if record_id <= 0:
-                continue
-            plantios_by_record_id.setdefault(record_id, []).append(
-                    PlantioItem(
-                        sequence=int(row.get("sequence") or 0),
-                        endereco=repair_mojibake_text(row.get("endereco", "")),
-                        qtd_mudas=repair_mojibake_text(row.get("qtd_mudas", "")),
-                        latitude=repair_mojibake_text(row.get("latitude", "")),
-                        longitude=repair_mojibake_text(row.get("longitude", "")),
-                    )
-                )
+        return cls._attach_plantios(
+            [cls._record_from_row(row) for row in record_rows],
+            [cls._plantio_from_row(row) for row in plantio_rows],
+        )
 
-        records: list[Compensacao] = []
-        for row in record_rows:
-            record_id = int(row.get("id") or 0)
-            records.append(
-                Compensacao(
-                    excel_row=int(row.get("excel_row") or 0),
-                    oficio_processo=repair_mojibake_text(row.get("oficio_processo", "")),
-                    eletronico=repair_mojibake_text(row.get("eletronico", "")),
-                    caixa=repair_mojibake_text(row.get("caixa", "")),
-                    av_tec=repair_mojibake_text(row.get("av_tec", "")),
-                    compensacao=repair_mojibake_text(row.get("compensacao", "")),
-                    endereco=repair_mojibake_text(row.get("endereco", "")),
-                    microbacia=repair_mojibake_text(row.get("microbacia", "")),
-                    compensado=repair_mojibake_text(row.get("compensado", "")),
-                    endereco_plantio=repair_mojibake_text(row.get("endereco_plantio", "")),
-                    latitude_plantio=repair_mojibake_text(row.get("latitude_plantio", "")),
-                    longitude_plantio=repair_mojibake_text(row.get("longitude_plantio", "")),
-                    latitude=repair_mojibake_text(row.get("latitude", "")),
-                    longitude=repair_mojibake_text(row.get("longitude", "")),
-                    uid=repair_mojibake_text(row.get("uid", "")),
-                    updated_at=repair_mojibake_text(row.get("updated_at", "")),
-                    plantios=sorted(
-                        plantios_by_record_id.get(record_id, []),
-                        key=lambda item: int(item.sequence or 0),
-                    ),
-                )
+    @staticmethod
+    def _attach_plantios(
+        records: Sequence[tuple[int, Compensacao]],
+        plantios: Sequence[tuple[int, PlantioItem]],
+    ) -> tuple[Compensacao, ...]:
+        plantios_by_record_id: dict[int, list[PlantioItem]] = {}
+        for record_id, plantio in plantios:
+            if record_id > 0:
+                plantios_by_record_id.setdefault(record_id, []).append(plantio)
+        for record_id, record in records:
+            record.plantios = sorted(
+                plantios_by_record_id.get(record_id, []),
+                key=lambda item: int(item.sequence or 0),
             )
-        return tuple(records)
+        return tuple(record for _record_id, record in records)
+
+    @staticmethod
+    def _plantio_from_row(row: dict[str, Any]) -> tuple[int, PlantioItem]:
+        return (
+            int(row.get("record_id") or 0),
+            PlantioItem(
+                sequence=int(row.get("sequence") or 0),
+                endereco=repair_mojibake_text(row.get("endereco", "")),
+                qtd_mudas=repair_mojibake_text(row.get("qtd_mudas", "")),
+                latitude=repair_mojibake_text(row.get("latitude", "")),
+                longitude=repair_mojibake_text(row.get("longitude", "")),
+            ),
+        )
+
+    @staticmethod
+    def _record_from_row(row: dict[str, Any]) -> tuple[int, Compensacao]:
+        return (
+            int(row.get("id") or 0),
+            Compensacao(
+                excel_row=int(row.get("excel_row") or 0),
+                oficio_processo=repair_mojibake_text(row.get("oficio_processo", "")),
+                eletronico=repair_mojibake_text(row.get("eletronico", "")),
+                caixa=repair_mojibake_text(row.get("caixa", "")),
+                av_tec=repair_mojibake_text(row.get("av_tec", "")),
+                compensacao=repair_mojibake_text(row.get("compensacao", "")),
+                endereco=repair_mojibake_text(row.get("endereco", "")),
+                microbacia=repair_mojibake_text(row.get("microbacia", "")),
+                compensado=repair_mojibake_text(row.get("compensado", "")),
+                endereco_plantio=repair_mojibake_text(row.get("endereco_plantio", "")),
+                latitude_plantio=repair_mojibake_text(row.get("latitude_plantio", "")),
+                longitude_plantio=repair_mojibake_text(row.get("longitude_plantio", "")),
+                latitude=repair_mojibake_text(row.get("latitude", "")),
+                longitude=repair_mojibake_text(row.get("longitude", "")),
+                uid=repair_mojibake_text(row.get("uid", "")),
+                updated_at=repair_mojibake_text(row.get("updated_at", "")),
+            ),
+        )
 
     @classmethod
     def _build_tcras(
@@ -219,74 +710,81 @@ class SupabaseWorkspaceSyncService:
         tcra_rows: Sequence[dict[str, Any]],
         event_rows: Sequence[dict[str, Any]],
     ) -> tuple[Tcra, ...]:
+        return cls._attach_eventos(
+            [cls._tcra_from_row(row) for row in tcra_rows],
+            [cls._evento_from_row(row) for row in event_rows],
+        )
+
+    @staticmethod
+    def _attach_eventos(tcras: Sequence[Tcra], eventos: Sequence[tuple[str, TcraEvento]]) -> tuple[Tcra, ...]:
         events_by_uid: dict[str, list[TcraEvento]] = {}
-        for row in event_rows:
-            uid = str(row.get("tcra_uid", "") or "").strip()
-            if not uid:
-                continue
-            events_by_uid.setdefault(uid, []).append(
-                TcraEvento(
-                    sequence=int(row.get("sequence") or 0),
-                    data_evento=cls._parse_date(row.get("data_evento")),
-                    tipo_evento=repair_mojibake_text(row.get("tipo_evento", "")),
-                    descricao=repair_mojibake_text(row.get("descricao", "")),
-                    prazo_resultante=cls._parse_date(row.get("prazo_resultante")),
-                    status_resultante=repair_mojibake_text(row.get("status_resultante", "")),
-                    protocolo=repair_mojibake_text(row.get("protocolo", "")),
-                    documento_ref=repair_mojibake_text(row.get("documento_ref", "")),
-                )
+        for uid, evento in eventos:
+            if uid:
+                events_by_uid.setdefault(uid, []).append(evento)
+        for tcra in tcras:
+            tcra.eventos = sorted(
+                events_by_uid.get(tcra.uid, []),
+                key=lambda item: int(item.sequence or 0),
             )
+        return tuple(tcras)
 
-        records: list[Tcra] = []
-        for row in tcra_rows:
-            uid = str(row.get("uid", "") or "")
-            records.append(
-                Tcra(
-                    uid=repair_mojibake_text(uid),
-                    numero_processo=repair_mojibake_text(row.get("numero_processo", "")),
-                    numero_tcra=repair_mojibake_text(row.get("numero_tcra", "")),
-                    local=repair_mojibake_text(row.get("local", "")),
-                    endereco=repair_mojibake_text(row.get("endereco", "")),
-                    bairro=repair_mojibake_text(row.get("bairro", "")),
-                    orgao_acompanhamento=repair_mojibake_text(row.get("orgao_acompanhamento", "")),
-                    status=repair_mojibake_text(row.get("status", "")),
-                    data_assinatura=cls._parse_date(row.get("data_assinatura")),
-                    prazo_final=cls._parse_date(row.get("prazo_final")),
-                    periodicidade_relatorio_meses=cls._parse_int(row.get("periodicidade_relatorio_meses")),
-                    data_ultimo_relatorio=cls._parse_date(row.get("data_ultimo_relatorio")),
-                    data_proximo_relatorio=cls._parse_date(row.get("data_proximo_relatorio")),
-                    area_m2=cls._parse_float(row.get("area_m2")),
-                    numero_mudas_previsto=cls._parse_int(row.get("numero_mudas_previsto")),
-                    servicos_exigidos=repair_mojibake_text(row.get("servicos_exigidos", "")),
-                    responsavel_execucao=repair_mojibake_text(row.get("responsavel_execucao", "")),
-                    observacoes=repair_mojibake_text(row.get("observacoes", "")),
-                    mpsp_relacionado=repair_mojibake_text(row.get("mpsp_relacionado", "")),
-                    inquerito_civil=repair_mojibake_text(row.get("inquerito_civil", "")),
-                    eventos=sorted(
-                        events_by_uid.get(uid, []),
-                        key=lambda item: int(item.sequence or 0),
-                    ),
-                )
-            )
-        return tuple(records)
+    @classmethod
+    def _evento_from_row(cls, row: dict[str, Any]) -> tuple[str, TcraEvento]:
+        return (
+            str(row.get("tcra_uid", "") or "").strip(),
+            TcraEvento(
+                sequence=int(row.get("sequence") or 0),
+                data_evento=cls._parse_date(row.get("data_evento")),
+                tipo_evento=repair_mojibake_text(row.get("tipo_evento", "")),
+                descricao=repair_mojibake_text(row.get("descricao", "")),
+                prazo_resultante=cls._parse_date(row.get("prazo_resultante")),
+                status_resultante=repair_mojibake_text(row.get("status_resultante", "")),
+                protocolo=repair_mojibake_text(row.get("protocolo", "")),
+                documento_ref=repair_mojibake_text(row.get("documento_ref", "")),
+            ),
+        )
+
+    @classmethod
+    def _tcra_from_row(cls, row: dict[str, Any]) -> Tcra:
+        return Tcra(
+            uid=repair_mojibake_text(str(row.get("uid", "") or "")),
+            numero_processo=repair_mojibake_text(row.get("numero_processo", "")),
+            numero_tcra=repair_mojibake_text(row.get("numero_tcra", "")),
+            local=repair_mojibake_text(row.get("local", "")),
+            endereco=repair_mojibake_text(row.get("endereco", "")),
+            bairro=repair_mojibake_text(row.get("bairro", "")),
+            orgao_acompanhamento=repair_mojibake_text(row.get("orgao_acompanhamento", "")),
+            status=repair_mojibake_text(row.get("status", "")),
+            data_assinatura=cls._parse_date(row.get("data_assinatura")),
+            prazo_final=cls._parse_date(row.get("prazo_final")),
+            periodicidade_relatorio_meses=cls._parse_int(row.get("periodicidade_relatorio_meses")),
+            data_ultimo_relatorio=cls._parse_date(row.get("data_ultimo_relatorio")),
+            data_proximo_relatorio=cls._parse_date(row.get("data_proximo_relatorio")),
+            area_m2=cls._parse_float(row.get("area_m2")),
+            numero_mudas_previsto=cls._parse_int(row.get("numero_mudas_previsto")),
+            servicos_exigidos=repair_mojibake_text(row.get("servicos_exigidos", "")),
+            responsavel_execucao=repair_mojibake_text(row.get("responsavel_execucao", "")),
+            observacoes=repair_mojibake_text(row.get("observacoes", "")),
+            mpsp_relacionado=repair_mojibake_text(row.get("mpsp_relacionado", "")),
+            inquerito_civil=repair_mojibake_text(row.get("inquerito_civil", "")),
+        )
+
+    @classmethod
+    def _normalize_audit_payloads(cls, rows: Sequence[dict[str, Any]]) -> tuple[dict[str, Any], ...]:
+        return tuple(cls._audit_payload_from_row(row) for row in rows)
 
     @staticmethod
-    def _normalize_audit_payloads(rows: Sequence[dict[str, Any]]) -> tuple[dict[str, Any], ...]:
-        payloads: list[dict[str, Any]] = []
-        for row in rows:
-            payloads.append(
-                {
-                    "event_id": repair_mojibake_text(row.get("event_id", "")),
-                    "timestamp": repair_mojibake_text(row.get("timestamp", "")),
-                    "action": repair_mojibake_text(row.get("action", "")),
-                    "summary": repair_mojibake_text(row.get("summary", "")),
-                    "backup_path": repair_mojibake_text(row.get("backup_path", "")),
-                    "metadata_json": repair_mojibake_object(dict(row.get("metadata_json") or {})),
-                    "before_json": repair_mojibake_object(dict(row.get("before_json") or {}) or None),
-                    "after_json": repair_mojibake_object(dict(row.get("after_json") or {}) or None),
-                }
-            )
-        return tuple(payloads)
+    def _audit_payload_from_row(row: dict[str, Any]) -> dict[str, Any]:
+        return {
+            "event_id": repair_mojibake_text(row.get("event_id", "")),
+            "timestamp": repair_mojibake_text(row.get("timestamp", "")),
+            "action": repair_mojibake_text(row.get("action", "")),
+            "summary": repair_mojibake_text(row.get("summary", "")),
+            "backup_path": repair_mojibake_text(row.get("backup_path", "")),
+            "metadata_json": repair_mojibake_object(dict(row.get("metadata_json") or {})),
+            "before_json": repair_mojibake_object(dict(row.get("before_json") or {}) or None),
+            "after_json": repair_mojibake_object(dict(row.get("after_json") or {}) or None),
+        }
 
     @staticmethod
     def _parse_date(value: object) -> date | None:
@@ -319,6 +817,7 @@ class SupabaseWorkspaceSyncService:
     @staticmethod
     def _reset_local_database(target_path: Path) -> None:
         ensure_dir(target_path.parent)
+        close_connection_manager(target_path)
         if target_path.exists():
             target_path.unlink()
 
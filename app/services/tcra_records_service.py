@@ -1005,13 +1005,13 @@ def filter_tcras(
 
     filtered: list[Tcra] = []
     for position, record in enumerate(records, start=1):
-        key = record.uid or f"tcra:{position}"
-        search_blob = search_index.get(key) if search_index is not None else None
-        if search_blob is None:
-            search_blob = build_search_blob(record)
-
-        if search_query and search_query not in search_blob:
-            continue
+        if search_query:
+            key = record.uid or f"tcra:{position}"
+            search_blob = search_index.get(key) if search_index is not None else None
+            if search_blob is None:
+                search_blob = build_search_blob(record)
+            if search_query not in search_blob:
+                continue
 
         if status_key and status_key != normalize_key(STATUS_TODOS):
             operational_status = resolve_operational_status(record, today=today)
@@ -1,6 +1,5 @@
 from __future__ import annotations
 
-import os
 import sqlite3
 import uuid
 from contextlib import contextmanager
@@ -10,18 +9,38 @@ from typing import Iterator, Sequence
 
 from app.models.tcra import Tcra
 from app.models.tcra_evento import TcraEvento
+from app.services.sqlite_connection_manager import SqliteConnectionSettings, get_connection_manager
+from app.services.sqlite_fts_support import (
+    build_search_clauses,
+    ensure_trigram_index,
+    rank_fts_rowids,
+    split_search_terms,
+)
 from app.services.tcra_records_service import (
+    DEFAULT_OPERATIONAL_RULES,
+    STATUS_CUMPRIDO,
+    STATUS_TODOS,
     TcraFilterFacets,
     TcraRecordOverview,
-    build_filter_facets,
-    build_record_overview,
+    TcraUpcomingReportSample,
     build_search_blob,
-    build_record_search_index,
-    compute_metrics,
-    filter_tcras,
     normalize_event_type_label,
+    normalize_key,
     normalize_orgao_label,
     normalize_status_label,
+    unique_non_empty,
+)
+from app.services.tcra_sqlite_service_support import (
+    TCRA_DERIVED_COLUMN_NAMES,
+    TCRA_DERIVED_COLUMNS,
+    is_cumprido_sql,
+    operational_status_sql,
+    prazo_vencido_sql,
+    relatorio_pendente_sql,
+    report_due_soon_sql,
+    risk_score_sql,
+    stale_movement_sql,
+    tcra_derived_values,
 )
 from app.utils.app_paths import ensure_dir, resolve_data_path
 from app.utils.logger import get_logger
@@ -30,6 +49,8 @@ from app.utils.logger import get_logger
 logger = get_logger("Persistence.TCRA")
 
 DEFAULT_DB_NAME = "compensacoes.db"
+TCRAS_FTS_TABLE = "tcras_fts"
+EVENTOS_UID_CHUNK_SIZE = 500
 TCRA_ROW_COLUMNS = """
     uid,
     numero_processo,
@@ -52,6 +73,33 @@ TCRA_ROW_COLUMNS = """
     mpsp_relacionado,
     inquerito_civil
 """
+TCRA_STORAGE_COLUMNS = (
+    "uid",
+    "numero_processo",
+    "numero_tcra",
+    "local",
+    "endereco",
+    "bairro",
+    "orgao_acompanhamento",
+    "status",
+    "data_assinatura",
+    "prazo_final",
+    "periodicidade_relatorio_meses",
+    "data_ultimo_relatorio",
+    "data_proximo_relatorio",
+    "area_m2",
+    "numero_mudas_previsto",
+    "servicos_exigidos",
+    "responsavel_execucao",
+    "observacoes",
+    "mpsp_relacionado",
+    "inquerito_civil",
+    "search_blob_norm",
+    *TCRA_DERIVED_COLUMN_NAMES,
+    "created_at",
+    "updated_at",
+)
+TCRA_UPCOMING_REPORTS_LIMIT = 5
 TCRA_DEFAULT_ORDER_BY = """
     CASE WHEN TRIM(numero_tcra) <> '' THEN 0 ELSE 1 END,
     numero_tcra COLLATE NOCASE ASC,
@@ -102,17 +150,31 @@ def _int_from_storage(value: object) -> int | None:
 
 
 class TcraSqliteService:
-    def __init__(self, *, db_path: str | Path | None = None):
+    def __init__(
+        self,
+        *,
+        db_path: str | Path | None = None,
+        connection_settings: SqliteConnectionSettings | None = None,
+    ):
         self.db_path = Path(db_path) if db_path else resolve_data_path("state", DEFAULT_DB_NAME)
         ensure_dir(self.db_path.parent)
+        self.connection_manager = get_connection_manager(self.db_path, settings=connection_settings)
+        self.full_text_search_enabled = False
         self.initialize()
 
     def initialize(self) -> None:
         with self._connect() as conn:
             self._create_schema(conn)
+            self.full_text_search_enabled = ensure_trigram_index(
+                conn,
+                fts_table=TCRAS_FTS_TABLE,
+                content_table="tcras",
+                content_rowid="rowid",
+                column="search_blob_norm",
+            )
 
     def list_tcras(self) -> list[Tcra]:
-        with self._connect() as conn:
+        with self._connect(read_only=True) as conn:
             tcra_rows = self._select_tcra_rows(conn)
             if not tcra_rows:
                 return []
@@ -127,7 +189,7 @@ class TcraSqliteService:
         normalized_uids = [_stringify(uid) for uid in uids if _stringify(uid)]
         if not normalized_uids:
             return []
-        with self._connect() as conn:
+        with self._connect(read_only=True) as conn:
             placeholders = ", ".join("?" for _ in normalized_uids)
             rows = self._select_tcra_rows(
                 conn,
@@ -156,11 +218,11 @@ class TcraSqliteService:
         only_relatorio_pendente: bool = False,
         only_prazo_vencido: bool = False,
         today: date | None = None,
+        rank_by_relevance: bool = False,
     ) -> list[Tcra]:
-        records = self.list_tcras()
-        return filter_tcras(
-            records,
-            text=text,
+        search_terms = split_search_terms(text)
+        where_clause, params = self._build_tcra_where_clause(
+            search_terms=search_terms,
             status=status,
             selected_orgaos=selected_orgaos,
             selected_bairros=selected_bairros,
@@ -169,12 +231,72 @@ class TcraSqliteService:
             only_mpsp=only_mpsp,
             only_relatorio_pendente=only_relatorio_pendente,
             only_prazo_vencido=only_prazo_vencido,
-            search_index=build_record_search_index(records),
-            today=today,
+            today=today or date.today(),
         )
+        with self._connect(read_only=True) as conn:
+            rows = list(
+                conn.execute(
+                    f"""
+                    SELECT rowid AS search_rowid, {TCRA_ROW_COLUMNS}
+                    FROM tcras
+                    {f"WHERE {where_clause}" if where_clause else ""}
+                    ORDER BY {TCRA_DEFAULT_ORDER_BY}
+                    """,
+                    params,
+                ).fetchall()
+            )
+            if not rows:
+                return []
+            if rank_by_relevance and search_terms:
+                positions = rank_fts_rowids(conn, search_terms, fts_table=self._tcras_fts_table())
+                if positions:
+                    fallback_position = len(positions)
+                    rows.sort(key=lambda row: positions.get(int(row["search_rowid"]), fallback_position))
+            eventos_by_uid = self._load_eventos_by_uid(conn, tcra_uids=[_stringify(row["uid"]) for row in rows])
+            return [self._row_to_tcra(row, eventos_by_uid.get(_stringify(row["uid"]), ())) for row in rows]
 
     def query_filter_facets(self, *, today: date | None = None) -> TcraFilterFacets:
-        return build_filter_facets(self.list_tcras(), today=today)
+        current_day = today or date.today()
+        with self._connect(read_only=True) as conn:
+            total_count = int(conn.execute("SELECT COUNT(*) FROM tcras").fetchone()[0] or 0)
+            if not total_count:
+                return TcraFilterFacets(total_count=0)
+            # unique_non_empty mantem a primeira grafia vista, entao as combinacoes
+            # distintas seguem a ordem padrao da listagem.
+            facet_rows = conn.execute(
+                f"""
+                SELECT operational_status, orgao_acompanhamento, bairro, responsavel_execucao
+                FROM (
+                    SELECT
+                        {operational_status_sql(current_day)} AS operational_status,
+                        orgao_acompanhamento,
+                        bairro,
+                        responsavel_execucao,
+                        ROW_NUMBER() OVER (ORDER BY {TCRA_DEFAULT_ORDER_BY}) AS position
+                    FROM tcras
+                )
+                GROUP BY operational_status, orgao_acompanhamento, bairro, responsavel_execucao
+                ORDER BY MIN(position) ASC
+                """
+            ).fetchall()
+            statuses = [_stringify(row["operational_status"]) for row in facet_rows]
+            orgaos = [_stringify(row["orgao_acompanhamento"]) for row in facet_rows]
+            bairros = [_stringify(row["bairro"]) for row in facet_rows]
+            responsaveis = [_stringify(row["responsavel_execucao"]) for row in facet_rows]
+            years = [
+                _stringify(row[0])
+                for row in conn.execute(
+                    "SELECT DISTINCT processo_year FROM tcras WHERE processo_year <> '' ORDER BY processo_year DESC"
+                ).fetchall()
+            ]
+        return TcraFilterFacets(
+            total_count=total_count,
+            statuses=tuple(unique_non_empty(statuses)),
+            orgaos_acompanhamento=tuple(unique_non_empty(normalize_orgao_label(item) for item in orgaos)),
+            bairros=tuple(unique_non_empty(bairros)),
+            anos_processo=tuple(years),
+            responsaveis_execucao=tuple(unique_non_empty(responsaveis)),
+        )
 
     def query_metrics(
         self,
@@ -190,8 +312,9 @@ class TcraSqliteService:
         only_prazo_vencido: bool = False,
         today: date | None = None,
     ) -> dict[str, object]:
-        records = self.query_tcras(
-            text=text,
+        current_day = today or date.today()
+        where_clause, params = self._build_tcra_where_clause(
+            search_terms=split_search_terms(text),
             status=status,
             selected_orgaos=selected_orgaos,
             selected_bairros=selected_bairros,
@@ -200,12 +323,227 @@ class TcraSqliteService:
             only_mpsp=only_mpsp,
             only_relatorio_pendente=only_relatorio_pendente,
             only_prazo_vencido=only_prazo_vencido,
-            today=today,
+            today=current_day,
         )
-        return compute_metrics(records, today=today)
+        with self._connect(read_only=True) as conn:
+            return self._query_metrics(conn, where_clause=where_clause, params=params, today=current_day)
 
     def build_record_overview(self, *, today: date | None = None) -> TcraRecordOverview:
-        return build_record_overview(self.list_tcras(), today=today)
+        current_day = today or date.today()
+        with self._connect(read_only=True) as conn:
+            metrics = self._query_metrics(conn, where_clause="", params=(), today=current_day)
+            upcoming_rows = conn.execute(
+                f"""
+                SELECT uid, numero_processo, numero_tcra, local, data_proximo_relatorio
+                FROM tcras
+                WHERE data_proximo_relatorio <> '' AND NOT {is_cumprido_sql()}
+                ORDER BY data_proximo_relatorio ASC, numero_processo ASC, uid ASC
+                LIMIT ?
+                """,
+                (TCRA_UPCOMING_REPORTS_LIMIT,),
+            ).fetchall()
+
+        return TcraRecordOverview(
+            total_count=int(metrics["count_total"]),
+            ativos_count=int(metrics["count_ativos"]),
+            cumpridos_count=int(metrics["count_cumpridos"]),
+            prazo_vencido_count=int(metrics["count_prazo_vencido"]),
+            relatorio_pendente_count=int(metrics["count_relatorio_pendente"]),
+            mpsp_relacionados_count=int(metrics["count_mpsp_relacionados"]),
+            com_eventos_count=int(metrics["count_com_eventos"]),
+            sem_numero_tcra_count=int(metrics["count_sem_numero_tcra"]),
+            upcoming_30d_count=int(metrics["count_relatorio_proximo_30d"]),
+            sem_responsavel_count=int(metrics["count_sem_responsavel"]),
+            alertas_count=int(metrics["count_alertas"]),
+            sem_movimentacao_count=int(metrics["count_sem_movimentacao"]),
+            risco_alto_count=int(metrics["count_risco_alto"]),
+            risco_medio_count=int(metrics["count_risco_medio"]),
+            risco_medio_score=int(metrics["risk_score_medio"]),
+            top_statuses=tuple(metrics["status_sorted"]),
+            top_orgaos=tuple(metrics["orgaos_sorted"]),
+            upcoming_reports=tuple(
+                TcraUpcomingReportSample(
+                    uid=_stringify(row["uid"]),
+                    numero_processo=_stringify(row["numero_processo"]),
+                    numero_tcra=_stringify(row["numero_tcra"]),
+                    local=_stringify(row["local"]),
+                    data_proximo_relatorio=_date_from_storage(row["data_proximo_relatorio"]),
+                )
+                for row in upcoming_rows
+            ),
+        )
+
+    def _build_tcra_where_clause(
+        self,
+        *,
+        search_terms: Sequence[str] = (),
+        status: str = "Todos",
+        selected_orgaos: Sequence[str] = (),
+        selected_bairros: Sequence[str] = (),
+        selected_responsaveis: Sequence[str] = (),
+        selected_year: str = "Todos",
+        only_mpsp: bool = False,
+        only_relatorio_pendente: bool = False,
+        only_prazo_vencido: bool = False,
+        today: date,
+    ) -> tuple[str, tuple[object, ...]]:
+        clauses, search_params = build_search_clauses(
+            search_terms,
+            fts_table=self._tcras_fts_table(),
+            rowid_column="tcras.rowid",
+        )
+        params: list[object] = list(search_params)
+
+        status_key = normalize_key(status)
+        if status_key and status_key != normalize_key(STATUS_TODOS):
+            clauses.append(f"(status_key = ? OR {operational_status_sql(today, as_key=True)} = ?)")
+            params.extend((status_key, status_key))
+
+        normalized_year = _stringify(selected_year)
+        if normalized_year and normalized_year != STATUS_TODOS:
+            clauses.append("processo_year = ?")
+            params.append(normalized_year)
+
+        for column, selected_values in (
+            ("orgao_key", selected_orgaos),
+            ("bairro_key", selected_bairros),
+            ("responsavel_key", selected_responsaveis),
+        ):
+            keys = sorted({normalize_key(item) for item in selected_values or ()})
+            if not keys:
+                continue
+            placeholders = ", ".join("?" for _ in keys)
+            clauses.append(f"{column} IN ({placeholders})")
+            params.extend(keys)
+
+        if only_mpsp:
+            clauses.append("mpsp_flag = 1")
+        if only_relatorio_pendente:
+            clauses.append(relatorio_pendente_sql(today))
+        if only_prazo_vencido:
+            clauses.append(prazo_vencido_sql(today))
+        return " AND ".join(clauses), tuple(params)
+
+    def _query_metrics(
+        self,
+        conn: sqlite3.Connection,
+        *,
+        where_clause: str,
+        params: Sequence[object],
+        today: date,
+    ) -> dict[str, object]:
+        rules = DEFAULT_OPERATIONAL_RULES
+        last_evento_column = "ev.last_evento"
+        # Mesmas regras de compute_metrics, avaliadas linha a linha no SQLite.
+        # A posicao na ordem padrao desempata os agrupamentos como o Counter.
+        conn.execute("DROP TABLE IF EXISTS temp.tcra_metric_rows")
+        conn.execute(
+            f"""
+            CREATE TEMP TABLE tcra_metric_rows AS
+            SELECT
+                ROW_NUMBER() OVER (ORDER BY {TCRA_DEFAULT_ORDER_BY}) AS position,
+                {operational_status_sql(today)} AS operational_status,
+                CASE WHEN TRIM(orgao_acompanhamento) = '' THEN '(Sem órgão)' ELSE orgao_acompanhamento END AS orgao_label,
+                {prazo_vencido_sql(today)} AS prazo_vencido,
+                {relatorio_pendente_sql(today)} AS relatorio_pendente,
+                {report_due_soon_sql(today, rules)} AS relatorio_proximo,
+                {stale_movement_sql(today, last_evento_column=last_evento_column, rules=rules)} AS sem_movimentacao,
+                {risk_score_sql(today, last_evento_column=last_evento_column, rules=rules)} AS risk_score,
+                {is_cumprido_sql()} AS cumprido,
+                mpsp_flag,
+                COALESCE(ev.eventos_count, 0) AS eventos_count,
+                TRIM(numero_tcra) = '' AS sem_numero_tcra,
+                TRIM(responsavel_execucao) = '' AS sem_responsavel,
+                TRIM(orgao_acompanhamento) = '' AS sem_orgao
+            FROM tcras
+            LEFT JOIN (
+                SELECT tcra_uid, MAX(data_evento) AS last_evento, COUNT(*) AS eventos_count
+                FROM tcra_eventos
+                GROUP BY tcra_uid
+            ) AS ev ON ev.tcra_uid = tcras.uid
+            {f"WHERE {where_clause}" if where_clause else ""}
+            """,
+            tuple(params),
+        )
+        try:
+            totals = conn.execute(
+                """
+                SELECT
+                    COUNT(*) AS count_total,
+                    COALESCE(SUM(operational_status = ?), 0) AS count_cumpridos,
+                    COALESCE(SUM(prazo_vencido), 0) AS count_prazo_vencido,
+                    COALESCE(SUM(relatorio_pendente), 0) AS count_relatorio_pendente,
+                    COALESCE(SUM(prazo_vencido OR relatorio_pendente), 0) AS count_alertas,
+                    COALESCE(SUM(relatorio_proximo), 0) AS count_relatorio_proximo_30d,
+                    COALESCE(SUM(mpsp_flag), 0) AS count_mpsp_relacionados,
+                    COALESCE(SUM(eventos_count > 0), 0) AS count_com_eventos,
+                    COALESCE(SUM(sem_numero_tcra), 0) AS count_sem_numero_tcra,
+                    COALESCE(SUM(sem_responsavel), 0) AS count_sem_responsavel,
+                    COALESCE(SUM(sem_orgao), 0) AS count_sem_orgao,
+                    COALESCE(SUM(sem_movimentacao), 0) AS count_sem_movimentacao,
+                    COALESCE(SUM(NOT cumprido AND risk_score >= ?), 0) AS count_risco_alto,
+                    COALESCE(SUM(NOT cumprido AND risk_score < ? AND risk_score >= ?), 0) AS count_risco_medio,
+                    COALESCE(SUM(risk_score), 0) AS total_risk_score
+                FROM tcra_metric_rows
+                """,
+                (
+                    STATUS_CUMPRIDO,
+                    rules.high_risk_threshold,
+                    rules.high_risk_threshold,
+                    rules.medium_risk_threshold,
+                ),
+            ).fetchone()
+            status_sorted = tuple(
+                (_stringify(row[0]), int(row[1]))
+                for row in conn.execute(
+                    """
+                    SELECT operational_status, COUNT(*) AS total
+                    FROM tcra_metric_rows
+                    GROUP BY operational_status
+                    ORDER BY total DESC, MIN(position) ASC
+                    """
+                ).fetchall()
+            )
+            orgaos_sorted = tuple(
+                (_stringify(row[0]), int(row[1]))
+                for row in conn.execute(
+                    """
+                    SELECT orgao_label, COUNT(*) AS total
+                    FROM tcra_metric_rows
+                    GROUP BY orgao_label
+                    ORDER BY total DESC, MIN(position) ASC
+                    """
+                ).fetchall()
+            )
+        finally:
+            conn.execute("DROP TABLE IF EXISTS temp.tcra_metric_rows")
+
+        total_count = int(totals["count_total"] or 0)
+        cumpridos_count = int(totals["count_cumpridos"] or 0)
+        total_risk_score = int(totals["total_risk_score"] or 0)
+        return {
+            "count_total": total_count,
+            "count_ativos": total_count - cumpridos_count,
+            "count_cumpridos": cumpridos_count,
+            "count_prazo_vencido": int(totals["count_prazo_vencido"] or 0),
+            "count_relatorio_pendente": int(totals["count_relatorio_pendente"] or 0),
+            "count_mpsp_relacionados": int(totals["count_mpsp_relacionados"] or 0),
+            "count_com_eventos": int(totals["count_com_eventos"] or 0),
+            "count_sem_numero_tcra": int(totals["count_sem_numero_tcra"] or 0),
+            "count_sem_responsavel": int(totals["count_sem_responsavel"] or 0),
+            "count_sem_orgao": int(totals["count_sem_orgao"] or 0),
+            "count_sem_movimentacao": int(totals["count_sem_movimentacao"] or 0),
+            "count_relatorio_proximo_30d": int(totals["count_relatorio_proximo_30d"] or 0),
+            "count_alertas": int(totals["count_alertas"] or 0),
+            "count_risco_alto": int(totals["count_risco_alto"] or 0),
+            "count_risco_medio": int(totals["count_risco_medio"] or 0),
+            "risk_score_medio": int(round(total_risk_score / total_count)) if total_count else 0,
+            "status_sorted": status_sorted,
+            "orgaos_sorted": orgaos_sorted,
+        }
+
+    def _tcras_fts_table(self) -> str | None:
+        return TCRAS_FTS_TABLE if getattr(self, "full_text_search_enabled", False) else None
 
     def find_tcra_by_uid(self, uid: str) -> Tcra | None:
         records = self.get_tcras_by_uids([uid])
@@ -224,7 +562,7 @@ class TcraSqliteService:
         normalized_numero_processo = _stringify(numero_processo)
         normalized_local = _stringify(local)
 
-        with self._connect() as conn:
+        with self._connect(read_only=True) as conn:
             if normalized_numero_tcra:
                 row = self._select_tcra_row(
                     conn,
@@ -256,80 +594,8 @@ class TcraSqliteService:
             ).fetchone()
             created_at = _stringify(existing["created_at"]) if existing is not None else timestamp
             conn.execute(
-                """
-                INSERT INTO tcras (
-                    uid,
-                    numero_processo,
-                    numero_tcra,
-                    local,
-                    endereco,
-                    bairro,
-                    orgao_acompanhamento,
-                    status,
-                    data_assinatura,
-                    prazo_final,
-                    periodicidade_relatorio_meses,
-                    data_ultimo_relatorio,
-                    data_proximo_relatorio,
-                    area_m2,
-                    numero_mudas_previsto,
-                    servicos_exigidos,
-                    responsavel_execucao,
-                    observacoes,
-                    mpsp_relacionado,
-                    inquerito_civil,
-                    search_blob_norm,
-                    created_at,
-                    updated_at
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ON CONFLICT(uid) DO UPDATE SET
-                    numero_processo = excluded.numero_processo,
-                    numero_tcra = excluded.numero_tcra,
-                    local = excluded.local,
-                    endereco = excluded.endereco,
-                    bairro = excluded.bairro,
-                    orgao_acompanhamento = excluded.orgao_acompanhamento,
-                    status = excluded.status,
-                    data_assinatura = excluded.data_assinatura,
-                    prazo_final = excluded.prazo_final,
-                    periodicidade_relatorio_meses = excluded.periodicidade_relatorio_meses,
-                    data_ultimo_relatorio = excluded.data_ultimo_relatorio,
-                    data_proximo_relatorio = excluded.data_proximo_relatorio,
-                    area_m2 = excluded.area_m2,
-                    numero_mudas_previsto = excluded.numero_mudas_previsto,
-                    servicos_exigidos = excluded.servicos_exigidos,
-                    responsavel_execucao = excluded.responsavel_execucao,
-                    observacoes = excluded.observacoes,
-                    mpsp_relacionado = excluded.mpsp_relacionado,
-                    inquerito_civil = excluded.inquerito_civil,
-                    search_blob_norm = excluded.search_blob_norm,
-                    updated_at = excluded.updated_at
-                """,
-                (
-                    normalized.uid,
-                    normalized.numero_processo,
-                    normalized.numero_tcra,
-                    normalized.local,
-                    normalized.endereco,
-                    normalized.bairro,
-                    normalized.orgao_acompanhamento,
-                    normalized.status,
-                    _date_to_storage(normalized.data_assinatura),
-                    _date_to_storage(normalized.prazo_final),
-                    normalized.periodicidade_relatorio_meses,
-                    _date_to_storage(normalized.data_ultimo_relatorio),
-                    _date_to_storage(normalized.data_proximo_relatorio),
-                    normalized.area_m2,
-                    normalized.numero_mudas_previsto,
-                    normalized.servicos_exigidos,
-                    normalized.responsavel_execucao,
-                    normalized.observacoes,
-                    normalized.mpsp_relacionado,
-                    normalized.inquerito_civil,
-                    self._build_search_blob(normalized),
-                    created_at,
-                    timestamp,
-                ),
+                self._tcra_upsert_sql(),
+                self._tcra_storage_params(normalized, created_at=created_at, updated_at=timestamp),
             )
             self._replace_eventos(conn, normalized.uid, normalized.eventos, timestamp=timestamp)
         return normalized.uid
@@ -342,62 +608,35 @@ class TcraSqliteService:
             conn.execute("DELETE FROM tcras")
             for tcra in normalized_tcras:
                 conn.execute(
-                    """
-                    INSERT INTO tcras (
-                        uid,
-                        numero_processo,
-                        numero_tcra,
-                        local,
-                        endereco,
-                        bairro,
-                        orgao_acompanhamento,
-                        status,
-                        data_assinatura,
-                        prazo_final,
-                        periodicidade_relatorio_meses,
-                        data_ultimo_relatorio,
-                        data_proximo_relatorio,
-                        area_m2,
-                        numero_mudas_previsto,
-                        servicos_exigidos,
-                        responsavel_execucao,
-                        observacoes,
-                        mpsp_relacionado,
-                        inquerito_civil,
-                        search_blob_norm,
-                        created_at,
-                        updated_at
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    """,
-                    (
-                        tcra.uid,
-                        tcra.numero_processo,
-                        tcra.numero_tcra,
-                        tcra.local,
-                        tcra.endereco,
-                        tcra.bairro,
-                        tcra.orgao_acompanhamento,
-                        tcra.status,
-                        _date_to_storage(tcra.data_assinatura),
-                        _date_to_storage(tcra.prazo_final),
-                        tcra.periodicidade_relatorio_meses,
-                        _date_to_storage(tcra.data_ultimo_relatorio),
-                        _date_to_storage(tcra.data_proximo_relatorio),
-                        tcra.area_m2,
-                        tcra.numero_mudas_previsto,
-                        tcra.servicos_exigidos,
-                        tcra.responsavel_execucao,
-                        tcra.observacoes,
-                        tcra.mpsp_relacionado,
-                        tcra.inquerito_civil,
-                        self._build_search_blob(tcra),
-                        timestamp,
-                        timestamp,
-                    ),
+                    self._tcra_insert_sql(),
+                    self._tcra_storage_params(tcra, created_at=timestamp, updated_at=timestamp),
                 )
                 self._replace_eventos(conn, tcra.uid, tcra.eventos, timestamp=timestamp)
         return len(normalized_tcras)
 
+    def apply_changes(self, upserts: Sequence[Tcra], deleted_uids: Sequence[str] = ()) -> tuple[int, int]:
+        """Grava os TCRAs alterados e remove os excluidos numa transacao; devolve (tcras, eventos)."""
+        normalized_tcras = [self._normalize_tcra(tcra) for tcra in upserts]
+        upserted_uids = {tcra.uid for tcra in normalized_tcras}
+        removed_uids = [uid for uid in dict.fromkeys(_stringify(uid) for uid in deleted_uids) if uid]
+        timestamp = _utc_timestamp()
+        with self._connect() as conn:
+            conn.executemany(
+                "DELETE FROM tcras WHERE uid = ?",
+                ((uid,) for uid in removed_uids if uid not in upserted_uids),
+            )
+            for tcra in normalized_tcras:
+                existing = conn.execute("SELECT created_at FROM tcras WHERE uid = ?", (tcra.uid,)).fetchone()
+                created_at = _stringify(existing["created_at"]) if existing is not None else timestamp
+                conn.execute(
+                    self._tcra_upsert_sql(),
+                    self._tcra_storage_params(tcra, created_at=created_at, updated_at=timestamp),
+                )
+                self._replace_eventos(conn, tcra.uid, tcra.eventos, timestamp=timestamp)
+            tcra_count = int(conn.execute("SELECT COUNT(*) FROM tcras").fetchone()[0] or 0)
+            event_count = int(conn.execute("SELECT COUNT(*) FROM tcra_eventos").fetchone()[0] or 0)
+        return tcra_count, event_count
+
     def delete_tcra(self, uid: str) -> bool:
         normalized_uid = _stringify(uid)
         if not normalized_uid:
@@ -452,6 +691,50 @@ class TcraSqliteService:
         normalized.sort(key=lambda item: (item.sequence, item.data_evento or date.min, item.tipo_evento))
         return normalized
 
+    def _tcra_insert_sql(self) -> str:
+        placeholders = ", ".join("?" for _ in TCRA_STORAGE_COLUMNS)
+        return f"INSERT INTO tcras ({', '.join(TCRA_STORAGE_COLUMNS)}) VALUES ({placeholders})"
+
+    def _tcra_upsert_sql(self) -> str:
+        updates = ",\n                ".join(
+            f"{column} = excluded.{column}"
+            for column in TCRA_STORAGE_COLUMNS
+            if column not in {"uid", "created_at"}
+        )
+        return f"""
+            {self._tcra_insert_sql()}
+            ON CONFLICT(uid) DO UPDATE SET
+                {updates}
+        """
+
+    def _tcra_storage_params(self, tcra: Tcra, *, created_at: str, updated_at: str) -> tuple[object, ...]:
+        return (
+            tcra.uid,
+            tcra.numero_processo,
+            tcra.numero_tcra,
+            tcra.local,
+            tcra.endereco,
+            tcra.bairro,
+            tcra.orgao_acompanhamento,
+            tcra.status,
+            _date_to_storage(tcra.data_assinatura),
+            _date_to_storage(tcra.prazo_final),
+            tcra.periodicidade_relatorio_meses,
+            _date_to_storage(tcra.data_ultimo_relatorio),
+            _date_to_storage(tcra.data_proximo_relatorio),
+            tcra.area_m2,
+            tcra.numero_mudas_previsto,
+            tcra.servicos_exigidos,
+            tcra.responsavel_execucao,
+            tcra.observacoes,
+            tcra.mpsp_relacionado,
+            tcra.inquerito_civil,
+            self._build_search_blob(tcra),
+            *tcra_derived_values(tcra),
+            created_at,
+            updated_at,
+        )
+
     def _build_search_blob(self, tcra: Tcra) -> str:
         return build_search_blob(tcra)
 
@@ -507,13 +790,19 @@ class TcraSqliteService:
             SELECT tcra_uid, sequence, data_evento, tipo_evento, descricao, prazo_resultante, status_resultante, protocolo, documento_ref
             FROM tcra_eventos
         """
-        params: tuple[object, ...] = ()
+        rows: list[sqlite3.Row] = []
         if normalized_uids:
-            placeholders = ", ".join("?" for _ in normalized_uids)
-            query += f" WHERE tcra_uid IN ({placeholders})"
-            params = tuple(normalized_uids)
-        query += " ORDER BY tcra_uid ASC, sequence ASC"
-        rows = conn.execute(query, params).fetchall()
+            for start in range(0, len(normalized_uids), EVENTOS_UID_CHUNK_SIZE):
+                chunk = normalized_uids[start : start + EVENTOS_UID_CHUNK_SIZE]
+                placeholders = ", ".join("?" for _ in chunk)
+                rows.extend(
+                    conn.execute(
+                        query + f" WHERE tcra_uid IN ({placeholders}) ORDER BY tcra_uid ASC, sequence ASC",
+                        tuple(chunk),
+                    ).fetchall()
+                )
+        else:
+            rows = conn.execute(query + " ORDER BY tcra_uid ASC, sequence ASC").fetchall()
         eventos_by_uid: dict[str, list[TcraEvento]] = {}
         for row in rows:
             uid = _stringify(row["tcra_uid"])
@@ -581,20 +870,10 @@ class TcraSqliteService:
         )
 
     @contextmanager
-    def _connect(self) -> Iterator[sqlite3.Connection]:
-        conn = sqlite3.connect(os.fspath(self.db_path), timeout=30)
-        try:
-            conn.row_factory = sqlite3.Row
-            conn.execute("PRAGMA foreign_keys = ON")
-            conn.execute("PRAGMA journal_mode = WAL")
-            conn.execute("PRAGMA synchronous = NORMAL")
+    def _connect(self, *, read_only: bool = False) -> Iterator[sqlite3.Connection]:
+        connection = self.connection_manager.reader() if read_only else self.connection_manager.writer()
+        with connection as conn:
             yield conn
-            conn.commit()
-        except Exception:
-            conn.rollback()
-            raise
-        finally:
-            conn.close()
 
     def _select_tcra_rows(
         self,
@@ -683,11 +962,37 @@ class TcraSqliteService:
         conn.execute("CREATE INDEX IF NOT EXISTS idx_tcra_eventos_uid_sequence ON tcra_eventos(tcra_uid, sequence)")
         self._ensure_column(conn, "tcra_eventos", "protocolo", "TEXT NOT NULL DEFAULT ''")
         self._ensure_column(conn, "tcra_eventos", "documento_ref", "TEXT NOT NULL DEFAULT ''")
+        added_derived_columns = [
+            self._ensure_column(conn, "tcras", column_name, definition)
+            for column_name, definition in TCRA_DERIVED_COLUMNS
+        ]
+        if any(added_derived_columns):
+            self._backfill_derived_columns(conn)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_tcras_processo_year ON tcras(processo_year)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_tcras_orgao_key ON tcras(orgao_key)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_tcras_bairro_key ON tcras(bairro_key)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_tcras_prox_relatorio ON tcras(data_proximo_relatorio)")
+
+    def _backfill_derived_columns(self, conn: sqlite3.Connection) -> None:
+        rows = self._select_tcra_rows(conn, order_by="")
+        if not rows:
+            return
+        assignments = ", ".join(f"{column} = ?" for column in TCRA_DERIVED_COLUMN_NAMES)
+        conn.executemany(
+            f"UPDATE tcras SET {assignments} WHERE uid = ?",
+            [
+                (*tcra_derived_values(self._row_to_tcra(row, ())), _stringify(row["uid"]))
+                for row in rows
+            ],
+        )
+        logger.info(f"[TCRA] Colunas de consulta preenchidas para {len(rows)} TCRA(s) existentes.")
 
-    def _ensure_column(self, conn: sqlite3.Connection, table_name: str, column_name: str, definition: str) -> None:
+    def _ensure_column(self, conn: sqlite3.Connection, table_name: str, column_name: str, definition: str) -> bool:
         columns = {
             _stringify(row["name"])
             for row in conn.execute(f"PRAGMA table_info({table_name})").fetchall()
         }
-        if column_name not in columns:
-            conn.execute(f"ALTER TABLE {table_name} ADD COLUMN {column_name} {definition}")
+        if column_name in columns:
+            return False
+        conn.execute(f"ALTER TABLE {table_name} ADD COLUMN {column_name} {definition}")
+        return True
@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+from datetime import date, timedelta
+from typing import Sequence
+
+from app.models.tcra import Tcra
+from app.services.tcra_records_service import (
+    DEFAULT_OPERATIONAL_RULES,
+    STATUS_ARQUIVADO,
+    STATUS_CUMPRIDO,
+    STATUS_PRAZO_VENCIDO,
+    STATUS_RELATORIO_PENDENTE,
+    STATUS_SEM_VALIDADE,
+    TcraOperationalRules,
+    extract_year,
+    normalize_key,
+    resolve_operational_status,
+    tcra_is_mpsp_related,
+)
+
+# Colunas derivadas gravadas junto de cada TCRA para que filtros, facetas e
+# metricas rodem direto no SQLite sem reconstruir os registros em Python.
+TCRA_DERIVED_COLUMNS = (
+    ("processo_year", "TEXT NOT NULL DEFAULT ''"),
+    ("status_key", "TEXT NOT NULL DEFAULT ''"),
+    ("status_base", "TEXT NOT NULL DEFAULT ''"),
+    ("status_base_key", "TEXT NOT NULL DEFAULT ''"),
+    ("orgao_key", "TEXT NOT NULL DEFAULT ''"),
+    ("bairro_key", "TEXT NOT NULL DEFAULT ''"),
+    ("responsavel_key", "TEXT NOT NULL DEFAULT ''"),
+    ("mpsp_flag", "INTEGER NOT NULL DEFAULT 0"),
+)
+TCRA_DERIVED_COLUMN_NAMES = tuple(name for name, _ in TCRA_DERIVED_COLUMNS)
+
+# Status que resolve_operational_status devolve antes de olhar as datas.
+_LOCKED_OPERATIONAL_STATUSES = (
+    STATUS_SEM_VALIDADE,
+    STATUS_CUMPRIDO,
+    STATUS_PRAZO_VENCIDO,
+    STATUS_RELATORIO_PENDENTE,
+)
+_CUMPRIDO_STATUSES = (STATUS_CUMPRIDO, STATUS_ARQUIVADO)
+
+
+def sql_literal(value: object) -> str:
+    return "'" + str(value or "").replace("'", "''") + "'"
+
+
+def _sql_list(values: Sequence[object]) -> str:
+    return ", ".join(sql_literal(value) for value in values)
+
+
+def tcra_derived_values(tcra: Tcra) -> tuple[object, ...]:
+    # Com date.min nenhuma regra de prazo dispara, entao sobra o status que
+    # independe do dia da consulta; o SQL reaplica as regras de data.
+    status_base = resolve_operational_status(tcra, today=date.min)
+    return (
+        extract_year(tcra.numero_processo) or "",
+        normalize_key(tcra.status),
+        status_base,
+        normalize_key(status_base),
+        normalize_key(tcra.orgao_acompanhamento),
+        normalize_key(tcra.bairro),
+        normalize_key(tcra.responsavel_execucao),
+        1 if tcra_is_mpsp_related(tcra) else 0,
+    )
+
+
+def is_cumprido_sql() -> str:
+    return f"status IN ({_sql_list(_CUMPRIDO_STATUSES)})"
+
+
+def prazo_vencido_sql(today: date) -> str:
+    return f"(NOT {is_cumprido_sql()} AND prazo_final <> '' AND prazo_final < {sql_literal(today.isoformat())})"
+
+
+def relatorio_pendente_sql(today: date) -> str:
+    return (
+        f"(NOT {is_cumprido_sql()} AND data_proximo_relatorio <> '' "
+        f"AND data_proximo_relatorio < {sql_literal(today.isoformat())})"
+    )
+
+
+def report_due_soon_sql(today: date, rules: TcraOperationalRules = DEFAULT_OPERATIONAL_RULES) -> str:
+    limit_day = today + timedelta(days=max(int(rules.upcoming_report_window_days or 0), 0))
+    return (
+        f"(NOT {is_cumprido_sql()} AND data_proximo_relatorio <> '' "
+        f"AND data_proximo_relatorio BETWEEN {sql_literal(today.isoformat())} AND {sql_literal(limit_day.isoformat())})"
+    )
+
+
+def stale_movement_sql(
+    today: date,
+    *,
+    last_evento_column: str,
+    rules: TcraOperationalRules = DEFAULT_OPERATIONAL_RULES,
+) -> str:
+    cutoff = today - timedelta(days=max(int(rules.stale_movement_window_days or 0), 0))
+    last_movement = f"MAX(COALESCE({last_evento_column}, ''), data_ultimo_relatorio, data_assinatura)"
+    return (
+        f"(NOT {is_cumprido_sql()} AND ({last_movement} = '' OR {last_movement} < {sql_literal(cutoff.isoformat())}))"
+    )
+
+
+def consistency_issue_sql() -> str:
+    return f"""(
+        (periodicidade_relatorio_meses IS NOT NULL AND periodicidade_relatorio_meses <= 0)
+        OR (data_assinatura <> '' AND prazo_final <> '' AND prazo_final < data_assinatura)
+        OR (data_ultimo_relatorio <> '' AND data_proximo_relatorio <> '' AND data_proximo_relatorio < data_ultimo_relatorio)
+        OR ({is_cumprido_sql()} AND data_proximo_relatorio <> '')
+        OR (status = {sql_literal(STATUS_RELATORIO_PENDENTE)} AND data_proximo_relatorio = '')
+        OR (status = {sql_literal(STATUS_PRAZO_VENCIDO)} AND prazo_final = '')
+    )"""
+
+
+def operational_status_sql(today: date, *, as_key: bool = False) -> str:
+    base_column = "status_base_key" if as_key else "status_base"
+    locked = [normalize_key(item) if as_key else item for item in _LOCKED_OPERATIONAL_STATUSES]
+    prazo_label = normalize_key(STATUS_PRAZO_VENCIDO) if as_key else STATUS_PRAZO_VENCIDO
+    relatorio_label = normalize_key(STATUS_RELATORIO_PENDENTE) if as_key else STATUS_RELATORIO_PENDENTE
+    return f"""(
+        CASE
+            WHEN {base_column} IN ({_sql_list(locked)}) THEN {base_column}
+            WHEN {prazo_vencido_sql(today)} THEN {sql_literal(prazo_label)}
+            WHEN {relatorio_pendente_sql(today)} THEN {sql_literal(relatorio_label)}
+            ELSE {base_column}
+        END
+    )"""
+
+
+def risk_score_sql(
+    today: date,
+    *,
+    last_evento_column: str,
+    rules: TcraOperationalRules = DEFAULT_OPERATIONAL_RULES,
+) -> str:
+    return f"""(
+        CASE
+            WHEN {is_cumprido_sql()} THEN 0
+            ELSE MIN(
+                (CASE WHEN {prazo_vencido_sql(today)} THEN 35 ELSE 0 END)
+                + (
+                    CASE
+                        WHEN {relatorio_pendente_sql(today)} THEN 30
+                        WHEN {report_due_soon_sql(today, rules)} THEN 15
+                        ELSE 0
+                    END
+                )
+                + (CASE WHEN {stale_movement_sql(today, last_evento_column=last_evento_column, rules=rules)} THEN 20 ELSE 0 END)
+                + (CASE WHEN TRIM(numero_tcra) = '' THEN 10 ELSE 0 END)
+                + (CASE WHEN TRIM(responsavel_execucao) = '' THEN 8 ELSE 0 END)
+                + (CASE WHEN TRIM(orgao_acompanhamento) = '' THEN 8 ELSE 0 END)
+                + (CASE WHEN {consistency_issue_sql()} THEN 25 ELSE 0 END)
+                + (CASE WHEN mpsp_flag = 1 THEN 5 ELSE 0 END),
+                100
+            )
+        END
+    )"""
+
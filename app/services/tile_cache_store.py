@@ -0,0 +1,452 @@
+from __future__ import annotations
+
+import atexit
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+from app.services.sqlite_connection_manager import SqliteConnectionManager, get_connection_manager
+from app.utils.app_paths import resolve_data_path
+from app.utils.logger import get_logger
+
+
+logger = get_logger("Map.TileCache")
+
+TILE_CACHE_FILE = "tiles.mbtiles"
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+DEFAULT_MEMORY_ITEMS = 800
+# Depois disso o tile e revalidado com ETag/Last-Modified antes de ser servido.
+DEFAULT_MAX_AGE_SECONDS = 7 * 24 * 60 * 60
+# O despejo libera ate 90% do limite para nao rodar a cada gravacao.
+EVICTION_TARGET_RATIO = 0.9
+USER_AGENT = "CompensacoesApp/1.0"
+_SCHEMA_VERSION = 1
+
+TILE_PROVIDERS: Dict[str, str] = {
+    "osm": "https://tile.openstreetmap.org/{z}/{x}/{y}.png",
+    "carto_light": "https://a.basemaps.cartocdn.com/light_all/{z}/{x}/{y}.png",
+    "carto_dark": "https://a.basemaps.cartocdn.com/dark_all/{z}/{x}/{y}.png",
+    "esri_places": "https://services.arcgisonline.com/ArcGIS/rest/services/Reference/World_Boundaries_and_Places/MapServer/tile/{z}/{y}/{x}",
+    "esri_transportation": "https://services.arcgisonline.com/ArcGIS/rest/services/Reference/World_Transportation/MapServer/tile/{z}/{y}/{x}",
+    "satellite": "https://server.arcgisonline.com/ArcGIS/rest/services/World_Imagery/MapServer/tile/{z}/{y}/{x}",
+}
+# Tiles oficiais do OSM ficam so na memoria da sessao, nunca no disco.
+MEMORY_ONLY_PROVIDERS = frozenset({"osm"})
+
+
+@dataclass(frozen=True)
+class TileKey:
+    provider: str
+    z: int
+    x: int
+    y: int
+
+
+@dataclass(frozen=True)
+class CachedTile:
+    body: bytes
+    content_type: str
+    etag: str = ""
+    last_modified: str = ""
+    fetched_at: float = 0.0
+
+
+@dataclass(frozen=True)
+class TileResponse:
+    status: int
+    body: bytes
+    content_type: str
+    remote_url: str
+    # cache, stale, revalidated, upstream ou error
+    source: str
+
+
+@dataclass(frozen=True)
+class TileCacheStats:
+    memory_hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+    revalidated: int = 0
+    stale_served: int = 0
+    stored: int = 0
+    evicted: int = 0
+    bytes_served: int = 0
+    bytes_stored: int = 0
+    disk_tiles: int = 0
+    disk_bytes: int = 0
+
+
+def tile_remote_url(key: TileKey) -> str:
+    return TILE_PROVIDERS[key.provider].format(z=key.z, x=key.x, y=key.y)
+
+
+class TileCacheStore:
+    """Cache de tiles em um arquivo SQLite no estilo MBTiles, com LRU por bytes.
+
+    Os tiles ficam indexados por provedor/z/x/y junto com ETag, Last-Modified
+    e o horario do ultimo acesso. Acima de max_bytes, os menos acessados saem
+    do disco. Um LRU em memoria de memory_items tiles fica na frente do banco;
+    os acessos servidos por ele so atualizam o disco no proximo despejo ou em
+    flush(), para que a leitura nao vire escrita.
+    """
+
+    def __init__(
+        self,
+        db_path: str | Path | None = None,
+        *,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        memory_items: int = DEFAULT_MEMORY_ITEMS,
+        max_age_seconds: float = DEFAULT_MAX_AGE_SECONDS,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.db_path = Path(db_path or resolve_data_path("tiles_cache", TILE_CACHE_FILE))
+        self.max_bytes = max(int(max_bytes), 0)
+        self.memory_items = max(int(memory_items), 0)
+        self.max_age_seconds = float(max_age_seconds)
+        self._clock = clock
+        self._lock = threading.RLock()
+        self._manager: Optional[SqliteConnectionManager] = None
+        self._memory: "OrderedDict[TileKey, CachedTile]" = OrderedDict()
+        self._touched: Dict[TileKey, float] = {}
+        self._disk_tiles = 0
+        self._disk_bytes = 0
+        self._counters = {
+            name: 0 for name in TileCacheStats.__dataclass_fields__ if name not in {"disk_tiles", "disk_bytes"}
+        }
+
+    def reserve_memory_items(self, count: int) -> None:
+        """Garante espaco em memoria para o maior consumidor do cache compartilhado."""
+        with self._lock:
+            self.memory_items = max(self.memory_items, int(count))
+
+    def _connection_manager(self) -> SqliteConnectionManager:
+        with self._lock:
+            if self._manager is None:
+                self.db_path.parent.mkdir(parents=True, exist_ok=True)
+                manager = get_connection_manager(self.db_path)
+                with manager.writer() as conn:
+                    self._create_schema(conn)
+                    if int(conn.execute("PRAGMA user_version").fetchone()[0] or 0) < _SCHEMA_VERSION:
+                        self._remove_legacy_tile_files()
+                        conn.execute(f"PRAGMA user_version = {_SCHEMA_VERSION}")
+                    row = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM tiles").fetchone()
+                    self._disk_tiles, self._disk_bytes = int(row[0]), int(row[1])
+                self._manager = manager
+            return self._manager
+
+    @staticmethod
+    def _create_schema(conn) -> None:
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS tiles (
+                provider TEXT NOT NULL,
+                zoom_level INTEGER NOT NULL,
+                tile_column INTEGER NOT NULL,
+                tile_row INTEGER NOT NULL,
+                tile_data BLOB NOT NULL,
+                content_type TEXT NOT NULL,
+                etag TEXT NOT NULL DEFAULT '',
+                last_modified TEXT NOT NULL DEFAULT '',
+                fetched_at REAL NOT NULL,
+                last_access REAL NOT NULL,
+                size INTEGER NOT NULL,
+                PRIMARY KEY (provider, zoom_level, tile_column, tile_row)
+            )
+            """
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_tiles_last_access ON tiles (last_access)")
+
+    def _remove_legacy_tile_files(self) -> None:
+        # Os .bin da versao anterior nao tinham indice nem limite de tamanho.
+        removed = 0
+        for path in self.db_path.parent.glob("*.bin"):
+            try:
+                path.unlink()
+                removed += 1
+            except OSError:
+                continue
+        if removed:
+            logger.info(f"[TileCache] {removed} tile(s) do cache antigo removidos.")
+
+    def _remember(self, key: TileKey, tile: CachedTile) -> None:
+        self._memory[key] = tile
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+
+    def is_fresh(self, tile: CachedTile) -> bool:
+        return float(self._clock()) - float(tile.fetched_at) <= self.max_age_seconds
+
+    def get(self, key: TileKey) -> Optional[CachedTile]:
+        with self._lock:
+            tile = self._memory.get(key)
+            if tile is not None:
+                self._memory.move_to_end(key)
+                self._touched[key] = float(self._clock())
+                self._counters["memory_hits"] += 1
+                self._counters["bytes_served"] += len(tile.body)
+                return tile
+
+        try:
+            with self._connection_manager().reader() as conn:
+                row = conn.execute(
+                    """
+                    SELECT tile_data, content_type, etag, last_modified, fetched_at
+                    FROM tiles
+                    WHERE provider = ? AND zoom_level = ? AND tile_column = ? AND tile_row = ?
+                    """,
+                    (key.provider, key.z, key.x, key.y),
+                ).fetchone()
+        except Exception as exc:
+            logger.warning(f"[TileCache] Falha ao ler tile {key}: {exc}")
+            row = None
+
+        with self._lock:
+            if row is None:
+                self._counters["misses"] += 1
+                return None
+            tile = CachedTile(
+                body=bytes(row["tile_data"]),
+                content_type=str(row["content_type"]),
+                etag=str(row["etag"] or ""),
+                last_modified=str(row["last_modified"] or ""),
+                fetched_at=float(row["fetched_at"]),
+            )
+            self._remember(key, tile)
+            self._touched[key] = float(self._clock())
+            self._counters["disk_hits"] += 1
+            self._counters["bytes_served"] += len(tile.body)
+            return tile
+
+    def put(
+        self,
+        key: TileKey,
+        body: bytes,
+        content_type: str,
+        *,
+        etag: str = "",
+        last_modified: str = "",
+        remember: bool = True,
+    ) -> CachedTile:
+        tile = CachedTile(
+            body=bytes(body),
+            content_type=str(content_type or "application/octet-stream"),
+            etag=str(etag or ""),
+            last_modified=str(last_modified or ""),
+            fetched_at=float(self._clock()),
+        )
+        with self._lock:
+            if remember:
+                self._remember(key, tile)
+            else:
+                self._memory.pop(key, None)
+            self._touched.pop(key, None)
+            self._counters["stored"] += 1
+            self._counters["bytes_stored"] += len(tile.body)
+        if key.provider not in MEMORY_ONLY_PROVIDERS:
+            self._write(key, tile)
+        return tile
+
+    def mark_revalidated(self, key: TileKey, tile: CachedTile) -> CachedTile:
+        """Renova um tile confirmado pelo servidor (304) sem regravar o conteudo."""
+        refreshed = replace(tile, fetched_at=float(self._clock()))
+        with self._lock:
+            self._remember(key, refreshed)
+            self._counters["revalidated"] += 1
+        if key.provider in MEMORY_ONLY_PROVIDERS:
+            return refreshed
+        try:
+            with self._connection_manager().writer() as conn:
+                conn.execute(
+                    """
+                    UPDATE tiles SET fetched_at = ?, last_access = ?
+                    WHERE provider = ? AND zoom_level = ? AND tile_column = ? AND tile_row = ?
+                    """,
+                    (refreshed.fetched_at, refreshed.fetched_at, key.provider, key.z, key.x, key.y),
+                )
+        except Exception as exc:
+            logger.warning(f"[TileCache] Falha ao renovar tile {key}: {exc}")
+        return refreshed
+
+    def fresh_tile_coords(self, provider: str, z: int) -> set[tuple[int, int]]:
+        """Colunas/linhas do zoom que ja estao no disco e dentro da validade."""
+        with self._connection_manager().reader() as conn:
+            rows = conn.execute(
+                """
+                SELECT tile_column, tile_row FROM tiles
+                WHERE provider = ? AND zoom_level = ? AND fetched_at >= ?
+                """,
+                (provider, int(z), float(self._clock()) - self.max_age_seconds),
+            ).fetchall()
+        return {(int(row["tile_column"]), int(row["tile_row"])) for row in rows}
+
+    def record_stale_served(self) -> None:
+        with self._lock:
+            self._counters["stale_served"] += 1
+
+    def _write(self, key: TileKey, tile: CachedTile) -> None:
+        try:
+            with self._connection_manager().writer() as conn:
+                previous = conn.execute(
+                    """
+                    SELECT size FROM tiles
+                    WHERE provider = ? AND zoom_level = ? AND tile_column = ? AND tile_row = ?
+                    """,
+                    (key.provider, key.z, key.x, key.y),
+                ).fetchone()
+                conn.execute(
+                    """
+                    INSERT OR REPLACE INTO tiles (
+                        provider, zoom_level, tile_column, tile_row, tile_data, content_type,
+                        etag, last_modified, fetched_at, last_access, size
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    """,
+                    (
+                        key.provider,
+                        key.z,
+                        key.x,
+                        key.y,
+                        tile.body,
+                        tile.content_type,
+                        tile.etag,
+                        tile.last_modified,
+                        tile.fetched_at,
+                        tile.fetched_at,
+                        len(tile.body),
+                    ),
+                )
+                with self._lock:
+                    if previous is None:
+                        self._disk_tiles += 1
+                        self._disk_bytes += len(tile.body)
+                    else:
+                        self._disk_bytes += len(tile.body) - int(previous["size"])
+                    over_limit = self._disk_bytes > self.max_bytes
+                if over_limit:
+                    self._evict(conn)
+        except Exception as exc:
+            logger.warning(f"[TileCache] Falha ao gravar tile {key}: {exc}")
+
+    def _flush_touched(self, conn) -> None:
+        with self._lock:
+            touched = list(self._touched.items())
+            self._touched.clear()
+        if touched:
+            conn.executemany(
+                """
+                UPDATE tiles SET last_access = MAX(last_access, ?)
+                WHERE provider = ? AND zoom_level = ? AND tile_column = ? AND tile_row = ?
+                """,
+                [(accessed_at, key.provider, key.z, key.x, key.y) for key, accessed_at in touched],
+            )
+
+    def _evict(self, conn) -> None:
+        self._flush_touched(conn)
+        with self._lock:
+            excess = self._disk_bytes - int(self.max_bytes * EVICTION_TARGET_RATIO)
+        victims = []
+        freed = 0
+        for row in conn.execute(
+            "SELECT provider, zoom_level, tile_column, tile_row, size FROM tiles ORDER BY last_access"
+        ):
+            if freed >= excess:
+                break
+            victims.append((row["provider"], row["zoom_level"], row["tile_column"], row["tile_row"]))
+            freed += int(row["size"])
+        conn.executemany(
+            "DELETE FROM tiles WHERE provider = ? AND zoom_level = ? AND tile_column = ? AND tile_row = ?",
+            victims,
+        )
+        with self._lock:
+            self._disk_tiles -= len(victims)
+            self._disk_bytes -= freed
+            self._counters["evicted"] += len(victims)
+
+    def flush(self) -> None:
+        """Grava no disco os acessos servidos pela memoria, preservando a ordem do LRU."""
+        with self._lock:
+            if not self._touched or self._manager is None:
+                return
+        try:
+            with self._connection_manager().writer() as conn:
+                self._flush_touched(conn)
+        except Exception as exc:
+            logger.warning(f"[TileCache] Falha ao gravar acessos aos tiles: {exc}")
+
+    def stats(self) -> TileCacheStats:
+        with self._lock:
+            return TileCacheStats(**self._counters, disk_tiles=self._disk_tiles, disk_bytes=self._disk_bytes)
+
+
+def fetch_tile(
+    store: TileCacheStore,
+    key: TileKey,
+    *,
+    get: Callable[..., object],
+    timeout: float,
+    user_agent: str = USER_AGENT,
+    url_for: Callable[[TileKey], str] = tile_remote_url,
+    remember: bool = True,
+) -> TileResponse:
+    """Serve o tile do cache ou do provedor, revalidando tiles vencidos.
+
+    Sem rede, um tile vencido continua sendo servido; so falta de tile vira erro.
+    """
+    remote_url = url_for(key)
+    cached = store.get(key)
+    if cached is not None and store.is_fresh(cached):
+        return TileResponse(200, cached.body, cached.content_type, remote_url, "cache")
+
+    headers = {"User-Agent": user_agent}
+    if cached is not None and cached.etag:
+        headers["If-None-Match"] = cached.etag
+    if cached is not None and cached.last_modified:
+        headers["If-Modified-Since"] = cached.last_modified
+    try:
+        response = get(remote_url, timeout=timeout, headers=headers)
+    except Exception as exc:
+        if cached is not None:
+            store.record_stale_served()
+            return TileResponse(200, cached.body, cached.content_type, remote_url, "stale")
+        message = f"tile upstream error: {exc}".encode("utf-8", errors="ignore")
+        return TileResponse(502, message, "text/plain; charset=utf-8", remote_url, "error")
+
+    status = int(getattr(response, "status_code", 502))
+    response_headers = getattr(response, "headers", None) or {}
+    if status == 304 and cached is not None:
+        refreshed = store.mark_revalidated(key, cached)
+        return TileResponse(200, refreshed.body, refreshed.content_type, remote_url, "revalidated")
+
+    content_type = response_headers.get("Content-Type", "application/octet-stream")
+    body = response.content if status == 200 else b""
+    if status == 200 and body:
+        store.put(
+            key,
+            body,
+            content_type,
+            etag=response_headers.get("ETag", ""),
+            last_modified=response_headers.get("Last-Modified", ""),
+            remember=remember,
+        )
+        return TileResponse(200, body, content_type, remote_url, "upstream")
+    if cached is not None and status != 404:
+        store.record_stale_served()
+        return TileResponse(200, cached.body, cached.content_type, remote_url, "stale")
+    return TileResponse(status, body, content_type, remote_url, "error")
+
+
+_SHARED_STORE: Optional[TileCacheStore] = None
+_SHARED_STORE_LOCK = threading.Lock()
+
+
+def get_shared_tile_store() -> TileCacheStore:
+    """Cache unico usado pelo proxy HTTP e pelo esquema compmap://."""
+    global _SHARED_STORE
+    with _SHARED_STORE_LOCK:
+        if _SHARED_STORE is None:
+            _SHARED_STORE = TileCacheStore()
+            atexit.register(_SHARED_STORE.flush)
+        return _SHARED_STORE
@@ -2,11 +2,8 @@ from __future__ import annotations
 
 import os
 import re
-import threading
-from collections import OrderedDict
 from typing import Dict, Optional, Tuple
 
-import requests
 from PySide6.QtCore import QByteArray, QBuffer, QIODevice
 from PySide6.QtWebEngineCore import (
     QWebEngineProfile,
@@ -15,6 +12,14 @@ from PySide6.QtWebEngineCore import (
     QWebEngineUrlSchemeHandler,
 )
 
+from app.services.tile_cache_store import (
+    TILE_PROVIDERS,
+    TileCacheStore,
+    TileKey,
+    get_shared_tile_store,
+)
+from app.services.tile_upstream import TileUpstream, get_shared_tile_upstream
+
 
 TILE_SCHEME_NAME = b"compmap"
 _INSTALLED_HANDLERS: Dict[int, "TileSchemeHandler"] = {}
@@ -45,30 +50,30 @@ def install_tile_scheme(profile: Optional[QWebEngineProfile] = None) -> "TileSch
     if existing is not None:
         return existing
 
-    handler = TileSchemeHandler(target_profile)
+    handler = TileSchemeHandler(target_profile, upstream=get_shared_tile_upstream())
     target_profile.installUrlSchemeHandler(TILE_SCHEME_NAME, handler)
     _INSTALLED_HANDLERS[profile_key] = handler
     return handler
 
 
 class TileSchemeHandler(QWebEngineUrlSchemeHandler):
-    _PROVIDERS: Dict[str, str] = {
-        "osm": "https://tile.openstreetmap.org/{z}/{x}/{y}.png",
-        "carto_light": "https://a.basemaps.cartocdn.com/light_all/{z}/{x}/{y}.png",
-        "carto_dark": "https://a.basemaps.cartocdn.com/dark_all/{z}/{x}/{y}.png",
-        "esri_places": "https://services.arcgisonline.com/ArcGIS/rest/services/Reference/World_Boundaries_and_Places/MapServer/tile/{z}/{y}/{x}",
-        "esri_transportation": "https://services.arcgisonline.com/ArcGIS/rest/services/Reference/World_Transportation/MapServer/tile/{z}/{y}/{x}",
-        "satellite": "https://server.arcgisonline.com/ArcGIS/rest/services/World_Imagery/MapServer/tile/{z}/{y}/{x}",
-    }
+    _PROVIDERS: Dict[str, str] = TILE_PROVIDERS
     _PATH_RE = re.compile(r"^/([a-z_]+)/(\d+)/(\d+)/(\d+)\.(png|jpg|jpeg)$")
 
-    def __init__(self, parent=None, *, timeout_sec: int = 12, cache_size: int = 800):
+    def __init__(
+        self,
+        parent=None,
+        *,
+        timeout_sec: int = 12,
+        cache_size: int = 800,
+        store: Optional[TileCacheStore] = None,
+        upstream: Optional[TileUpstream] = None,
+    ):
         super().__init__(parent)
         self._timeout_sec = timeout_sec
-        self._cache_size = cache_size
-        self._cache: "OrderedDict[str, Tuple[bytes, str]]" = OrderedDict()
-        self._cache_lock = threading.Lock()
-        self._session = requests.Session()
+        self._store = store or get_shared_tile_store()
+        self._store.reserve_memory_items(cache_size)
+        self._upstream = upstream or get_shared_tile_upstream()
         self._debug = os.environ.get("COMP_DEBUG_MAP", "").strip() == "1"
 
     def requestStarted(self, request: QWebEngineUrlRequestJob) -> None:
@@ -117,44 +122,15 @@ class TileSchemeHandler(QWebEngineUrlSchemeHandler):
         if not template:
             return 404, b"", "text/plain", ""
 
-        remote_url = template.format(z=z, x=x, y=y)
-        cached = self._cache_get(remote_url)
-        if cached is not None:
-            body, content_type = cached
-            if self._debug:
-                print(f"[MAP SCHEME] cache-hit provider={provider} len={len(body)}", flush=True)
-            return 200, body, content_type, remote_url
-
-        headers = {"User-Agent": "CompensacoesApp/1.0 (TileScheme)"}
-        try:
-            response = self._session.get(remote_url, timeout=self._timeout_sec, headers=headers)
-        except Exception as exc:
-            if self._debug:
-                print(f"[MAP SCHEME] upstream exception provider={provider} url={remote_url} err={exc}", flush=True)
-            return 502, b"", "text/plain", remote_url
-
-        status = int(getattr(response, "status_code", 502))
-        content_type = response.headers.get("Content-Type", "application/octet-stream")
-        body = response.content if status == 200 else b""
-        if status == 200 and body:
-            self._cache_put(remote_url, body, content_type)
-            if self._debug:
-                print(f"[MAP SCHEME] upstream-ok provider={provider} len={len(body)}", flush=True)
-        elif self._debug:
-            print(f"[MAP SCHEME] upstream-non200 provider={provider} status={status} url={remote_url}", flush=True)
-        return status, body, content_type, remote_url
-
-    def _cache_get(self, key: str) -> Optional[Tuple[bytes, str]]:
-        with self._cache_lock:
-            value = self._cache.get(key)
-            if value is None:
-                return None
-            self._cache.move_to_end(key)
-            return value
-
-    def _cache_put(self, key: str, body: bytes, content_type: str) -> None:
-        with self._cache_lock:
-            self._cache[key] = (body, content_type)
-            self._cache.move_to_end(key)
-            while len(self._cache) > self._cache_size:
-                self._cache.popitem(last=False)
+        result = self._upstream.fetch(
+            self._store,
+            TileKey(provider, int(z), int(x), int(y)),
+            timeout=self._timeout_sec,
+            user_agent="CompensacoesApp/1.0 (TileScheme)",
+        )
+        if self._debug:
+            print(
+                f"[MAP SCHEME] {result.source} provider={provider} status={result.status} len={len(result.body)}",
+                flush=True,
+            )
+        return result.status, result.body, result.content_type, result.remote_url
@@ -0,0 +1,295 @@
+from __future__ import annotations
+
+import math
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Callable, Iterable, Mapping, Optional, Sequence
+
+from app.config import (
+    TILE_SEED_MAX_WORKERS,
+    TILE_SEED_MAX_ZOOM,
+    TILE_SEED_MIN_ZOOM,
+    TILE_SEED_RATE_PER_SECOND,
+)
+from app.services.batch_geocode_service import TokenBucket
+from app.services.tile_cache_store import (
+    MEMORY_ONLY_PROVIDERS,
+    TILE_PROVIDERS,
+    USER_AGENT,
+    TileCacheStore,
+    TileKey,
+    tile_remote_url,
+)
+from app.services.tile_upstream import TileUpstream, get_shared_tile_upstream
+from app.utils.logger import get_logger
+
+
+logger = get_logger("Map.TileSeed")
+
+_CANCEL_POLL_SECONDS = 0.2
+
+
+@dataclass(frozen=True)
+class TileBounds:
+    south: float
+    west: float
+    north: float
+    east: float
+
+
+# Limites aproximados do municipio de Sao Carlos (SP), com folga nas bordas.
+SAO_CARLOS_BOUNDS = TileBounds(south=-22.20, west=-48.10, north=-21.60, east=-47.65)
+
+
+@dataclass(frozen=True)
+class TileSeedPolicy:
+    provider: str
+    persist: bool = True
+    rate_per_second: float = TILE_SEED_RATE_PER_SECOND
+    max_zoom: Optional[int] = None
+
+
+def default_seed_policies() -> dict[str, TileSeedPolicy]:
+    # Sem disco para o OSM, pre-baixar seria so carga extra no servidor oficial.
+    return {
+        provider: TileSeedPolicy(provider, persist=provider not in MEMORY_ONLY_PROVIDERS)
+        for provider in TILE_PROVIDERS
+    }
+
+
+@dataclass(frozen=True)
+class TileSeedPlan:
+    keys: tuple[TileKey, ...]
+    providers: tuple[str, ...]
+    skipped_providers: tuple[str, ...]
+    min_zoom: int
+    max_zoom: int
+
+
+@dataclass(frozen=True)
+class TileSeedProgress:
+    completed: int
+    total: int
+    fetched: int
+    skipped: int
+    failed: int
+    key: TileKey
+
+
+@dataclass(frozen=True)
+class TileSeedOutcome:
+    total: int
+    fetched: int
+    skipped: int
+    failed: int
+    cancelled: bool
+    cache_tiles: int
+    cache_bytes: int
+
+
+def tile_xy(lat: float, lon: float, z: int) -> tuple[int, int]:
+    """Coluna/linha do tile Web Mercator (esquema XYZ) que contem o ponto."""
+    count = 2**z
+    lat_rad = math.radians(max(min(lat, 85.05112878), -85.05112878))
+    x = int((lon + 180.0) / 360.0 * count)
+    y = int((1.0 - math.asinh(math.tan(lat_rad)) / math.pi) / 2.0 * count)
+    return min(max(x, 0), count - 1), min(max(y, 0), count - 1)
+
+
+def tile_range(bounds: TileBounds, z: int) -> tuple[range, range]:
+    west_x, north_y = tile_xy(bounds.north, bounds.west, z)
+    east_x, south_y = tile_xy(bounds.south, bounds.east, z)
+    return range(west_x, east_x + 1), range(north_y, south_y + 1)
+
+
+def plan_tile_seed(
+    bounds: TileBounds = SAO_CARLOS_BOUNDS,
+    *,
+    min_zoom: int = TILE_SEED_MIN_ZOOM,
+    max_zoom: int = TILE_SEED_MAX_ZOOM,
+    policies: Mapping[str, TileSeedPolicy] | None = None,
+) -> TileSeedPlan:
+    resolved = dict(default_seed_policies() if policies is None else policies)
+    keys: list[TileKey] = []
+    providers: list[str] = []
+    skipped: list[str] = []
+    for provider, policy in resolved.items():
+        if not policy.persist:
+            skipped.append(provider)
+            continue
+        providers.append(provider)
+        last_zoom = max_zoom if policy.max_zoom is None else min(max_zoom, policy.max_zoom)
+        for z in range(int(min_zoom), int(last_zoom) + 1):
+            columns, rows = tile_range(bounds, z)
+            keys.extend(TileKey(provider, z, x, y) for x in columns for y in rows)
+    return TileSeedPlan(tuple(keys), tuple(providers), tuple(skipped), int(min_zoom), int(max_zoom))
+
+
+def format_cache_size(size_bytes: int) -> str:
+    return f"{size_bytes / (1024 * 1024):.1f} MB"
+
+
+def describe_tile_seed_outcome(outcome: TileSeedOutcome) -> str:
+    prefix = "Download de mapas offline interrompido" if outcome.cancelled else "Mapas offline atualizados"
+    return (
+        f"{prefix}: {outcome.fetched} tile(s) baixados, {outcome.skipped} ja estavam no cache"
+        f" e {outcome.failed} falharam. Cache com {outcome.cache_tiles} tile(s), "
+        f"{format_cache_size(outcome.cache_bytes)}."
+    )
+
+
+class TileSeeder:
+    """Pre-baixa os tiles de um plano para o cache compartilhado.
+
+    Tiles ja presentes e dentro da validade sao pulados, entao uma execucao
+    interrompida continua de onde parou. Cada provedor tem seu limitador de
+    taxa; o numero de downloads simultaneos e limitado por max_workers. Sem
+    um get explicito, os downloads passam pelo upstream compartilhado com o
+    mapa, que junta pedidos simultaneos do mesmo tile.
+    """
+
+    def __init__(
+        self,
+        store: TileCacheStore,
+        *,
+        get: Optional[Callable[..., object]] = None,
+        policies: Mapping[str, TileSeedPolicy] | None = None,
+        max_workers: int = TILE_SEED_MAX_WORKERS,
+        timeout: float = 12.0,
+        url_for: Callable[[TileKey], str] = tile_remote_url,
+        upstream: Optional[TileUpstream] = None,
+    ):
+        self.store = store
+        self.max_workers = max(int(max_workers), 1)
+        self.timeout = timeout
+        self._url_for = url_for
+        self._policies = dict(default_seed_policies() if policies is None else policies)
+        self._limiters = {
+            provider: TokenBucket(policy.rate_per_second) for provider, policy in self._policies.items()
+        }
+        self._get = get
+        self._upstream = None if get is not None else upstream or get_shared_tile_upstream()
+        self._cancel_event = threading.Event()
+
+    def cancel(self) -> None:
+        self._cancel_event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel_event.is_set()
+
+    def pending_keys(self, keys: Iterable[TileKey]) -> tuple[list[TileKey], int]:
+        cached: dict[tuple[str, int], set[tuple[int, int]]] = {}
+        pending: list[TileKey] = []
+        skipped = 0
+        for key in keys:
+            coords = cached.get((key.provider, key.z))
+            if coords is None:
+                coords = cached[(key.provider, key.z)] = self.store.fresh_tile_coords(key.provider, key.z)
+            if (key.x, key.y) in coords:
+                skipped += 1
+            else:
+                pending.append(key)
+        return pending, skipped
+
+    def _fetch(self, key: TileKey) -> Optional[bool]:
+        # None indica que o cancelamento chegou antes do download.
+        if self.cancelled:
+            return None
+        limiter = self._limiters.get(key.provider)
+        if limiter is not None:
+            limiter.acquire()
+        if self.cancelled:
+            return None
+        if self._upstream is not None:
+            result = self._upstream.fetch(
+                self.store,
+                key,
+                timeout=self.timeout,
+                user_agent=f"{USER_AGENT} (TileSeed)",
+                remember=False,
+                url_for=self._url_for,
+            )
+            return result.status == 200 and result.source != "stale"
+        response = self._get(
+            self._url_for(key),
+            timeout=self.timeout,
+            headers={"User-Agent": f"{USER_AGENT} (TileSeed)"},
+        )
+        status = int(getattr(response, "status_code", 0))
+        body = getattr(response, "content", b"") if status == 200 else b""
+        if not body:
+            return False
+        headers = getattr(response, "headers", None) or {}
+        self.store.put(
+            key,
+            body,
+            headers.get("Content-Type", "application/octet-stream"),
+            etag=headers.get("ETag", ""),
+            last_modified=headers.get("Last-Modified", ""),
+            remember=False,
+        )
+        return True
+
+    def seed(
+        self,
+        keys: Sequence[TileKey],
+        *,
+        on_progress: Callable[[TileSeedProgress], None] | None = None,
+    ) -> TileSeedOutcome:
+        total = len(keys)
+        pending, skipped = self.pending_keys(keys)
+        fetched = failed = 0
+        if pending and not self.cancelled:
+            executor = ThreadPoolExecutor(
+                max_workers=min(self.max_workers, len(pending)),
+                thread_name_prefix="tile-seed",
+            )
+            try:
+                # A fila de submissao fica limitada para o cancelamento valer logo.
+                queue = iter(pending)
+                running: dict[Future, TileKey] = {}
+                for key in queue:
+                    running[executor.submit(self._fetch, key)] = key
+                    if len(running) >= self.max_workers * 2:
+                        break
+                while running and not self.cancelled:
+                    done, _ = wait(tuple(running), timeout=_CANCEL_POLL_SECONDS, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        key = running.pop(future)
+                        ok = self._future_result(future, key)
+                        if ok is None:
+                            continue
+                        if ok:
+                            fetched += 1
+                        else:
+                            failed += 1
+                        if on_progress is not None:
+                            on_progress(
+                                TileSeedProgress(skipped + fetched + failed, total, fetched, skipped, failed, key)
+                            )
+                        next_key = next(queue, None)
+                        if next_key is not None and not self.cancelled:
+                            running[executor.submit(self._fetch, next_key)] = next_key
+            finally:
+                executor.shutdown(wait=True, cancel_futures=True)
+        self.store.flush()
+        stats = self.store.stats()
+        return TileSeedOutcome(
+            total=total,
+            fetched=fetched,
+            skipped=skipped,
+            failed=failed,
+            cancelled=self.cancelled,
+            cache_tiles=stats.disk_tiles,
+            cache_bytes=stats.disk_bytes,
+        )
+
+    def _future_result(self, future: Future, key: TileKey) -> Optional[bool]:
+        try:
+            return future.result()
+        except Exception as exc:
+            if not self.cancelled:
+                logger.warning(f"[TileSeed] Falha ao baixar {key}: {exc}")
+            return False
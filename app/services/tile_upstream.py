@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import atexit
+import threading
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional
+
+import requests
+
+from app.services.tile_cache_store import (
+    USER_AGENT,
+    TileCacheStore,
+    TileKey,
+    TileResponse,
+    fetch_tile,
+    tile_remote_url,
+)
+from app.utils.logger import get_logger
+
+
+logger = get_logger("Map.TileUpstream")
+
+DEFAULT_MAX_CONCURRENCY = 8
+
+
+@dataclass(frozen=True)
+class TileUpstreamStats:
+    requests: int = 0
+    coalesced: int = 0
+    upstream_calls: int = 0
+    max_in_flight: int = 0
+
+
+class _Flight:
+    __slots__ = ("done", "result")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Optional[TileResponse] = None
+
+
+class TileUpstream:
+    """Busca de tiles nos provedores com conexoes reaproveitadas.
+
+    Cada provedor tem sua Session com pool keep-alive. Pedidos simultaneos do
+    mesmo tile esperam a primeira busca em vez de sair de novo para a rede, e
+    um semaforo limita quantas requisicoes ficam abertas nos provedores ao
+    mesmo tempo. A consulta ao cache nao segura nenhum desses locks.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        session_factory: Callable[[], requests.Session] = requests.Session,
+        url_for: Callable[[TileKey], str] = tile_remote_url,
+    ):
+        self.max_concurrency = max(int(max_concurrency), 1)
+        self._session_factory = session_factory
+        self._url_for = url_for
+        self._semaphore = threading.BoundedSemaphore(self.max_concurrency)
+        self._lock = threading.Lock()
+        self._sessions: Dict[str, requests.Session] = {}
+        self._flights: Dict[TileKey, _Flight] = {}
+        self._in_flight = 0
+        self._counters = {name: 0 for name in TileUpstreamStats.__dataclass_fields__}
+
+    def session_for(self, provider: str) -> requests.Session:
+        with self._lock:
+            session = self._sessions.get(provider)
+            if session is None:
+                session = self._session_factory()
+                adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=self.max_concurrency)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                self._sessions[provider] = session
+            return session
+
+    def _limited_get(self, provider: str) -> Callable[..., object]:
+        session = self.session_for(provider)
+
+        def get(url: str, **kwargs):
+            with self._semaphore:
+                with self._lock:
+                    self._in_flight += 1
+                    self._counters["upstream_calls"] += 1
+                    self._counters["max_in_flight"] = max(self._counters["max_in_flight"], self._in_flight)
+                try:
+                    return session.get(url, **kwargs)
+                finally:
+                    with self._lock:
+                        self._in_flight -= 1
+
+        return get
+
+    def fetch(
+        self,
+        store: TileCacheStore,
+        key: TileKey,
+        *,
+        timeout: float,
+        user_agent: str = USER_AGENT,
+        remember: bool = True,
+        url_for: Optional[Callable[[TileKey], str]] = None,
+    ) -> TileResponse:
+        url_for = url_for or self._url_for
+        with self._lock:
+            self._counters["requests"] += 1
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+            else:
+                self._counters["coalesced"] += 1
+        if not leader:
+            flight.done.wait()
+            return flight.result
+
+        try:
+            flight.result = fetch_tile(
+                store,
+                key,
+                get=self._limited_get(key.provider),
+                timeout=timeout,
+                user_agent=user_agent,
+                url_for=url_for,
+                remember=remember,
+            )
+        except Exception as exc:
+            logger.warning(f"[TileUpstream] Falha ao buscar {key}: {exc}")
+            message = f"tile upstream error: {exc}".encode("utf-8", errors="ignore")
+            flight.result = TileResponse(502, message, "text/plain; charset=utf-8", url_for(key), "error")
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+        return flight.result
+
+    def stats(self) -> TileUpstreamStats:
+        with self._lock:
+            return TileUpstreamStats(**self._counters)
+
+    def close(self) -> None:
+        with self._lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+        for session in sessions:
+            session.close()
+
+
+_SHARED_UPSTREAM: Optional[TileUpstream] = None
+_SHARED_UPSTREAM_LOCK = threading.Lock()
+
+
+def get_shared_tile_upstream() -> TileUpstream:
+    """Upstream unico do proxy HTTP, do esquema compmap:// e do download offline."""
+    global _SHARED_UPSTREAM
+    with _SHARED_UPSTREAM_LOCK:
+        if _SHARED_UPSTREAM is None:
+            _SHARED_UPSTREAM = TileUpstream()
+            atexit.register(_SHARED_UPSTREAM.close)
+        return _SHARED_UPSTREAM
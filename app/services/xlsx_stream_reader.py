@@ -0,0 +1,270 @@
+from __future__ import annotations
+
+import posixpath
+import zipfile
+from typing import Dict, Iterator, List, Optional, Tuple
+from xml.etree.ElementTree import ParseError, iterparse, parse
+
+from openpyxl.formula.translate import Translator
+from openpyxl.styles.numbers import BUILTIN_FORMATS, is_date_format, is_timedelta_format
+from openpyxl.utils.datetime import CALENDAR_MAC_1904, CALENDAR_WINDOWS_1900, from_excel, from_ISO8601
+
+
+_MAIN_NS = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+_REL_NS = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+_PACKAGE_REL_NS = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+
+_ROW = f"{_MAIN_NS}row"
+_VALUE = f"{_MAIN_NS}v"
+_FORMULA = f"{_MAIN_NS}f"
+_INLINE = f"{_MAIN_NS}is"
+_TEXT = f"{_MAIN_NS}t"
+_PHONETIC = f"{_MAIN_NS}rPh"
+
+
+class XlsxStreamError(Exception):
+    """Estrutura de planilha que o leitor em streaming nao cobre."""
+
+
+def _cast_number(text: str):
+    if "." in text or "E" in text or "e" in text:
+        return float(text)
+    return int(text)
+
+
+def _string_content(node) -> str:
+    # Mesmo texto que o openpyxl devolve: runs concatenados, sem a fonetica.
+    parts: List[str] = []
+    for child in node:
+        if child.tag == _TEXT:
+            parts.append(child.text or "")
+        elif child.tag != _PHONETIC:
+            parts.extend(item.text or "" for item in child.iter(_TEXT))
+    return "".join(parts)
+
+
+class XlsxStreamReader:
+    """Le os valores das abas de um .xlsx percorrendo o XML em streaming.
+
+    Devolve as linhas como o openpyxl em iter_rows(values_only=True) com
+    data_only=False (formulas como texto "=..."), mas sem montar celulas nem
+    estilos. Arquivos com recursos fora desse recorte levantam XlsxStreamError
+    para o chamador cair no openpyxl.
+    """
+
+    def __init__(self, path: str):
+        self._archive = zipfile.ZipFile(path)
+        try:
+            self._read_workbook()
+        except Exception:
+            self._archive.close()
+            raise
+        self._shared_strings: Optional[List[str]] = None
+        self._date_styles: Optional[Tuple[frozenset, frozenset]] = None
+
+    def __enter__(self) -> "XlsxStreamReader":
+        return self
+
+    def __exit__(self, *_exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._archive.close()
+
+    def _parse_part(self, name: str):
+        try:
+            with self._archive.open(name) as handle:
+                return parse(handle).getroot()
+        except (KeyError, ParseError) as exc:
+            raise XlsxStreamError(f"parte invalida '{name}': {exc}") from exc
+
+    def _relationships(self, part: str) -> Dict[str, Tuple[str, str]]:
+        folder, name = posixpath.split(part)
+        rels_path = posixpath.join(folder, "_rels", f"{name}.rels")
+        if rels_path not in self._archive.NameToInfo:
+            return {}
+        relationships: Dict[str, Tuple[str, str]] = {}
+        for rel in self._parse_part(rels_path).iter(f"{_PACKAGE_REL_NS}Relationship"):
+            target = rel.get("Target", "")
+            if rel.get("TargetMode") == "External":
+                continue
+            if target.startswith("/"):
+                resolved = target.lstrip("/")
+            else:
+                resolved = posixpath.normpath(posixpath.join(folder, target))
+            relationships[rel.get("Id", "")] = (rel.get("Type", "").rsplit("/", 1)[-1], resolved)
+        return relationships
+
+    def _read_workbook(self) -> None:
+        package_rels = self._relationships("")
+        workbook_part = next(
+            (target for kind, target in package_rels.values() if kind == "officeDocument"),
+            "xl/workbook.xml",
+        )
+        root = self._parse_part(workbook_part)
+        if not root.tag.startswith(_MAIN_NS):
+            raise XlsxStreamError(f"namespace nao suportado: {root.tag}")
+        self._parts = self._relationships(workbook_part)
+
+        properties = root.find(f"{_MAIN_NS}workbookPr")
+        date1904 = properties is not None and properties.get("date1904", "").lower() in {"1", "true"}
+        self._epoch = CALENDAR_MAC_1904 if date1904 else CALENDAR_WINDOWS_1900
+
+        self._sheet_parts: Dict[str, str] = {}
+        for sheet in root.iter(f"{_MAIN_NS}sheet"):
+            kind, target = self._parts.get(sheet.get(f"{_REL_NS}id", ""), ("", ""))
+            if kind == "worksheet":
+                self._sheet_parts[sheet.get("name", "")] = target
+        if not self._sheet_parts:
+            raise XlsxStreamError("nenhuma aba de dados encontrada")
+        self.sheetnames: List[str] = list(self._sheet_parts)
+
+        view = root.find(f"{_MAIN_NS}bookViews/{_MAIN_NS}workbookView")
+        try:
+            active_index = int(view.get("activeTab", 0)) if view is not None else 0
+        except ValueError:
+            active_index = 0
+        self.active_sheet = self.sheetnames[min(max(active_index, 0), len(self.sheetnames) - 1)]
+
+    def _part_of_kind(self, kind: str) -> str:
+        return next((target for part_kind, target in self._parts.values() if part_kind == kind), "")
+
+    @property
+    def shared_strings(self) -> List[str]:
+        if self._shared_strings is None:
+            strings: List[str] = []
+            part = self._part_of_kind("sharedStrings")
+            if part:
+                try:
+                    with self._archive.open(part) as handle:
+                        for _event, node in iterparse(handle):
+                            if node.tag == f"{_MAIN_NS}si":
+                                strings.append(_string_content(node).replace("x005F_", ""))
+                                node.clear()
+                except (KeyError, ParseError) as exc:
+                    raise XlsxStreamError(f"tabela de textos invalida: {exc}") from exc
+            self._shared_strings = strings
+        return self._shared_strings
+
+    def _styles(self) -> Tuple[frozenset, frozenset]:
+        if self._date_styles is None:
+            dates: set = set()
+            durations: set = set()
+            part = self._part_of_kind("styles")
+            if part:
+                root = self._parse_part(part)
+                custom = {
+                    int(item.get("numFmtId", -1)): item.get("formatCode", "")
+                    for item in root.iter(f"{_MAIN_NS}numFmt")
+                }
+                cell_formats = root.find(f"{_MAIN_NS}cellXfs")
+                for index, xf in enumerate(cell_formats if cell_formats is not None else ()):
+                    format_id = int(xf.get("numFmtId", 0))
+                    code = custom[format_id] if format_id in custom else BUILTIN_FORMATS.get(format_id)
+                    if code and is_date_format(code):
+                        dates.add(index)
+                    if code and is_timedelta_format(code):
+                        durations.add(index)
+            self._date_styles = (frozenset(dates), frozenset(durations))
+        return self._date_styles
+
+    def iter_rows(self, sheet_name: str) -> Iterator[tuple]:
+        part = self._sheet_parts.get(sheet_name)
+        if part is None:
+            raise KeyError(f"Aba nao encontrada: {sheet_name}")
+        try:
+            with self._archive.open(part) as handle:
+                yield from self._rows(handle)
+        except (KeyError, ParseError, ValueError, IndexError) as exc:
+            raise XlsxStreamError(f"aba '{sheet_name}' nao lida em streaming: {exc}") from exc
+
+    def _rows(self, handle) -> Iterator[tuple]:
+        date_styles, duration_styles = self._styles()
+        columns: Dict[str, int] = {}
+        shared_formulas: Dict[str, Translator] = {}
+        row_number = 0
+        for _event, row in iterparse(handle):
+            if row.tag != _ROW:
+                continue
+            number = row.get("r")
+            current = int(float(number)) if number else row_number + 1
+            if current <= row_number:
+                row.clear()
+                continue
+            # Linhas ausentes no XML aparecem vazias, como no openpyxl.
+            while row_number + 1 < current:
+                row_number += 1
+                yield ()
+            row_number = current
+
+            values: list = []
+            for cell in row:
+                coordinate = cell.get("r")
+                if coordinate:
+                    letters = coordinate.rstrip("0123456789")
+                    column = columns.get(letters)
+                    if column is None:
+                        column = 0
+                        for letter in letters:
+                            column = column * 26 + ord(letter) - 64
+                        columns[letters] = column
+                else:
+                    column = len(values) + 1
+                if column > len(values) + 1:
+                    values.extend([None] * (column - len(values) - 1))
+                value = self._cell_value(cell, coordinate, date_styles, duration_styles, shared_formulas)
+                if column <= len(values):
+                    values[column - 1] = value
+                else:
+                    values.append(value)
+            row.clear()
+            yield tuple(values)
+
+    def _cell_value(self, cell, coordinate, date_styles, duration_styles, shared_formulas):
+        kind = cell.get("t", "n")
+        text = formula = inline = None
+        for child in cell:
+            if child.tag == _VALUE:
+                text = child.text
+            elif child.tag == _FORMULA:
+                formula = child
+            elif child.tag == _INLINE:
+                inline = child
+
+        if formula is not None:
+            return self._formula_value(formula, coordinate, shared_formulas)
+        if kind == "inlineStr":
+            return _string_content(inline) if inline is not None else None
+        if not text:
+            return None
+        if kind == "n":
+            number = _cast_number(text)
+            style = int(cell.get("s", 0) or 0)
+            if style in date_styles:
+                try:
+                    return from_excel(number, self._epoch, timedelta=style in duration_styles)
+                except (OverflowError, ValueError):
+                    return "#VALUE!"
+            return number
+        if kind == "s":
+            return self.shared_strings[int(text)]
+        if kind == "b":
+            return bool(int(text))
+        if kind == "d":
+            return from_ISO8601(text)
+        return text
+
+    @staticmethod
+    def _formula_value(formula, coordinate, shared_formulas):
+        kind = formula.get("t")
+        value = "=" + (formula.text or "")
+        if kind == "shared":
+            index = formula.get("si")
+            if index in shared_formulas:
+                return shared_formulas[index].translate_formula(coordinate)
+            if value != "=":
+                shared_formulas[index] = Translator(value, coordinate)
+            return value
+        if kind in {"array", "dataTable"}:
+            raise XlsxStreamError(f"formula do tipo '{kind}' em {coordinate}")
+        return value
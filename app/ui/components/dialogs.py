@@ -35,6 +35,7 @@ from app.application.use_cases.map_rendering import MapRenderingUseCases
 from app.models.display_columns import display_column_index
 from app.services.tcra_excel_service import TcraWorkbookAnalysis
 from app.services.tile_proxy_service import TileProxyService
+from app.services.tile_upstream import get_shared_tile_upstream
 from app.services.records_service import STANDARD_TIPO_OPTIONS
 from app.services.tcra_report_service import TcraPdfExportOptions
 from app.services.tcra_records_service import (
@@ -1466,7 +1467,11 @@ class MapFullScreenDialog(QDialog):
         self.heatmap_points = heatmap_points
         self.parent_window = parent
         self._syncing = False
-        self._tile_proxy = TileProxyService(cache_size=1800, startup_wait_sec=0.8)
+        self._tile_proxy = TileProxyService(
+            cache_size=1800,
+            startup_wait_sec=0.8,
+            upstream=get_shared_tile_upstream(),
+        )
         self.map_rendering_use_cases = MapRenderingUseCases()
         self.map_interactions_use_cases = MapInteractionsUseCases()
         self.fullscreen_use_cases = MapFullscreenOperationsUseCases(
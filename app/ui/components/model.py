@@ -1,9 +1,11 @@
-from typing import Any
+from collections import OrderedDict
+from typing import Any, Protocol
 
 from PySide6.QtCore import QAbstractTableModel, QModelIndex, QPersistentModelIndex, Qt
 from PySide6.QtGui import QColor
 
 from app.models.compensacao import Compensacao
+from app.models.plantio_item import PlantioItem
 from app.models.display_columns import DISPLAY_COLUMN_ATTRS, DISPLAY_COLUMN_LABELS
 from app.services.coordinates import format_coordinate_pair
 from app.services.records_service import display_tipo_value
@@ -51,10 +53,11 @@ class CompensacoesTableModel(QAbstractTableModel):
         index: QModelIndex | QPersistentModelIndex,
         role: int = int(Qt.ItemDataRole.DisplayRole),
     ) -> Any:
-        if not index.isValid() or not (0 <= index.row() < len(self.records)):
+        if not index.isValid():
+            return None
+        record = self.record_at(index.row())
+        if record is None:
             return None
-
-        record = self.records[index.row()]
         attr = DISPLAY_COLUMN_ATTRS[index.column()]
 
         if role == int(Qt.ItemDataRole.DisplayRole):
@@ -102,7 +105,145 @@ class CompensacoesTableModel(QAbstractTableModel):
 
         return None
 
+    def record_at(self, row: int) -> Compensacao | None:
+        if not (0 <= row < len(self.records)):
+            return None
+        return self.records[row]
+
     def update_data(self, new_records: list[Compensacao]) -> None:
         self.beginResetModel()
         self.records = new_records
         self.endResetModel()
+
+
+class RecordPageSource(Protocol):
+    def count(self) -> int: ...
+
+    def fetch_page(self, after_excel_row: int, limit: int) -> list[Compensacao]: ...
+
+    def fetch_page_at(self, offset: int, limit: int) -> list[Compensacao]: ...
+
+    def with_sort(self, sort_key: str, descending: bool = False) -> "RecordPageSource": ...
+
+    def load_plantios(self, record: Compensacao) -> list[PlantioItem]: ...
+
+
+class PagedCompensacoesTableModel(CompensacoesTableModel):
+    """Modelo da tabela que busca apenas as paginas visiveis no espelho local.
+
+    O total vem de source.count(); as paginas ficam num cache LRU limitado. Ao
+    pedir uma linha, a pagina dela e as vizinhas dentro da margem de prefetch sao
+    carregadas. Sem ordenacao, a pagina seguinte a uma ja lida usa o ultimo
+    excel_row como chave; saltos e colunas ordenadas vao direto pelo OFFSET. A
+    ordenacao por coluna e repassada a fonte (sort), que ordena na consulta. Os
+    registros chegam sem plantios, que sao lidos por record_with_plantios quando
+    a linha e aberta para edicao.
+    """
+
+    # O proxy da tabela consulta este atributo e repassa a ordenacao em vez de ler todas as linhas.
+    sorts_in_source = True
+
+    def __init__(
+        self,
+        source: RecordPageSource | None = None,
+        *,
+        page_size: int = 200,
+        prefetch_pages: int = 1,
+        max_cached_pages: int = 12,
+    ):
+        super().__init__()
+        self.page_size = max(int(page_size), 1)
+        self.prefetch_pages = max(int(prefetch_pages), 0)
+        self.max_cached_pages = max(int(max_cached_pages), 2 * self.prefetch_pages + 1)
+        self._source: RecordPageSource | None = None
+        self._sort_column = -1
+        self._sort_order = Qt.SortOrder.AscendingOrder
+        self._row_count = 0
+        self._pages: OrderedDict[int, list[Compensacao]] = OrderedDict()
+        self._page_after_keys: dict[int, int] = {0: 0}
+        self._plantios_loaded: set[tuple[str, int]] = set()
+        if source is not None:
+            self.set_source(source)
+
+    @property
+    def source(self) -> RecordPageSource | None:
+        return self._source
+
+    def set_source(self, source: RecordPageSource | None) -> None:
+        self.beginResetModel()
+        self._source = self._sorted_source(source)
+        self._row_count = max(int(source.count()), 0) if source is not None else 0
+        self._reset_pages()
+        self.endResetModel()
+
+    def sort(self, column: int, order: Qt.SortOrder = Qt.SortOrder.AscendingOrder) -> None:
+        self.beginResetModel()
+        self._sort_column = column if 0 <= column < len(DISPLAY_COLUMN_ATTRS) else -1
+        self._sort_order = order
+        self._source = self._sorted_source(self._source)
+        self._reset_pages()
+        self.endResetModel()
+
+    def _sorted_source(self, source: RecordPageSource | None) -> RecordPageSource | None:
+        if source is None:
+            return None
+        sort_key = DISPLAY_COLUMN_ATTRS[self._sort_column] if self._sort_column >= 0 else ""
+        return source.with_sort(sort_key, self._sort_order == Qt.SortOrder.DescendingOrder)
+
+    def update_data(self, new_records: list[Compensacao]) -> None:
+        raise TypeError("PagedCompensacoesTableModel carrega registros pela fonte paginada; use set_source.")
+
+    def rowCount(self, parent: QModelIndex | QPersistentModelIndex = QModelIndex()) -> int:
+        if parent.isValid():
+            return 0
+        return self._row_count
+
+    def record_at(self, row: int) -> Compensacao | None:
+        if self._source is None or not (0 <= row < self._row_count):
+            return None
+        page_index = row // self.page_size
+        first_page = max(page_index - self.prefetch_pages, 0)
+        last_page = min(page_index + self.prefetch_pages, (self._row_count - 1) // self.page_size)
+        for index in range(first_page, last_page + 1):
+            self._ensure_page(index)
+        page = self._pages.get(page_index)
+        if page is None:
+            return None
+        self._pages.move_to_end(page_index)
+        offset = row - page_index * self.page_size
+        return page[offset] if offset < len(page) else None
+
+    def record_with_plantios(self, row: int) -> Compensacao | None:
+        record = self.record_at(row)
+        if record is None or self._source is None:
+            return record
+        key = (record.uid, record.excel_row)
+        if key not in self._plantios_loaded:
+            record.plantios = list(self._source.load_plantios(record))
+            self._plantios_loaded.add(key)
+        return record
+
+    def cached_page_count(self) -> int:
+        return len(self._pages)
+
+    def _reset_pages(self) -> None:
+        self._pages.clear()
+        self._page_after_keys = {0: 0}
+        self._plantios_loaded.clear()
+
+    def _ensure_page(self, page_index: int) -> None:
+        if page_index in self._pages or self._source is None:
+            return
+        if self._sort_column < 0 and page_index in self._page_after_keys:
+            page = list(self._source.fetch_page(self._page_after_keys[page_index], self.page_size))
+        else:
+            page = list(self._source.fetch_page_at(page_index * self.page_size, self.page_size))
+        self._store_page(page_index, page)
+
+    def _store_page(self, page_index: int, page: list[Compensacao]) -> None:
+        self._pages[page_index] = page
+        self._pages.move_to_end(page_index)
+        if page and self._sort_column < 0:
+            self._page_after_keys[page_index + 1] = int(page[-1].excel_row)
+        while len(self._pages) > self.max_cached_pages:
+            self._pages.popitem(last=False)
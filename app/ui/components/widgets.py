@@ -429,6 +429,31 @@ class CheckableComboBox(ClickableComboBox):
 
 
 class NumericSortProxy(QSortFilterProxyModel):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._source_sort = None
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        source = self.sourceModel()
+        if getattr(source, "sorts_in_source", False):
+            # Modelo paginado: ordenar aqui leria todas as linhas; a consulta da fonte ordena.
+            super().sort(-1)
+            self._source_sort = (column, order)
+            source.sort(column, order)
+            return
+        self._source_sort = None
+        super().sort(column, order)
+
+    def sortColumn(self):
+        if self._source_sort is not None:
+            return self._source_sort[0]
+        return super().sortColumn()
+
+    def sortOrder(self):
+        if self._source_sort is not None:
+            return self._source_sort[1]
+        return super().sortOrder()
+
     def lessThan(self, left, right):
         if left.column() == 4:
             l, r = self.sourceModel().data(left, Qt.UserRole), self.sourceModel().data(right, Qt.UserRole)
@@ -10,8 +10,15 @@ from PySide6.QtCore import QThread, Signal
 from app import __version__ as APP_VERSION
 from app.config import resolve_update_manifest_url
 from app.services.auto_update_service import AutoUpdateCancelled, prepare_staged_update
+from app.services.batch_geocode_service import (
+    BatchGeocodeEngine,
+    BatchGeocodeProgress,
+    assemble_batch_geocode_results,
+    plan_batch_geocode,
+)
+from app.services.geocode_cache import geocode_cache
 from app.services.geocode_service import geocode_address
-from app.services.plantio_service import record_plantio_items
+from app.services.tile_seed_service import TileSeeder, TileSeedProgress
 from app.utils.logger import logger
 
 
@@ -20,89 +27,100 @@ class GeocodeWorker(QThread):
     finished_process = Signal(object)
     cancelled_process = Signal(str)
 
-    def __init__(self, records_to_process):
+    def __init__(self, records_to_process, *, engine: BatchGeocodeEngine | None = None):
         super().__init__()
         self.records = records_to_process
         self.is_running = True
+        self.engine = engine or BatchGeocodeEngine(geocoder=geocode_address)
         self.resultados = {}  # {excel_row: {"main": (lat, lon), "plantios": {sequencia: (lat, lon)}}}
 
     def run(self):
         total = len(self.records)
-        cancelled = False
-        for i, record in enumerate(self.records):
-            if not self.is_running or self.isInterruptionRequested():
-                cancelled = True
-                break
-
-            result = {}
-            lat_m = str(getattr(record, "latitude", "")).strip()
-            lon_m = str(getattr(record, "longitude", "")).strip()
-            micro = str(getattr(record, "microbacia", "")).strip()
-            has_main_coords = bool(lat_m and lon_m)
-
-            if (record.endereco or "").strip():
-                if not has_main_coords:
-                    self.progress_update.emit(i, f"Principal ({i + 1}/{total}): {str(record.endereco)[:30]}...")
-                    try:
-                        coords = self._geocode_api(record.endereco)
-                        if coords:
-                            result["main"] = coords
-                    except Exception as exc:
-                        logger.error(f"[GEOCODE] Erro ao buscar endereco principal (linha {record.excel_row}): {exc}")
-                    time.sleep(0.3)
-                    if not self.is_running or self.isInterruptionRequested():
-                        cancelled = True
-                        break
-                elif not micro:
-                    result["main"] = (float(lat_m), float(lon_m))
-
-            plantio_results = {}
-            for plantio in record_plantio_items(record):
-                if not (plantio.endereco or "").strip():
-                    continue
-
-                lat_p = str(getattr(plantio, "latitude", "")).strip()
-                lon_p = str(getattr(plantio, "longitude", "")).strip()
-                has_plantio_coords = bool(lat_p and lon_p)
-
-                if not has_plantio_coords:
-                    self.progress_update.emit(i, f"Plantio ({i + 1}/{total}): {str(plantio.endereco)[:30]}...")
-                    try:
-                        coords = self._geocode_api(plantio.endereco)
-                        if coords:
-                            plantio_results[int(plantio.sequence)] = coords
-                    except Exception as exc:
-                        logger.error(
-                            f"[GEOCODE] Erro ao buscar endereco de plantio (linha {record.excel_row}, plantio {plantio.sequence}): {exc}"
-                        )
-                    time.sleep(0.3)
-                    if not self.is_running or self.isInterruptionRequested():
-                        cancelled = True
-                        break
-                elif not micro and not result.get("main"):
-                    plantio_results[int(plantio.sequence)] = (float(lat_p), float(lon_p))
-
-            if cancelled:
-                break
-
-            if plantio_results:
-                result["plantios"] = plantio_results
-
-            if result:
-                self.resultados[record.excel_row] = result
-
-        if cancelled:
+        plan = plan_batch_geocode(self.records)
+
+        def report(progress: BatchGeocodeProgress) -> None:
+            # A barra de progresso conta registros; os enderecos distintos sao
+            # convertidos proporcionalmente.
+            current = min(int(progress.completed * total / max(progress.total, 1)), max(total - 1, 0))
+            self.progress_update.emit(
+                current,
+                f"Endereco ({progress.completed}/{progress.total}): {progress.address[:30]}...",
+            )
+            if self.isInterruptionRequested():
+                self.engine.cancel()
+
+        outcome = self.engine.geocode_many(plan.addresses, on_progress=report)
+        geocode_cache.flush()
+        if outcome.cancelled or not self.is_running or self.isInterruptionRequested():
             self.cancelled_process.emit("Geocodificação em lote cancelada.")
             return
 
+        self.resultados = assemble_batch_geocode_results(plan, outcome)
         self.finished_process.emit(self.resultados)
 
     def stop(self):
         self.is_running = False
+        self.engine.cancel()
         self.requestInterruption()
 
     def _geocode_api(self, address: str):
-        return geocode_address(address, timeout=8)
+        return self.engine.geocode(address)
+
+
+class GisLoadWorker(QThread):
+    loaded = Signal(object, float)
+    failed = Signal(str)
+
+    def __init__(self, microbacias_dir: str, name_field: str, *, factory: Callable[[str, str], object]):
+        super().__init__()
+        self.microbacias_dir = microbacias_dir
+        self.name_field = name_field
+        self._factory = factory
+
+    def run(self):
+        started_at = time.perf_counter()
+        try:
+            service = self._factory(self.microbacias_dir, self.name_field)
+        except Exception as exc:
+            logger.warning(f"Falha ao carregar microbacias: {exc}", exc_info=True)
+            self.failed.emit(str(exc))
+            return
+        self.loaded.emit(service, time.perf_counter() - started_at)
+
+
+class TileSeedWorker(QThread):
+    progress_update = Signal(int, str)
+    failed = Signal(str)
+    finished_process = Signal(object)
+
+    def __init__(self, keys, *, seeder: TileSeeder):
+        super().__init__()
+        self.keys = list(keys)
+        self.seeder = seeder
+
+    def run(self):
+        def report(progress: TileSeedProgress) -> None:
+            self.progress_update.emit(
+                progress.completed,
+                f"Mapas offline ({progress.completed}/{progress.total}): "
+                f"{progress.key.provider} z{progress.key.z}",
+            )
+            if self.isInterruptionRequested():
+                self.seeder.cancel()
+
+        outcome = None
+        try:
+            outcome = self.seeder.seed(self.keys, on_progress=report)
+        except Exception as exc:
+            logger.warning(f"Falha ao baixar mapas offline: {exc}", exc_info=True)
+            self.failed.emit(str(exc))
+        finally:
+            # Sem o aviso de termino o controlador nunca liberaria um novo download.
+            self.finished_process.emit(outcome)
+
+    def stop(self):
+        self.seeder.cancel()
+        self.requestInterruption()
 
 
 class UpdaterWorker(QThread):
@@ -18,7 +18,6 @@ from app.config import SEARCH_FILTER_DEBOUNCE_MS
 from app.models.compensacao import Compensacao
 from app.services.access_service import AccessEnvironment
 from app.services.error_service import friendly_error_message
-from app.services.gis_service import GisService
 from app.services.record_integrity_service import build_record_integrity_report
 from app.services.records_service import (
     build_record_search_index,
@@ -27,7 +26,7 @@ from app.services.records_service import (
 )
 from app.services.session_spreadsheet_adapter import ExternalSpreadsheetAdapter
 from app.ui.components.dialogs import OperationHistoryDialog
-from app.ui.components.job_specs import BlockingJobSpec
+from app.ui.components.job_specs import BackgroundJobSpec, BlockingJobSpec, build_disconnect_callback
 from app.ui.components.timer_utils import schedule_owned_single_shot
 from app.ui.controllers.data_controller_support import (
     COMPENSACOES_QUICK_FILTER_ALL,
@@ -45,14 +44,29 @@ from app.ui.controllers.data_controller_support import (
     build_filter_state_snapshot,
 )
 from app.ui.components.ui_utils import msg_confirm
+from app.ui.components.workers import GisLoadWorker
 from app.utils.logger import get_logger
 
 
 logger = get_logger("UI.Data")
 
+GIS_LOAD_JOB_NAME = "gis_load"
+# Se a janela nao pintar (minimizada, oculta), a carga do GIS sai mesmo assim.
+GIS_LOAD_FALLBACK_DELAY_MS = 1500
+
+
+def create_gis_service(microbacias_dir: str, name_field: str):
+    # geopandas, shapely e pyproj so entram no processo aqui, fora da abertura da janela.
+    from app.services.gis_service import GisService
+
+    return GisService(microbacias_dir, name_field)
+
+
 class DataController:
     NEW_SESSION_OPTION = "+ Nova sess\u00e3o..."
     REMOTE_OPERATIONAL_REFRESH_INTERVAL_SECONDS = 60.0
+    GIS_UNAVAILABLE_MESSAGE = "Microbacias indisponiveis no momento. O cadastro e as exportacoes continuam funcionando."
+    EMPTY_GEOJSON = {"type": "FeatureCollection", "features": []}
 
     def __init__(self, window):
         self.window = window
@@ -80,6 +94,9 @@ class DataController:
         settings_controller = getattr(window, "settings_controller", None)
         filter_state_loader = getattr(settings_controller, "compensacoes_filter_state", None)
         self._pending_filter_restore = dict(filter_state_loader() or {}) if callable(filter_state_loader) else {}
+        self._gis_load_requested = False
+        self._gis_worker: Optional[GisLoadWorker] = None
+        self.gis_load_failed = False
         self.rebuild_saved_views_menu()
 
     def _runtime_workbook(self):
@@ -524,7 +541,7 @@ class DataController:
         self.window._setup_dynamic_form_options_from_records()
         if sync_snapshot:
             self._sync_workbook_snapshot()
-        self.load_gis()
+        self.request_gis_load()
         restored_filter_state = self._restore_filter_state_if_pending()
         self.apply_filter()
         self.window.data_tab.align_splitter_to_table_width()
@@ -636,39 +653,129 @@ class DataController:
             sample_limit=0,
         )
 
+    def _microbacias_dir_available(self) -> bool:
+        if os.path.isdir(self.window.MICROB_DIR):
+            return True
+        logger.warning(f"Diretorio de microbacias nao encontrado: {self.window.MICROB_DIR}")
+        self.window.data_tab.set_map_notice(self.GIS_UNAVAILABLE_MESSAGE)
+        self.window._run_map_js(
+            f"if(window.setMicrobacias) window.setMicrobacias({json.dumps(self.EMPTY_GEOJSON)});",
+            "clear-microbacias-missing-dir",
+        )
+        return False
+
     def load_gis(self):
+        """Carrega as microbacias na thread atual."""
         self.window.gis = None
-        empty_geojson = {"type": "FeatureCollection", "features": []}
-        unavailable_message = "Microbacias indisponiveis no momento. O cadastro e as exportacoes continuam funcionando."
-        if not os.path.isdir(self.window.MICROB_DIR):
-            logger.warning(f"Diretorio de microbacias nao encontrado: {self.window.MICROB_DIR}")
-            self.window.data_tab.set_map_notice(unavailable_message)
-            self.window._run_map_js(
-                f"if(window.setMicrobacias) window.setMicrobacias({json.dumps(empty_geojson)});",
-                "clear-microbacias-missing-dir",
-            )
+        if not self._microbacias_dir_available():
             return False
+        started_at = time.perf_counter()
+        try:
+            gis = create_gis_service(self.window.MICROB_DIR, self.window.MICROB_NAME_FIELD)
+        except Exception as exc:
+            logger.warning(f"Falha ao carregar microbacias: {exc}", exc_info=True)
+            return self._handle_gis_failure(str(exc))
+        return self._handle_gis_loaded(gis, time.perf_counter() - started_at)
+
+    def request_gis_load(self) -> bool:
+        """Reaproveita o GIS ja carregado ou agenda a carga em segundo plano.
+
+        Na abertura, a carga so comeca depois da primeira pintura da janela
+        (ou apos GIS_LOAD_FALLBACK_DELAY_MS, se ela nao acontecer); ate la o
+        mapa usa a camada de microbacias do cache em disco.
+        """
+        if self.window.gis is not None:
+            return self._apply_gis_service()
+        if not self._microbacias_dir_available():
+            return False
+        if self._gis_load_requested:
+            return True
+        self._gis_load_requested = True
+        timeline = getattr(self.window, "startup_timeline", None)
+        if timeline is None or timeline.first_paint_done:
+            self.start_gis_load()
+        else:
+            schedule_owned_single_shot(self.window, GIS_LOAD_FALLBACK_DELAY_MS, self.start_gis_load)
+        return True
+
+    def on_window_painted(self) -> None:
+        if self._gis_load_requested:
+            self.start_gis_load()
 
+    def start_gis_load(self) -> None:
+        if not self._gis_load_requested or self._gis_worker is not None or self.window.gis is not None:
+            return
+        worker = GisLoadWorker(
+            self.window.MICROB_DIR,
+            self.window.MICROB_NAME_FIELD,
+            factory=create_gis_service,
+        )
+        worker.loaded.connect(self._on_gis_worker_loaded)
+        worker.failed.connect(self._on_gis_worker_failed)
+        worker.finished.connect(self._on_gis_worker_finished)
+        self._gis_worker = worker
+        self.window.start_background_job(
+            BackgroundJobSpec(
+                name=GIS_LOAD_JOB_NAME,
+                worker=worker,
+                disconnect_callbacks=[
+                    build_disconnect_callback(worker.loaded, self._on_gis_worker_loaded),
+                    build_disconnect_callback(worker.failed, self._on_gis_worker_failed),
+                    build_disconnect_callback(worker.finished, self._on_gis_worker_finished),
+                ],
+                # A importacao do geopandas nao e interrompivel; espera terminar ao fechar.
+                wait_ms=15000,
+            )
+        )
+
+    def _on_gis_worker_loaded(self, gis, load_seconds: float) -> None:
+        self._gis_load_requested = False
+        self._handle_gis_loaded(gis, load_seconds)
+
+    def _on_gis_worker_failed(self, message: str) -> None:
+        self._gis_load_requested = False
+        self.window.mark_job_failed(GIS_LOAD_JOB_NAME, message)
+        self._handle_gis_failure(message)
+
+    def _on_gis_worker_finished(self) -> None:
+        self._gis_worker = None
+
+    def _handle_gis_loaded(self, gis, load_seconds: float) -> bool:
+        self.window.gis = gis
+        self.gis_load_failed = False
+        timeline = getattr(self.window, "startup_timeline", None)
+        if timeline is not None:
+            timeline.mark_gis_ready(load_seconds=load_seconds, source=str(getattr(gis, "load_source", "") or ""))
+        logger.info(f"Microbacias prontas em {load_seconds * 1000:.0f} ms.")
+        return self._apply_gis_service()
+
+    def _apply_gis_service(self) -> bool:
         try:
-            self.window.gis = GisService(self.window.MICROB_DIR, self.window.MICROB_NAME_FIELD)
             self.window.data_tab.set_map_notice("")
             self.window._load_microbacias_layer()
             self.window._update_filters_from_records()
             self.window._setup_dynamic_form_options_from_records()
             return True
         except Exception as exc:
-            self.window.gis = None
             logger.warning(f"Falha ao carregar microbacias: {exc}", exc_info=True)
-            self.window.data_tab.set_map_notice(unavailable_message)
-            self.window._run_map_js(
-                f"if(window.setMicrobacias) window.setMicrobacias({json.dumps(empty_geojson)});",
-                "clear-microbacias-load-failure",
-            )
-            self.window._run_map_js(
-                f"if(window.setStatus) window.setStatus({json.dumps('Mapa de microbacias indisponível no momento.')});",
-                "gis-load-failure-status",
-            )
-            return False
+            return self._handle_gis_failure(str(exc))
+
+    def _handle_gis_failure(self, message: str) -> bool:
+        self.window.gis = None
+        self.gis_load_failed = True
+        timeline = getattr(self.window, "startup_timeline", None)
+        if timeline is not None:
+            timeline.mark_gis_failed(message)
+        self.window.data_tab.set_map_notice(self.GIS_UNAVAILABLE_MESSAGE)
+        self.window._run_map_js(
+            f"if(window.setMicrobacias) window.setMicrobacias({json.dumps(self.EMPTY_GEOJSON)});",
+            "clear-microbacias-load-failure",
+        )
+        self.window._run_map_js(
+            f"if(window.setStatus) window.setStatus({json.dumps('Mapa de microbacias indisponível no momento.')});",
+            "gis-load-failure-status",
+        )
+        return False
 
     def update_dashboard_view(self, metrics: Dict[str, object]):
         return self.window.navigation_controller.update_dashboard(metrics)
@@ -682,6 +789,7 @@ class DataController:
             if hasattr(self.window, "shell_controller")
             else self._current_session_path()
         )
+        quick_filter_mode = self._current_quick_filter_mode()
         record_source = self.local_record_queries.resolve_filtered_record_source(
             workbook_path,
             fallback_records=self.window.records,
@@ -695,22 +803,38 @@ class DataController:
             caixa_all_selected=self.window.data_tab.filter_caixa.is_all_selected(),
             selected_year=self.window.data_tab.filter_year.currentText(),
             fallback_search_index=self.window._record_search_index,
+            materialize_records=quick_filter_mode != COMPENSACOES_QUICK_FILTER_ALL,
         )
-        base_filtered_records = list(record_source.records)
         quality_key_sets = self._resolved_quality_key_sets()
-        self.window.filtered_records = apply_compensacoes_quick_filter(
-            base_filtered_records,
-            mode=self._current_quick_filter_mode(),
-            quality_key_sets=quality_key_sets,
-        )
-        self.window._filtered_metrics = dict(compute_metrics(self.window.filtered_records))
+        page_source = getattr(record_source, "page_source", None)
+        if page_source is not None and quick_filter_mode == COMPENSACOES_QUICK_FILTER_ALL:
+            # Com o espelho SQLite por tras, a tabela le so as paginas visiveis e as metricas
+            # vem dos agregados SQL. A lista filtrada nao sai do espelho: e resolvida pelos
+            # uids do recorte sobre os registros ja carregados na sessao.
+            self.window.data_tab.show_record_pages(page_source)
+            self.window.set_filtered_record_source(page_source)
+            self.window._filtered_metrics = dict(record_source.metrics)
+            filtered_count = self.window.data_tab.displayed_record_count()
+            base_filtered_records = self.window.filtered_records
+            resize_records = self.window.data_tab.displayed_records_sample(
+                self.window.data_tab.paged_table_model.page_size
+            )
+        else:
+            base_filtered_records = list(record_source.records)
+            self.window.filtered_records = apply_compensacoes_quick_filter(
+                base_filtered_records,
+                mode=quick_filter_mode,
+                quality_key_sets=quality_key_sets,
+            )
+            self.window._filtered_metrics = dict(compute_metrics(self.window.filtered_records))
+            self.window.data_tab.show_records(self.window.filtered_records)
+            filtered_count = len(self.window.filtered_records)
+            resize_records = list(self.window.filtered_records)
         self.window._local_record_read_status = self.local_record_queries.build_read_status(
             record_source,
-            filtered_records=len(self.window.filtered_records),
+            filtered_records=filtered_count,
         )
-        self.window.data_tab.table_model.update_data(self.window.filtered_records)
-        resize_records = list(self.window.filtered_records or self.window.records)
-        self.window.data_tab.resize_table_columns_for_records(resize_records)
+        self.window.data_tab.resize_table_columns_for_records(resize_records or list(self.window.records))
         metrics = (
             self.window.shell_controller.resolved_filtered_metrics()
             if hasattr(self.window, "shell_controller")
@@ -722,8 +846,8 @@ class DataController:
             self.window.data_tab.lbl_results.setText(self.window.shell_controller.current_results_label_text())
             self.window.statusBar().showMessage(self.window.shell_controller.current_filter_status_message_text())
         else:
-            self.window.data_tab.lbl_results.setText(f"{len(self.window.filtered_records)} registros")
-            self.window.statusBar().showMessage(f"Filtro aplicado: {len(self.window.filtered_records)} registros")
+            self.window.data_tab.lbl_results.setText(f"{filtered_count} registros")
+            self.window.statusBar().showMessage(f"Filtro aplicado: {filtered_count} registros")
         self._refresh_compensacoes_operational_chips(
             base_filtered_records,
             quality_key_sets=quality_key_sets,
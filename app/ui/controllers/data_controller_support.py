@@ -372,7 +372,7 @@ def clear_loaded_data_view(window, empty_metrics: Dict[str, object]) -> None:
     window._record_integrity_report = None
 
     window.data_tab.table.clearSelection()
-    window.data_tab.table_model.update_data([])
+    window.data_tab.clear_records()
     window.data_tab.update_totals_tables(empty_metrics)
     window.dash_tab.update_dashboard(
         empty_metrics,
@@ -400,6 +400,10 @@ class FormController:
 
     def selected_table_records(self) -> list[Compensacao]:
         rows = self._selected_table_rows()
+        # A tabela paginada pode estar ordenada na consulta; a linha so vale para o modelo exibido.
+        displayed_record_at = getattr(self.window.data_tab, "displayed_record_at", None)
+        if callable(displayed_record_at):
+            return [record for record in (displayed_record_at(row) for row in rows) if record is not None]
         return [self.window.filtered_records[row] for row in rows if 0 <= row < len(self.window.filtered_records)]
 
     def _bulk_action_target_summary(self, record: Compensacao) -> str:
@@ -28,8 +28,10 @@ from app.services.geocode_service import (
     geocode_address_candidates,
     geocode_address_arcgis,
 )
+from app.services.gis_layer_cache import load_cached_microbacia_layer
 from app.services.map_engine import resolve_map_engine_resource
 from app.services.geocode_update_service import (
+    batch_geocode_result_coords,
     build_cached_microbacia_finder,
 )
 from app.services.plantio_service import (
@@ -210,7 +212,7 @@ class MapController:
         heatmap_points = self._current_heatmap_points()
         commands = self.map_rendering_use_cases.build_initial_sync_commands(
             theme="dark" if self.window.is_dark_mode else "light",
-            geojson_data=self.window.gis.to_geojson_obj() if self.window.gis else None,
+            geojson_data=self.microbacias_layer_payload(),
             current_layer=self.window.settings_controller.current_map_layer(),
             marker_coords=self.window.last_marker_coords,
             heatmap_points=heatmap_points if self.window.data_tab.chk_heatmap.isChecked() else None,
@@ -218,13 +220,28 @@ class MapController:
         for command in commands:
             self.run_map_js(command.script, command.context)
 
+    def microbacias_layer_payload(self):
+        gis = self.window.gis
+        if gis:
+            to_geojson_text = getattr(gis, "to_geojson_text", None)
+            return to_geojson_text() if callable(to_geojson_text) else gis.to_geojson_obj()
+        # Enquanto o GisService carrega em segundo plano, usa a camada ja
+        # simplificada do cache em disco; depois de uma falha, nada e exibido.
+        microb_dir = getattr(self.window, "MICROB_DIR", "")
+        if not microb_dir or getattr(getattr(self.window, "data_controller", None), "gis_load_failed", False):
+            return None
+        return load_cached_microbacia_layer(microb_dir, getattr(self.window, "MICROB_NAME_FIELD", ""))
+
     def load_microbacias_layer(self):
         data_tab = getattr(self.window, "data_tab", None)
-        if not self.window.gis or data_tab is None:
+        if data_tab is None:
             return
         if not getattr(data_tab, "_map_loaded", False) or getattr(data_tab, "web", None) is None:
             return
-        command = self.map_rendering_use_cases.build_microbacias_command(self.window.gis.to_geojson_obj())
+        payload = self.microbacias_layer_payload()
+        if not payload:
+            return
+        command = self.map_rendering_use_cases.build_microbacias_command(payload)
         self.run_map_js(command.script, command.context)
 
     def run_map_js(self, script: str, context: str):
@@ -424,7 +441,7 @@ class MapController:
         dialog = MapFullScreenDialog(
             self.window,
             map_resource.html_path,
-            self.window.gis.to_geojson_obj() if self.window.gis else None,
+            self.microbacias_layer_payload(),
             "dark" if self.window.is_dark_mode else "light",
             self.window.last_marker_coords,
             self.window.gis,
@@ -595,7 +612,16 @@ class MapController:
         self._log_authoritative_write_issues("batch_geocode", preparation.issues)
         authoritative_records = list(preparation.base_records)
         projected_records = list(preparation.base_records)
-        micro_finder = build_cached_microbacia_finder(self.window.gis.find_microbacia) if self.window.gis else None
+        gis = self.window.gis
+        micro_finder = (
+            build_cached_microbacia_finder(
+                gis.find_microbacia,
+                find_microbacias=getattr(gis, "find_microbacias", None),
+                prefetch=batch_geocode_result_coords(results),
+            )
+            if gis
+            else None
+        )
         persistence_plan = self.batch_geocode_use_cases.apply_results(
             projected_records,
             results,
@@ -737,15 +763,18 @@ class MapController:
         self.run_map_js(command.script, command.context)
 
     def _current_heatmap_points(self) -> list[list[float]]:
-        records = (
-            self.window.shell_controller.visible_records()
-            if hasattr(self.window, "shell_controller")
-            else list(self.window.filtered_records)
-        )
+        enabled = self.window.data_tab.chk_heatmap.isChecked()
+        records = []
+        if enabled:
+            records = (
+                self.window.shell_controller.visible_records()
+                if hasattr(self.window, "shell_controller")
+                else list(self.window.filtered_records)
+            )
         return self.map_rendering_use_cases.build_heatmap_points(
             records,
             self.window.data_tab.combo_heatmap_type.currentText(),
-            enabled=self.window.data_tab.chk_heatmap.isChecked(),
+            enabled=enabled,
         )
 
     @staticmethod
@@ -6,6 +6,20 @@ from app.application.use_cases.operations_overview_use_cases import OperationsOv
 from app.application.use_cases.persistence_monitoring import PersistenceMonitoringUseCases
 from app.application.use_cases.runtime_monitoring import RuntimeMonitoringUseCases
 from app.services.audit_service import audit_backup_available, audit_backup_path
+from app.services.tile_cache_store import get_shared_tile_store
+from app.services.tile_seed_service import (
+    TileSeeder,
+    describe_tile_seed_outcome,
+    format_cache_size,
+    plan_tile_seed,
+)
+from app.services.tile_upstream import get_shared_tile_upstream
+from app.ui.components.job_specs import BackgroundJobSpec, build_disconnect_callback
+from app.ui.components.ui_utils import msg_confirm
+from app.ui.components.workers import TileSeedWorker
+
+
+TILE_SEED_JOB_NAME = "tile_seed"
 
 
 class OperationsController:
@@ -19,6 +33,8 @@ class OperationsController:
         )
         self.overview_use_cases = OperationsOverviewUseCases(self.persistence_use_cases)
         self.runtime_use_cases = RuntimeMonitoringUseCases()
+        self.tile_seed_worker_factory = None
+        self._tile_seed_worker = None
         if hasattr(window, "job_runner") and hasattr(window.job_runner, "subscribe_runtime_updates"):
             window.job_runner.subscribe_runtime_updates(self.refresh_runtime_overview)
 
@@ -105,3 +121,74 @@ class OperationsController:
 
     def refresh_production_snapshot(self):
         return self.window.data_controller.refresh_production_snapshot()
+
+    def seed_offline_tiles(self):
+        if self._tile_seed_worker is not None:
+            return
+        plan = plan_tile_seed()
+        store = get_shared_tile_store()
+        message = (
+            f"Baixar ate {len(plan.keys)} tile(s) de {', '.join(plan.providers)} "
+            f"(zoom {plan.min_zoom} a {plan.max_zoom}) para usar o mapa sem internet?"
+        )
+        if plan.skipped_providers:
+            message += f"\n\nNao armazenados em disco: {', '.join(plan.skipped_providers)}."
+        message += f"\n\nCache atual: {format_cache_size(store.stats().disk_bytes)}. Tiles ja baixados sao pulados."
+        if not msg_confirm(self.window, "Mapas offline", message):
+            return
+
+        factory = self.tile_seed_worker_factory or self._create_tile_seed_worker
+        worker = factory(plan.keys, store)
+        worker.progress_update.connect(self._on_tile_seed_progress)
+        worker.failed.connect(self._on_tile_seed_failed)
+        worker.finished_process.connect(self._on_tile_seed_finished)
+        self._tile_seed_worker = worker
+        self.window.start_background_job(
+            BackgroundJobSpec(
+                name=TILE_SEED_JOB_NAME,
+                worker=worker,
+                disconnect_callbacks=[
+                    build_disconnect_callback(worker.progress_update, self._on_tile_seed_progress),
+                    build_disconnect_callback(worker.failed, self._on_tile_seed_failed),
+                    build_disconnect_callback(worker.finished_process, self._on_tile_seed_finished),
+                ],
+                stop_callback=getattr(worker, "stop", None),
+                wait_ms=10000,
+                busy_message="Baixando mapas offline...",
+                total=len(plan.keys),
+                cancellable=True,
+                cancel_callback=self.cancel_tile_seed,
+            )
+        )
+
+    @staticmethod
+    def _create_tile_seed_worker(keys, store):
+        return TileSeedWorker(keys, seeder=TileSeeder(store, upstream=get_shared_tile_upstream()))
+
+    def _on_tile_seed_progress(self, current: int, message: str):
+        self.window.update_busy_operation(current, message)
+
+    def cancel_tile_seed(self):
+        worker = self._tile_seed_worker
+        if worker is None:
+            return
+        self.window.statusBar().showMessage("Interrompendo download de mapas offline...")
+        worker.stop()
+
+    def _on_tile_seed_failed(self, error_message: str):
+        message = f"Falha ao baixar mapas offline: {error_message}"
+        self.window.mark_job_failed(TILE_SEED_JOB_NAME, message)
+        self.window.end_busy_operation(message)
+        QMessageBox.warning(self.window, "Mapas offline", message)
+
+    def _on_tile_seed_finished(self, outcome):
+        self._tile_seed_worker = None
+        if outcome is None:
+            return
+        message = describe_tile_seed_outcome(outcome)
+        if outcome.cancelled:
+            self.window.mark_job_cancelled(TILE_SEED_JOB_NAME, message)
+        else:
+            self.window.mark_job_completed(TILE_SEED_JOB_NAME, message)
+        self.window.end_busy_operation(message)
+        QMessageBox.information(self.window, "Mapas offline", message)
@@ -52,6 +52,7 @@ def build_window_command_bindings() -> tuple[WindowCommandBinding, ...]:
         WindowCommandBinding("refresh_operations_overview", "operations_controller", "refresh_overview"),
         WindowCommandBinding("refresh_production_snapshot", "operations_controller", "refresh_production_snapshot"),
         WindowCommandBinding("open_selected_operation_backup", "operations_controller", "open_selected_backup"),
+        WindowCommandBinding("seed_offline_tiles", "operations_controller", "seed_offline_tiles"),
         WindowCommandBinding("open_logs_folder", "support_controller", "open_logs_folder"),
         WindowCommandBinding("export_diagnostics", "support_controller", "export_diagnostics"),
         WindowCommandBinding("check_for_updates", "support_controller", "check_for_updates"),
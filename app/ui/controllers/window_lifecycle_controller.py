@@ -11,6 +11,10 @@ from app.ui.controllers.window_lifecycle_support import (
     run_startup_sequence,
     stop_active_timer,
 )
+from app.utils.logger import get_logger
+
+
+logger = get_logger("UI.Lifecycle")
 
 
 class WindowLifecycleController:
@@ -78,6 +82,12 @@ class WindowLifecycleController:
             )
         )
 
+    def handle_first_paint(self):
+        logger.info(f"Primeira pintura da janela em {self.window.startup_timeline.first_paint_ms:.0f} ms.")
+        data_controller = getattr(self.window, "data_controller", None)
+        if data_controller is not None:
+            data_controller.on_window_painted()
+
     def handle_resize(self):
         if self.window._startup_layout_pending and not self.window.isMinimized():
             self.window._startup_layout_pending = False
@@ -32,6 +32,7 @@ class WindowSessionSnapshot:
 class WindowSessionState:
     records: List[Compensacao] = field(default_factory=list)
     filtered_records: List[Compensacao] = field(default_factory=list)
+    filtered_page_source: object | None = None
     selected: Optional[Compensacao] = None
     form_plantios: List[object] = field(default_factory=list)
     last_marker_coords: Optional[Tuple[float, float]] = None
@@ -59,7 +60,7 @@ class WindowSessionController:
         pending_metrics = self.state.pending_dashboard_metrics
         return WindowSessionSnapshot(
             records=list(self.state.records),
-            filtered_records=list(self.state.filtered_records),
+            filtered_records=list(self.resolved_filtered_records()),
             selected=self.state.selected,
             form_plantios=list(self.state.form_plantios),
             last_marker_coords=self.state.last_marker_coords,
@@ -81,6 +82,7 @@ class WindowSessionController:
     def restore(self, snapshot: WindowSessionSnapshot) -> None:
         self.state.records = list(snapshot.records)
         self.state.filtered_records = list(snapshot.filtered_records)
+        self.state.filtered_page_source = None
         self.state.selected = snapshot.selected
         self.state.form_plantios = list(snapshot.form_plantios)
         self.state.last_marker_coords = snapshot.last_marker_coords
@@ -103,6 +105,7 @@ class WindowSessionController:
     def clear_workbook_state(self) -> None:
         self.state.records = []
         self.state.filtered_records = []
+        self.state.filtered_page_source = None
         self.state.selected = None
         self.state.form_plantios = []
         self.state.last_marker_coords = None
@@ -121,3 +124,25 @@ class WindowSessionController:
 
     def clear_recent_files(self) -> None:
         self.state.recent_files = []
+
+    def set_filtered_records(self, records: List[Compensacao]) -> None:
+        self.state.filtered_records = list(records)
+        self.state.filtered_page_source = None
+
+    def set_filtered_page_source(self, page_source: object) -> None:
+        # A lista filtrada so e montada quando lida, pelos uids do recorte sobre os registros da sessao.
+        self.state.filtered_records = []
+        self.state.filtered_page_source = page_source
+
+    def resolved_filtered_records(self) -> List[Compensacao]:
+        page_source = self.state.filtered_page_source
+        if page_source is None:
+            return self.state.filtered_records
+        records_by_uid = {str(record.uid or "").lower(): record for record in self.state.records if record.uid}
+        self.state.filtered_records = [
+            records_by_uid[key]
+            for key in (str(uid or "").lower() for uid in page_source.uids())
+            if key in records_by_uid
+        ]
+        self.state.filtered_page_source = None
+        return self.state.filtered_records
@@ -1250,6 +1250,7 @@ class WindowShellController:
         self.window.operations_tab.btn_history.clicked.connect(build_command("show_operation_history"))
         self.window.operations_tab.btn_rollback.clicked.connect(build_command("show_rollback_dialog"))
         self.window.operations_tab.btn_open_backup.clicked.connect(build_command("open_selected_operation_backup"))
+        self.window.operations_tab.btn_seed_tiles.clicked.connect(build_command("seed_offline_tiles"))
         self.refresh_compensacoes_selection_state()
 
     def sync_global_search_context(self):
@@ -1446,6 +1447,7 @@ class WindowShellController:
             app.setStyleSheet(qss)
         self.window.setStyleSheet(qss)
         self.window.data_tab.table_model.set_dark_mode(self.window.is_dark_mode)
+        self.window.data_tab.paged_table_model.set_dark_mode(self.window.is_dark_mode)
         self.window.dash_tab.apply_theme(theme)
         self.window.operations_tab.apply_theme(theme)
         self.window.tcra_tab.apply_theme(theme)
@@ -1701,10 +1703,10 @@ class WindowShellController:
 
     def on_table_clicked(self, index):
         source_index = self.window.data_tab.proxy.mapToSource(index)
-        if not source_index.isValid() or source_index.row() >= len(self.window.filtered_records):
+        clicked_record = self._displayed_table_record(source_index.row()) if source_index.isValid() else None
+        if clicked_record is None:
             return
 
-        clicked_record = self.window.filtered_records[source_index.row()]
         is_current_selection = self._records_refer_to_same_selection(self.window.selected, clicked_record)
         if self.window.selected is not None and self.window.form_controller.has_pending_changes():
             action_text = "remover a seleção" if is_current_selection else "trocar de registro"
@@ -1717,7 +1719,7 @@ class WindowShellController:
             self.window._refresh_window_chrome()
             return
 
-        self.window.selected = self._resolve_filtered_record_selection(source_index.row())
+        self.window.selected = self._resolve_filtered_record_selection(clicked_record)
         self.window._fill_form(self.window.selected)
         self.window.data_tab.update_record_summary(self.window.selected)
         self.window._update_form_action_buttons()
@@ -1734,12 +1736,20 @@ class WindowShellController:
         current_index = self.window.data_tab.table.currentIndex()
         if current_index.isValid():
             source_index = self.window.data_tab.proxy.mapToSource(current_index)
-            if 0 <= source_index.row() < len(self.window.filtered_records):
-                self.window.selected = self._resolve_filtered_record_selection(source_index.row())
+            displayed_record = self._displayed_table_record(source_index.row())
+            if displayed_record is not None:
+                self.window.selected = self._resolve_filtered_record_selection(displayed_record)
         self.window.delete_selected()
 
-    def _resolve_filtered_record_selection(self, row_index: int):
-        fallback_record = self.window.filtered_records[row_index]
+    def _displayed_table_record(self, row_index: int):
+        # A tabela paginada pode estar ordenada na consulta; a linha so vale para o modelo exibido.
+        displayed_record_at = getattr(self.window.data_tab, "displayed_record_at", None)
+        if callable(displayed_record_at):
+            return displayed_record_at(row_index)
+        records = self.window.filtered_records
+        return records[row_index] if 0 <= row_index < len(records) else None
+
+    def _resolve_filtered_record_selection(self, fallback_record):
         self._bind_runtime_persistence_service()
         if isinstance(self.persistence, AuthoritativePersistenceUseCases):
             selected_result = self.persistence.resolve_selected_record(
@@ -1,6 +1,6 @@
 ﻿import os
 import sys
-from typing import List, Optional, Tuple, Dict
+from typing import TYPE_CHECKING, List, Optional, Tuple, Dict
 
 from PySide6.QtCore import QSettings, QTimer
 from PySide6.QtWidgets import (
@@ -11,6 +11,7 @@ from PySide6.QtWidgets import (
 from app.config import APP_WINDOW_TITLE, APP_SETTINGS_NAME, APP_SETTINGS_ORG
 from app.application.use_cases.authoritative_persistence import AuthoritativePersistenceUseCases
 from app.application.use_cases.persistence_monitoring import PersistenceMonitoringUseCases
+from app.application.use_cases.startup_timing import StartupTimeline
 from app.models.compensacao import Compensacao
 from app.services.access_service import AppAccessSession, SupabaseAccessService
 from app.services.app_settings import AppSettings
@@ -21,7 +22,6 @@ from app.services.sqlite_mirror_service import SqliteMirrorService
 from app.services.sqlite_mirror_service import SqliteMirrorService as DirectSqliteMirrorService
 from app.services.supabase_admin_users_service import SupabaseAdminUsersService
 from app.services.coordinates import build_heatmap_point, build_heatmap_points
-from app.services.gis_service import GisService
 
 # --- Componentes Modularizados ---
 from app.ui.controllers.data_controller import DataController
@@ -54,6 +54,10 @@ from app.ui.tabs.tcra_tab import TcraTab
 from app.ui.tabs.admin_users_tab import AdminUsersTab
 from app.utils.logger import get_logger
 
+if TYPE_CHECKING:
+    # GisService puxa geopandas; a instancia chega depois, por GisLoadWorker.
+    from app.services.gis_service import GisService
+
 _ajustar_ambiente_pyinstaller()
 
 logger = get_logger("UI.MainWindow")
@@ -66,6 +70,7 @@ MICROB_DIR = resource_path("data", "microbacias")
 class MainWindow(QMainWindow):
     def __init__(self, access_session: AppAccessSession | None = None):
         super().__init__()
+        self.startup_timeline = StartupTimeline()
         self.access_session = access_session or AppAccessSession.local_default()
         self.setWindowTitle(APP_WINDOW_TITLE)
         configure_window_class_registry(
@@ -114,7 +119,7 @@ class MainWindow(QMainWindow):
         self.audit_service = runtime_bundle.audit_service
         self.authoritative_persistence = runtime_bundle.authoritative_persistence
         self.persistence_monitoring_use_cases = runtime_bundle.persistence_monitoring_use_cases
-        self.gis: Optional[GisService] = None
+        self.gis: Optional["GisService"] = None
         self.geo_worker = None
         self._startup_window_state_applied = False
         self._startup_layout_pending = False
@@ -157,6 +162,11 @@ class MainWindow(QMainWindow):
             self.shell_controller.apply_responsive_layout()
         self.lifecycle_controller.handle_resize()
 
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if self.startup_timeline.mark_first_paint():
+            self.lifecycle_controller.handle_first_paint()
+
     def showEvent(self, event):
         super().showEvent(event)
         self.lifecycle_controller.schedule_post_show_fit()
@@ -325,11 +335,14 @@ class MainWindow(QMainWindow):
 
     @property
     def filtered_records(self) -> List[Compensacao]:
-        return self.session_controller.state.filtered_records
+        return self.session_controller.resolved_filtered_records()
 
     @filtered_records.setter
     def filtered_records(self, value: List[Compensacao]):
-        self.session_controller.state.filtered_records = list(value)
+        self.session_controller.set_filtered_records(value)
+
+    def set_filtered_record_source(self, page_source: object) -> None:
+        self.session_controller.set_filtered_page_source(page_source)
 
     @property
     def selected(self) -> Optional[Compensacao]:
@@ -23,7 +23,7 @@ from app.ui.components.widgets import (
     DebugPage,
     LockedSplitter,
 )
-from app.ui.components.model import CompensacoesTableModel
+from app.ui.components.model import CompensacoesTableModel, PagedCompensacoesTableModel, RecordPageSource
 from app.ui.components.timer_utils import schedule_owned_single_shot
 from app.ui.controllers.data_controller_support import (
     COMPENSACOES_QUICK_FILTER_ALL,
@@ -386,6 +386,7 @@ class DataTab(QWidget):
         l_lay.setContentsMargins(0, 0, panel_gap, panel_bottom_gap)
         l_lay.setSpacing(int(6 * self.sf))
         self.table_model = CompensacoesTableModel()
+        self.paged_table_model = PagedCompensacoesTableModel()
         self.proxy = NumericSortProxy()
         self.proxy.setSourceModel(self.table_model)
         self.table = QTableView()
@@ -1614,6 +1615,41 @@ class DataTab(QWidget):
             display_tipo_value=display_tipo_value,
         )
 
+    def show_records(self, records: List[Compensacao]) -> None:
+        if self.proxy.sourceModel() is not self.table_model:
+            sort_column, sort_order = self.proxy.sortColumn(), self.proxy.sortOrder()
+            self.paged_table_model.set_source(None)
+            self.proxy.setSourceModel(self.table_model)
+            self.proxy.sort(sort_column, sort_order)
+        self.table_model.update_data(records)
+
+    def clear_records(self) -> None:
+        self.paged_table_model.set_source(None)
+        self.show_records([])
+
+    def show_record_pages(self, source: RecordPageSource) -> None:
+        # O proxy repassa a ordenacao ao modelo paginado, que ordena na consulta;
+        # so as paginas visiveis sao buscadas.
+        if self.proxy.sourceModel() is not self.paged_table_model:
+            sort_column, sort_order = self.proxy.sortColumn(), self.proxy.sortOrder()
+            self.proxy.setSourceModel(self.paged_table_model)
+            self.proxy.sort(sort_column, sort_order)
+        self.paged_table_model.set_source(source)
+
+    def displayed_record_count(self) -> int:
+        return self.proxy.sourceModel().rowCount()
+
+    def displayed_record_at(self, source_row: int) -> Optional[Compensacao]:
+        model = self.proxy.sourceModel()
+        if model is self.paged_table_model:
+            return self.paged_table_model.record_with_plantios(source_row)
+        return self.table_model.record_at(source_row)
+
+    def displayed_records_sample(self, limit: int) -> List[Compensacao]:
+        model = self.proxy.sourceModel()
+        rows = range(min(model.rowCount(), max(int(limit), 0)))
+        return [record for record in (model.record_at(row) for row in rows) if record is not None]
+
     def resize_table_columns_for_records(self, records: List[Compensacao]):
         effective_records = list(records or [])
         for column_index, attr in enumerate(DISPLAY_COLUMN_ATTRS):
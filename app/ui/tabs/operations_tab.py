@@ -257,11 +257,16 @@ class OperationsTab(QWidget):
         self.btn_history = QPushButton("Abrir histórico")
         self.btn_rollback = QPushButton("Restaurar ponto")
         self.btn_open_backup = QPushButton("Abrir backup")
+        self.btn_seed_tiles = QPushButton("Baixar mapas offline")
+        self.btn_seed_tiles.setToolTip(
+            "Baixa os tiles do município de São Carlos para usar o mapa em campo, sem internet."
+        )
         self.btn_cancel_runtime = QPushButton("Interromper job")
         for button in [
             self.btn_history,
             self.btn_rollback,
             self.btn_open_backup,
+            self.btn_seed_tiles,
             self.btn_cancel_runtime,
         ]:
             button.setProperty("kind", "chip-quiet")
@@ -276,6 +281,7 @@ class OperationsTab(QWidget):
             self.btn_history,
             self.btn_rollback,
             self.btn_open_backup,
+            self.btn_seed_tiles,
             self.btn_cancel_runtime,
         ]:
             actions_layout.addWidget(button)
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import unicodedata
 from collections.abc import Mapping, Sequence
 from typing import Any
 
@@ -7,6 +8,13 @@ from typing import Any
 _MOJIBAKE_MARKERS = ("Ã", "Â", "â€", "â€™", "â€œ", "â€“", "�")
 
 
+def normalized_text_key(value: object) -> str:
+    """Forma sem acentos, em caixa baixa e com espacos colapsados, para comparar textos livres."""
+    decomposed = unicodedata.normalize("NFD", str(value or ""))
+    stripped = "".join(ch for ch in decomposed if unicodedata.category(ch) != "Mn")
+    return " ".join(stripped.casefold().split())
+
+
 def looks_like_mojibake(value: str) -> bool:
     text = str(value or "")
     return bool(text) and any(marker in text for marker in _MOJIBAKE_MARKERS)
@@ -0,0 +1,187 @@
+import argparse
+import json
+import logging
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+import requests
+
+import app.services.geocode_service as geocode_service
+from app.services.batch_geocode_service import BatchGeocodeEngine, TokenBucket
+from app.services.geocode_cache import GeocodeCache
+
+DEFAULT_TOTAL = 240
+DEFAULT_UNIQUE_RATIO = 0.4
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description=(
+            "Compara a geocodificacao em lote sequencial com o motor concorrente, "
+            "usando um servidor HTTP local que imita Nominatim e ArcGIS."
+        )
+    )
+    parser.add_argument("--total", type=int, default=DEFAULT_TOTAL, help="Enderecos no lote. Padrao: 240")
+    parser.add_argument("--unique-ratio", type=float, default=DEFAULT_UNIQUE_RATIO)
+    parser.add_argument("--latency-ms", type=float, default=150.0, help="Latencia simulada por requisicao.")
+    parser.add_argument("--nominatim-rate", type=float, default=10.0, help="Requisicoes/s aceitas pelo stub.")
+    parser.add_argument("--arcgis-rate", type=float, default=20.0)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--legacy-sleep", type=float, default=0.3, help="Pausa fixa do laco antigo.")
+    return parser.parse_args()
+
+
+class _StubState:
+    def __init__(self, latency_seconds: float, rates: dict[str, float]):
+        self.latency_seconds = latency_seconds
+        self.rates = rates
+        self.lock = threading.Lock()
+        self.last_request_at: dict[str, float] = {}
+        self.requests = 0
+        self.throttled = 0
+
+    def admit(self, provider: str) -> bool:
+        # Recusa com 429 quem chega antes do intervalo minimo do provedor.
+        interval = 1.0 / max(self.rates.get(provider, 1.0), 1e-6)
+        with self.lock:
+            self.requests += 1
+            now = time.monotonic()
+            last = self.last_request_at.get(provider)
+            if last is not None and now - last < interval * 0.9:
+                self.throttled += 1
+                return False
+            self.last_request_at[provider] = now
+            return True
+
+
+def _coords_for(query: str) -> tuple[float, float]:
+    digest = sum(ord(char) for char in query)
+    return -22.0 - (digest % 100) / 1000, -47.9 + (digest % 77) / 1000
+
+
+def _build_handler(state: _StubState):
+    class StubHandler(BaseHTTPRequestHandler):
+        def log_message(self, *_args):
+            return
+
+        def do_GET(self):
+            parsed = urlparse(self.path)
+            params = parse_qs(parsed.query)
+            provider = "nominatim" if parsed.path == "/search" else "arcgis"
+            time.sleep(state.latency_seconds)
+            if not state.admit(provider):
+                self._send(429, {"error": "rate limited"}, {"Retry-After": "0"})
+                return
+            if provider == "nominatim":
+                query = (params.get("q") or [""])[0]
+                lat, lon = _coords_for(query)
+                self._send(
+                    200,
+                    [{"lat": str(lat), "lon": str(lon), "display_name": f"{query}, Sao Carlos", "importance": 0.6}],
+                )
+                return
+            query = (params.get("SingleLine") or [""])[0]
+            lat, lon = _coords_for(query)
+            self._send(
+                200,
+                {"candidates": [{"address": query, "score": 90, "location": {"x": lon, "y": lat}, "attributes": {}}]},
+            )
+
+        def _send(self, status: int, payload: object, headers: dict[str, str] | None = None) -> None:
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+    return StubHandler
+
+
+def _stub_requester(base_url: str):
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=32)
+    session.mount("http://", adapter)
+
+    def request(url: str, **kwargs):
+        path = "/search" if url.startswith(geocode_service.NOMINATIM_SEARCH_URL) else "/findAddressCandidates"
+        return session.get(f"{base_url}{path}", **kwargs)
+
+    return request
+
+
+def _addresses(total: int, unique_ratio: float) -> list[str]:
+    unique = max(int(total * unique_ratio), 1)
+    return [f"Rua Sintetica {index % unique}, {100 + index % unique}" for index in range(total)]
+
+
+def _reset_cache(cache_dir: str, label: str) -> None:
+    geocode_service.geocode_cache = GeocodeCache(str(Path(cache_dir) / f"{label}.db"))
+
+
+def _run_legacy(addresses: list[str], requester, args: argparse.Namespace) -> float:
+    started_at = time.perf_counter()
+    for address in addresses:
+        geocode_service.geocode_address(
+            address,
+            timeout=8,
+            requester=requester,
+            rate_limit_seconds=1.0 / args.nominatim_rate,
+        )
+        time.sleep(args.legacy_sleep)
+    return time.perf_counter() - started_at
+
+
+def _run_engine(addresses: list[str], requester, args: argparse.Namespace) -> float:
+    engine = BatchGeocodeEngine(
+        requester=requester,
+        max_workers=args.workers,
+        limiters={
+            "nominatim": TokenBucket(args.nominatim_rate),
+            "arcgis": TokenBucket(args.arcgis_rate),
+        },
+        backoff_seconds=0.1,
+    )
+    started_at = time.perf_counter()
+    engine.geocode_many(addresses)
+    return time.perf_counter() - started_at
+
+
+def main() -> int:
+    args = _parse_args()
+    logging.disable(logging.INFO)
+    state = _StubState(args.latency_ms / 1000.0, {"nominatim": args.nominatim_rate, "arcgis": args.arcgis_rate})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _build_handler(state))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address
+    requester = _stub_requester(f"http://{host}:{port}")
+    addresses = _addresses(args.total, args.unique_ratio)
+
+    print(f"{'modo':>12} {'enderecos':>10} {'tempo (s)':>10} {'requisicoes':>12} {'429':>6}")
+    try:
+        with tempfile.TemporaryDirectory() as cache_dir:
+            for label, runner in (("sequencial", _run_legacy), ("concorrente", _run_engine)):
+                _reset_cache(cache_dir, label)
+                state.requests = state.throttled = 0
+                elapsed = runner(addresses, requester, args)
+                print(f"{label:>12} {len(addresses):>10} {elapsed:>10.2f} {state.requests:>12} {state.throttled:>6}")
+    finally:
+        server.shutdown()
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
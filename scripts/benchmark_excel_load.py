@@ -0,0 +1,131 @@
+import argparse
+import logging
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+import openpyxl
+
+from app.services.excel_service import (
+    EXPECTED_HEADERS,
+    EXPECTED_PLANTIO_HEADERS,
+    PLANTIOS_SHEET_NAME,
+    SHEET_NAME,
+    ExcelService,
+)
+
+DEFAULT_TOTAL = 50_000
+MICROBACIAS = ("Gregorio", "Monjolinho", "Santa Maria do Leme", "Tijuco Preto", "Medeiros")
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description=(
+            "Compara a carga editavel (ExcelService.load) com a leitura em streaming "
+            "(ExcelService.read_records) numa planilha sintetica com plantios, e mede o custo de gravacao."
+        )
+    )
+    parser.add_argument("--total", type=int, default=DEFAULT_TOTAL, help="Quantidade de registros. Padrao: 50000")
+    parser.add_argument("--plantios-per-record", type=int, default=2)
+    parser.add_argument("--memory", action="store_true", help="Mede tambem o pico de memoria (mais lento).")
+    parser.add_argument("--edits", type=int, default=10, help="Edicoes gravadas no teste de escrita. Padrao: 10")
+    return parser.parse_args()
+
+
+def _build_workbook(path: Path, total: int, plantios_per_record: int) -> None:
+    # Modo normal de escrita, como ExcelService salva: strings compartilhadas
+    # e dimensao da planilha gravadas no arquivo.
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.title = SHEET_NAME
+    headers = list(EXPECTED_HEADERS.values())
+    sheet.append(headers)
+    keys = list(EXPECTED_HEADERS)
+    for index in range(total):
+        values = {
+            "oficio_processo": f"{index + 2}/20{20 + index % 7}",
+            "eletronico": "Eletrônico" if index % 2 else "Físico",
+            "caixa": f"CX-{index % 40}",
+            "av_tec": f"AT-{index:07d}",
+            "compensacao": 5 + index % 30,
+            "endereco": f"Rua Sintetica {index % 900}, {index % 150}",
+            "microbacia": MICROBACIAS[index % len(MICROBACIAS)],
+            "compensado": "SIM" if index % 3 == 0 else "",
+            "latitude": "-22.01",
+            "longitude": "-47.89",
+            "uid": f"bench-{index:07d}",
+        }
+        sheet.append([values.get(key) for key in keys])
+
+    plantio_sheet = workbook.create_sheet(PLANTIOS_SHEET_NAME)
+    plantio_sheet.append(list(EXPECTED_PLANTIO_HEADERS.values()))
+    for index in range(total):
+        for sequence in range(1, plantios_per_record + 1):
+            plantio_sheet.append(
+                [f"bench-{index:07d}", sequence, f"Area {index}-{sequence}", 10, "-22.02", "-47.90"]
+            )
+    workbook.save(path)
+
+
+def _measure(label: str, load, *, memory: bool) -> None:
+    if memory:
+        tracemalloc.start()
+    started_at = time.perf_counter()
+    records = load()
+    elapsed = time.perf_counter() - started_at
+    peak = 0.0
+    if memory:
+        _current, peak_bytes = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        peak = peak_bytes / (1024 * 1024)
+    plantios = sum(len(record.plantios) for record in records)
+    memory_column = f"{peak:>10.1f}" if memory else f"{'-':>10}"
+    print(f"{label:>10} {len(records):>9} {plantios:>9} {elapsed:>9.2f} {memory_column}")
+
+
+def _measure_edits(path: Path, edits: int) -> None:
+    service = ExcelService()
+    records = service.load(str(path))
+    service.last_backup_time = time.time()
+    edits = max(min(int(edits), len(records)), 1)
+
+    started_at = time.perf_counter()
+    records[0].caixa = "CX-EDITADA"
+    service.save_edit(records[0])
+    single = time.perf_counter() - started_at
+
+    started_at = time.perf_counter()
+    with service.write_batch():
+        for record in records[1 : edits + 1]:
+            record.caixa = "CX-LOTE"
+            service.save_edit(record)
+    batch = time.perf_counter() - started_at
+    print(f"Gravacao: 1 edicao em {single:.2f}s; {edits} edicoes em lote (um save) em {batch:.2f}s")
+
+
+def main() -> int:
+    args = _parse_args()
+    logging.disable(logging.INFO)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = Path(temp_dir) / "benchmark_compensacoes.xlsx"
+        started_at = time.perf_counter()
+        _build_workbook(path, max(int(args.total), 1), max(int(args.plantios_per_record), 0))
+        size_mb = path.stat().st_size / (1024 * 1024)
+        print(f"Planilha gerada: {args.total} registros, {size_mb:.1f} MB em {time.perf_counter() - started_at:.1f}s")
+        print(f"{'modo':>10} {'registros':>9} {'plantios':>9} {'tempo (s)':>9} {'pico (MB)':>10}")
+        _measure("editavel", lambda: ExcelService().load(str(path)), memory=args.memory)
+        _measure("streaming", lambda: ExcelService().read_records(str(path)), memory=args.memory)
+        if args.edits > 0:
+            _measure_edits(path, args.edits)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,70 @@
+import argparse
+import logging
+import sys
+import time
+from pathlib import Path
+
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+import numpy as np
+
+from app.services.gis_service import GisService
+
+DEFAULT_POINTS = 50_000
+DEFAULT_SAMPLE = 2_000
+# Envelope aproximado do municipio de Sao Carlos.
+BBOX = (-48.12, -22.18, -47.70, -21.86)
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Compara a atribuicao de microbacia ponto a ponto com a consulta em lote."
+    )
+    parser.add_argument("--points", type=int, default=DEFAULT_POINTS, help="Pontos aleatorios. Padrao: 50000")
+    parser.add_argument(
+        "--sample",
+        type=int,
+        default=DEFAULT_SAMPLE,
+        help="Pontos medidos no modo ponto a ponto (o total e extrapolado). Padrao: 2000",
+    )
+    parser.add_argument("--microbacias-dir", default=str(PROJECT_ROOT / "data" / "microbacias"))
+    parser.add_argument("--name-field", default="Nome_Do_Arquivo")
+    parser.add_argument("--seed", type=int, default=7)
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = _parse_args()
+    logging.disable(logging.INFO)
+    rng = np.random.default_rng(args.seed)
+    min_lon, min_lat, max_lon, max_lat = BBOX
+    lats = rng.uniform(min_lat, max_lat, args.points)
+    lons = rng.uniform(min_lon, max_lon, args.points)
+
+    started_at = time.perf_counter()
+    service = GisService(args.microbacias_dir, args.name_field)
+    load_seconds = time.perf_counter() - started_at
+
+    started_at = time.perf_counter()
+    bulk = service.find_microbacias(lats, lons)
+    bulk_seconds = time.perf_counter() - started_at
+
+    sample = min(max(args.sample, 1), args.points)
+    started_at = time.perf_counter()
+    single = [service.find_microbacia(lat, lon) for lat, lon in zip(lats[:sample], lons[:sample])]
+    single_seconds = (time.perf_counter() - started_at) * args.points / sample
+
+    mismatches = sum(1 for left, right in zip(bulk[:sample], single) if left != right)
+    print(f"Carga das microbacias: {load_seconds:.2f}s ({len(service.gdf)} poligonos)")
+    print(f"{'modo':>14} {'pontos':>8} {'tempo (s)':>10} {'pontos/s':>10}")
+    print(f"{'ponto a ponto':>14} {args.points:>8} {single_seconds:>10.2f} {args.points / single_seconds:>10.0f}")
+    print(f"{'lote':>14} {args.points:>8} {bulk_seconds:>10.2f} {args.points / bulk_seconds:>10.0f}")
+    print(f"Com microbacia: {int((bulk != '').sum())} | divergencias na amostra: {mismatches}/{sample}")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,103 @@
+import argparse
+import gc
+import logging
+import sys
+import time
+import tracemalloc
+from copy import deepcopy
+from dataclasses import MISSING, field, fields, make_dataclass
+from pathlib import Path
+
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from app.models.compensacao import Compensacao
+from app.models.plantio_item import PlantioItem
+
+DEFAULT_TOTAL = 100_000
+MICROBACIAS = ("Gregorio", "Monjolinho", "Santa Maria do Leme", "Tijuco Preto", "Medeiros")
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Compara memoria por registro e custo de clonagem dos modelos com e sem __slots__."
+    )
+    parser.add_argument("--total", type=int, default=DEFAULT_TOTAL, help="Quantidade de registros. Padrao: 100000")
+    parser.add_argument("--plantios-per-record", type=int, default=1)
+    return parser.parse_args()
+
+
+def _plain_variant(cls: type, name: str) -> type:
+    # Mesmos campos, mas como @dataclass comum (com __dict__ por instancia e
+    # deepcopy generico), que era a forma anterior dos modelos.
+    specs: list[tuple] = []
+    for item in fields(cls):
+        if item.default_factory is not MISSING:
+            specs.append((item.name, item.type, field(default_factory=item.default_factory)))
+        elif item.default is not MISSING:
+            specs.append((item.name, item.type, field(default=item.default)))
+        else:
+            specs.append((item.name, item.type))
+    return make_dataclass(name, specs)
+
+
+def _build_records(record_cls: type, plantio_cls: type, total: int, plantios_per_record: int) -> list:
+    records = []
+    for index in range(total):
+        excel_row = index + 2
+        records.append(
+            record_cls(
+                excel_row=excel_row,
+                uid=f"bench-{index:07d}",
+                oficio_processo=f"{excel_row}/20{20 + index % 7}",
+                eletronico="SIM" if index % 2 else "NAO",
+                caixa=f"CX-{index % 40}",
+                av_tec=f"AT-{index:07d}",
+                compensacao=str(5 + index % 30),
+                endereco=f"Rua Sintetica {index % 900}, {index % 150}",
+                microbacia=MICROBACIAS[index % len(MICROBACIAS)],
+                compensado="SIM" if index % 3 == 0 else "",
+                endereco_plantio=f"Praca {index % 200}",
+                latitude="-22.01",
+                longitude="-47.89",
+                plantios=[
+                    plantio_cls(sequence=sequence, endereco=f"Area {index}-{sequence}", qtd_mudas="10")
+                    for sequence in range(1, max(int(plantios_per_record), 0) + 1)
+                ],
+            )
+        )
+    return records
+
+
+def _measure(record_cls: type, plantio_cls: type, total: int, plantios_per_record: int) -> tuple[float, float]:
+    gc.collect()
+    tracemalloc.start()
+    records = _build_records(record_cls, plantio_cls, total, plantios_per_record)
+    current, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    started_at = time.perf_counter()
+    deepcopy(records)
+    clone_seconds = time.perf_counter() - started_at
+    return current / max(total, 1), clone_seconds
+
+
+def main() -> int:
+    args = _parse_args()
+    logging.disable(logging.INFO)
+    plain_record_cls = _plain_variant(Compensacao, "PlainCompensacao")
+    plain_plantio_cls = _plain_variant(PlantioItem, "PlainPlantioItem")
+
+    print(f"{'modelo':>22} {'bytes/registro':>16} {'clone (s)':>10}")
+    for label, record_cls, plantio_cls in (
+        ("dataclass (antes)", plain_record_cls, plain_plantio_cls),
+        ("slots (atual)", Compensacao, PlantioItem),
+    ):
+        bytes_per_record, clone_seconds = _measure(record_cls, plantio_cls, args.total, args.plantios_per_record)
+        print(f"{label:>22} {bytes_per_record:>16.0f} {clone_seconds:>10.3f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,91 @@
+import argparse
+import logging
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from app.models.compensacao import Compensacao
+from app.models.plantio_item import PlantioItem
+from app.services.sqlite_mirror_service import SqliteMirrorService
+
+DEFAULT_SIZES = (1_000, 10_000, 100_000)
+MICROBACIAS = ("Gregorio", "Monjolinho", "Santa Maria do Leme", "Tijuco Preto", "Medeiros")
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Mede a taxa de carga em lote do espelho SQLite de compensacoes.")
+    parser.add_argument(
+        "--sizes",
+        default=",".join(str(size) for size in DEFAULT_SIZES),
+        help="Quantidades de registros sinteticos separadas por virgula. Padrao: 1000,10000,100000",
+    )
+    parser.add_argument("--plantios-per-record", type=int, default=2)
+    parser.add_argument("--db-dir", default="", help="Diretorio para os bancos temporarios.")
+    return parser.parse_args()
+
+
+def build_synthetic_records(total: int, *, plantios_per_record: int = 2) -> list[Compensacao]:
+    records: list[Compensacao] = []
+    for index in range(total):
+        excel_row = index + 2
+        records.append(
+            Compensacao(
+                excel_row=excel_row,
+                uid=f"bench-{index:07d}",
+                oficio_processo=f"{excel_row}/20{20 + index % 7}",
+                eletronico="SIM" if index % 2 else "NAO",
+                caixa=f"CX-{index % 40}",
+                av_tec=f"AT-{index:07d}",
+                compensacao=str(5 + index % 30),
+                endereco=f"Rua Sintetica {index % 900}, {index % 150}",
+                microbacia=MICROBACIAS[index % len(MICROBACIAS)],
+                compensado="SIM" if index % 3 == 0 else "",
+                endereco_plantio=f"Praca {index % 200}",
+                latitude="-22.01",
+                longitude="-47.89",
+                plantios=[
+                    PlantioItem(sequence=sequence, endereco=f"Area {index}-{sequence}", qtd_mudas="10")
+                    for sequence in range(1, max(int(plantios_per_record), 0) + 1)
+                ],
+            )
+        )
+    return records
+
+
+def _measure(db_path: Path, records: list[Compensacao], *, rebuild_indexes: bool) -> float:
+    service = SqliteMirrorService(db_path=db_path)
+    service.sync_workbook_snapshot("session://benchmark", records, rebuild_indexes=rebuild_indexes)
+    started_at = time.perf_counter()
+    service.sync_workbook_snapshot("session://benchmark", records, rebuild_indexes=rebuild_indexes)
+    return time.perf_counter() - started_at
+
+
+def main() -> int:
+    args = _parse_args()
+    logging.disable(logging.INFO)
+    sizes = [int(item) for item in str(args.sizes).split(",") if item.strip()]
+    base_dir = Path(args.db_dir) if args.db_dir else Path(tempfile.mkdtemp(prefix="mirror-bench-"))
+    base_dir.mkdir(parents=True, exist_ok=True)
+
+    print(f"{'registros':>10} {'indices':>10} {'segundos':>10} {'linhas/s':>12}")
+    for size in sizes:
+        records = build_synthetic_records(size, plantios_per_record=args.plantios_per_record)
+        for rebuild_indexes in (False, True):
+            label = "rebuild" if rebuild_indexes else "mantidos"
+            db_path = base_dir / f"mirror-{size}-{label}.db"
+            db_path.unlink(missing_ok=True)
+            elapsed = _measure(db_path, records, rebuild_indexes=rebuild_indexes)
+            rate = size / elapsed if elapsed > 0 else 0.0
+            print(f"{size:>10} {label:>10} {elapsed:>10.3f} {rate:>12.0f}")
+    print(f"Bancos gerados em: {base_dir}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,176 @@
+import argparse
+import json
+import logging
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from supabase import create_client
+
+from app.services.supabase_workspace_sync_service import SNAPSHOT_TABLES, SupabaseWorkspaceSyncService
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description=(
+            "Mede a carga completa da base oficial contra um servidor local compativel com o PostgREST "
+            "que adiciona latencia: busca sequencial antiga contra o planejador paralelo de paginas."
+        )
+    )
+    parser.add_argument("--records", type=int, default=20_000, help="Registros sinteticos. Padrao: 20000")
+    parser.add_argument("--latency-ms", type=float, default=120.0, help="Latencia simulada por requisicao.")
+    parser.add_argument("--max-rows", type=int, default=1000, help="Limite de linhas por resposta (max-rows).")
+    return parser.parse_args()
+
+
+def _build_tables(total: int) -> dict[str, list[dict]]:
+    timestamp = "2026-04-09T12:00:00+00:00"
+    records = [
+        {
+            "id": index,
+            "uid": f"bench-{index:07d}",
+            "excel_row": index + 1,
+            "oficio_processo": f"{index}/2026",
+            "av_tec": f"AT-{index:07d}",
+            "compensacao": str(5 + index % 30),
+            "endereco": f"Rua Sintetica {index % 900}",
+            "microbacia": "Monjolinho",
+            "updated_at": timestamp,
+        }
+        for index in range(1, total + 1)
+    ]
+    plantios = [
+        {"id": index, "record_id": index, "sequence": 1, "endereco": f"Area {index}", "qtd_mudas": "10"}
+        for index in range(1, total + 1)
+    ]
+    audit_events = [
+        {"id": index, "event_id": f"evt-{index}", "timestamp": timestamp, "action": "EDIT", "summary": "Edicao"}
+        for index in range(1, total // 4 + 1)
+    ]
+    tcras = [
+        {"uid": f"tcra-{index:04d}", "numero_tcra": f"TCRA-{index}", "updated_at": timestamp}
+        for index in range(200)
+    ]
+    tcra_eventos = [
+        {"id": index + 1, "tcra_uid": f"tcra-{index % 200:04d}", "sequence": index // 200 + 1, "tipo_evento": "Obra"}
+        for index in range(600)
+    ]
+    return {
+        "workbooks": [{"id": 1, "workbook_path": "session://banco-local", "workbook_name": "Base oficial"}],
+        "records": records,
+        "plantios": plantios,
+        "audit_events": audit_events,
+        "tcras": tcras,
+        "tcra_eventos": tcra_eventos,
+        "sync_tombstones": [],
+    }
+
+
+class _StubState:
+    def __init__(self, tables: dict[str, list[dict]], latency_seconds: float, max_rows: int):
+        self.tables = tables
+        self.latency_seconds = latency_seconds
+        self.max_rows = max_rows
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.max_in_flight = 0
+        self._in_flight = 0
+
+    def reset(self) -> None:
+        with self.lock:
+            self.requests = self.max_in_flight = 0
+
+    def enter(self) -> None:
+        with self.lock:
+            self.requests += 1
+            self._in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self._in_flight)
+
+    def leave(self) -> None:
+        with self.lock:
+            self._in_flight -= 1
+
+
+def _build_handler(state: _StubState):
+    class PostgrestStubHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *_args):
+            return
+
+        def do_GET(self):
+            state.enter()
+            try:
+                time.sleep(state.latency_seconds)
+                url = urlsplit(self.path)
+                table_name = url.path.rsplit("/", 1)[-1]
+                params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+                rows = state.tables.get(table_name, [])
+                order = params.get("order", "").split(".")[0]
+                if order:
+                    rows = sorted(rows, key=lambda row: row.get(order), reverse=".desc" in params.get("order", ""))
+                offset = int(params.get("offset", 0))
+                limit = min(int(params.get("limit", state.max_rows)), state.max_rows)
+                page = rows[offset : offset + limit]
+                body = json.dumps(page).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                total = str(len(rows)) if "count=exact" in self.headers.get("Prefer", "") else "*"
+                last = offset + len(page) - 1
+                self.send_header("Content-Range", f"{offset}-{last}/{total}" if page else f"*/{total}")
+                self.end_headers()
+                self.wfile.write(body)
+            finally:
+                state.leave()
+
+    return PostgrestStubHandler
+
+
+def _legacy_snapshot(service: SupabaseWorkspaceSyncService, client) -> int:
+    # Comportamento anterior: uma tabela depois da outra, pagina a pagina.
+    service._fetch_workbook_row(client)
+    rows = {name: service._fetch_table_rows(client, name, order_by=order_by) for name, order_by in SNAPSHOT_TABLES}
+    records = service._build_records(rows["records"], rows["plantios"])
+    service._build_tcras(rows["tcras"], rows["tcra_eventos"])
+    return len(records)
+
+
+def main() -> int:
+    args = _parse_args()
+    logging.disable(logging.INFO)
+    state = _StubState(_build_tables(max(int(args.records), 1)), args.latency_ms / 1000.0, max(int(args.max_rows), 1))
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _build_handler(state))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address
+    client = create_client(f"http://{host}:{port}", "sb_publishable_benchmark")
+    service = SupabaseWorkspaceSyncService()
+
+    modes = (
+        ("sequencial", lambda: _legacy_snapshot(service, client)),
+        ("paralelo", lambda: len(service._fetch_snapshot(client).records)),
+    )
+    print(f"{'modo':>10} {'registros':>9} {'tempo (s)':>9} {'requisicoes':>11} {'simultaneas':>11}")
+    try:
+        for mode, run in modes:
+            state.reset()
+            started_at = time.perf_counter()
+            records = run()
+            elapsed = time.perf_counter() - started_at
+            print(f"{mode:>10} {records:>9} {elapsed:>9.2f} {state.requests:>11} {state.max_in_flight:>11}")
+    finally:
+        server.shutdown()
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
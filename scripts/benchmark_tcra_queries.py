@@ -0,0 +1,125 @@
+import argparse
+import logging
+import sys
+import tempfile
+import time
+from datetime import date
+from pathlib import Path
+
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from app.models.tcra import Tcra
+from app.models.tcra_evento import TcraEvento
+from app.services.tcra_records_service import (
+    build_filter_facets,
+    build_record_overview,
+    compute_metrics,
+    filter_tcras,
+)
+from app.services.tcra_sqlite_service import TcraSqliteService
+
+DEFAULT_SIZES = (5_000, 50_000)
+STATUSES = ("Em acompanhamento", "Cumprido", "Prazo vencido", "Relatório pendente", "", "Arquivado")
+ORGAOS = ("CETESB", "MPSP", "SMAA", "DAAE", "")
+BAIRROS = ("Centro", "Varjão", "Cidade Aracy", "Vila Prado", "Jardim Botânico", "Santa Felicia")
+BENCHMARK_TODAY = date(2026, 4, 3)
+BENCHMARK_FILTERS = {
+    "status": "Prazo vencido",
+    "selected_orgaos": ("CETESB", "MPSP"),
+    "selected_year": "2021",
+}
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Compara filtros, facetas e metricas de TCRA em Python e em SQL.")
+    parser.add_argument(
+        "--sizes",
+        default=",".join(str(size) for size in DEFAULT_SIZES),
+        help="Quantidades de TCRAs sinteticos separadas por virgula. Padrao: 5000,50000",
+    )
+    parser.add_argument("--eventos-per-tcra", type=int, default=3)
+    parser.add_argument("--db-dir", default="", help="Diretorio para os bancos temporarios.")
+    return parser.parse_args()
+
+
+def build_synthetic_tcras(total: int, *, eventos_per_tcra: int = 3) -> list[Tcra]:
+    tcras: list[Tcra] = []
+    for index in range(total):
+        tcras.append(
+            Tcra(
+                uid=f"bench-tcra-{index:07d}",
+                numero_processo=f"{1000 + index}/20{18 + index % 8}",
+                numero_tcra="" if index % 17 == 0 else f"TCRA-{index:07d}",
+                local=f"Sistema de Lazer {index % 400}",
+                endereco=f"Rua Sintetica {index % 900}",
+                bairro=BAIRROS[index % len(BAIRROS)],
+                orgao_acompanhamento=ORGAOS[index % len(ORGAOS)],
+                status=STATUSES[index % len(STATUSES)],
+                data_assinatura=date(2018 + index % 6, 1 + index % 12, 1),
+                prazo_final=date(2025 + index % 3, 1 + index % 12, 10),
+                periodicidade_relatorio_meses=12,
+                data_ultimo_relatorio=date(2025, 1 + index % 12, 5) if index % 4 else None,
+                data_proximo_relatorio=date(2026, 1 + (index * 5) % 12, 1 + index % 27) if index % 3 else None,
+                responsavel_execucao="" if index % 9 == 0 else f"Responsavel {index % 25}",
+                mpsp_relacionado="Sim" if index % 11 == 0 else "",
+                eventos=[
+                    TcraEvento(
+                        sequence=sequence,
+                        data_evento=date(2024, 1 + (index + sequence) % 12, 1 + sequence),
+                        tipo_evento="Relatorio",
+                        descricao=f"Evento {sequence} do TCRA {index}",
+                    )
+                    for sequence in range(1, max(int(eventos_per_tcra), 0) + 1)
+                ],
+            )
+        )
+    return tcras
+
+
+def _timed(callback) -> float:
+    started_at = time.perf_counter()
+    callback()
+    return time.perf_counter() - started_at
+
+
+def _python_path(service: TcraSqliteService) -> None:
+    records = service.list_tcras()
+    filtered = filter_tcras(records, text="", selected_bairros=(), today=BENCHMARK_TODAY, **BENCHMARK_FILTERS)
+    build_filter_facets(records, today=BENCHMARK_TODAY)
+    compute_metrics(filtered, today=BENCHMARK_TODAY)
+    build_record_overview(records, today=BENCHMARK_TODAY)
+
+
+def _sql_path(service: TcraSqliteService) -> None:
+    service.query_tcras(today=BENCHMARK_TODAY, **BENCHMARK_FILTERS)
+    service.query_filter_facets(today=BENCHMARK_TODAY)
+    service.query_metrics(today=BENCHMARK_TODAY, **BENCHMARK_FILTERS)
+    service.build_record_overview(today=BENCHMARK_TODAY)
+
+
+def main() -> int:
+    args = _parse_args()
+    logging.disable(logging.INFO)
+    sizes = [int(item) for item in str(args.sizes).split(",") if item.strip()]
+    base_dir = Path(args.db_dir) if args.db_dir else Path(tempfile.mkdtemp(prefix="tcra-bench-"))
+    base_dir.mkdir(parents=True, exist_ok=True)
+
+    print(f"{'tcras':>10} {'python (s)':>12} {'sql (s)':>12} {'ganho':>8}")
+    for size in sizes:
+        db_path = base_dir / f"tcras-{size}.db"
+        db_path.unlink(missing_ok=True)
+        service = TcraSqliteService(db_path=db_path)
+        service.replace_all(build_synthetic_tcras(size, eventos_per_tcra=args.eventos_per_tcra))
+        python_elapsed = _timed(lambda: _python_path(service))
+        sql_elapsed = _timed(lambda: _sql_path(service))
+        speedup = python_elapsed / sql_elapsed if sql_elapsed > 0 else 0.0
+        print(f"{size:>10} {python_elapsed:>12.3f} {sql_elapsed:>12.3f} {speedup:>7.1f}x")
+    print(f"Bancos gerados em: {base_dir}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,160 @@
+import argparse
+import logging
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+import requests
+
+from app.services.tile_cache_store import TileCacheStore, TileKey, fetch_tile
+from app.services.tile_proxy_service import TileProxyService
+from app.services.tile_upstream import TileUpstream
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description=(
+            "Teste de carga do proxy de tiles contra um provedor local simulado: compara a busca "
+            "antiga (requests.get por tile) com sessoes por provedor, coalescencia e semaforo."
+        )
+    )
+    parser.add_argument("--tiles", type=int, default=200, help="Tiles distintos pedidos. Padrao: 200")
+    parser.add_argument("--duplicates", type=int, default=2, help="Pedidos simultaneos de cada tile.")
+    parser.add_argument("--clients", type=int, default=16, help="Clientes HTTP em paralelo.")
+    parser.add_argument("--latency-ms", type=float, default=40.0, help="Latencia simulada do provedor.")
+    parser.add_argument(
+        "--handshake-ms",
+        type=float,
+        default=60.0,
+        help="Custo simulado de cada conexao nova (TCP+TLS) no provedor.",
+    )
+    parser.add_argument("--concurrency", type=int, default=8, help="Limite de buscas simultaneas no provedor.")
+    return parser.parse_args()
+
+
+class _StubState:
+    def __init__(self, latency_seconds: float, handshake_seconds: float):
+        self.latency_seconds = latency_seconds
+        self.handshake_seconds = handshake_seconds
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.connections = 0
+
+    def reset(self) -> None:
+        with self.lock:
+            self.requests = self.connections = 0
+
+
+def _build_handler(state: _StubState):
+    class StubHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def setup(self):
+            super().setup()
+            with state.lock:
+                state.connections += 1
+            time.sleep(state.handshake_seconds)
+
+        def log_message(self, *_args):
+            return
+
+        def do_GET(self):
+            with state.lock:
+                state.requests += 1
+            time.sleep(state.latency_seconds)
+            body = self.path.encode("utf-8").ljust(2048, b".")
+            self.send_response(200)
+            self.send_header("Content-Type", "image/png")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    return StubHandler
+
+
+class _LegacyUpstream:
+    """Comportamento anterior: requests.get sem Session, sem coalescencia nem limite."""
+
+    def __init__(self, url_for):
+        self._url_for = url_for
+
+    def fetch(self, store, key, *, timeout, user_agent):
+        return fetch_tile(store, key, get=requests.get, timeout=timeout, user_agent=user_agent, url_for=self._url_for)
+
+    def close(self):
+        return
+
+
+def _run(mode: str, upstream, args: argparse.Namespace, cache_dir: str) -> tuple[float, list[float]]:
+    store = TileCacheStore(Path(cache_dir) / f"{mode}.mbtiles", memory_items=args.tiles * 2)
+    proxy = TileProxyService(store=store, upstream=upstream, startup_wait_sec=0.5)
+    base_url = proxy.start()
+    paths = [
+        f"{base_url}/tiles/carto_light/15/{12000 + index % 100}/{18300 + index // 100}.png"
+        for index in range(args.tiles)
+        for _duplicate in range(args.duplicates)
+    ]
+    local = threading.local()
+
+    def request(url: str) -> float:
+        session = getattr(local, "session", None)
+        if session is None:
+            session = local.session = requests.Session()
+        started_at = time.perf_counter()
+        response = session.get(url, timeout=30)
+        response.raise_for_status()
+        return time.perf_counter() - started_at
+
+    started_at = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=args.clients) as executor:
+            latencies = list(executor.map(request, paths))
+    finally:
+        proxy.stop()
+    return time.perf_counter() - started_at, latencies
+
+
+def main() -> int:
+    args = _parse_args()
+    logging.disable(logging.INFO)
+    state = _StubState(args.latency_ms / 1000.0, args.handshake_ms / 1000.0)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _build_handler(state))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address
+
+    def url_for(key: TileKey) -> str:
+        return f"http://{host}:{port}/{key.provider}/{key.z}/{key.x}/{key.y}.png"
+
+    modes = (
+        ("legado", lambda: _LegacyUpstream(url_for)),
+        ("pool", lambda: TileUpstream(max_concurrency=args.concurrency, url_for=url_for)),
+    )
+    print(f"{'modo':>8} {'pedidos':>8} {'tiles/s':>9} {'p95 (ms)':>9} {'upstream':>9} {'conexoes':>9}")
+    try:
+        with tempfile.TemporaryDirectory() as cache_dir:
+            for mode, factory in modes:
+                state.reset()
+                elapsed, latencies = _run(mode, factory(), args, cache_dir)
+                p95 = statistics.quantiles(latencies, n=20)[-1] * 1000
+                print(
+                    f"{mode:>8} {len(latencies):>8} {len(latencies) / elapsed:>9.1f} {p95:>9.1f} "
+                    f"{state.requests:>9} {state.connections:>9}"
+                )
+    finally:
+        server.shutdown()
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
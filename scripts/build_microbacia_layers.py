@@ -0,0 +1,84 @@
+import argparse
+import json
+import logging
+import sys
+import time
+from pathlib import Path
+
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from app.services.gis_layer_cache import (
+    LAYER_CACHE_DIR,
+    build_microbacia_layer,
+    load_cached_microbacia_layer,
+    serialize_layer,
+    shapefile_fingerprint,
+    write_cached_layer,
+)
+from app.services.gis_service import GisService
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description=(
+            "Gera a camada de microbacias simplificada por nivel de zoom e grava no cache "
+            "usado pelo mapa, comparando com o GeoJSON em resolucao total."
+        )
+    )
+    parser.add_argument("--microbacias-dir", default=str(PROJECT_ROOT / "data" / "microbacias"))
+    parser.add_argument("--name-field", default="Nome_Do_Arquivo")
+    parser.add_argument("--cache-dir", default=str(LAYER_CACHE_DIR), help="Destino da camada gerada.")
+    return parser.parse_args()
+
+
+def _count_vertices(coords) -> int:
+    if coords and isinstance(coords[0], (int, float)):
+        return 1
+    return sum(_count_vertices(item) for item in coords)
+
+
+def main() -> int:
+    args = _parse_args()
+    logging.disable(logging.INFO)
+
+    started_at = time.perf_counter()
+    service = GisService(args.microbacias_dir, args.name_field, layer_cache_dir=args.cache_dir)
+    load_seconds = time.perf_counter() - started_at
+
+    started_at = time.perf_counter()
+    full_text = service.gdf.to_json()
+    json.loads(full_text)
+    full_seconds = time.perf_counter() - started_at
+
+    started_at = time.perf_counter()
+    layer = build_microbacia_layer(service.gdf_metric, args.name_field)
+    text = serialize_layer(layer)
+    fingerprint = shapefile_fingerprint(service.microbacias_dir, args.name_field)
+    write_cached_layer(fingerprint, text, args.cache_dir)
+    build_seconds = time.perf_counter() - started_at
+
+    started_at = time.perf_counter()
+    cached = load_cached_microbacia_layer(service.microbacias_dir, args.name_field, cache_dir=args.cache_dir)
+    warm_seconds = time.perf_counter() - started_at
+    if cached != text:
+        print("Falha: a camada lida do cache difere da gerada.")
+        return 1
+
+    print(f"Shapefiles lidos com geopandas: {load_seconds:.3f}s ({len(service.gdf)} poligonos)")
+    print(f"GeoJSON completo (to_json + loads): {full_seconds:.3f}s, {len(full_text)} bytes")
+    print(f"Camada gerada em {build_seconds:.3f}s -> {args.cache_dir} ({fingerprint})")
+    print(f"{'zoom minimo':>12} {'vertices':>10} {'bytes':>10}")
+    levels = [(0, layer["features"])] + [(lod["min_zoom"], lod["features"]) for lod in layer["lods"]]
+    for min_zoom, features in levels:
+        vertices = sum(_count_vertices(feature["geometry"]["coordinates"]) for feature in features)
+        size = len(json.dumps(features, separators=(",", ":")))
+        print(f"{min_zoom:>12} {vertices:>10} {size:>10}")
+    print(f"Abertura a quente (hash + leitura, sem geopandas): {warm_seconds * 1000:.2f} ms, {len(cached)} bytes")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
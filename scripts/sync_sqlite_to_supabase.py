@@ -5,8 +5,12 @@ import json
 import os
 import sqlite3
 import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Iterable
+from typing import Any, Iterable, Iterator, Mapping, Sequence
 
 try:
     import psycopg
@@ -36,6 +40,180 @@ IDENTITY_TABLES = (
     "audit_events",
     "tcra_eventos",
 )
+DEFAULT_BATCH_SIZE = 5000
+
+
+@dataclass(frozen=True)
+class TableSpec:
+    name: str
+    columns: tuple[str, ...]
+    order_by: str
+    conflict_key: tuple[str, ...]
+    json_columns: tuple[str, ...] = ()
+    json_object_columns: tuple[str, ...] = ()
+    nullable_columns: tuple[str, ...] = ()
+    # Filtro SQLite do modo --since; vazio envia a tabela inteira.
+    since_filter: str = ""
+    # (coluna, tabela pai, chave do pai): no --since os filhos do pai alterado sao trocados por inteiro.
+    parent: tuple[str, str, str] | None = None
+    # No --since apaga do Postgres os ids que sumiram do SQLite (exclusoes locais).
+    prune_missing: bool = False
+    # Coluna do unique nao deferivel por posicao: no --since as linhas enviadas vao para -id antes do merge.
+    parked_column: str = ""
+
+
+@dataclass(frozen=True)
+class TableSyncStats:
+    table: str
+    rows: int
+    seconds: float
+
+
+TABLE_SPECS = (
+    TableSpec("meta", ("key", "value"), order_by="key", conflict_key=("key",)),
+    TableSpec(
+        "workbooks",
+        (
+            "id",
+            "workbook_path",
+            "workbook_name",
+            "created_at",
+            "last_loaded_at",
+            "last_synced_at",
+            "record_count",
+            "plantio_count",
+            "source_mtime_ns",
+            "source_size",
+        ),
+        order_by="id",
+        conflict_key=("id",),
+    ),
+    TableSpec(
+        "records",
+        (
+            "id",
+            "workbook_id",
+            "uid",
+            "excel_row",
+            "oficio_processo",
+            "eletronico",
+            "caixa",
+            "av_tec",
+            "compensacao",
+            "endereco",
+            "microbacia",
+            "compensado",
+            "endereco_plantio",
+            "latitude_plantio",
+            "longitude_plantio",
+            "latitude",
+            "longitude",
+            "synced_at",
+            "oficio_year",
+            "tipo_key",
+            "microbacia_key",
+            "search_blob_norm",
+        ),
+        order_by="id",
+        conflict_key=("id",),
+        since_filter="modified_at >= :since",
+        prune_missing=True,
+        parked_column="excel_row",
+    ),
+    TableSpec(
+        "plantios",
+        ("id", "record_id", "sequence", "endereco", "qtd_mudas", "latitude", "longitude"),
+        order_by="id",
+        conflict_key=("id",),
+        since_filter="record_id IN (SELECT id FROM records WHERE modified_at >= :since)",
+        parent=("record_id", "records", "id"),
+    ),
+    TableSpec(
+        "audit_events",
+        (
+            "id",
+            "event_id",
+            "workbook_id",
+            "workbook_path",
+            "timestamp",
+            "action",
+            "summary",
+            "backup_path",
+            "metadata_json",
+            "before_json",
+            "after_json",
+            "mirrored_at",
+        ),
+        order_by="id",
+        conflict_key=("id",),
+        json_columns=("metadata_json", "before_json", "after_json"),
+        json_object_columns=("metadata_json",),
+        since_filter="mirrored_at >= :since",
+    ),
+    TableSpec(
+        "tcras",
+        (
+            "uid",
+            "numero_processo",
+            "numero_tcra",
+            "local",
+            "endereco",
+            "bairro",
+            "orgao_acompanhamento",
+            "status",
+            "data_assinatura",
+            "prazo_final",
+            "periodicidade_relatorio_meses",
+            "data_ultimo_relatorio",
+            "data_proximo_relatorio",
+            "area_m2",
+            "numero_mudas_previsto",
+            "servicos_exigidos",
+            "responsavel_execucao",
+            "observacoes",
+            "mpsp_relacionado",
+            "inquerito_civil",
+            "search_blob_norm",
+            "created_at",
+            "updated_at",
+        ),
+        order_by="uid",
+        conflict_key=("uid",),
+        nullable_columns=(
+            "data_assinatura",
+            "prazo_final",
+            "data_ultimo_relatorio",
+            "data_proximo_relatorio",
+            "periodicidade_relatorio_meses",
+            "area_m2",
+            "numero_mudas_previsto",
+        ),
+        since_filter="updated_at >= :since OR uid IN (SELECT tcra_uid FROM tcra_eventos WHERE updated_at >= :since)",
+    ),
+    TableSpec(
+        "tcra_eventos",
+        (
+            "id",
+            "tcra_uid",
+            "sequence",
+            "data_evento",
+            "tipo_evento",
+            "descricao",
+            "prazo_resultante",
+            "status_resultante",
+            "created_at",
+            "updated_at",
+        ),
+        order_by="id",
+        conflict_key=("id",),
+        nullable_columns=("data_evento", "prazo_resultante"),
+        since_filter=(
+            "tcra_uid IN (SELECT uid FROM tcras WHERE updated_at >= :since "
+            "UNION SELECT tcra_uid FROM tcra_eventos WHERE updated_at >= :since)"
+        ),
+        parent=("tcra_uid", "tcras", "uid"),
+    ),
+)
 
 
 def parse_args() -> argparse.Namespace:
@@ -62,7 +240,47 @@ def parse_args() -> argparse.Namespace:
         action="store_true",
         help="Apenas mostra as contagens que seriam sincronizadas, sem gravar no Supabase.",
     )
-    return parser.parse_args()
+    parser.add_argument(
+        "--copy",
+        action="store_true",
+        help=(
+            "Modo de alto volume: le o SQLite em lotes e envia cada tabela com COPY para uma tabela "
+            "temporaria, mesclando no destino com um unico INSERT ... ON CONFLICT."
+        ),
+    )
+    parser.add_argument(
+        "--since",
+        default="",
+        help=(
+            "Com --copy, envia apenas o que mudou desde este instante ISO 8601 (modified_at dos registros, "
+            "updated_at dos TCRAs) e nao limpa o "
+            "destino. Exclusoes locais nao sao propagadas; rode uma carga completa para alinha-las."
+        ),
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=DEFAULT_BATCH_SIZE,
+        help=f"Linhas lidas do SQLite por lote no modo --copy. Padrao: {DEFAULT_BATCH_SIZE}",
+    )
+    args = parser.parse_args()
+    if args.since and not args.copy:
+        parser.error("--since exige --copy.")
+    if args.since:
+        try:
+            args.since = normalize_since(args.since)
+        except ValueError:
+            parser.error(f"Valor invalido para --since: {args.since!r}. Use uma data ISO 8601.")
+    args.batch_size = max(int(args.batch_size), 1)
+    return args
+
+
+def normalize_since(value: str) -> str:
+    moment = datetime.fromisoformat(str(value).strip())
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    # Mesma largura fixa do modified_at do espelho, para a comparacao textual no SQLite valer.
+    return moment.astimezone(timezone.utc).isoformat(timespec="microseconds")
 
 
 def load_local_env(path: Path) -> dict[str, str]:
@@ -122,44 +340,96 @@ def blank_to_none(value: Any) -> Any:
     return value
 
 
-def prepare_dataset(conn: sqlite3.Connection) -> dict[str, list[dict[str, Any]]]:
-    dataset = {
-        "meta": fetch_rows(conn, "meta", order_by="key"),
-        "workbooks": fetch_rows(conn, "workbooks", order_by="id"),
-        "records": fetch_rows(conn, "records", order_by="id"),
-        "plantios": fetch_rows(conn, "plantios", order_by="id"),
-        "audit_events": fetch_rows(conn, "audit_events", order_by="id"),
-        "tcras": fetch_rows(conn, "tcras", order_by="uid"),
-        "tcra_eventos": fetch_rows(conn, "tcra_eventos", order_by="id"),
-    }
-
-    for row in dataset["audit_events"]:
-        row["metadata_json"] = parse_json_text(row.get("metadata_json")) or {}
-        row["before_json"] = parse_json_text(row.get("before_json"))
-        row["after_json"] = parse_json_text(row.get("after_json"))
-
-    for row in dataset["tcras"]:
-        for field in (
-            "data_assinatura",
-            "prazo_final",
-            "data_ultimo_relatorio",
-            "data_proximo_relatorio",
-            "periodicidade_relatorio_meses",
-            "area_m2",
-            "numero_mudas_previsto",
-        ):
-            row[field] = blank_to_none(row.get(field))
+def convert_value(spec: TableSpec, column: str, value: Any) -> Any:
+    if column in spec.json_columns:
+        parsed = parse_json_text(value)
+        if not parsed and column in spec.json_object_columns:
+            return {}
+        return parsed
+    if column in spec.nullable_columns:
+        return blank_to_none(value)
+    return value
 
-    for row in dataset["tcra_eventos"]:
-        for field in ("data_evento", "prazo_resultante"):
-            row[field] = blank_to_none(row.get(field))
 
+def prepare_dataset(conn: sqlite3.Connection) -> dict[str, list[dict[str, Any]]]:
+    dataset = {spec.name: fetch_rows(conn, spec.name, order_by=spec.order_by) for spec in TABLE_SPECS}
+    for spec in TABLE_SPECS:
+        converted_columns = (*spec.json_columns, *spec.nullable_columns)
+        if not converted_columns:
+            continue
+        for row in dataset[spec.name]:
+            for column in converted_columns:
+                row[column] = convert_value(spec, column, row.get(column))
     return dataset
 
 
-def print_summary(dataset: dict[str, list[dict[str, Any]]]) -> None:
-    for table in ("meta", "workbooks", "records", "plantios", "audit_events", "tcras", "tcra_eventos"):
-        print(f"{table}: {len(dataset[table])}")
+def print_summary(dataset: Mapping[str, Sequence[Any]]) -> None:
+    print_counts({table: len(rows) for table, rows in dataset.items()})
+
+
+def print_counts(counts: Mapping[str, int]) -> None:
+    for spec in TABLE_SPECS:
+        print(f"{spec.name}: {counts[spec.name]}")
+
+
+def build_select_sql(spec: TableSpec, *, since: str = "", count_only: bool = False) -> str:
+    query = f"SELECT {'COUNT(*)' if count_only else ', '.join(spec.columns)} FROM {spec.name}"
+    if since and spec.since_filter:
+        query += f" WHERE {spec.since_filter}"
+    if not count_only:
+        query += f" ORDER BY {spec.order_by}"
+    return query
+
+
+def require_since_columns(conn: sqlite3.Connection) -> None:
+    columns = {str(row[1]) for row in conn.execute("PRAGMA table_info(records)").fetchall()}
+    if "modified_at" not in columns:
+        raise SystemExit(
+            "O SQLite de origem ainda nao tem records.modified_at. Abra o app uma vez para migrar o banco "
+            "local ou rode uma carga completa sem --since."
+        )
+
+
+def count_rows(conn: sqlite3.Connection, spec: TableSpec, *, since: str = "") -> int:
+    return int(conn.execute(build_select_sql(spec, since=since, count_only=True), {"since": since}).fetchone()[0])
+
+
+def stream_rows(
+    conn: sqlite3.Connection,
+    spec: TableSpec,
+    *,
+    since: str = "",
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> Iterator[tuple[Any, ...]]:
+    """Le a tabela em lotes pelo cursor do SQLite, sem materializar a tabela inteira."""
+    cursor = conn.execute(build_select_sql(spec, since=since), {"since": since})
+    json_positions = {index for index, column in enumerate(spec.columns) if column in spec.json_columns}
+    try:
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            for row in rows:
+                values = [convert_value(spec, column, row[index]) for index, column in enumerate(spec.columns)]
+                for index in json_positions:
+                    if values[index] is not None:
+                        values[index] = Jsonb(values[index])
+                yield tuple(values)
+    finally:
+        cursor.close()
+
+
+def stream_ids(conn: sqlite3.Connection, spec: TableSpec, *, batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator[int]:
+    cursor = conn.execute(f"SELECT id FROM {spec.name} ORDER BY id")
+    try:
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            for row in rows:
+                yield int(row[0])
+    finally:
+        cursor.close()
 
 
 def truncate_target(conn: psycopg.Connection, schema: str) -> None:
@@ -197,6 +467,105 @@ def insert_many(
         cur.executemany(sql, values)
 
 
+def build_merge_sql(schema: str, spec: TableSpec, stage: str) -> str:
+    columns_sql = ", ".join(spec.columns)
+    updates = [column for column in spec.columns if column not in spec.conflict_key]
+    action = (
+        "DO UPDATE SET " + ", ".join(f"{column} = EXCLUDED.{column}" for column in updates)
+        if updates
+        else "DO NOTHING"
+    )
+    return (
+        f"INSERT INTO {schema}.{spec.name} ({columns_sql}) "
+        f"SELECT {columns_sql} FROM {stage} "
+        f"ON CONFLICT ({', '.join(spec.conflict_key)}) {action}"
+    )
+
+
+def copy_table(
+    conn: psycopg.Connection,
+    schema: str,
+    spec: TableSpec,
+    rows: Iterable[tuple[Any, ...]],
+    *,
+    replace_children: bool = False,
+    local_ids: Iterable[int] | None = None,
+) -> int:
+    stage = f"stage_{spec.name}"
+    columns_sql = ", ".join(spec.columns)
+    copied = 0
+    with conn.cursor() as cur:
+        cur.execute(
+            f"CREATE TEMP TABLE {stage} ON COMMIT DROP AS "
+            f"SELECT {columns_sql} FROM {schema}.{spec.name} WITH NO DATA"
+        )
+        with cur.copy(f"COPY {stage} ({columns_sql}) FROM STDIN") as copy:
+            for row in rows:
+                copy.write_row(row)
+                copied += 1
+        if replace_children and spec.parent is not None:
+            column, parent_table, parent_key = spec.parent
+            cur.execute(
+                f"DELETE FROM {schema}.{spec.name} "
+                f"WHERE {column} IN (SELECT {parent_key} FROM stage_{parent_table})"
+            )
+        if local_ids is not None:
+            cur.execute(f"CREATE TEMP TABLE {stage}_ids (id bigint PRIMARY KEY) ON COMMIT DROP")
+            with cur.copy(f"COPY {stage}_ids (id) FROM STDIN") as copy:
+                for local_id in local_ids:
+                    copy.write_row((local_id,))
+            cur.execute(
+                f"DELETE FROM {schema}.{spec.name} target "
+                f"WHERE NOT EXISTS (SELECT 1 FROM {stage}_ids local WHERE local.id = target.id)"
+            )
+        if replace_children and spec.parked_column:
+            # Uma exclusao local renumera as linhas seguintes; sem estacionar, o merge linha a linha
+            # bate no unique (workbook_id, posicao) enquanto a vizinha ainda ocupa o numero antigo.
+            cur.execute(
+                f"UPDATE {schema}.{spec.name} SET {spec.parked_column} = -id "
+                f"WHERE id IN (SELECT id FROM {stage})"
+            )
+        cur.execute(build_merge_sql(schema, spec, stage))
+    return copied
+
+
+def copy_sync(
+    sqlite_conn: sqlite3.Connection,
+    pg_conn: psycopg.Connection,
+    schema: str,
+    *,
+    since: str = "",
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> list[TableSyncStats]:
+    if not since:
+        truncate_target(pg_conn, schema)
+    stats: list[TableSyncStats] = []
+    for spec in TABLE_SPECS:
+        started_at = time.perf_counter()
+        copied = copy_table(
+            pg_conn,
+            schema,
+            spec,
+            stream_rows(sqlite_conn, spec, since=since, batch_size=batch_size),
+            replace_children=bool(since),
+            local_ids=stream_ids(sqlite_conn, spec, batch_size=batch_size) if since and spec.prune_missing else None,
+        )
+        stats.append(TableSyncStats(spec.name, copied, time.perf_counter() - started_at))
+    sync_identity_sequences(pg_conn, schema)
+    return stats
+
+
+def print_throughput(stats: Sequence[TableSyncStats], total_seconds: float, peak_bytes: int) -> None:
+    print(f"{'tabela':>14} {'linhas':>9} {'tempo (s)':>9} {'linhas/s':>10}")
+    for item in stats:
+        rate = item.rows / item.seconds if item.seconds > 0 else 0.0
+        print(f"{item.table:>14} {item.rows:>9} {item.seconds:>9.2f} {rate:>10.0f}")
+    total_rows = sum(item.rows for item in stats)
+    total_rate = total_rows / total_seconds if total_seconds > 0 else 0.0
+    print(f"{'total':>14} {total_rows:>9} {total_seconds:>9.2f} {total_rate:>10.0f}")
+    print(f"Pico de memoria Python: {peak_bytes / (1024 * 1024):.1f} MiB")
+
+
 def sync_identity_sequences(conn: psycopg.Connection, schema: str) -> None:
     with conn.cursor() as cur:
         for table in IDENTITY_TABLES:
@@ -233,12 +602,60 @@ def validate_target_schema(conn: psycopg.Connection, schema: str) -> None:
         )
 
 
+def resolve_required_db_url(explicit_value: str) -> str:
+    db_url = resolve_db_url(explicit_value)
+    if not db_url:
+        raise SystemExit(
+            "Informe a connection string do Supabase via --db-url, .env.supabase ou pela variavel SUPABASE_DB_URL."
+        )
+    return db_url
+
+
+def run_copy_mode(args: argparse.Namespace, sqlite_path: Path) -> int:
+    with open_sqlite(sqlite_path) as sqlite_conn:
+        print(f"SQLite origem: {sqlite_path}")
+        if args.since:
+            require_since_columns(sqlite_conn)
+            print(f"Modo incremental desde {args.since}")
+        print_counts({spec.name: count_rows(sqlite_conn, spec, since=args.since) for spec in TABLE_SPECS})
+        if args.dry_run:
+            print("Dry-run concluido. Nenhum dado foi enviado ao Supabase.")
+            return 0
+
+        db_url = resolve_required_db_url(args.db_url)
+        next_since = datetime.now(timezone.utc).isoformat(timespec="microseconds")
+        tracemalloc.start()
+        started_at = time.perf_counter()
+        try:
+            with psycopg.connect(db_url, autocommit=False) as pg_conn:
+                validate_target_schema(pg_conn, args.schema)
+                stats = copy_sync(
+                    sqlite_conn,
+                    pg_conn,
+                    args.schema,
+                    since=args.since,
+                    batch_size=args.batch_size,
+                )
+                pg_conn.commit()
+            _current, peak_bytes = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+    print_throughput(stats, time.perf_counter() - started_at, peak_bytes)
+    print("Sincronizacao concluida com sucesso no Supabase.")
+    print(f"Para a proxima carga incremental: --copy --since {next_since}")
+    return 0
+
+
 def main() -> int:
     args = parse_args()
     sqlite_path = Path(args.sqlite_path).resolve()
     if not sqlite_path.exists():
         raise SystemExit(f"Banco SQLite nao encontrado: {sqlite_path}")
 
+    if args.copy:
+        return run_copy_mode(args, sqlite_path)
+
     with open_sqlite(sqlite_path) as sqlite_conn:
         dataset = prepare_dataset(sqlite_conn)
 
@@ -248,140 +665,12 @@ def main() -> int:
         print("Dry-run concluido. Nenhum dado foi enviado ao Supabase.")
         return 0
 
-    db_url = resolve_db_url(args.db_url)
-    if not db_url:
-        raise SystemExit(
-            "Informe a connection string do Supabase via --db-url, .env.supabase ou pela variavel SUPABASE_DB_URL."
-        )
-
+    db_url = resolve_required_db_url(args.db_url)
     with psycopg.connect(db_url, autocommit=False) as pg_conn:
         validate_target_schema(pg_conn, args.schema)
         truncate_target(pg_conn, args.schema)
-        insert_many(pg_conn, args.schema, "meta", ("key", "value"), dataset["meta"])
-        insert_many(
-            pg_conn,
-            args.schema,
-            "workbooks",
-            (
-                "id",
-                "workbook_path",
-                "workbook_name",
-                "created_at",
-                "last_loaded_at",
-                "last_synced_at",
-                "record_count",
-                "plantio_count",
-                "source_mtime_ns",
-                "source_size",
-            ),
-            dataset["workbooks"],
-        )
-        insert_many(
-            pg_conn,
-            args.schema,
-            "records",
-            (
-                "id",
-                "workbook_id",
-                "uid",
-                "excel_row",
-                "oficio_processo",
-                "eletronico",
-                "caixa",
-                "av_tec",
-                "compensacao",
-                "endereco",
-                "microbacia",
-                "compensado",
-                "endereco_plantio",
-                "latitude_plantio",
-                "longitude_plantio",
-                "latitude",
-                "longitude",
-                "synced_at",
-                "oficio_year",
-                "tipo_key",
-                "microbacia_key",
-                "search_blob_norm",
-            ),
-            dataset["records"],
-        )
-        insert_many(
-            pg_conn,
-            args.schema,
-            "plantios",
-            ("id", "record_id", "sequence", "endereco", "qtd_mudas", "latitude", "longitude"),
-            dataset["plantios"],
-        )
-        insert_many(
-            pg_conn,
-            args.schema,
-            "audit_events",
-            (
-                "id",
-                "event_id",
-                "workbook_id",
-                "workbook_path",
-                "timestamp",
-                "action",
-                "summary",
-                "backup_path",
-                "metadata_json",
-                "before_json",
-                "after_json",
-                "mirrored_at",
-            ),
-            dataset["audit_events"],
-        )
-        insert_many(
-            pg_conn,
-            args.schema,
-            "tcras",
-            (
-                "uid",
-                "numero_processo",
-                "numero_tcra",
-                "local",
-                "endereco",
-                "bairro",
-                "orgao_acompanhamento",
-                "status",
-                "data_assinatura",
-                "prazo_final",
-                "periodicidade_relatorio_meses",
-                "data_ultimo_relatorio",
-                "data_proximo_relatorio",
-                "area_m2",
-                "numero_mudas_previsto",
-                "servicos_exigidos",
-                "responsavel_execucao",
-                "observacoes",
-                "mpsp_relacionado",
-                "inquerito_civil",
-                "search_blob_norm",
-                "created_at",
-                "updated_at",
-            ),
-            dataset["tcras"],
-        )
-        insert_many(
-            pg_conn,
-            args.schema,
-            "tcra_eventos",
-            (
-                "id",
-                "tcra_uid",
-                "sequence",
-                "data_evento",
-                "tipo_evento",
-                "descricao",
-                "prazo_resultante",
-                "status_resultante",
-                "created_at",
-                "updated_at",
-            ),
-            dataset["tcra_eventos"],
-        )
+        for spec in TABLE_SPECS:
+            insert_many(pg_conn, args.schema, spec.name, spec.columns, dataset[spec.name])
         sync_identity_sequences(pg_conn, args.schema)
         pg_conn.commit()
 
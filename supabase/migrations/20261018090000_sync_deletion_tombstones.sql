@@ -0,0 +1,51 @@
+create table if not exists public.sync_tombstones (
+    id bigint primary key generated by default as identity,
+    table_name text not null,
+    row_key text not null,
+    deleted_at timestamptz not null default timezone('utc', now())
+);
+
+create index if not exists idx_sync_tombstones_deleted_at
+    on public.sync_tombstones (deleted_at);
+
+create index if not exists idx_records_updated_at
+    on public.records (updated_at);
+
+create index if not exists idx_tcras_updated_at
+    on public.tcras (updated_at);
+
+create or replace function app_private.record_sync_tombstone()
+returns trigger
+language plpgsql
+security definer
+set search_path = ''
+as $$
+begin
+    insert into public.sync_tombstones (table_name, row_key)
+    values (tg_table_name, old.uid);
+    return old;
+end;
+$$;
+
+drop trigger if exists trg_records_sync_tombstone on public.records;
+create trigger trg_records_sync_tombstone
+after delete on public.records
+for each row
+execute function app_private.record_sync_tombstone();
+
+drop trigger if exists trg_tcras_sync_tombstone on public.tcras;
+create trigger trg_tcras_sync_tombstone
+after delete on public.tcras
+for each row
+execute function app_private.record_sync_tombstone();
+
+alter table public.sync_tombstones enable row level security;
+
+drop policy if exists sync_tombstones_select_active_users on public.sync_tombstones;
+create policy sync_tombstones_select_active_users
+on public.sync_tombstones
+for select
+to authenticated
+using ((select app_private.is_active_app_user()));
+
+revoke all on function app_private.record_sync_tombstone() from public;
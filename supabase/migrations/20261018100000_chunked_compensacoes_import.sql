@@ -0,0 +1,347 @@
+create table if not exists public.import_sessions (
+    session_id text primary key,
+    workbook_id bigint not null references public.workbooks (id) on delete cascade,
+    created_by uuid not null default auth.uid(),
+    total_chunks integer not null check (total_chunks > 0),
+    total_records integer not null check (total_records >= 0),
+    created_at timestamptz not null default timezone('utc', now())
+);
+
+create index if not exists idx_import_sessions_created_by
+    on public.import_sessions (created_by, created_at);
+
+create table if not exists public.import_session_chunks (
+    session_id text not null references public.import_sessions (session_id) on delete cascade,
+    chunk_index integer not null check (chunk_index >= 0),
+    record_count integer not null check (record_count >= 0),
+    records jsonb not null,
+    received_at timestamptz not null default timezone('utc', now()),
+    primary key (session_id, chunk_index)
+);
+
+alter table public.import_sessions enable row level security;
+alter table public.import_session_chunks enable row level security;
+
+drop policy if exists import_sessions_select_owner on public.import_sessions;
+create policy import_sessions_select_owner
+on public.import_sessions
+for select
+to authenticated
+using (created_by = (select auth.uid()));
+
+drop policy if exists import_sessions_insert_owner on public.import_sessions;
+create policy import_sessions_insert_owner
+on public.import_sessions
+for insert
+to authenticated
+with check (created_by = (select auth.uid()) and (select app_private.can_write_app_data()));
+
+drop policy if exists import_sessions_update_owner on public.import_sessions;
+create policy import_sessions_update_owner
+on public.import_sessions
+for update
+to authenticated
+using (created_by = (select auth.uid()))
+with check (created_by = (select auth.uid()));
+
+drop policy if exists import_sessions_delete_owner on public.import_sessions;
+create policy import_sessions_delete_owner
+on public.import_sessions
+for delete
+to authenticated
+using (created_by = (select auth.uid()));
+
+drop policy if exists import_session_chunks_select_owner on public.import_session_chunks;
+create policy import_session_chunks_select_owner
+on public.import_session_chunks
+for select
+to authenticated
+using (
+    exists (
+        select 1
+        from public.import_sessions
+        where public.import_sessions.session_id = public.import_session_chunks.session_id
+          and public.import_sessions.created_by = (select auth.uid())
+    )
+);
+
+drop policy if exists import_session_chunks_insert_owner on public.import_session_chunks;
+create policy import_session_chunks_insert_owner
+on public.import_session_chunks
+for insert
+to authenticated
+with check (
+    exists (
+        select 1
+        from public.import_sessions
+        where public.import_sessions.session_id = public.import_session_chunks.session_id
+          and public.import_sessions.created_by = (select auth.uid())
+    )
+);
+
+drop policy if exists import_session_chunks_update_owner on public.import_session_chunks;
+create policy import_session_chunks_update_owner
+on public.import_session_chunks
+for update
+to authenticated
+using (
+    exists (
+        select 1
+        from public.import_sessions
+        where public.import_sessions.session_id = public.import_session_chunks.session_id
+          and public.import_sessions.created_by = (select auth.uid())
+    )
+)
+with check (
+    exists (
+        select 1
+        from public.import_sessions
+        where public.import_sessions.session_id = public.import_session_chunks.session_id
+          and public.import_sessions.created_by = (select auth.uid())
+    )
+);
+
+create or replace function public.rpc_begin_compensacoes_import(
+    p_session_id text,
+    p_workbook_path text,
+    p_total_chunks integer,
+    p_total_records integer
+)
+returns jsonb
+language plpgsql
+security invoker
+set search_path = ''
+as $$
+declare
+    v_session_id text := trim(coalesce(p_session_id, ''));
+    v_workbook_id bigint;
+    v_session public.import_sessions%rowtype;
+    v_acked_chunks jsonb;
+begin
+    if not app_private.can_write_app_data() then
+        raise exception 'Usuario autenticado sem permissao de escrita na base oficial.';
+    end if;
+
+    if v_session_id = '' then
+        raise exception 'Informe o identificador da sessao de importacao.';
+    end if;
+
+    select public.workbooks.id
+    into v_workbook_id
+    from public.workbooks
+    where public.workbooks.workbook_path = trim(coalesce(p_workbook_path, ''))
+    limit 1;
+
+    if v_workbook_id is null then
+        raise exception 'Workbook remoto nao encontrado para %.', p_workbook_path;
+    end if;
+
+    -- Sessoes abandonadas do proprio usuario nao seguram lotes para sempre.
+    delete from public.import_sessions
+    where public.import_sessions.created_by = auth.uid()
+      and public.import_sessions.created_at < timezone('utc', now()) - interval '1 day'
+      and public.import_sessions.session_id <> v_session_id;
+
+    insert into public.import_sessions (session_id, workbook_id, total_chunks, total_records)
+    values (v_session_id, v_workbook_id, p_total_chunks, p_total_records)
+    on conflict (session_id) do nothing;
+
+    select *
+    into v_session
+    from public.import_sessions
+    where public.import_sessions.session_id = v_session_id;
+
+    if not found then
+        raise exception 'Sessao de importacao % indisponivel para este usuario.', v_session_id;
+    end if;
+
+    if v_session.workbook_id <> v_workbook_id
+       or v_session.total_chunks <> p_total_chunks
+       or v_session.total_records <> p_total_records
+    then
+        raise exception 'compensacoes_import_session_mismatch: a sessao % foi aberta para outro lote.', v_session_id;
+    end if;
+
+    select coalesce(
+        jsonb_agg(public.import_session_chunks.chunk_index order by public.import_session_chunks.chunk_index),
+        '[]'::jsonb
+    )
+    into v_acked_chunks
+    from public.import_session_chunks
+    where public.import_session_chunks.session_id = v_session_id;
+
+    return jsonb_build_object(
+        'session_id', v_session_id,
+        'total_chunks', v_session.total_chunks,
+        'total_records', v_session.total_records,
+        'acked_chunks', v_acked_chunks
+    );
+end;
+$$;
+
+create or replace function public.rpc_stage_compensacoes_import_chunk(
+    p_session_id text,
+    p_chunk_index integer,
+    p_records jsonb
+)
+returns jsonb
+language plpgsql
+security invoker
+set search_path = ''
+as $$
+declare
+    v_session_id text := trim(coalesce(p_session_id, ''));
+    v_total_chunks integer;
+    v_record_count integer;
+begin
+    if not app_private.can_write_app_data() then
+        raise exception 'Usuario autenticado sem permissao de escrita na base oficial.';
+    end if;
+
+    select public.import_sessions.total_chunks
+    into v_total_chunks
+    from public.import_sessions
+    where public.import_sessions.session_id = v_session_id;
+
+    if v_total_chunks is null then
+        raise exception 'Sessao de importacao % nao encontrada.', v_session_id;
+    end if;
+
+    if p_chunk_index is null or p_chunk_index < 0 or p_chunk_index >= v_total_chunks then
+        raise exception 'Lote % fora do intervalo da sessao de importacao %.', p_chunk_index, v_session_id;
+    end if;
+
+    if jsonb_typeof(coalesce(p_records, '[]'::jsonb)) <> 'array' then
+        raise exception 'O lote de importacao precisa ser uma lista JSON de registros.';
+    end if;
+
+    v_record_count := jsonb_array_length(coalesce(p_records, '[]'::jsonb));
+
+    insert into public.import_session_chunks (session_id, chunk_index, record_count, records)
+    values (v_session_id, p_chunk_index, v_record_count, coalesce(p_records, '[]'::jsonb))
+    on conflict (session_id, chunk_index) do update
+    set
+        record_count = excluded.record_count,
+        records = excluded.records,
+        received_at = excluded.received_at;
+
+    return jsonb_build_object(
+        'session_id', v_session_id,
+        'chunk_index', p_chunk_index,
+        'record_count', v_record_count
+    );
+end;
+$$;
+
+create or replace function public.rpc_commit_compensacoes_import(
+    p_session_id text,
+    p_action text default 'IMPORT',
+    p_summary text default '',
+    p_backup_path text default '',
+    p_metadata jsonb default '{}'::jsonb,
+    p_before jsonb default null,
+    p_after jsonb default null
+)
+returns jsonb
+language plpgsql
+security invoker
+set search_path = ''
+as $$
+declare
+    v_session public.import_sessions%rowtype;
+    v_staged_chunks integer;
+    v_staged_records integer;
+    v_workbook_record_count integer;
+    v_workbook_plantio_count integer;
+    v_workbook_path text;
+    v_audit_event_id text;
+    v_imported_count integer := 0;
+    v_item jsonb;
+begin
+    if not app_private.can_write_app_data() then
+        raise exception 'Usuario autenticado sem permissao de escrita na base oficial.';
+    end if;
+
+    select *
+    into v_session
+    from public.import_sessions
+    where public.import_sessions.session_id = trim(coalesce(p_session_id, ''))
+    for update;
+
+    if not found then
+        raise exception 'Sessao de importacao % nao encontrada.', p_session_id;
+    end if;
+
+    select count(*), coalesce(sum(public.import_session_chunks.record_count), 0)
+    into v_staged_chunks, v_staged_records
+    from public.import_session_chunks
+    where public.import_session_chunks.session_id = v_session.session_id;
+
+    if v_staged_chunks <> v_session.total_chunks or v_staged_records <> v_session.total_records then
+        raise exception 'compensacoes_import_incomplete: a sessao % recebeu %/% lote(s) e %/% registro(s).',
+            v_session.session_id,
+            v_staged_chunks,
+            v_session.total_chunks,
+            v_staged_records,
+            v_session.total_records;
+    end if;
+
+    -- A troca acontece inteira nesta transacao: ou a base passa a ser o lote, ou nada muda.
+    delete from public.records
+    where public.records.workbook_id = v_session.workbook_id;
+
+    for v_item in
+        select staged.value
+        from public.import_session_chunks
+        cross join lateral jsonb_array_elements(public.import_session_chunks.records)
+            with ordinality as staged(value, position)
+        where public.import_session_chunks.session_id = v_session.session_id
+        order by public.import_session_chunks.chunk_index, staged.position
+    loop
+        perform *
+        from app_private.upsert_compensacao_record(v_session.workbook_id, v_item);
+        v_imported_count := v_imported_count + 1;
+    end loop;
+
+    select workbook_path, record_count, plantio_count
+    into v_workbook_path, v_workbook_record_count, v_workbook_plantio_count
+    from app_private.refresh_workbook_counters(v_session.workbook_id);
+
+    v_audit_event_id := app_private.append_audit_event(
+        v_session.workbook_id,
+        v_workbook_path,
+        p_action,
+        p_summary,
+        p_backup_path,
+        coalesce(p_metadata, '{}'::jsonb),
+        p_before,
+        p_after
+    );
+
+    delete from public.import_sessions
+    where public.import_sessions.session_id = v_session.session_id;
+
+    return jsonb_build_object(
+        'workbook_path', v_workbook_path,
+        'uid', '',
+        'record_id', 0,
+        'excel_row', 0,
+        'record_count', v_workbook_record_count,
+        'plantio_count', v_workbook_plantio_count,
+        'imported_count', v_imported_count,
+        'audit_event_id', v_audit_event_id
+    );
+end;
+$$;
+
+revoke all on function public.rpc_begin_compensacoes_import(text, text, integer, integer) from public;
+revoke all on function public.rpc_stage_compensacoes_import_chunk(text, integer, jsonb) from public;
+revoke all on function public.rpc_commit_compensacoes_import(text, text, text, text, jsonb, jsonb, jsonb) from public;
+
+revoke all on function public.rpc_begin_compensacoes_import(text, text, integer, integer) from anon;
+revoke all on function public.rpc_stage_compensacoes_import_chunk(text, integer, jsonb) from anon;
+revoke all on function public.rpc_commit_compensacoes_import(text, text, text, text, jsonb, jsonb, jsonb) from anon;
+
+grant execute on function public.rpc_begin_compensacoes_import(text, text, integer, integer) to authenticated;
+grant execute on function public.rpc_stage_compensacoes_import_chunk(text, integer, jsonb) to authenticated;
+grant execute on function public.rpc_commit_compensacoes_import(text, text, text, text, jsonb, jsonb, jsonb) to authenticated;
@@ -0,0 +1,52 @@
+alter table public.sync_tombstones
+    add column if not exists workbook_id bigint references public.workbooks(id) on delete cascade;
+
+-- Registros sao unicos por (workbook_id, lower(uid)); a marca usa a mesma chave.
+-- TCRAs nao pertencem a workbook e seguem com o uid como esta.
+update public.sync_tombstones
+set row_key = lower(row_key)
+where table_name = 'records'
+  and row_key <> lower(row_key);
+
+delete from public.sync_tombstones older
+using public.sync_tombstones newer
+where older.table_name = newer.table_name
+  and coalesce(older.workbook_id, 0) = coalesce(newer.workbook_id, 0)
+  and older.row_key = newer.row_key
+  and older.id < newer.id;
+
+create unique index if not exists uq_sync_tombstones_table_workbook_key
+    on public.sync_tombstones (table_name, (coalesce(workbook_id, 0)), row_key);
+
+create index if not exists idx_sync_tombstones_workbook_id
+    on public.sync_tombstones (workbook_id, id);
+
+create or replace function app_private.record_sync_tombstone()
+returns trigger
+language plpgsql
+security definer
+set search_path = ''
+as $$
+declare
+    v_workbook_id bigint;
+    v_row_key text;
+begin
+    if tg_table_name = 'records' then
+        v_workbook_id := old.workbook_id;
+        v_row_key := lower(old.uid);
+    else
+        v_workbook_id := null;
+        v_row_key := old.uid;
+    end if;
+
+    -- Excluir de novo a mesma chave renova o id, para passar da marca dos clientes.
+    insert into public.sync_tombstones (table_name, workbook_id, row_key)
+    values (tg_table_name, v_workbook_id, v_row_key)
+    on conflict (table_name, (coalesce(workbook_id, 0)), row_key) do update
+    set id = nextval(pg_get_serial_sequence('public.sync_tombstones', 'id')),
+        deleted_at = timezone('utc', now());
+    return old;
+end;
+$$;
+
+revoke all on function app_private.record_sync_tombstone() from public;
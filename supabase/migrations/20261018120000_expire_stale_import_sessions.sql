@@ -0,0 +1,198 @@
+-- A expiracao conta a partir do ultimo lote recebido, nao da abertura da sessao:
+-- uma importacao longa que segue mandando lotes nao perde o que ja subiu.
+alter table public.import_sessions
+    add column if not exists last_activity_at timestamptz not null default timezone('utc', now());
+
+update public.import_sessions
+set last_activity_at = coalesce(
+    (
+        select max(public.import_session_chunks.received_at)
+        from public.import_session_chunks
+        where public.import_session_chunks.session_id = public.import_sessions.session_id
+    ),
+    public.import_sessions.created_at
+);
+
+create index if not exists idx_import_sessions_last_activity_at
+    on public.import_sessions (last_activity_at);
+
+create or replace function app_private.expire_stale_import_sessions(p_max_idle interval default interval '1 day')
+returns integer
+language plpgsql
+security definer
+set search_path = ''
+as $$
+declare
+    v_expired integer;
+begin
+    -- Roda como dono da tabela: sessoes abandonadas de outros usuarios tambem saem.
+    delete from public.import_sessions
+    where public.import_sessions.last_activity_at < timezone('utc', now()) - p_max_idle;
+
+    get diagnostics v_expired = row_count;
+    return v_expired;
+end;
+$$;
+
+revoke all on function app_private.expire_stale_import_sessions(interval) from public;
+revoke all on function app_private.expire_stale_import_sessions(interval) from anon;
+grant execute on function app_private.expire_stale_import_sessions(interval) to authenticated;
+
+create or replace function public.rpc_begin_compensacoes_import(
+    p_session_id text,
+    p_workbook_path text,
+    p_total_chunks integer,
+    p_total_records integer
+)
+returns jsonb
+language plpgsql
+security invoker
+set search_path = ''
+as $$
+declare
+    v_session_id text := trim(coalesce(p_session_id, ''));
+    v_workbook_id bigint;
+    v_session public.import_sessions%rowtype;
+    v_acked_chunks jsonb;
+begin
+    if not app_private.can_write_app_data() then
+        raise exception 'Usuario autenticado sem permissao de escrita na base oficial.';
+    end if;
+
+    if v_session_id = '' then
+        raise exception 'Informe o identificador da sessao de importacao.';
+    end if;
+
+    select public.workbooks.id
+    into v_workbook_id
+    from public.workbooks
+    where public.workbooks.workbook_path = trim(coalesce(p_workbook_path, ''))
+    limit 1;
+
+    if v_workbook_id is null then
+        raise exception 'Workbook remoto nao encontrado para %.', p_workbook_path;
+    end if;
+
+    -- Sessoes paradas de qualquer usuario expiram aqui e no agendamento diario.
+    perform app_private.expire_stale_import_sessions();
+
+    insert into public.import_sessions (session_id, workbook_id, total_chunks, total_records)
+    values (v_session_id, v_workbook_id, p_total_chunks, p_total_records)
+    on conflict (session_id) do nothing;
+
+    update public.import_sessions
+    set last_activity_at = timezone('utc', now())
+    where public.import_sessions.session_id = v_session_id;
+
+    select *
+    into v_session
+    from public.import_sessions
+    where public.import_sessions.session_id = v_session_id;
+
+    if not found then
+        raise exception 'Sessao de importacao % indisponivel para este usuario.', v_session_id;
+    end if;
+
+    if v_session.workbook_id <> v_workbook_id
+       or v_session.total_chunks <> p_total_chunks
+       or v_session.total_records <> p_total_records
+    then
+        raise exception 'compensacoes_import_session_mismatch: a sessao % foi aberta para outro lote.', v_session_id;
+    end if;
+
+    select coalesce(
+        jsonb_agg(public.import_session_chunks.chunk_index order by public.import_session_chunks.chunk_index),
+        '[]'::jsonb
+    )
+    into v_acked_chunks
+    from public.import_session_chunks
+    where public.import_session_chunks.session_id = v_session_id;
+
+    return jsonb_build_object(
+        'session_id', v_session_id,
+        'total_chunks', v_session.total_chunks,
+        'total_records', v_session.total_records,
+        'acked_chunks', v_acked_chunks
+    );
+end;
+$$;
+
+create or replace function public.rpc_stage_compensacoes_import_chunk(
+    p_session_id text,
+    p_chunk_index integer,
+    p_records jsonb
+)
+returns jsonb
+language plpgsql
+security invoker
+set search_path = ''
+as $$
+declare
+    v_session_id text := trim(coalesce(p_session_id, ''));
+    v_total_chunks integer;
+    v_record_count integer;
+begin
+    if not app_private.can_write_app_data() then
+        raise exception 'Usuario autenticado sem permissao de escrita na base oficial.';
+    end if;
+
+    select public.import_sessions.total_chunks
+    into v_total_chunks
+    from public.import_sessions
+    where public.import_sessions.session_id = v_session_id;
+
+    if v_total_chunks is null then
+        raise exception 'Sessao de importacao % nao encontrada.', v_session_id;
+    end if;
+
+    if p_chunk_index is null or p_chunk_index < 0 or p_chunk_index >= v_total_chunks then
+        raise exception 'Lote % fora do intervalo da sessao de importacao %.', p_chunk_index, v_session_id;
+    end if;
+
+    if jsonb_typeof(coalesce(p_records, '[]'::jsonb)) <> 'array' then
+        raise exception 'O lote de importacao precisa ser uma lista JSON de registros.';
+    end if;
+
+    v_record_count := jsonb_array_length(coalesce(p_records, '[]'::jsonb));
+
+    insert into public.import_session_chunks (session_id, chunk_index, record_count, records)
+    values (v_session_id, p_chunk_index, v_record_count, coalesce(p_records, '[]'::jsonb))
+    on conflict (session_id, chunk_index) do update
+    set
+        record_count = excluded.record_count,
+        records = excluded.records,
+        received_at = excluded.received_at;
+
+    update public.import_sessions
+    set last_activity_at = timezone('utc', now())
+    where public.import_sessions.session_id = v_session_id;
+
+    return jsonb_build_object(
+        'session_id', v_session_id,
+        'chunk_index', p_chunk_index,
+        'record_count', v_record_count
+    );
+end;
+$$;
+
+revoke all on function public.rpc_begin_compensacoes_import(text, text, integer, integer) from public;
+revoke all on function public.rpc_stage_compensacoes_import_chunk(text, integer, jsonb) from public;
+
+revoke all on function public.rpc_begin_compensacoes_import(text, text, integer, integer) from anon;
+revoke all on function public.rpc_stage_compensacoes_import_chunk(text, integer, jsonb) from anon;
+
+grant execute on function public.rpc_begin_compensacoes_import(text, text, integer, integer) to authenticated;
+grant execute on function public.rpc_stage_compensacoes_import_chunk(text, integer, jsonb) to authenticated;
+
+-- Sem novas importacoes a limpeza no begin nao roda; o pg_cron cobre esse caso quando existe.
+do $$
+begin
+    if exists (select 1 from pg_extension where extname = 'pg_cron') then
+        perform cron.schedule(
+            'expire-stale-import-sessions',
+            '17 3 * * *',
+            'select app_private.expire_stale_import_sessions()'
+        );
+    end if;
+end;
+$$;
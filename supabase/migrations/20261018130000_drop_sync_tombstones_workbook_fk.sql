@@ -0,0 +1,7 @@
+-- A marca de exclusao e gravada pelo trigger de records, inclusive quando a
+-- exclusao vem do cascade de um workbook removido. Com a FK para workbooks o
+-- insert da marca violava a chave e desfazia a exclusao do workbook inteiro.
+-- workbook_id fica como bigint simples: as marcas de um workbook removido
+-- continuam avisando os clientes que ainda espelham aqueles registros.
+alter table public.sync_tombstones
+    drop constraint if exists sync_tombstones_workbook_id_fkey;
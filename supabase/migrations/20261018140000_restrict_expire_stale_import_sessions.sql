@@ -0,0 +1,131 @@
+-- A expiracao roda como dono da tabela e apaga sessoes de qualquer usuario; com o
+-- intervalo vindo de quem chamava e o grant para authenticated, qualquer usuario
+-- podia apagar as importacoes em andamento dos outros. O intervalo passa a ser fixo
+-- e so o trigger do begin e o pg_cron chamam a funcao.
+drop function if exists app_private.expire_stale_import_sessions(interval);
+
+create or replace function app_private.expire_stale_import_sessions()
+returns integer
+language plpgsql
+security definer
+set search_path = ''
+as $$
+declare
+    v_expired integer;
+begin
+    delete from public.import_sessions
+    where public.import_sessions.last_activity_at < timezone('utc', now()) - interval '1 day';
+
+    get diagnostics v_expired = row_count;
+    return v_expired;
+end;
+$$;
+
+revoke all on function app_private.expire_stale_import_sessions() from public;
+revoke all on function app_private.expire_stale_import_sessions() from anon;
+revoke all on function app_private.expire_stale_import_sessions() from authenticated;
+
+-- O begin roda como o usuario, que nao tem mais EXECUTE na expiracao; o trigger
+-- dispara a limpeza sem exigir o privilegio de quem insere a sessao.
+create or replace function app_private.expire_stale_import_sessions_on_begin()
+returns trigger
+language plpgsql
+security definer
+set search_path = ''
+as $$
+begin
+    perform app_private.expire_stale_import_sessions();
+    return null;
+end;
+$$;
+
+revoke all on function app_private.expire_stale_import_sessions_on_begin() from public;
+revoke all on function app_private.expire_stale_import_sessions_on_begin() from anon;
+revoke all on function app_private.expire_stale_import_sessions_on_begin() from authenticated;
+
+drop trigger if exists trg_import_sessions_expire_stale on public.import_sessions;
+create trigger trg_import_sessions_expire_stale
+before insert on public.import_sessions
+for each statement
+execute function app_private.expire_stale_import_sessions_on_begin();
+
+create or replace function public.rpc_begin_compensacoes_import(
+    p_session_id text,
+    p_workbook_path text,
+    p_total_chunks integer,
+    p_total_records integer
+)
+returns jsonb
+language plpgsql
+security invoker
+set search_path = ''
+as $$
+declare
+    v_session_id text := trim(coalesce(p_session_id, ''));
+    v_workbook_id bigint;
+    v_session public.import_sessions%rowtype;
+    v_acked_chunks jsonb;
+begin
+    if not app_private.can_write_app_data() then
+        raise exception 'Usuario autenticado sem permissao de escrita na base oficial.';
+    end if;
+
+    if v_session_id = '' then
+        raise exception 'Informe o identificador da sessao de importacao.';
+    end if;
+
+    select public.workbooks.id
+    into v_workbook_id
+    from public.workbooks
+    where public.workbooks.workbook_path = trim(coalesce(p_workbook_path, ''))
+    limit 1;
+
+    if v_workbook_id is null then
+        raise exception 'Workbook remoto nao encontrado para %.', p_workbook_path;
+    end if;
+
+    -- O trigger trg_import_sessions_expire_stale expira as sessoes paradas antes deste insert.
+    insert into public.import_sessions (session_id, workbook_id, total_chunks, total_records)
+    values (v_session_id, v_workbook_id, p_total_chunks, p_total_records)
+    on conflict (session_id) do nothing;
+
+    update public.import_sessions
+    set last_activity_at = timezone('utc', now())
+    where public.import_sessions.session_id = v_session_id;
+
+    select *
+    into v_session
+    from public.import_sessions
+    where public.import_sessions.session_id = v_session_id;
+
+    if not found then
+        raise exception 'Sessao de importacao % indisponivel para este usuario.', v_session_id;
+    end if;
+
+    if v_session.workbook_id <> v_workbook_id
+       or v_session.total_chunks <> p_total_chunks
+       or v_session.total_records <> p_total_records
+    then
+        raise exception 'compensacoes_import_session_mismatch: a sessao % foi aberta para outro lote.', v_session_id;
+    end if;
+
+    select coalesce(
+        jsonb_agg(public.import_session_chunks.chunk_index order by public.import_session_chunks.chunk_index),
+        '[]'::jsonb
+    )
+    into v_acked_chunks
+    from public.import_session_chunks
+    where public.import_session_chunks.session_id = v_session_id;
+
+    return jsonb_build_object(
+        'session_id', v_session_id,
+        'total_chunks', v_session.total_chunks,
+        'total_records', v_session.total_records,
+        'acked_chunks', v_acked_chunks
+    );
+end;
+$$;
+
+revoke all on function public.rpc_begin_compensacoes_import(text, text, integer, integer) from public;
+revoke all on function public.rpc_begin_compensacoes_import(text, text, integer, integer) from anon;
+grant execute on function public.rpc_begin_compensacoes_import(text, text, integer, integer) to authenticated;
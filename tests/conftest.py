@@ -125,6 +125,30 @@ def ui_window_factory(ui_test_env):
     return factory
 
 
+@pytest.fixture(autouse=True)
+def isolated_geocode_cache(monkeypatch, tmp_path):
+    # O cache global apontaria para data/ do repositorio; cada teste usa um banco temporario.
+    from app.services.geocode_cache import geocode_cache
+
+    geocode_cache.close()
+    monkeypatch.setattr(geocode_cache, "cache_file", str(tmp_path / "geocode_cache.db"))
+    monkeypatch.setattr(geocode_cache, "legacy_json_file", None)
+    yield geocode_cache
+    geocode_cache.close()
+
+
+@pytest.fixture(autouse=True, scope="session")
+def isolated_gis_cache(tmp_path_factory):
+    # Camada e dataset binario das microbacias vao para uma pasta temporaria; o escopo
+    # de sessao cobre o carregamento em segundo plano que termina depois do teste.
+    import app.services.gis_layer_cache as gis_layer_cache
+
+    cache_dir = tmp_path_factory.mktemp("gis_cache")
+    with pytest.MonkeyPatch.context() as patcher:
+        patcher.setattr(gis_layer_cache, "LAYER_CACHE_DIR", cache_dir)
+        yield cache_dir
+
+
 @pytest.fixture(autouse=True)
 def cleanup_qt_widgets():
     app = QApplication.instance()
@@ -1,5 +1,7 @@
 from types import SimpleNamespace
 
+import pytest
+
 from app.application.use_cases.authoritative_persistence import (
     AuthoritativePersistenceUseCases,
     AuthoritativeSessionLoadResult,
@@ -12,6 +14,7 @@ from app.application.use_cases.local_mutation_sync import (
 from app.application.use_cases.workbook_session import ImportWorkbookAnalysis
 from app.models.compensacao import Compensacao
 from app.services.access_service import AccessEnvironment, AppAccessSession
+from app.services.supabase_compensacoes_rpc_service import SupabaseCompensacoesConflictError
 
 
 def make_record(**overrides) -> Compensacao:
@@ -169,6 +172,34 @@ class FakeSnapshotPersistence:
         )
 
 
+class FakeIncrementalPersistence(FakeSnapshotPersistence):
+    def __init__(self, *, snapshot_records=None, plantio_count: int = 0, fail_apply: bool = False):
+        super().__init__(snapshot_records=snapshot_records, synced_at="2026-03-31T12:00:00+00:00")
+        self.plantio_count = plantio_count
+        self.fail_apply = fail_apply
+        self.apply_calls = []
+        self.mirrored_events = []
+
+    def apply_workbook_changes(self, workbook_path, upserts, deleted_uids=()):
+        self.apply_calls.append(
+            {"workbook_path": workbook_path, "upserts": list(upserts), "deleted": list(deleted_uids)}
+        )
+        if self.fail_apply:
+            raise RuntimeError("sqlite busy")
+        touched = {record.uid for record in upserts} | set(deleted_uids)
+        self.snapshot_records = [record for record in self.snapshot_records if record.uid not in touched]
+        self.snapshot_records.extend(upserts)
+        return SimpleNamespace(
+            workbook_path=workbook_path,
+            synced_at="2026-04-09T12:05:01+00:00",
+            record_count=len(self.snapshot_records),
+            plantio_count=self.plantio_count,
+        )
+
+    def mirror_audit_event(self, **payload):
+        self.mirrored_events.append(payload)
+
+
 class FakeMonitoringPersistence:
     def get_workbook_snapshot_summary(self, workbook_path):
         return SimpleNamespace(
@@ -718,3 +749,105 @@ def test_execute_delete_passes_expected_updated_at_in_production():
     assert remote_rpc.delete_calls[0]["expected_updated_at"] == "2026-04-09T12:00:00+00:00"
     assert result.write_status.status == "remote_authoritative"
     assert result.status.strategy == "remote_snapshot_refresh"
+
+
+def _build_remote_service(persistence, remote_rpc, remote_sync):
+    workbook = FakeWorkbook()
+    workbook.path = "session://banco-local"
+    service = AuthoritativePersistenceUseCases(
+        workbook,
+        FakeAuditTrail(),
+        persistence,
+        loader_factory=lambda: workbook,
+        access_service=FakeAccessService(sync_service=remote_sync),
+        remote_compensacoes_service=remote_rpc,
+    )
+    service.access_session = make_production_session()
+    return service
+
+
+def test_execute_edit_applies_remote_result_without_full_resync():
+    existing = make_record(uid="base-uid", excel_row=8, av_tec="AT-BASE", updated_at="2026-04-09T12:00:00+00:00")
+    updated = make_record(uid="base-uid", excel_row=8, av_tec="AT-EDIT", updated_at="2026-04-09T12:00:00+00:00")
+    persistence = FakeIncrementalPersistence(snapshot_records=[existing])
+    remote_sync = FakeRemoteSyncService(persistence, synced_records=[updated])
+    remote_rpc = FakeRemoteCompensacoesRpcService(
+        save_result=SimpleNamespace(
+            uid="base-uid",
+            excel_row=8,
+            updated_at="2026-04-09T12:05:00+00:00",
+            record_count=1,
+            plantio_count=0,
+            audit_event_id="evt-remote-1",
+        )
+    )
+    service = _build_remote_service(persistence, remote_rpc, remote_sync)
+
+    result = service.execute_edit(updated, authoritative_records=[existing], before_record=existing)
+
+    assert remote_sync.calls == []
+    assert result.status.strategy == "remote_result_apply"
+    assert result.write_status.status == "remote_authoritative"
+    assert persistence.apply_calls[0]["upserts"][0].updated_at == "2026-04-09T12:05:00+00:00"
+    assert persistence.apply_calls[0]["deleted"] == []
+    assert [record.av_tec for record in result.records] == ["AT-EDIT"]
+    assert persistence.mirrored_events[0]["event_id"] == "evt-remote-1"
+    assert persistence.mirrored_events[0]["action"] == "edit"
+    assert persistence.mirrored_events[0]["before"]["av_tec"] == "AT-BASE"
+    assert remote_rpc.save_calls[0]["summary"] == persistence.mirrored_events[0]["summary"]
+
+
+def test_execute_delete_applies_remote_result_without_shifting_rows():
+    deleted = make_record(uid="base-uid", excel_row=8, av_tec="AT-BASE")
+    following = make_record(uid="next-uid", excel_row=9, av_tec="AT-NEXT")
+    persistence = FakeIncrementalPersistence(snapshot_records=[deleted, following])
+    remote_sync = FakeRemoteSyncService(persistence, synced_records=[following])
+    remote_rpc = FakeRemoteCompensacoesRpcService(
+        delete_result=SimpleNamespace(uid="base-uid", record_count=1, plantio_count=0, audit_event_id="evt-del")
+    )
+    service = _build_remote_service(persistence, remote_rpc, remote_sync)
+
+    result = service.execute_delete(deleted, authoritative_records=[deleted, following])
+
+    assert remote_sync.calls == []
+    assert persistence.apply_calls[0]["deleted"] == ["base-uid"]
+    assert [(record.uid, record.excel_row) for record in result.records] == [("next-uid", 9)]
+    assert persistence.mirrored_events[0]["action"] == "delete"
+
+
+def test_execute_add_resyncs_when_remote_counts_diverge_from_local_mirror():
+    existing = make_record(uid="base-uid", excel_row=8, av_tec="AT-BASE")
+    remote_added = make_record(uid="remote-uid", excel_row=9, av_tec="AT-NOVO")
+    other_station = make_record(uid="other-uid", excel_row=10, av_tec="AT-OUTRO")
+    persistence = FakeIncrementalPersistence(snapshot_records=[existing])
+    remote_sync = FakeRemoteSyncService(persistence, synced_records=[existing, remote_added, other_station])
+    remote_rpc = FakeRemoteCompensacoesRpcService(
+        save_result=SimpleNamespace(uid="remote-uid", excel_row=9, record_count=3, plantio_count=0)
+    )
+    service = _build_remote_service(persistence, remote_rpc, remote_sync)
+
+    result = service.execute_add(make_record(uid="", excel_row=0, av_tec="AT-NOVO"), authoritative_records=[existing])
+
+    assert len(persistence.apply_calls) == 1
+    assert len(remote_sync.calls) == 1
+    assert result.status.strategy == "remote_snapshot_refresh"
+    assert [record.uid for record in result.records] == ["base-uid", "remote-uid", "other-uid"]
+
+
+def test_execute_edit_refreshes_cache_and_reraises_on_remote_conflict():
+    existing = make_record(uid="base-uid", excel_row=8, av_tec="AT-BASE", updated_at="2026-04-09T12:00:00+00:00")
+    persistence = FakeIncrementalPersistence(snapshot_records=[existing])
+    remote_sync = FakeRemoteSyncService(persistence, synced_records=[existing])
+    remote_rpc = FakeRemoteCompensacoesRpcService()
+
+    def conflicting_save(client, **kwargs):
+        raise SupabaseCompensacoesConflictError("registro remoto alterado")
+
+    remote_rpc.save_record = conflicting_save
+    service = _build_remote_service(persistence, remote_rpc, remote_sync)
+
+    with pytest.raises(SupabaseCompensacoesConflictError):
+        service.execute_edit(existing, authoritative_records=[existing], before_record=existing)
+
+    assert len(remote_sync.calls) == 1
+    assert persistence.apply_calls == []
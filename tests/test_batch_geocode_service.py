@@ -0,0 +1,148 @@
+import threading
+
+import pytest
+
+from app.models.compensacao import Compensacao
+from app.models.plantio_item import PlantioItem
+from app.services.batch_geocode_service import (
+    BatchGeocodeCancelled,
+    BatchGeocodeEngine,
+    RateLimitedRequester,
+    TokenBucket,
+    assemble_batch_geocode_results,
+    plan_batch_geocode,
+    provider_for_url,
+)
+from app.services.geocode_service import ARCGIS_GEOCODE_URL, NOMINATIM_SEARCH_URL
+
+
+class FakeResponse:
+    def __init__(self, status_code=200, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+def make_record(**overrides) -> Compensacao:
+    base = {
+        "excel_row": 2,
+        "oficio_processo": "123/2026",
+        "eletronico": "SIM",
+        "caixa": "CX-1",
+        "av_tec": "AT-1",
+        "compensacao": "10",
+        "endereco": "Rua A",
+        "microbacia": "",
+        "compensado": "",
+        "uid": "uid-1",
+    }
+    base.update(overrides)
+    return Compensacao(**base)
+
+
+def test_token_bucket_reserves_slots_in_request_order():
+    sleeps = []
+    bucket = TokenBucket(2.0, clock=lambda: 100.0, sleeper=sleeps.append)
+
+    waits = [bucket.acquire() for _ in range(3)]
+
+    assert waits == [0.0, 0.5, 1.0]
+    assert sleeps == [0.5, 1.0]
+
+
+def test_rate_limited_requester_retries_throttled_responses_per_provider():
+    sleeps = []
+    acquired = []
+    responses = iter([FakeResponse(429, {"Retry-After": "3"}), FakeResponse(503), FakeResponse(200)])
+    calls = []
+
+    class CountingBucket:
+        def acquire(self):
+            acquired.append("nominatim")
+            return 0.0
+
+    requester = RateLimitedRequester(
+        lambda url, **kwargs: calls.append(url) or next(responses),
+        limiters={"nominatim": CountingBucket()},
+        max_retries=2,
+        backoff_seconds=0.5,
+        sleeper=sleeps.append,
+    )
+
+    response = requester(NOMINATIM_SEARCH_URL, params={"q": "Rua A"})
+
+    assert response.status_code == 200
+    assert len(calls) == 3
+    assert acquired == ["nominatim"] * 3
+    assert sleeps == [3.0, 1.0]
+    assert provider_for_url(ARCGIS_GEOCODE_URL) == "arcgis"
+    assert provider_for_url("https://maps.google.com/x") == ""
+
+
+def test_rate_limited_requester_gives_up_after_retries_and_honours_cancel():
+    cancel = threading.Event()
+
+    def failing(url, **kwargs):
+        raise ConnectionError("offline")
+
+    requester = RateLimitedRequester(failing, limiters={}, max_retries=1, sleeper=lambda _s: None, cancel_event=cancel)
+
+    with pytest.raises(ConnectionError):
+        requester(ARCGIS_GEOCODE_URL)
+    cancel.set()
+    with pytest.raises(BatchGeocodeCancelled):
+        requester(ARCGIS_GEOCODE_URL)
+
+
+def test_engine_geocodes_each_distinct_address_once_and_streams_progress():
+    calls = []
+    lock = threading.Lock()
+
+    def geocoder(address, **kwargs):
+        with lock:
+            calls.append(address)
+        return None if "Sem" in address else (-22.0, -47.9)
+
+    engine = BatchGeocodeEngine(geocoder=geocoder, limiters={}, max_workers=3)
+    progress = []
+
+    outcome = engine.geocode_many(
+        ["Rua A, 10", "R. A, 10", "rua a, 10 ", "Avenida B", "Sem Numero", ""],
+        on_progress=progress.append,
+    )
+
+    assert sorted(calls) == ["Avenida B", "Rua A, 10", "Sem Numero"]
+    assert outcome.cancelled is False
+    assert outcome.coords_for("R. A, 10") == (-22.0, -47.9)
+    assert outcome.coords_for("Sem Numero") is None
+    assert [item.completed for item in progress] == [1, 2, 3]
+    assert {item.total for item in progress} == {3}
+
+
+def test_plan_and_assemble_keep_the_worker_result_shape():
+    records = [
+        make_record(
+            excel_row=2,
+            endereco="Rua A",
+            plantios=[
+                PlantioItem(sequence=1, endereco="Praca 1"),
+                PlantioItem(sequence=2, endereco="Praca 2", latitude="-22.1", longitude="-47.1"),
+            ],
+        ),
+        make_record(excel_row=3, endereco="Rua B", latitude="-22.2", longitude="-47.2"),
+        make_record(excel_row=4, endereco="Rua A", microbacia="Gregorio"),
+        make_record(excel_row=5, endereco="", plantios=[PlantioItem(sequence=1, endereco="Sem Retorno")]),
+    ]
+    plan = plan_batch_geocode(records)
+    engine = BatchGeocodeEngine(
+        geocoder=lambda address, **kwargs: None if address == "Sem Retorno" else (-22.5, -47.5),
+        limiters={},
+    )
+
+    results = assemble_batch_geocode_results(plan, engine.geocode_many(plan.addresses))
+
+    assert plan.addresses == ["Rua A", "Praca 1", "Rua A", "Sem Retorno"]
+    assert results == {
+        2: {"main": (-22.5, -47.5), "plantios": {1: (-22.5, -47.5)}},
+        3: {"main": (-22.2, -47.2)},
+        4: {"main": (-22.5, -47.5)},
+    }
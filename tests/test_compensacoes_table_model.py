@@ -0,0 +1,124 @@
+from dataclasses import replace
+
+from PySide6.QtCore import Qt
+
+from app.models.compensacao import Compensacao
+from app.models.display_columns import DISPLAY_COLUMN_ATTRS
+from app.models.plantio_item import PlantioItem
+from app.ui.components.model import CompensacoesTableModel, PagedCompensacoesTableModel
+
+
+def make_record(excel_row: int) -> Compensacao:
+    return Compensacao(
+        excel_row=excel_row,
+        oficio_processo=f"{excel_row}/2026",
+        eletronico="SIM",
+        caixa="CX-1",
+        av_tec=f"AT-{excel_row}",
+        compensacao="10",
+        endereco=f"Rua {excel_row}",
+        microbacia="Gregorio",
+        compensado="",
+        uid=f"uid-{excel_row}",
+    )
+
+
+class FakePageSource:
+    def __init__(self, total: int):
+        # excel_row com buracos, como num recorte filtrado.
+        self.records = [make_record(2 + index * 3) for index in range(total)]
+        self.fetches: list[tuple[int, int]] = []
+        self.offset_fetches: list[tuple[int, int]] = []
+        self.plantio_loads: list[str] = []
+        self.sort_key = ""
+        self.descending = False
+
+    def count(self) -> int:
+        return len(self.records)
+
+    def fetch_page(self, after_excel_row: int, limit: int) -> list[Compensacao]:
+        self.fetches.append((after_excel_row, limit))
+        page = [record for record in self.records if record.excel_row > after_excel_row][:limit]
+        return [replace(record, plantios=[]) for record in page]
+
+    def fetch_page_at(self, offset: int, limit: int) -> list[Compensacao]:
+        self.offset_fetches.append((offset, limit))
+        ordered = list(self.records)
+        if self.sort_key:
+            ordered.sort(key=lambda record: getattr(record, self.sort_key), reverse=self.descending)
+        return [replace(record, plantios=[]) for record in ordered[offset : offset + limit]]
+
+    def with_sort(self, sort_key: str, descending: bool = False) -> "FakePageSource":
+        self.sort_key = sort_key
+        self.descending = descending
+        return self
+
+    def load_plantios(self, record: Compensacao) -> list[PlantioItem]:
+        self.plantio_loads.append(record.uid)
+        return [PlantioItem(sequence=1, endereco=f"Area {record.excel_row}", qtd_mudas="3")]
+
+
+def test_paged_table_model_fetches_only_the_visible_window():
+    source = FakePageSource(1_000)
+    model = PagedCompensacoesTableModel(source, page_size=50, prefetch_pages=1, max_cached_pages=4)
+
+    assert model.rowCount() == 1_000
+    assert source.fetches == []
+
+    value = model.data(model.index(0, 0), int(Qt.ItemDataRole.DisplayRole))
+    assert value == "2/2026"
+    assert source.fetches == [(0, 50), (149, 50)]
+
+    model.data(model.index(60, 0), int(Qt.ItemDataRole.DisplayRole))
+    assert len(source.fetches) == 3
+    assert model.cached_page_count() <= 4
+
+
+def test_paged_table_model_jumps_by_offset_and_loads_plantios_on_demand():
+    source = FakePageSource(300)
+    model = PagedCompensacoesTableModel(source, page_size=20, prefetch_pages=0, max_cached_pages=3)
+
+    record = model.record_at(299)
+    assert record is not None
+    assert record.excel_row == source.records[299].excel_row
+    assert model.cached_page_count() == 1
+    assert source.fetches == []
+    assert source.offset_fetches == [(280, 20)]
+
+    assert record.plantios == []
+    loaded = model.record_with_plantios(299)
+    assert [item.endereco for item in loaded.plantios] == [f"Area {record.excel_row}"]
+    model.record_with_plantios(299)
+    assert source.plantio_loads == [record.uid]
+
+    source.fetches.clear()
+    assert model.record_at(0).excel_row == 2
+    assert source.fetches == [(0, 20)]
+
+    model.set_source(None)
+    assert model.rowCount() == 0
+    assert model.record_at(0) is None
+
+
+def test_paged_table_model_sorts_in_the_source():
+    source = FakePageSource(100)
+    model = PagedCompensacoesTableModel(source, page_size=10, prefetch_pages=0)
+    assert model.record_at(0).excel_row == 2
+
+    model.sort(DISPLAY_COLUMN_ATTRS.index("endereco"), Qt.SortOrder.DescendingOrder)
+
+    assert (source.sort_key, source.descending) == ("endereco", True)
+    assert model.rowCount() == 100
+    assert model.record_at(0).endereco == "Rua 98"
+    assert source.offset_fetches == [(0, 10)]
+
+    model.sort(-1)
+    assert source.sort_key == ""
+    assert model.record_at(0).excel_row == 2
+
+
+def test_compensacoes_table_model_record_at_bounds():
+    model = CompensacoesTableModel([make_record(2)])
+    assert model.record_at(0).excel_row == 2
+    assert model.record_at(1) is None
+    assert model.data(model.index(0, 0), int(Qt.ItemDataRole.DisplayRole)) == "2/2026"
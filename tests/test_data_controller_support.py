@@ -93,7 +93,7 @@ def build_window():
             filter_eletronico=ele,
             filter_caixa=caixa,
             table=SimpleNamespace(clearSelection=lambda: None),
-            table_model=SimpleNamespace(update_data=lambda data: setattr(window, "_table_data", data)),
+            clear_records=lambda: setattr(window, "_table_data", []),
             update_totals_tables=lambda metrics: setattr(window, "_totals_metrics", metrics),
             lbl_results=SimpleNamespace(setText=lambda text: setattr(window, "_results_label", text)),
         ),
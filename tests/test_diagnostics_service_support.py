@@ -29,6 +29,7 @@ def test_build_window_session_snapshot_handles_probe_failures():
         _local_filter_facets_status={"source": "sqlite"},
         _local_mutation_sync_status={"status": "ok"},
         _local_record_read_status={"strategy": "sqlite_query"},
+        startup_timeline=SimpleNamespace(snapshot=lambda: {"first_paint_ms": 120.0, "gis_ready_ms": 480.5}),
     )
 
     snapshot = build_window_session_snapshot(window, logger=logger, serializer=lambda value: value)
@@ -39,6 +40,7 @@ def test_build_window_session_snapshot_handles_probe_failures():
     assert snapshot["selected_uid"] == "uid-1"
     assert snapshot["local_record_read"]["strategy"] == "sqlite_query"
     assert snapshot["record_integrity"].issue_count == 0
+    assert snapshot["startup_timing"]["gis_ready_ms"] == 480.5
     assert len(warnings) == 2
 
 
@@ -3,6 +3,7 @@ from app.services.error_service import friendly_error_message
 from app.services.excel_service import WorkbookModifiedExternallyError
 from app.services.supabase_compensacoes_rpc_service import (
     SupabaseCompensacoesConflictError,
+    SupabaseCompensacoesImportInterruptedError,
     SupabaseCompensacoesRpcError,
 )
 
@@ -68,3 +69,14 @@ def test_friendly_error_message_handles_supabase_conflict_error():
 
     assert title == "Conflito de Edição"
     assert "atualize" in msg.lower()
+
+
+def test_friendly_error_message_handles_interrupted_chunked_import():
+    title, msg = friendly_error_message(
+        SupabaseCompensacoesImportInterruptedError("lote 3 falhou", session_id="s-1", acked_chunks=2, total_chunks=5),
+        "importar",
+    )
+
+    assert title == "Importação Interrompida"
+    assert "2 de 5" in msg
+    assert "retomar" in msg.lower()
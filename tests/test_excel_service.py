@@ -397,3 +397,180 @@ def test_save_edit_roundtrip_persists_hidden_plantios_sheet(tmp_path):
     assert reloaded_records[0].plantios[0].endereco == "Rua Plantio A"
     assert reloaded_records[0].plantios[1].qtd_mudas == "5"
     assert reloaded_records[0].endereco_plantio == "2 áreas / 8 mudas"
+
+
+def test_read_records_matches_load_without_touching_the_file(tmp_path):
+    path = tmp_path / "compensacoes_stream.xlsx"
+    build_workbook(path)
+    service = ExcelService()
+    record = service.load(str(path))[0]
+    record.plantios = [
+        PlantioItem(sequence=1, endereco="Rua Plantio A", qtd_mudas="3", latitude="-22.01", longitude="-47.89"),
+        PlantioItem(sequence=2, endereco="Rua Plantio B", qtd_mudas="5", latitude="-22.02", longitude="-47.90"),
+    ]
+    service.save_edit(record)
+    service.add_new(make_record(uid=""))
+    before = (os.stat(path).st_mtime_ns, path.read_bytes())
+
+    reader = ExcelService()
+    streamed = reader.read_records(str(path))
+
+    assert (os.stat(path).st_mtime_ns, path.read_bytes()) == before
+    assert reader.wb is None and reader.path is None
+    assert streamed == ExcelService().load(str(path))
+    assert [len(item.plantios) for item in streamed] == [2, 0]
+
+
+def test_read_records_assigns_uids_in_memory_for_legacy_workbook(tmp_path):
+    path = tmp_path / "legacy_stream.xlsx"
+    build_legacy_workbook(path)
+    before = path.read_bytes()
+
+    records = ExcelService().read_records(str(path))
+
+    assert path.read_bytes() == before
+    assert len(records) == 1
+    assert records[0].uid
+    assert records[0].oficio_processo == "123/2026"
+    assert records[0].microbacia == "Gregorio"
+
+
+def test_read_records_maps_near_match_headers_like_load(tmp_path):
+    path = tmp_path / "near_match.xlsx"
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = SHEET_NAME
+    ws.append(
+        ["Ofício/ Processo", "Tipo", "Caixa", "Av. Tec", "Compensação", "Endereço", "Microbacia (nome)", "UID"]
+    )
+    ws.append(["123/2026", "SIM", "CX-1", "AT-1", 8, "Rua A", "Gregorio", "uid-1"])
+    wb.save(path)
+
+    streamed = ExcelService().read_records(str(path))
+    service = ExcelService()
+    loaded = service.load(str(path))
+
+    assert streamed == loaded
+    assert (streamed[0].av_tec, streamed[0].microbacia) == ("AT-1", "Gregorio")
+    assert streamed[0].endereco_plantio == ""
+    assert (service.col_map["av_tec"], service.col_map["microbacia"]) == (4, 7)
+    assert service.col_map["endereco_plantio"] > 8
+
+
+def test_read_records_falls_back_to_openpyxl_when_streaming_is_not_supported(tmp_path, monkeypatch):
+    from app.services import xlsx_stream_reader
+
+    path = tmp_path / "fallback.xlsx"
+    build_workbook(path)
+    expected = ExcelService().load(str(path))
+
+    def unsupported(self, sheet_name):
+        raise xlsx_stream_reader.XlsxStreamError("formula do tipo 'array'")
+
+    monkeypatch.setattr(xlsx_stream_reader.XlsxStreamReader, "iter_rows", unsupported)
+
+    assert ExcelService().read_records(str(path)) == expected
+
+
+def sheet_values(workbook) -> dict:
+    return {
+        sheet.title: [row for row in sheet.iter_rows(values_only=True) if any(value is not None for value in row)]
+        for sheet in workbook.worksheets
+    }
+
+
+def test_writes_reuse_loaded_workbook_without_reloading_from_disk(tmp_path, monkeypatch):
+    path = tmp_path / "compensacoes_inplace.xlsx"
+    build_workbook(path)
+    service = ExcelService()
+    record = service.load(str(path))[0]
+
+    def fail_reload(self, path):
+        raise AssertionError("a gravacao nao deveria reler a planilha")
+
+    monkeypatch.setattr(ExcelService, "load", fail_reload)
+    record.caixa = "CX-EDITADA"
+    service.save_edit(record)
+    new_row = service.add_new(make_record(uid="novo-uid"))
+    service.delete_record_shift_up(2, record.uid)
+
+    reloaded = openpyxl.load_workbook(path)[SHEET_NAME]
+    assert new_row == 3
+    assert reloaded.max_row == 2
+    assert reloaded.cell(row=2, column=4).value == "AT-2"
+
+
+def test_write_batch_saves_once_and_rolls_back_every_change_on_failure(tmp_path, monkeypatch):
+    path = tmp_path / "compensacoes_batch.xlsx"
+    build_workbook(path)
+    service = ExcelService()
+    record = service.load(str(path))[0]
+    saves = []
+    original_save = ExcelService._save_workbook
+    monkeypatch.setattr(ExcelService, "_save_workbook", lambda self: (saves.append(1), original_save(self)))
+
+    with service.write_batch():
+        service.add_new(make_record(uid="lote-1", av_tec="AT-2"))
+        service.add_new(make_record(uid="lote-2", av_tec="AT-3"))
+
+    assert len(saves) == 1
+    assert ExcelService().read_records(str(path))[2].uid == "lote-2"
+
+    before_memory = sheet_values(service.wb)
+    before_disk = path.read_bytes()
+    record.plantios = [PlantioItem(sequence=1, endereco="Rua Plantio", qtd_mudas="4")]
+    with pytest.raises(RuntimeError, match="falhou"):
+        with service.write_batch():
+            service.save_edit(record)
+            service.delete_record_shift_up(3, "lote-1")
+            service.add_new(make_record(uid="lote-3", av_tec="AT-4"))
+            raise RuntimeError("lote falhou")
+
+    assert len(saves) == 1
+    assert path.read_bytes() == before_disk
+    assert sheet_values(service.wb) == before_memory
+    assert "Plantios" not in service.wb.sheetnames
+    assert service.find_row_by_uid("lote-1") == 3
+
+
+def test_write_batch_rollback_restores_formatting_of_a_deleted_row(tmp_path):
+    from openpyxl.styles import Font, PatternFill
+
+    path = tmp_path / "compensacoes_formatada.xlsx"
+    build_workbook(path)
+    workbook = openpyxl.load_workbook(path)
+    sheet = workbook[SHEET_NAME]
+    sheet.cell(row=2, column=1).font = Font(bold=True, color="FFC00000")
+    sheet.cell(row=2, column=3).fill = PatternFill("solid", fgColor="FFFFFF00")
+    sheet.cell(row=2, column=6).hyperlink = "https://example.org/processo/123"
+    sheet.cell(row=2, column=16).value = "Observacao"
+    sheet.merge_cells("P2:Q2")
+    workbook.save(path)
+    service = ExcelService()
+    record = service.load(str(path))[0]
+    before_disk = path.read_bytes()
+
+    with pytest.raises(RuntimeError, match="falhou"):
+        with service.write_batch():
+            service.delete_record_shift_up(2, record.uid)
+            raise RuntimeError("exclusao falhou")
+
+    restored = service.ws
+    assert path.read_bytes() == before_disk
+    assert restored.cell(row=2, column=1).value == "123/2026"
+    assert restored.cell(row=2, column=1).font.bold is True
+    assert restored.cell(row=2, column=1).font.color.rgb == "FFC00000"
+    assert restored.cell(row=2, column=3).fill.fgColor.rgb == "FFFFFF00"
+    assert restored.cell(row=2, column=6).value == "Rua A"
+    assert restored.cell(row=2, column=6).hyperlink.target == "https://example.org/processo/123"
+    assert [merged.coord for merged in restored.merged_cells.ranges] == ["P2:Q2"]
+    assert type(restored.cell(row=2, column=17)).__name__ == "MergedCell"
+
+    record.caixa = "CX-SALVA"
+    service.save_edit(record)
+
+    reloaded = openpyxl.load_workbook(path)[SHEET_NAME]
+    assert reloaded.cell(row=2, column=3).value == "CX-SALVA"
+    assert reloaded.cell(row=2, column=1).font.bold is True
+    assert reloaded.cell(row=2, column=6).hyperlink.target == "https://example.org/processo/123"
+    assert [merged.coord for merged in reloaded.merged_cells.ranges] == ["P2:Q2"]
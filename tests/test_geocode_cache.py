@@ -0,0 +1,126 @@
+import json
+import sqlite3
+
+from app.services.geocode_cache import EXPIRATION_SECONDS, GeocodeCache
+
+
+class FakeClock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def stored_keys(db_path):
+    if not db_path.exists():
+        return []
+    with sqlite3.connect(db_path) as conn:
+        return sorted(row[0] for row in conn.execute("SELECT cache_key FROM geocode_cache"))
+
+
+def test_geocode_cache_opens_lazily_and_migrates_both_legacy_formats_once(tmp_path):
+    clock = FakeClock()
+    legacy = tmp_path / "geocode_cache.json"
+    legacy.write_text(
+        json.dumps(
+            {
+                "Rua Antiga, 10": [-22.0, -47.9],
+                "Rua Nova, 20": {"coords": [-22.1, -47.8], "timestamp": clock.now - 10, "confirmed": True},
+                "Rua Vencida": {"coords": [-22.2, -47.7], "timestamp": clock.now - EXPIRATION_SECONDS - 1},
+                "invalido": "x",
+            }
+        ),
+        encoding="utf-8",
+    )
+    db_path = tmp_path / "geocode_cache.db"
+    cache = GeocodeCache(str(db_path), legacy_json_file=str(legacy), clock=clock)
+
+    assert not db_path.exists()
+    assert cache.get("rua antiga, 10") == (-22.0, -47.9)
+    assert cache.get("RUA NOVA, 20") == (-22.1, -47.8)
+    assert cache.get("Rua Vencida") is None
+    assert stored_keys(db_path) == ["rua antiga, 10", "rua nova, 20"]
+
+    legacy.write_text(json.dumps({"Rua Depois": [-22.3, -47.6]}), encoding="utf-8")
+    reopened = GeocodeCache(str(db_path), legacy_json_file=str(legacy), clock=clock)
+    assert reopened.get("Rua Depois") is None
+    stats = cache.stats()
+    assert (stats.migrated, stats.evicted, stats.hits, stats.misses) == (3, 1, 2, 1)
+
+
+def test_geocode_cache_batches_writes_and_keeps_confirmations(tmp_path):
+    clock = FakeClock()
+    db_path = tmp_path / "geocode_cache.db"
+    cache = GeocodeCache(str(db_path), clock=clock, write_batch_size=3, max_pending_seconds=60)
+
+    cache.set("Rua A", -22.0, -47.0)
+    cache.set("Rua B", -22.1, -47.1)
+    assert cache.get("rua a") == (-22.0, -47.0)
+    assert stored_keys(db_path) == []
+
+    cache.set("Rua C", -22.2, -47.2)
+    assert stored_keys(db_path) == ["rua a", "rua b", "rua c"]
+
+    cache.set("Rua A", -22.5, -47.5, confirmed=True)
+    cache.set("Rua A", -22.6, -47.6)
+    cache.flush()
+    clock.now += EXPIRATION_SECONDS + 1
+
+    assert cache.get("Rua A") == (-22.5, -47.5)
+    assert cache.get("Rua B") is None
+    stats = cache.stats()
+    assert (stats.writes, stats.flushes, stats.expired) == (5, 3, 1)
+
+
+def test_geocode_cache_auto_results_never_overwrite_confirmed_coordinates(tmp_path, monkeypatch):
+    clock = FakeClock()
+    db_path = tmp_path / "geocode_cache.db"
+    cache = GeocodeCache(str(db_path), clock=clock, write_batch_size=100, max_pending_seconds=60)
+
+    cache.set("Rua A", -22.5, -47.5, confirmed=True, label="Conferido")
+    cache.set("Rua A", -22.6, -47.6, label="Nominatim")
+    assert cache.get("rua a") == (-22.5, -47.5)
+
+    cache.flush()
+    with sqlite3.connect(db_path) as conn:
+        row = conn.execute("SELECT lat, lon, confirmed, label FROM geocode_cache").fetchone()
+    assert row == (-22.5, -47.5, 1, "Conferido")
+
+    # Confirmacao ainda no buffer: a busca automatica seguinte tambem nao a substitui.
+    monkeypatch.setattr(cache, "flush", lambda: None)
+    cache.set("Rua B", -23.0, -48.0, confirmed=True)
+    cache.set("Rua B", -23.1, -48.1)
+    assert cache.get("Rua B") == (-23.0, -48.0)
+
+    cache.set("Rua A", -22.7, -47.7, confirmed=True, label="Nova conferencia")
+    assert cache.get("Rua A") == (-22.7, -47.7)
+
+
+def test_geocode_cache_flushes_old_pending_entries_and_clears(tmp_path):
+    clock = FakeClock()
+    db_path = tmp_path / "geocode_cache.db"
+    cache = GeocodeCache(str(db_path), clock=clock, write_batch_size=100, max_pending_seconds=5)
+
+    cache.set("Rua A", -22.0, -47.0)
+    clock.now += 6
+    cache.set("Rua B", -22.1, -47.1)
+
+    assert stored_keys(db_path) == ["rua a", "rua b"]
+    cache.clear()
+    assert cache.get("Rua A") is None
+    assert stored_keys(db_path) == []
+
+
+def test_geocode_cache_close_checkpoints_the_wal_and_reopens_on_demand(tmp_path):
+    db_path = tmp_path / "geocode_cache.db"
+    cache = GeocodeCache(str(db_path), write_batch_size=100, max_pending_seconds=60)
+    cache.set("Rua A", -22.0, -47.0)
+
+    cache.close()
+
+    wal_path = tmp_path / "geocode_cache.db-wal"
+    assert not wal_path.exists() or wal_path.stat().st_size == 0
+    assert stored_keys(db_path) == ["rua a"]
+    assert cache.get("Rua A") == (-22.0, -47.0)
+    cache.close()
@@ -1,6 +1,7 @@
 ﻿from app.models.compensacao import Compensacao
 from app.services.geocode_update_service import (
     apply_geocode_to_record,
+    batch_geocode_result_coords,
     build_cached_microbacia_finder,
     find_record_by_excel_row,
 )
@@ -76,3 +77,32 @@ def test_build_cached_microbacia_finder_reuses_previous_lookup():
     assert cached(-22.0100001, -47.8900001) == "Gregorio"
     assert cached(-22.0100002, -47.8900002) == "Gregorio"
     assert len(calls) == 1
+
+
+def test_build_cached_microbacia_finder_prefetches_known_points_in_one_call():
+    point_calls = []
+    batch_calls = []
+
+    def finder(lat, lon):
+        point_calls.append((lat, lon))
+        return "Fora"
+
+    def batch_finder(lats, lons):
+        batch_calls.append((list(lats), list(lons)))
+        return ["Gregorio", "Monjolinho"]
+
+    results = {
+        2: {"main": (-22.0100001, -47.8900001), "plantios": {1: (-22.02, -47.91)}},
+        3: {"main": (-22.01, -47.89)},
+    }
+    cached = build_cached_microbacia_finder(
+        finder,
+        find_microbacias=batch_finder,
+        prefetch=batch_geocode_result_coords(results),
+    )
+
+    assert cached(-22.01, -47.89) == "Gregorio"
+    assert cached(-22.02, -47.91) == "Monjolinho"
+    assert cached(-22.5, -47.5) == "Fora"
+    assert batch_calls == [([-22.01, -22.02], [-47.89, -47.91])]
+    assert point_calls == [(-22.5, -47.5)]
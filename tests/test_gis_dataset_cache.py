@@ -0,0 +1,45 @@
+from app.services.gis_dataset_cache import (
+    GisDataset,
+    dataset_cache_path,
+    read_gis_dataset,
+    shapefile_signature,
+    write_gis_dataset,
+)
+
+
+def build_dataset(name_field: str = "Nome_Do_Arquivo") -> GisDataset:
+    return GisDataset(
+        name_field=name_field,
+        names=("Gregorio", None),
+        file_names=("Gregorio", "Monjolinho"),
+        metric_crs="EPSG:31983",
+        wgs84_wkb=(b"\x01wgs-a", b"\x01wgs-bb"),
+        metric_wkb=(b"\x01utm-a", b""),
+    )
+
+
+def test_gis_dataset_round_trips_and_rejects_other_signature_or_field(tmp_path):
+    shapes_dir = tmp_path / "microbacias"
+    shapes_dir.mkdir()
+    (shapes_dir / "microbacias.shp").write_bytes(b"v1")
+    (shapes_dir / "microbacias.shp.xml").write_bytes(b"metadados")
+    signature = shapefile_signature(str(shapes_dir))
+
+    assert [entry[0] for entry in signature] == ["microbacias.shp"]
+    assert read_gis_dataset(signature, "Nome_Do_Arquivo", cache_dir=tmp_path) is None
+
+    write_gis_dataset(build_dataset(), signature, cache_dir=tmp_path)
+
+    assert read_gis_dataset(signature, "Nome_Do_Arquivo", cache_dir=tmp_path) == build_dataset()
+    assert read_gis_dataset(signature, "Nome", cache_dir=tmp_path) is None
+    (shapes_dir / "microbacias.shp").write_bytes(b"v2 maior")
+    assert read_gis_dataset(shapefile_signature(str(shapes_dir)), "Nome_Do_Arquivo", cache_dir=tmp_path) is None
+
+
+def test_truncated_gis_dataset_is_ignored(tmp_path):
+    signature = [["microbacias.shp", 2, 1]]
+    write_gis_dataset(build_dataset(), signature, cache_dir=tmp_path)
+    path = dataset_cache_path(tmp_path)
+    path.write_bytes(path.read_bytes()[:-3])
+
+    assert read_gis_dataset(signature, "Nome_Do_Arquivo", cache_dir=tmp_path) is None
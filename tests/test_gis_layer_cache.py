@@ -0,0 +1,69 @@
+import json
+
+import geopandas as gpd
+import shapely
+from shapely.geometry import Polygon
+
+from app.services.gis_layer_cache import (
+    LayerLevel,
+    build_microbacia_layer,
+    load_cached_microbacia_layer,
+    serialize_layer,
+    shapefile_fingerprint,
+    write_cached_layer,
+)
+
+
+def wavy_polygon(offset: float = 0.0) -> Polygon:
+    # Borda com muitos vertices quase colineares, que somem ao simplificar.
+    top = [(-47.90 + offset + step * 0.0001, -22.01 + (0.00001 if step % 2 else 0.0)) for step in range(100)]
+    return Polygon([(-47.90 + offset, -22.02), (-47.89 + offset, -22.02), *reversed(top)])
+
+
+def test_fingerprint_tracks_shapefile_content_and_cache_skips_rebuild(tmp_path):
+    shapes_dir = tmp_path / "microbacias"
+    shapes_dir.mkdir()
+    (shapes_dir / "Microbacia_do_Gregorio.shp").write_bytes(b"v1")
+    (shapes_dir / "Microbacia_do_Gregorio.shp.xml").write_bytes(b"metadados")
+    cache_dir = tmp_path / "cache"
+
+    first = shapefile_fingerprint(str(shapes_dir), "Nome_Do_Arquivo")
+    (shapes_dir / "Microbacia_do_Gregorio.shp.xml").write_bytes(b"outros metadados")
+    unchanged = shapefile_fingerprint(str(shapes_dir), "Nome_Do_Arquivo")
+
+    assert load_cached_microbacia_layer(str(shapes_dir), "Nome_Do_Arquivo", cache_dir=cache_dir) is None
+    write_cached_layer(first, '{"type":"FeatureCollection","features":[]}', cache_dir)
+    assert first == unchanged
+    assert load_cached_microbacia_layer(str(shapes_dir), "Nome_Do_Arquivo", cache_dir=cache_dir) == (
+        '{"type":"FeatureCollection","features":[]}'
+    )
+
+    (shapes_dir / "Microbacia_do_Gregorio.shp").write_bytes(b"v2")
+    second = shapefile_fingerprint(str(shapes_dir), "Nome_Do_Arquivo")
+    write_cached_layer(second, "{}", cache_dir)
+
+    assert second != first
+    assert shapefile_fingerprint(str(shapes_dir), "Outro_Campo") != second
+    assert sorted(path.name for path in cache_dir.iterdir()) == [f"microbacias-{second}.json"]
+
+
+def test_build_layer_simplifies_coarse_levels_and_keeps_names():
+    gdf = gpd.GeoDataFrame(
+        {"Nome_Do_Arquivo": ["Gregorio", "Monjolinho"], "geometry": [wavy_polygon(), wavy_polygon(0.02)]},
+        crs="EPSG:4326",
+    )
+    levels = (
+        LayerLevel(min_zoom=0, tolerance_m=20.0, precision=4),
+        LayerLevel(min_zoom=14, tolerance_m=0.0, precision=6),
+    )
+
+    built = build_microbacia_layer(gdf.to_crs("EPSG:31982"), "Nome_Do_Arquivo", levels=levels)
+    layer = json.loads(serialize_layer(built))
+
+    base = shapely.from_geojson(json.dumps(layer["features"][0]["geometry"]))
+    detailed = shapely.from_geojson(json.dumps(layer["lods"][0]["features"][0]["geometry"]))
+    assert [feature["properties"]["Nome_Do_Arquivo"] for feature in layer["features"]] == ["Gregorio", "Monjolinho"]
+    assert layer["lods"][0]["min_zoom"] == 14
+    assert shapely.get_num_coordinates(base) < 10 < shapely.get_num_coordinates(detailed)
+    assert base.is_valid
+    assert abs(base.area - detailed.area) / detailed.area < 0.05
@@ -1,6 +1,9 @@
+import os
+
 import geopandas as gpd
 from shapely.geometry import Polygon
 
+import app.services.gis_service as gis_service_module
 from app.services.gis_service import GisService
 
 
@@ -34,8 +37,14 @@ def test_find_microbacia_uses_cached_metric_projection():
     assert micro == "Gregorio"
 
 
-def test_to_geojson_obj_is_cached(monkeypatch):
+def test_to_geojson_obj_is_built_once_and_reused_from_disk_cache(monkeypatch, tmp_path):
+    shapes_dir = tmp_path / "microbacias"
+    shapes_dir.mkdir()
+    (shapes_dir / "Microbacia_do_Gregorio.shp").write_bytes(b"shape-v1")
     service = GisService.__new__(GisService)
+    service.microbacias_dir = str(shapes_dir)
+    service.layer_cache_dir = str(tmp_path / "cache")
+    service.name_field = "Nome_Do_Arquivo"
     service.gdf = gpd.GeoDataFrame(
         {
             "Nome_Do_Arquivo": ["Gregorio"],
@@ -52,21 +61,30 @@ def test_to_geojson_obj_is_cached(monkeypatch):
         },
         crs="EPSG:4326",
     )
+    service.gdf_metric = service.gdf.to_crs("EPSG:31982")
     service._geojson_obj = None
 
     calls = []
-    original_to_json = gpd.GeoDataFrame.to_json
+    original_build = gis_service_module.build_microbacia_layer
 
-    def fake_to_json(self, *args, **kwargs):
+    def fake_build(*args, **kwargs):
         calls.append(1)
-        return original_to_json(self, *args, **kwargs)
+        return original_build(*args, **kwargs)
 
-    monkeypatch.setattr(gpd.GeoDataFrame, "to_json", fake_to_json)
+    monkeypatch.setattr(gis_service_module, "build_microbacia_layer", fake_build)
 
     first = service.to_geojson_obj()
     second = service.to_geojson_obj()
+    warm = GisService.__new__(GisService)
+    warm.microbacias_dir = service.microbacias_dir
+    warm.layer_cache_dir = service.layer_cache_dir
+    warm.name_field = service.name_field
+    warm._geojson_obj = None
 
     assert first is second
+    assert first["features"][0]["properties"] == {"Nome_Do_Arquivo": "Gregorio"}
+    assert [lod["min_zoom"] for lod in first["lods"]] == [12, 15]
+    assert warm.to_geojson_text() == service.to_geojson_text()
     assert len(calls) == 1
 
 
@@ -164,3 +182,67 @@ def test_gis_service_normalizes_alias_to_official_microbacia_name():
     service._build_name_lookup_cache()
 
     assert service.normalize_microbacia_name("Gregorio") == "Gregório"
+
+
+def test_find_microbacias_matches_point_lookup_and_keeps_input_order():
+    square = [(-47.8900, -22.0150), (-47.8890, -22.0150), (-47.8890, -22.0140), (-47.8900, -22.0140)]
+    service = GisService.__new__(GisService)
+    service.name_field = "Nome_Do_Arquivo"
+    service.gdf = gpd.GeoDataFrame(
+        {
+            "Nome_Do_Arquivo": ["Gregorio", "Monjolinho", None],
+            "geometry": [
+                Polygon(square),
+                Polygon([(x + 0.002, y) for x, y in square]),
+                Polygon([(x + 0.1, y) for x, y in square]),
+            ],
+        },
+        crs="EPSG:4326",
+    )
+    service.sindex = service.gdf.sindex
+    service.metric_crs = "EPSG:31982"
+    service.gdf_metric = service.gdf.to_crs(service.metric_crs)
+    points = [
+        (-22.0145, -47.8865),  # dentro de Monjolinho
+        (-22.0145, -47.8895),  # dentro de Gregorio
+        (-22.0160, -47.8895),  # ~110 m ao sul de Gregorio
+        (-22.0500, -47.8895),  # longe de tudo
+        (float("nan"), -47.8895),
+        (-22.0145, -47.7895),  # dentro do poligono sem nome
+    ]
+
+    names = service.find_microbacias([lat for lat, _ in points], [lon for _, lon in points])
+
+    assert list(names) == ["Monjolinho", "Gregorio", "Gregorio", "", "", ""]
+    assert list(names[:4]) == [service.find_microbacia(lat, lon) for lat, lon in points[:4]]
+    assert list(service.find_microbacias([], [])) == []
+
+
+def test_gis_service_restores_microbacias_from_binary_cache_until_shapefiles_change(tmp_path):
+    shapes_dir = tmp_path / "microbacias"
+    shapes_dir.mkdir()
+    gpd.GeoDataFrame(
+        {"Nome": ["Gregorio", "Monjolinho"]},
+        geometry=[
+            Polygon([(-47.90, -22.02), (-47.89, -22.02), (-47.89, -22.01), (-47.90, -22.01)]),
+            Polygon([(-47.89, -22.02), (-47.88, -22.02), (-47.88, -22.01), (-47.89, -22.01)]),
+        ],
+        crs="EPSG:4326",
+    ).to_file(shapes_dir / "microbacias.shp")
+    cache_dir = tmp_path / "cache"
+
+    cold = GisService(str(shapes_dir), "Nome", dataset_cache_dir=str(cache_dir))
+    warm = GisService(str(shapes_dir), "Nome", dataset_cache_dir=str(cache_dir))
+
+    assert cold.load_source == "shapefiles"
+    assert warm.load_source == "cache"
+    assert warm.gdf_metric.crs == cold.gdf_metric.crs
+    assert list(warm.find_microbacias([-22.015, -22.015], [-47.895, -47.885])) == ["Gregorio", "Monjolinho"]
+    assert warm.find_microbacia(-22.015, -47.885) == cold.find_microbacia(-22.015, -47.885)
+
+    shp_path = shapes_dir / "microbacias.shp"
+    stat = shp_path.stat()
+    os.utime(shp_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    reloaded = GisService(str(shapes_dir), "Nome", dataset_cache_dir=str(cache_dir))
+
+    assert reloaded.load_source == "shapefiles"
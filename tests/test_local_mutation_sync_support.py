@@ -124,3 +124,20 @@ def test_small_pure_helpers_keep_paths_and_clones_stable():
     assert normalized_workbook_path("  C:/tmp/base.xlsx  ") == "C:/tmp/base.xlsx"
     assert [record.uid for record in sorted_records] == ["u-1", "u-2"]
     assert cloned_records[0] is not records[0]
+
+
+def test_projections_share_unchanged_records_and_leave_the_base_intact():
+    existing = [make_record(uid=f"u-{index}", excel_row=index + 2) for index in range(4)]
+
+    edited = project_records_after_edit(existing, make_record(uid="u-1", excel_row=3, endereco="Rua B"))
+    deleted = project_records_after_delete(edited, existing[0])
+    applied = build_apply_result(
+        status=build_sync_status(status="sqlite", operation="edit", workbook_path="base.xlsx"),
+        projected_records=edited,
+    )
+
+    assert [edited[index] is existing[index] for index in range(4)] == [True, False, True, True]
+    assert [record.excel_row for record in deleted] == [2, 3, 4]
+    assert [record.excel_row for record in existing] == [2, 3, 4, 5]
+    assert existing[1].endereco == "Rua A"
+    assert applied.records[2] is existing[2]
@@ -1,6 +1,6 @@
 from app.application.use_cases.local_mutation_sync import LocalMutationSyncUseCases
 from app.models.compensacao import Compensacao
-from app.services.sqlite_mirror_service import WorkbookSnapshotSummary
+from app.services.sqlite_mirror_service import SqliteMirrorService, WorkbookSnapshotSummary
 
 
 def make_record(**overrides) -> Compensacao:
@@ -117,6 +117,29 @@ def test_local_mutation_sync_projects_delete_and_resequences_rows():
     assert [record.excel_row for record in projected] == [2, 3]
 
 
+def test_local_mutation_sync_can_delete_without_shifting_rows_in_the_mirror(tmp_path):
+    mirror = SqliteMirrorService(db_path=tmp_path / "mirror.db")
+    records = [
+        make_record(excel_row=2, uid="u-1", av_tec="AT-1"),
+        make_record(excel_row=3, uid="u-2", av_tec="AT-2"),
+        make_record(excel_row=4, uid="u-3", av_tec="AT-3"),
+    ]
+    mirror.sync_workbook_snapshot("session://banco-local", records)
+    use_cases = LocalMutationSyncUseCases(mirror)
+
+    result = use_cases.apply_after_delete(
+        workbook_path="session://banco-local",
+        existing_records=records,
+        deleted_record=records[1],
+        shift_rows=False,
+    )
+
+    assert result.status.strategy == "incremental"
+    assert [(record.uid, record.excel_row) for record in result.records] == [("u-1", 2), ("u-3", 4)]
+    mirrored = mirror.list_records_for_workbook("session://banco-local")
+    assert [(record.uid, record.excel_row) for record in mirrored] == [("u-1", 2), ("u-3", 4)]
+
+
 def test_local_mutation_sync_updates_sqlite_after_import_projection():
     writer = StubSnapshotWriter()
     use_cases = LocalMutationSyncUseCases(writer)
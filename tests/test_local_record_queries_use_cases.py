@@ -332,6 +332,45 @@ def test_local_record_queries_can_use_indexed_sqlite_query_for_filtered_result()
     assert reader.metrics_calls[0]["caixa_all_selected"] is False
 
 
+def test_local_record_queries_skips_materializing_rows_when_a_page_source_is_available():
+    session_records = [make_record(oficio_processo="ABC-1", uid="u-1"), make_record(oficio_processo="XYZ-2", uid="u-2")]
+
+    class PagedReader(StubLocalRecordReader):
+        def record_page_source_for_workbook(self, workbook_path: str, **filters):
+            return ("paginas", filters["search_text"])
+
+    reader = PagedReader(
+        summary=WorkbookSnapshotSummary(
+            workbook_path="C:/tmp/base.xlsx",
+            synced_at="2026-03-31T12:00:00+00:00",
+            record_count=2,
+            plantio_count=0,
+            audit_event_count=0,
+        ),
+        records=session_records,
+    )
+    use_cases = LocalRecordQueriesUseCases(reader)
+
+    result = use_cases.resolve_filtered_record_source(
+        "C:/tmp/base.xlsx",
+        fallback_records=session_records,
+        text="ABC",
+        status="Todos",
+        selected_micros=(),
+        selected_eletronicos=(),
+        micro_all_selected=True,
+        eletronico_all_selected=True,
+        materialize_records=False,
+    )
+
+    assert result.source == "sqlite"
+    assert result.records == ()
+    assert result.metrics["count_total"] == 1
+    assert result.page_source == ("paginas", "ABC")
+    assert reader.query_calls == []
+    assert reader.metrics_calls[0]["search_text"] == "ABC"
+
+
 def test_local_record_queries_can_resolve_filter_facets_from_sqlite_snapshot():
     session_records = [
         make_record(oficio_processo="ABC/2026", microbacia="Gregorio", uid="u-1"),
@@ -1,5 +1,6 @@
 ﻿import os
 import json
+import threading
 from types import SimpleNamespace
 from dataclasses import replace
 
@@ -95,6 +96,15 @@ def settle_window(window, cycles: int = 4):
     return window
 
 
+def wait_for_gis_load(window, timeout_ms: int = 5000):
+    # Dispara a carga pendente sem esperar a primeira pintura da janela offscreen.
+    window.data_controller.start_gis_load()
+    worker = window.data_controller._gis_worker
+    if worker is not None:
+        worker.wait(timeout_ms)
+    return settle_window(window)
+
+
 def available_left_panel_table_height(window) -> int:
     layout = window.data_tab.left_panel.layout()
     margins = layout.contentsMargins()
@@ -1040,7 +1050,7 @@ def test_load_gis_refreshes_microbacia_options_after_success(monkeypatch):
         lambda path: True if path == window.MICROB_DIR else real_isdir(path),
     )
     monkeypatch.setattr(
-        "app.ui.controllers.data_controller.GisService",
+        "app.ui.controllers.data_controller.create_gis_service",
         lambda *args, **kwargs: SimpleNamespace(
             to_geojson_obj=lambda: {"type": "FeatureCollection", "features": []},
             list_microbacias=lambda: ["Água Quente", "Gregório"],
@@ -1056,6 +1066,47 @@ def test_load_gis_refreshes_microbacia_options_after_success(monkeypatch):
     window.close()
 
 
+def test_request_gis_load_waits_for_first_paint_and_loads_in_background(monkeypatch):
+    window = MainWindow()
+    get_app().processEvents()
+    real_isdir = os.path.isdir
+    loaded_in = []
+    service = SimpleNamespace(
+        load_source="cache",
+        to_geojson_obj=lambda: {"type": "FeatureCollection", "features": []},
+        list_microbacias=lambda: ["Gregório"],
+        normalize_microbacia_name=lambda value: value,
+    )
+
+    def fake_create(*args):
+        loaded_in.append(threading.current_thread() is threading.main_thread())
+        return service
+
+    monkeypatch.setattr(
+        "app.ui.controllers.data_controller.os.path.isdir",
+        lambda path: True if path == window.MICROB_DIR else real_isdir(path),
+    )
+    monkeypatch.setattr("app.ui.controllers.data_controller.create_gis_service", fake_create)
+    monkeypatch.setattr(window, "_load_microbacias_layer", lambda: None)
+    window.gis = None
+    window.startup_timeline.first_paint_ms = None
+
+    assert window.data_controller.request_gis_load() is True
+    assert window.data_controller._gis_worker is None
+
+    assert window.startup_timeline.mark_first_paint() is True
+    window.lifecycle_controller.handle_first_paint()
+    wait_for_gis_load(window)
+
+    assert window.gis is service
+    assert loaded_in == [False]
+    assert window.startup_timeline.gis_source == "cache"
+    assert window.startup_timeline.gis_ready_ms >= window.startup_timeline.first_paint_ms
+    assert window.data_controller.request_gis_load() is True
+    assert loaded_in == [False]
+    window.close()
+
+
 def test_eletronico_prefills_caixa_but_keeps_it_locked():
     window = MainWindow()
     get_app().processEvents()
@@ -1200,6 +1251,72 @@ def test_apply_filter_can_use_sqlite_mirror_record_source(monkeypatch):
     window.close()
 
 
+def test_apply_filter_pages_the_table_from_the_sqlite_mirror(monkeypatch, tmp_path):
+    from app.application.use_cases.local_record_queries import LocalRecordQueriesUseCases
+    from app.services.sqlite_mirror_service import SqliteMirrorService
+
+    window = MainWindow()
+    monkeypatch.setattr(window, "_run_map_js", lambda *args, **kwargs: None)
+    mirror = SqliteMirrorService(db_path=tmp_path / "mirror.db")
+    mirrored_records = [
+        make_record(excel_row=row, oficio_processo=f"MIRROR-{row}", uid=f"mirror-{row}", av_tec=f"AT-{row}")
+        for row in range(2, 7)
+    ]
+    mirror.sync_workbook_snapshot("session://paginado", mirrored_records)
+    window.records = list(mirrored_records)
+    queries = LocalRecordQueriesUseCases(mirror)
+    monkeypatch.setattr(
+        window.data_controller.local_record_queries,
+        "resolve_filtered_record_source",
+        lambda workbook_path, **kwargs: queries.resolve_filtered_record_source("session://paginado", **kwargs),
+    )
+
+    materialized_queries: list[dict] = []
+    query_records = mirror.query_records_for_session
+    monkeypatch.setattr(
+        mirror,
+        "query_records_for_session",
+        lambda *args, **kwargs: materialized_queries.append(kwargs) or query_records(*args, **kwargs),
+    )
+
+    window.apply_filter()
+
+    data_tab = window.data_tab
+    assert data_tab.proxy.sourceModel() is data_tab.paged_table_model
+    assert data_tab.proxy.rowCount() == 5
+    assert data_tab.paged_table_model.record_at(4).uid == "mirror-6"
+    assert materialized_queries == []
+    assert window._filtered_metrics["count_total"] == 5
+    assert window._local_record_read_status.filtered_records == 5
+    window._on_table_clicked(data_tab.proxy.index(1, 0))
+    assert window.selected.uid == "mirror-3"
+
+    data_tab.table.setSortingEnabled(True)
+    data_tab.proxy.sort(display_column_index("av_tec"), Qt.SortOrder.DescendingOrder)
+    assert data_tab.proxy.sourceModel() is data_tab.paged_table_model
+    assert data_tab.proxy.sortColumn() == display_column_index("av_tec")
+    assert [data_tab.displayed_record_at(row).uid for row in range(3)] == ["mirror-6", "mirror-5", "mirror-4"]
+    window.clear_form(force=True)
+    window._on_table_clicked(data_tab.proxy.index(0, 0))
+    assert window.selected.uid == "mirror-6"
+    assert [record.uid for record in window.filtered_records] == [f"mirror-{row}" for row in range(2, 7)]
+    assert window.filtered_records[0] is window.records[0]
+
+    window.data_controller.set_quick_filter_mode("pendentes")
+    window.apply_filter()
+    assert data_tab.proxy.sourceModel() is data_tab.table_model
+    assert data_tab.proxy.rowCount() == len(window.filtered_records)
+
+    window.data_controller.set_quick_filter_mode("all")
+    window.apply_filter()
+    assert data_tab.proxy.sourceModel() is data_tab.paged_table_model
+    window.data_controller.clear_loaded_data_state()
+    assert data_tab.proxy.sourceModel() is data_tab.table_model
+    assert data_tab.paged_table_model.source is None
+    assert data_tab.proxy.rowCount() == 0
+    window.close()
+
+
 def test_table_plantio_column_respects_header_minimum_width(monkeypatch):
     window = MainWindow()
     header = window.data_tab.table.horizontalHeader()
@@ -2201,8 +2318,7 @@ def test_table_row_selection_populates_form(monkeypatch):
     )
     
     window.filtered_records = [r3]
-    window.data_tab.table_model.records = [r3]
-    window.data_tab.table_model.layoutChanged.emit()
+    window.data_tab.show_records([r3])
     
     index = window.data_tab.proxy.index(0, 0)
     window._on_table_clicked(index)
@@ -2222,7 +2338,7 @@ def test_second_click_same_table_row_clears_selection_and_feedback(monkeypatch):
     record = make_record(excel_row=3, oficio_processo="PROC-3", uid="u3")
     window.records = [record]
     window.filtered_records = [record]
-    window.data_tab.table_model.update_data(window.filtered_records)
+    window.data_tab.show_records(window.filtered_records)
 
     index = window.data_tab.proxy.index(0, 0)
     window.data_tab.table.selectRow(0)
@@ -2249,8 +2365,7 @@ def test_delete_shortcut_uses_current_table_row(monkeypatch):
     window = MainWindow()
     r3 = make_record(excel_row=3, oficio_processo="PROC-3", uid="u3")
     window.filtered_records = [r3]
-    window.data_tab.table_model.records = [r3]
-    window.data_tab.table_model.layoutChanged.emit()
+    window.data_tab.show_records([r3])
     window.data_tab.table.setCurrentIndex(window.data_tab.proxy.index(0, 0))
 
     deleted = []
@@ -2389,6 +2504,7 @@ def test_table_fullscreen_dialog_reserves_footer_space(monkeypatch):
 
 def test_table_fullscreen_dialog_exposes_and_syncs_filters(monkeypatch):
     window = MainWindow()
+    wait_for_gis_load(window)
     window.records = [
         make_record(oficio_processo="123/2026", microbacia="Gregorio", eletronico="SIM", caixa="Arquivado"),
         make_record(excel_row=3, oficio_processo="999/2025", microbacia="Medeiros", eletronico="NAO", uid="u-2", caixa="CX-3"),
@@ -2464,6 +2580,7 @@ def test_open_map_fullscreen_passes_current_heatmap_points(monkeypatch):
 
 def test_search_on_map_persists_detected_microbacia(monkeypatch):
     window = MainWindow()
+    wait_for_gis_load(window)
     monkeypatch.setattr("app.ui.controllers.map_controller.geocode_address_arcgis", lambda address: (-22.01, -47.89))
     window.gis = SimpleNamespace(
         find_microbacia=lambda lat, lng: "Gregorio",
@@ -3100,6 +3217,7 @@ def test_load_last_session_falls_back_to_singleton_database(monkeypatch):
 
 def test_load_session_failure_restores_previous_filter_state(monkeypatch):
     window = MainWindow()
+    wait_for_gis_load(window)
     window.records = [
         make_record(oficio_processo="123/2026", microbacia="Gregorio", eletronico="SIM", caixa="Arquivado"),
         make_record(excel_row=3, oficio_processo="999/2025", microbacia="Medeiros", eletronico="NAO", uid="u-2", caixa="CX-3"),
@@ -3159,13 +3277,15 @@ def test_load_session_continues_when_gis_fails(ui_window_factory, monkeypatch, t
         lambda path: True if path == window.MICROB_DIR else real_isdir(path),
     )
     monkeypatch.setattr(
-        "app.ui.controllers.data_controller.GisService",
+        "app.ui.controllers.data_controller.create_gis_service",
         lambda *args, **kwargs: (_ for _ in ()).throw(ValueError("shapefile quebrado")),
     )
 
     assert window._load_session(str(workbook_path)) is True
     assert len(window.records) == 1
+    wait_for_gis_load(window)
     assert window.gis is None
+    assert window.startup_timeline.gis_error == "shapefile quebrado"
     assert "Microbacias indisponiveis" in window.data_tab.map_notice_label.text()
     assert any(context == "clear-microbacias-load-failure" for context, _script in map_calls)
     assert any(context == "gis-load-failure-status" for context, _script in map_calls)
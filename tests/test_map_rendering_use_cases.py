@@ -63,3 +63,15 @@ def test_map_rendering_builds_initial_sync_commands_and_custom_layer_script():
     assert "window.setHeatmap([[-22.05, -47.95]])" in commands[4].script
     assert "window.customLayer = L.geoJSON" in custom_layer.script
     assert "window.highlightGeoJsonByName(\"Nome_Do_Arquivo\", \"Gregorio\")" in highlight.script
+
+
+def test_map_rendering_injects_preserialized_microbacias_layer_verbatim():
+    use_cases = MapRenderingUseCases()
+
+    cached = use_cases.build_microbacias_command('{"type":"FeatureCollection","features":[],"lods":[]}')
+    built = use_cases.build_microbacias_command({"type": "FeatureCollection", "features": []})
+
+    assert cached.script == (
+        'if(window.setMicrobacias) window.setMicrobacias({"type":"FeatureCollection","features":[],"lods":[]});'
+    )
+    assert '{"type": "FeatureCollection", "features": []}' in built.script
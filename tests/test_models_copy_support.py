@@ -0,0 +1,58 @@
+import pickle
+from copy import deepcopy
+from datetime import date
+
+import pytest
+
+from app.models.compensacao import Compensacao
+from app.models.plantio_item import PlantioItem
+from app.models.tcra import Tcra
+from app.models.tcra_evento import TcraEvento
+
+
+def make_record() -> Compensacao:
+    return Compensacao(
+        excel_row=2,
+        oficio_processo="123/2026",
+        eletronico="SIM",
+        caixa="CX-1",
+        av_tec="AT-1",
+        compensacao="10",
+        endereco="Rua A",
+        microbacia="Gregorio",
+        compensado="",
+        uid="uid-1",
+        plantios=[PlantioItem(sequence=1, endereco="Area 1", qtd_mudas="5")],
+    )
+
+
+def test_models_are_slotted_without_instance_dict():
+    record = make_record()
+    tcra = Tcra(uid="tcra-1", eventos=[TcraEvento(sequence=1, data_evento=date(2026, 1, 2))])
+
+    for instance in (record, record.plantios[0], tcra, tcra.eventos[0]):
+        assert not hasattr(instance, "__dict__")
+    with pytest.raises(AttributeError):
+        record.campo_inexistente = "x"
+
+
+def test_deepcopy_clones_nested_lists_and_keeps_equality():
+    record = make_record()
+    tcra = Tcra(uid="tcra-1", prazo_final=date(2027, 1, 1), eventos=[TcraEvento(sequence=1, tipo_evento="Relatorio")])
+
+    records_copy = deepcopy([record, record])
+    assert records_copy[0] == record
+    assert records_copy[0] is records_copy[1]
+    assert records_copy[0].plantios is not record.plantios
+    assert records_copy[0].plantios[0] is not record.plantios[0]
+    records_copy[0].plantios[0].qtd_mudas = "99"
+    assert record.plantios[0].qtd_mudas == "5"
+
+    tcra_copy = deepcopy(tcra)
+    assert tcra_copy == tcra
+    assert tcra_copy.eventos[0] is not tcra.eventos[0]
+
+
+def test_slotted_models_still_pickle():
+    record = make_record()
+    assert pickle.loads(pickle.dumps(record)) == record
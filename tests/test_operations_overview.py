@@ -9,6 +9,9 @@ from app.application.use_cases.persistence_monitoring import (
 )
 from app.services.access_service import AccessEnvironment, AppAccessSession
 from app.services.audit_service import AuditEvent
+from app.services.tile_cache_store import TileCacheStore
+from app.services.tile_seed_service import TileBounds, TileSeeder, TileSeedPolicy, plan_tile_seed
+from app.ui.components.workers import TileSeedWorker
 
 
 def make_event(*, event_id, timestamp, action, summary, backup_path="", metadata=None):
@@ -452,6 +455,92 @@ def test_operations_tab_shows_runtime_jobs_and_cancel_action(ui_window_factory):
     window.close()
 
 
+def test_operations_tab_seeds_offline_tiles_as_background_job(ui_window_factory, monkeypatch, tmp_path):
+    window = ui_window_factory()
+    store = TileCacheStore(tmp_path / "tiles.mbtiles")
+    infos = []
+    policies = {"carto_light": TileSeedPolicy("carto_light", rate_per_second=1000.0)}
+    response = type("Response", (), {"status_code": 200, "content": b"tile", "headers": {}})()
+
+    class InlineTileSeedWorker(TileSeedWorker):
+        def start(self):
+            self.run()
+
+    monkeypatch.setattr("app.ui.controllers.operations_controller.get_shared_tile_store", lambda: store)
+    monkeypatch.setattr("app.ui.controllers.operations_controller.msg_confirm", lambda *args: True)
+    monkeypatch.setattr(
+        "app.ui.controllers.operations_controller.plan_tile_seed",
+        lambda: plan_tile_seed(TileBounds(-22.02, -47.90, -22.01, -47.89), min_zoom=13, max_zoom=13, policies=policies),
+    )
+    monkeypatch.setattr(
+        "app.ui.controllers.operations_controller.QMessageBox.information",
+        lambda *args: infos.append(args[2]),
+    )
+    window.operations_controller.tile_seed_worker_factory = lambda keys, target: InlineTileSeedWorker(
+        keys,
+        seeder=TileSeeder(target, policies=policies, get=lambda url, **kwargs: response),
+    )
+
+    window.operations_tab.btn_seed_tiles.click()
+
+    job = next(job for job in window.list_runtime_jobs(limit=10) if job.name == "tile_seed")
+    assert job.status == "completed"
+    assert "Mapas offline atualizados: 1 tile(s) baixados" in infos[0]
+    assert store.stats().disk_tiles == 1
+    assert window.operations_controller._tile_seed_worker is None
+    window.close()
+
+
+def test_operations_tab_can_seed_again_after_the_seeder_fails(ui_window_factory, monkeypatch, tmp_path):
+    window = ui_window_factory()
+    store = TileCacheStore(tmp_path / "tiles.mbtiles")
+    warnings = []
+    policies = {"carto_light": TileSeedPolicy("carto_light", rate_per_second=1000.0)}
+    response = type("Response", (), {"status_code": 200, "content": b"tile", "headers": {}})()
+
+    class InlineTileSeedWorker(TileSeedWorker):
+        def start(self):
+            self.run()
+
+    class BrokenSeeder(TileSeeder):
+        def seed(self, keys, *, on_progress=None):
+            raise OSError("disco cheio")
+
+    monkeypatch.setattr("app.ui.controllers.operations_controller.get_shared_tile_store", lambda: store)
+    monkeypatch.setattr("app.ui.controllers.operations_controller.msg_confirm", lambda *args: True)
+    monkeypatch.setattr(
+        "app.ui.controllers.operations_controller.plan_tile_seed",
+        lambda: plan_tile_seed(TileBounds(-22.02, -47.90, -22.01, -47.89), min_zoom=13, max_zoom=13, policies=policies),
+    )
+    monkeypatch.setattr(
+        "app.ui.controllers.operations_controller.QMessageBox.warning",
+        lambda *args: warnings.append(args[2]),
+    )
+    monkeypatch.setattr("app.ui.controllers.operations_controller.QMessageBox.information", lambda *args: None)
+    seeders = [
+        BrokenSeeder(store, policies=policies),
+        TileSeeder(store, policies=policies, get=lambda url, **kwargs: response),
+    ]
+    window.operations_controller.tile_seed_worker_factory = lambda keys, target: InlineTileSeedWorker(
+        keys,
+        seeder=seeders.pop(0),
+    )
+
+    window.operations_tab.btn_seed_tiles.click()
+
+    failed_job = next(job for job in window.list_runtime_jobs(limit=10) if job.name == "tile_seed")
+    assert failed_job.status == "failed"
+    assert "disco cheio" in warnings[0]
+    assert window.operations_controller._tile_seed_worker is None
+
+    window.operations_tab.btn_seed_tiles.click()
+
+    assert seeders == []
+    assert store.stats().disk_tiles == 1
+    assert window.operations_controller._tile_seed_worker is None
+    window.close()
+
+
 def test_operations_tab_can_toggle_technical_details(ui_window_factory):
     window = ui_window_factory()
 
@@ -0,0 +1,92 @@
+from app.models.compensacao import Compensacao
+from app.models.plantio_item import PlantioItem
+from app.models.record_snapshot import RecordSnapshot
+
+
+def make_record(**overrides) -> Compensacao:
+    base = {
+        "excel_row": 2,
+        "oficio_processo": "123/2026",
+        "eletronico": "SIM",
+        "caixa": "CX-1",
+        "av_tec": "AT-1",
+        "compensacao": "10",
+        "endereco": "Rua A",
+        "microbacia": "Gregorio",
+        "compensado": "",
+        "uid": "uid-1",
+    }
+    base.update(overrides)
+    return Compensacao(**base)
+
+
+def build_records(total: int) -> list[Compensacao]:
+    return [
+        make_record(
+            uid=f"u-{index}",
+            excel_row=index + 2,
+            plantios=[PlantioItem(sequence=1, endereco=f"Area {index}")],
+        )
+        for index in range(total)
+    ]
+
+
+def test_snapshot_edit_shares_unchanged_records_and_copies_only_the_edited_one():
+    records = build_records(5)
+    base = RecordSnapshot.from_records(reversed(records))
+    edited = make_record(uid="u-2", excel_row=4, endereco="Rua B")
+
+    projected = base.with_replaced(edited)
+
+    assert [record.uid for record in base] == ["u-0", "u-1", "u-2", "u-3", "u-4"]
+    assert all(projected[index] is records[index] for index in (0, 1, 3, 4))
+    assert projected[2] is not edited
+    assert projected[2].endereco == "Rua B"
+    assert base[2].endereco == "Rua A"
+    assert projected.version_of("u-2") == 2
+    assert projected.version_of("u-1") == 1
+    assert projected.get("u-2") is projected[2]
+    assert RecordSnapshot.from_records(projected) is projected
+
+
+def test_snapshot_delete_shifts_following_rows_without_touching_the_base():
+    records = build_records(4)
+    base = RecordSnapshot(records)
+
+    projected = base.without(records[1])
+
+    assert [(record.uid, record.excel_row) for record in projected] == [("u-0", 2), ("u-2", 3), ("u-3", 4)]
+    assert projected[0] is records[0]
+    assert projected[1] is not records[2]
+    assert projected[1].plantios is records[2].plantios
+    assert [record.excel_row for record in records] == [2, 3, 4, 5]
+    assert projected.version_of("u-1") == 0
+    assert projected.version_of("u-3") == 2
+
+
+def test_snapshot_delete_can_keep_following_rows_in_place():
+    records = build_records(4)
+
+    projected = RecordSnapshot(records).without(records[1], shift_rows=False)
+
+    assert [(record.uid, record.excel_row) for record in projected] == [("u-0", 2), ("u-2", 4), ("u-3", 5)]
+    assert all(projected[index] is records[index + 1] for index in (1, 2))
+    assert projected.version_of("u-2") == 1
+
+
+def test_snapshot_add_and_import_keep_order_and_compare_as_sequences():
+    records = build_records(3)
+    base = RecordSnapshot(records)
+    appended = make_record(uid="u-9", excel_row=9)
+    inserted = make_record(uid="u-x", excel_row=3)
+
+    after_add = base.with_added((appended,))
+    after_import = after_add.with_added([inserted])
+
+    assert [record.uid for record in after_add] == ["u-0", "u-1", "u-2", "u-9"]
+    assert [record.uid for record in after_import] == ["u-0", "u-1", "u-x", "u-2", "u-9"]
+    assert after_import[2] is not inserted
+    assert after_import.version_of("u-x") == 1
+    assert base == records
+    assert len(after_import) == 5
+    assert base.with_added(()) is base
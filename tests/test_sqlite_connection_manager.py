@@ -0,0 +1,124 @@
+import sqlite3
+import threading
+
+import pytest
+
+from app.services.sqlite_connection_manager import (
+    SqliteConnectionManager,
+    SqliteConnectionSettings,
+    close_connection_manager,
+    get_connection_manager,
+)
+from app.services.sqlite_mirror_service import SqliteMirrorService
+from app.services.tcra_sqlite_service import TcraSqliteService
+
+
+def test_sqlite_connection_manager_reuses_connections_and_applies_pragmas_once(tmp_path):
+    manager = SqliteConnectionManager(
+        tmp_path / "local.db",
+        settings=SqliteConnectionSettings(cache_size_kib=4096, mmap_size_bytes=1024 * 1024),
+    )
+    with manager.writer() as conn:
+        conn.execute("CREATE TABLE items (value TEXT)")
+        conn.execute("INSERT INTO items (value) VALUES ('a')")
+
+    for _ in range(10):
+        with manager.reader() as conn:
+            assert conn.execute("SELECT COUNT(*) FROM items").fetchone()[0] == 1
+            assert conn.execute("PRAGMA cache_size").fetchone()[0] == -4096
+            assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+    stats = manager.stats()
+    assert stats.acquisitions == 11
+    assert stats.writer_acquisitions == 1
+    assert stats.reader_acquisitions == 10
+    assert stats.connections_opened == 2
+    manager.close()
+
+
+def test_sqlite_connection_manager_nested_reader_sees_pending_writes_and_rolls_back(tmp_path):
+    manager = SqliteConnectionManager(tmp_path / "local.db")
+    with manager.writer() as conn:
+        conn.execute("CREATE TABLE items (value TEXT)")
+
+    with pytest.raises(RuntimeError):
+        with manager.writer() as conn:
+            conn.execute("INSERT INTO items (value) VALUES ('pending')")
+            with manager.reader() as nested:
+                assert nested is conn
+                assert nested.execute("SELECT COUNT(*) FROM items").fetchone()[0] == 1
+            raise RuntimeError("falha simulada")
+
+    with manager.reader() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM items").fetchone()[0] == 0
+    assert manager.stats().reused_acquisitions == 1
+    manager.close()
+
+
+def test_sqlite_connection_manager_waits_for_free_reader_and_counts_wait(tmp_path):
+    manager = SqliteConnectionManager(tmp_path / "local.db", settings=SqliteConnectionSettings(reader_pool_size=1))
+    released = threading.Event()
+    acquired = threading.Event()
+
+    def hold_reader():
+        with manager.reader():
+            acquired.set()
+            released.wait(timeout=5)
+
+    worker = threading.Thread(target=hold_reader)
+    worker.start()
+    acquired.wait(timeout=5)
+    threading.Timer(0.05, released.set).start()
+    with manager.reader() as conn:
+        conn.execute("SELECT 1").fetchone()
+    worker.join(timeout=5)
+
+    stats = manager.stats()
+    assert stats.connections_opened == 1
+    assert stats.wait_seconds_max >= 0.04
+    assert stats.wait_seconds_total >= stats.wait_seconds_max
+    manager.close()
+
+
+def test_sqlite_connection_manager_reopens_after_database_file_is_replaced(tmp_path):
+    db_path = tmp_path / "local.db"
+    manager = SqliteConnectionManager(db_path)
+    with manager.writer() as conn:
+        conn.execute("CREATE TABLE items (value TEXT)")
+    with manager.reader() as conn:
+        conn.execute("SELECT COUNT(*) FROM items").fetchone()
+
+    db_path.unlink()
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("CREATE TABLE replaced (value TEXT)")
+
+    with manager.reader() as conn:
+        tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'").fetchall()}
+    assert tables == {"replaced"}
+    manager.close()
+
+
+def test_sqlite_services_share_one_manager_per_database(tmp_path):
+    db_path = tmp_path / "local.db"
+    mirror = SqliteMirrorService(db_path=db_path)
+    tcra = TcraSqliteService(db_path=db_path)
+
+    assert mirror.connection_manager is tcra.connection_manager
+    assert get_connection_manager(db_path) is mirror.connection_manager
+
+    opened_before = mirror.connection_manager.stats().connections_opened
+    for _ in range(5):
+        mirror.query_records_for_workbook("session://painel")
+        mirror.query_metrics_for_workbook("session://painel")
+        mirror.query_filter_facets_for_workbook("session://painel")
+        tcra.query_filter_facets()
+    assert mirror.connection_manager.stats().connections_opened - opened_before <= 1
+
+    close_connection_manager(db_path)
+    db_path.unlink()
+    recreated = SqliteMirrorService(db_path=db_path)
+
+    assert get_connection_manager(db_path) is mirror.connection_manager
+    assert recreated.connection_manager is tcra.connection_manager
+    with mirror.connection_manager.writer() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM records").fetchone()[0] == 0
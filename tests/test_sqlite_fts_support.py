@@ -0,0 +1,71 @@
+import sqlite3
+
+from app.services.sqlite_fts_support import (
+    build_fts_match_query,
+    build_search_clauses,
+    ensure_trigram_index,
+    rank_fts_rowids,
+    split_search_terms,
+)
+
+
+def test_sqlite_fts_support_splits_terms_without_accents_or_duplicates():
+    assert split_search_terms("  São  Sebastião sao ") == ("sao", "sebastiao")
+    assert split_search_terms(None) == ()
+    assert build_fts_match_query(("rua", 'x"y')) == '"rua" AND "x""y"'
+
+
+def test_sqlite_fts_support_falls_back_to_like_for_short_terms_and_missing_index():
+    clauses, params = build_search_clauses(("rua", "10"), fts_table="records_fts", rowid_column="id")
+
+    assert clauses == [
+        "id IN (SELECT rowid FROM records_fts WHERE records_fts MATCH ?)",
+        "search_blob_norm LIKE ? ESCAPE '\\'",
+    ]
+    assert params == ['"rua"', "%10%"]
+
+    clauses, params = build_search_clauses(("100%",), fts_table=None, rowid_column="id")
+
+    assert clauses == ["search_blob_norm LIKE ? ESCAPE '\\'"]
+    assert params == ["%100\\%%"]
+
+
+def test_sqlite_fts_support_indexes_existing_rows_and_tracks_changes():
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE items (id INTEGER PRIMARY KEY, search_blob_norm TEXT NOT NULL)")
+    conn.execute("INSERT INTO items (id, search_blob_norm) VALUES (1, 'rua alfa'), (2, 'rua beta')")
+
+    assert ensure_trigram_index(
+        conn,
+        fts_table="items_fts",
+        content_table="items",
+        content_rowid="id",
+        column="search_blob_norm",
+    )
+    conn.execute("UPDATE items SET search_blob_norm = 'rua gama' WHERE id = 2")
+    conn.execute("INSERT INTO items (id, search_blob_norm) VALUES (3, 'praca alfa')")
+
+    assert set(rank_fts_rowids(conn, ("alfa",), fts_table="items_fts")) == {1, 3}
+    assert rank_fts_rowids(conn, ("beta",), fts_table="items_fts") == {}
+    assert set(rank_fts_rowids(conn, ("rua",), fts_table="items_fts")) == {1, 2}
+
+
+def test_sqlite_fts_support_rebuilds_index_after_a_session_without_triggers(monkeypatch):
+    import app.services.sqlite_fts_support as fts_support
+
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE items (id INTEGER PRIMARY KEY, search_blob_norm TEXT NOT NULL)")
+    conn.execute("INSERT INTO items (id, search_blob_norm) VALUES (1, 'rua alfa')")
+    options = dict(fts_table="items_fts", content_table="items", content_rowid="id", column="search_blob_norm")
+    assert ensure_trigram_index(conn, **options)
+
+    monkeypatch.setattr(fts_support, "fts5_trigram_available", lambda _conn: False)
+    assert not ensure_trigram_index(conn, **options)
+    conn.execute("UPDATE items SET search_blob_norm = 'rua beta' WHERE id = 1")
+    conn.execute("INSERT INTO items (id, search_blob_norm) VALUES (2, 'praca gama')")
+    monkeypatch.undo()
+
+    assert ensure_trigram_index(conn, **options)
+    assert rank_fts_rowids(conn, ("alfa",), fts_table="items_fts") == {}
+    assert set(rank_fts_rowids(conn, ("beta",), fts_table="items_fts")) == {1}
+    assert set(rank_fts_rowids(conn, ("gama",), fts_table="items_fts")) == {2}
@@ -5,6 +5,7 @@ import pytest
 
 from app.models.compensacao import Compensacao
 from app.models.plantio_item import PlantioItem
+from app.services.sqlite_aggregates_support import rebuild_workbook_aggregates
 from app.services.sqlite_mirror_service import (
     LocalWorkspaceEntry,
     LocalWorkspaceFilterFacets,
@@ -75,7 +76,17 @@ def test_sqlite_mirror_service_initializes_schema(tmp_path):
     assert {"meta", "workbooks", "records", "plantios", "audit_events"}.issubset(tables)
     assert int(schema_version) == SCHEMA_VERSION
     assert {"source_mtime_ns", "source_size"}.issubset(workbook_columns)
-    assert {"oficio_year", "tipo_key", "microbacia_key", "search_blob_norm", "updated_at"}.issubset(record_columns)
+    assert {
+        "oficio_year",
+        "tipo_key",
+        "microbacia_key",
+        "search_blob_norm",
+        "updated_at",
+        "content_hash",
+        "compensacao_value",
+        "is_compensado",
+        "caixa_key",
+    }.issubset(record_columns)
 
 
 def test_sync_workbook_snapshot_persists_records_and_plantios(tmp_path):
@@ -141,6 +152,153 @@ def test_sync_workbook_snapshot_rolls_back_on_invalid_duplicate(tmp_path):
     assert persisted_rows == [("uid-1", "AT-1")]
 
 
+def test_sync_workbook_snapshot_bulk_mode_rebuilds_query_indexes(tmp_path):
+    service = SqliteMirrorService(db_path=tmp_path / "mirror.db")
+    records = [
+        make_record(
+            excel_row=row,
+            uid=f"uid-{row}",
+            av_tec=f"AT-{row}",
+            plantios=[PlantioItem(sequence=1, endereco=f"Area {row}", qtd_mudas="5")],
+        )
+        for row in range(2, 42)
+    ]
+
+    summary = service.sync_workbook_snapshot("session://bulk", records, rebuild_indexes=True)
+
+    with sqlite3.connect(service.db_path) as conn:
+        index_names = {
+            row[0]
+            for row in conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'records'"
+            ).fetchall()
+        }
+        plantio_rows = conn.execute(
+            """
+            SELECT records.uid, plantios.endereco
+            FROM plantios
+            JOIN records ON records.id = plantios.record_id
+            ORDER BY records.excel_row
+            """
+        ).fetchall()
+
+    assert summary.record_count == 40
+    assert summary.plantio_count == 40
+    assert {
+        "idx_records_workbook_row",
+        "idx_records_workbook_av_tec",
+        "idx_records_workbook_year",
+        "idx_records_workbook_tipo_key",
+        "idx_records_workbook_micro_key",
+    }.issubset(index_names)
+    assert plantio_rows[0] == ("uid-2", "Area 2")
+    assert plantio_rows[-1] == ("uid-41", "Area 41")
+    assert [record.uid for record in service.list_records_for_workbook("session://bulk")][:2] == ["uid-2", "uid-3"]
+
+
+def test_sync_workbook_snapshot_only_rewrites_changed_rows(tmp_path):
+    service = SqliteMirrorService(db_path=tmp_path / "mirror.db")
+    records = [make_record(excel_row=row, uid=f"uid-{row}", av_tec=f"AT-{row}") for row in range(2, 7)]
+    service.sync_workbook_snapshot("session://diff", records)
+
+    with sqlite3.connect(service.db_path) as conn:
+        before = dict(conn.execute("SELECT uid, id FROM records").fetchall())
+
+    edited = [make_record(excel_row=row, uid=f"uid-{row}", av_tec=f"AT-{row}") for row in range(2, 7)]
+    edited[2].compensado = "SIM"
+    with sqlite3.connect(service.db_path) as conn:
+        conn.execute("UPDATE records SET synced_at = 'antes'")
+        conn.commit()
+
+    summary = service.sync_workbook_snapshot("session://diff", edited)
+
+    with sqlite3.connect(service.db_path) as conn:
+        after = dict(conn.execute("SELECT uid, id FROM records").fetchall())
+        touched = [
+            row[0]
+            for row in conn.execute("SELECT uid FROM records WHERE synced_at != 'antes' ORDER BY excel_row").fetchall()
+        ]
+        compensado = conn.execute("SELECT compensado FROM records WHERE uid = 'uid-4'").fetchone()[0]
+
+    assert summary.record_count == 5
+    assert after == before
+    assert touched == ["uid-4"]
+    assert compensado == "SIM"
+
+
+def test_sync_workbook_snapshot_diff_handles_shifted_rows(tmp_path):
+    service = SqliteMirrorService(db_path=tmp_path / "mirror.db")
+    records = [
+        make_record(
+            excel_row=row,
+            uid=f"uid-{row}",
+            av_tec=f"AT-{row}",
+            plantios=[PlantioItem(sequence=1, endereco=f"Area {row}", qtd_mudas="12")],
+        )
+        for row in range(2, 6)
+    ]
+    service.sync_workbook_snapshot("session://diff", records)
+
+    shifted = [
+        make_record(excel_row=2, uid="uid-2", av_tec="AT-2"),
+        make_record(excel_row=3, uid="uid-novo", av_tec="AT-NOVO"),
+        make_record(excel_row=4, uid="uid-4", av_tec="AT-4"),
+        make_record(excel_row=5, uid="uid-5", av_tec="AT-5"),
+    ]
+    summary = service.sync_workbook_snapshot("session://diff", shifted)
+
+    persisted = service.list_records_for_workbook("session://diff")
+
+    assert summary.record_count == 4
+    assert [(record.excel_row, record.uid) for record in persisted] == [
+        (2, "uid-2"),
+        (3, "uid-novo"),
+        (4, "uid-4"),
+        (5, "uid-5"),
+    ]
+    assert summary.plantio_count == 4
+    assert persisted[1].plantios[0].endereco == "Area principal"
+
+    reordered = [
+        make_record(excel_row=2, uid="uid-5", av_tec="AT-5"),
+        make_record(excel_row=3, uid="uid-4", av_tec="AT-4"),
+    ]
+    service.sync_workbook_snapshot("session://diff", reordered)
+
+    assert [
+        (record.excel_row, record.uid)
+        for record in service.list_records_for_workbook("session://diff")
+    ] == [(2, "uid-5"), (3, "uid-4")]
+
+
+def test_sync_workbook_snapshot_matches_uids_case_insensitively(tmp_path):
+    service = SqliteMirrorService(db_path=tmp_path / "mirror.db")
+    service.sync_workbook_snapshot("session://diff", [make_record(excel_row=2, uid="UID-A", av_tec="AT-1")])
+    with sqlite3.connect(service.db_path) as conn:
+        record_id = conn.execute("SELECT id FROM records").fetchone()[0]
+
+    service.sync_workbook_snapshot(
+        "session://diff",
+        [
+            make_record(excel_row=2, uid="uid-a", av_tec="AT-EDITADO"),
+            make_record(
+                excel_row=3,
+                uid="uid-b",
+                av_tec="AT-2",
+                plantios=[PlantioItem(sequence=1, endereco="Area B", qtd_mudas="3")],
+            ),
+        ],
+    )
+    service.apply_workbook_changes("session://diff", [], deleted_uids=["UID-B"])
+
+    with sqlite3.connect(service.db_path) as conn:
+        rows = conn.execute("SELECT id, uid, av_tec FROM records ORDER BY excel_row").fetchall()
+        orphan_plantios = conn.execute("SELECT COUNT(*) FROM plantios WHERE endereco = 'Area B'").fetchone()[0]
+
+    assert rows == [(record_id, "uid-a", "AT-EDITADO")]
+    assert orphan_plantios == 0
+
+
 def test_mirror_audit_event_is_idempotent_and_updates_summary(tmp_path):
     service = SqliteMirrorService(db_path=tmp_path / "mirror.db")
     workbook_path = tmp_path / "base.xlsx"
@@ -429,6 +587,61 @@ def test_query_records_for_workbook_applies_indexed_filters(tmp_path):
     assert [record.uid for record in filtered] == ["uid-3"]
 
 
+def test_query_records_for_workbook_matches_every_search_term_without_accents(tmp_path):
+    service = SqliteMirrorService(db_path=tmp_path / "mirror.db")
+    workbook_path = tmp_path / "base.xlsx"
+    records = [
+        make_record(excel_row=2, uid="uid-1", av_tec="AT-1"),
+        make_record(excel_row=3, uid="uid-2", av_tec="AT-2"),
+        make_record(excel_row=4, uid="uid-3", av_tec="AT-3"),
+    ]
+    records[0].endereco = "Rua São Sebastião, 10"
+    records[0].microbacia = "Gregório"
+    records[1].endereco = "Rua São Sebastião, Q7"
+    records[1].microbacia = "Medeiros"
+    records[2].endereco = "Avenida Paulista"
+    records[2].microbacia = "Gregório"
+
+    service.sync_workbook_snapshot(str(workbook_path), records)
+
+    assert service.full_text_search_enabled is True
+    indexed = service.query_records_for_workbook(str(workbook_path), search_text="sebastiao GREGORIO")
+    ranked = service.query_records_for_workbook(
+        str(workbook_path),
+        search_text="gregorio",
+        rank_by_relevance=True,
+    )
+    service.full_text_search_enabled = False
+    fallback = service.query_records_for_workbook(str(workbook_path), search_text="sebastiao GREGORIO")
+    short_term = service.query_records_for_workbook(str(workbook_path), search_text="q7")
+
+    assert [record.uid for record in indexed] == ["uid-1"]
+    assert sorted(record.uid for record in ranked) == ["uid-1", "uid-3"]
+    assert [record.uid for record in fallback] == ["uid-1"]
+    assert [record.uid for record in short_term] == ["uid-2"]
+
+
+def test_sync_workbook_snapshot_keeps_full_text_index_in_sync(tmp_path):
+    service = SqliteMirrorService(db_path=tmp_path / "mirror.db")
+    workbook_path = tmp_path / "base.xlsx"
+    records = [
+        make_record(excel_row=2, uid="uid-1", av_tec="AT-1"),
+        make_record(excel_row=3, uid="uid-2", av_tec="AT-2"),
+    ]
+    records[0].endereco = "Rua Alfa"
+    records[1].endereco = "Rua Beta"
+    service.sync_workbook_snapshot(str(workbook_path), records)
+
+    records[0].endereco = "Rua Gama"
+    service.sync_workbook_snapshot(str(workbook_path), records[:1])
+
+    assert service.query_records_for_workbook(str(workbook_path), search_text="alfa") == []
+    assert service.query_records_for_workbook(str(workbook_path), search_text="beta") == []
+    assert [record.uid for record in service.query_records_for_workbook(str(workbook_path), search_text="gama")] == [
+        "uid-1"
+    ]
+
+
 def test_query_filter_facets_for_workbook_returns_distinct_microbacias_and_years(tmp_path):
     service = SqliteMirrorService(db_path=tmp_path / "mirror.db")
     workbook_path = tmp_path / "base.xlsx"
@@ -496,6 +709,122 @@ def test_query_metrics_for_workbook_returns_same_filtered_breakdown(tmp_path):
     assert ("Eletrônico", 12.0) in metrics["pend_ele_sorted"]
 
 
+def test_query_metrics_for_workbook_uses_typed_value_and_status_columns(tmp_path):
+    service = SqliteMirrorService(db_path=tmp_path / "mirror.db")
+    workbook_path = tmp_path / "base.xlsx"
+    records = [
+        make_record(excel_row=2, uid="uid-1", av_tec="AT-1"),
+        make_record(excel_row=3, uid="uid-2", av_tec="AT-2"),
+        make_record(excel_row=4, uid="uid-3", av_tec="AT-3"),
+    ]
+    records[0].compensacao = " 1,5 "
+    records[0].compensado = " sim "
+    records[0].caixa = " cx-a "
+    records[1].compensacao = "12abc"
+    records[1].caixa = "CX-A"
+    records[2].compensacao = "4"
+    records[2].caixa = "CX-B"
+    service.sync_workbook_snapshot(str(workbook_path), records)
+
+    with sqlite3.connect(service.db_path) as conn:
+        typed_rows = conn.execute(
+            "SELECT compensacao_value, is_compensado, caixa_key FROM records ORDER BY excel_row"
+        ).fetchall()
+    assert typed_rows == [(1.5, 1, "CX-A"), (12.0, 0, "CX-A"), (4.0, 0, "CX-B")]
+
+    metrics = service.query_metrics_for_workbook(str(workbook_path))
+    assert metrics["total_geral"] == 17.5
+    assert metrics["total_compensado"] == 1.5
+    assert metrics["count_comp"] == 1
+    assert metrics["count_pend"] == 2
+
+    filtered = service.query_records_for_workbook(
+        str(workbook_path),
+        status="Compensados",
+        selected_caixas=("cx-a",),
+        caixa_all_selected=False,
+    )
+    assert [record.uid for record in filtered] == ["uid-1"]
+
+    records[1].compensado = "SIM"
+    service.sync_workbook_snapshot(str(workbook_path), records)
+    assert service.query_metrics_for_workbook(str(workbook_path), status="Compensados")["count_total"] == 2
+
+
+def _aggregate_snapshot(db_path) -> list[tuple]:
+    with sqlite3.connect(db_path) as conn:
+        rows = conn.execute(
+            """
+            SELECT workbook_id, dimension, label, record_count, compensados_count,
+                   compensado_cents, pendente_cents, without_coordinates_count
+            FROM workbook_aggregates
+            ORDER BY workbook_id, dimension, label
+            """
+        ).fetchall()
+    return rows
+
+
+def test_workbook_aggregates_follow_every_mutation_and_match_a_rebuild(tmp_path):
+    service = SqliteMirrorService(db_path=tmp_path / "mirror.db")
+    workbook_path = str(tmp_path / "base.xlsx")
+    records = [make_record(excel_row=row, uid=f"uid-{row}", av_tec=f"AT-{row}") for row in range(2, 8)]
+    records[0].compensado = "SIM"
+    records[1].microbacia = ""
+    records[2].latitude = "-22.0"
+    records[2].longitude = "-47.9"
+    records[3].compensacao = "2,5"
+    service.sync_workbook_snapshot(workbook_path, records)
+    service.sync_workbook_snapshot("session://outra", records[:2])
+
+    extra = make_record(excel_row=8, uid="uid-8", av_tec="AT-8")
+    extra.microbacia = "Medeiros"
+    service.append_record_to_workbook(workbook_path, extra)
+    records[4].compensado = "SIM"
+    records[4].microbacia = "Medeiros"
+    service.update_record_in_workbook(workbook_path, records[4])
+    service.delete_record_from_workbook(workbook_path, records[5])
+    records = [record for record in records if record.uid != "uid-7"]
+    records[1].compensacao = "30"
+    service.sync_workbook_snapshot(workbook_path, [*records, extra])
+
+    incremental = _aggregate_snapshot(service.db_path)
+    with sqlite3.connect(service.db_path) as conn:
+        rebuild_workbook_aggregates(conn)
+    assert _aggregate_snapshot(service.db_path) == incremental
+
+    metrics = service.query_metrics_for_workbook(workbook_path)
+    filtered = service.query_metrics_for_workbook(workbook_path, search_text="rua")
+    assert metrics == filtered
+    assert metrics["count_total"] == 6
+    assert metrics["count_comp"] == 2
+    assert metrics["total_geral"] == 12.0 * 3 + 2.5 + 30.0 + 12.0
+    assert metrics["pend_micro_sorted"] == [("(Sem microbacia)", 30.0), ("Gregorio", 14.5), ("Medeiros", 12.0)]
+
+    overview = service.build_workbook_record_overview(workbook_path)
+    assert overview.total_records == 6
+    assert overview.compensados_count == 2
+    assert overview.records_without_microbacia_count == 1
+    assert overview.records_without_coordinates_count == 5
+    assert overview.top_microbacias[0] == ("Gregorio", 3)
+
+
+def test_workbook_aggregates_are_backfilled_for_existing_databases(tmp_path):
+    db_path = tmp_path / "mirror.db"
+    service = SqliteMirrorService(db_path=db_path)
+    records = [make_record(excel_row=2, uid="uid-1", av_tec="AT-1"), make_record(excel_row=3, uid="uid-2", av_tec="AT-2")]
+    service.sync_workbook_snapshot("session://painel", records)
+    expected = _aggregate_snapshot(db_path)
+    with sqlite3.connect(db_path) as conn:
+        for trigger_name in ("records_aggregates_ai", "records_aggregates_ad", "records_aggregates_au"):
+            conn.execute(f"DROP TRIGGER {trigger_name}")
+        conn.execute("DROP TABLE workbook_aggregates")
+
+    SqliteMirrorService(db_path=db_path)
+
+    assert _aggregate_snapshot(db_path) == expected
+    assert expected[0][3] == 2
+
+
 def test_sqlite_mirror_service_migrates_v2_schema_and_backfills_query_columns(tmp_path):
     db_path = tmp_path / "legacy_v2.db"
     workbook_path = str((tmp_path / "base.xlsx").resolve())
@@ -598,6 +927,10 @@ def test_sqlite_mirror_service_migrates_v2_schema_and_backfills_query_columns(tm
         row = conn.execute(
             "SELECT oficio_year, tipo_key, microbacia_key, search_blob_norm, updated_at FROM records WHERE uid = 'uid-1'"
         ).fetchone()
+        typed_row = conn.execute(
+            "SELECT compensacao_value, is_compensado, caixa_key FROM records WHERE uid = 'uid-1'"
+        ).fetchone()
+        modified_at = conn.execute("SELECT modified_at FROM records WHERE uid = 'uid-1'").fetchone()[0]
         workbook_row = conn.execute(
             "SELECT source_mtime_ns, source_size FROM workbooks WHERE id = 1"
         ).fetchone()
@@ -607,6 +940,8 @@ def test_sqlite_mirror_service_migrates_v2_schema_and_backfills_query_columns(tm
     assert row[2] == "GREGORIO"
     assert "abc/2026" in row[3]
     assert isinstance(row[4], str)
+    assert typed_row == (12.0, 0, "ARQUIVADO")
+    assert modified_at == "2026-03-31T12:00:00.000000+00:00"
     assert int(workbook_row[0]) > 0
     assert int(workbook_row[1]) == (tmp_path / "base.xlsx").stat().st_size
     filtered = service.query_records_for_workbook(
@@ -692,3 +1027,104 @@ def test_sqlite_mirror_service_exposes_local_workspace_wrappers(tmp_path):
     assert service.get_local_workspace_display_name(workspace.session_path) == "Base Operacional"
     assert diagnostics.session_path == workspace.session_path
     assert [item.uid for item in service.list_records_for_local_workspace(workspace.session_path)] == ["uid-1"]
+
+
+def test_query_record_page_for_workbook_walks_filtered_rows_by_excel_row(tmp_path):
+    service = SqliteMirrorService(db_path=tmp_path / "mirror.db")
+    workbook_path = str(tmp_path / "base.xlsx")
+    records = [
+        make_record(
+            excel_row=row,
+            uid=f"uid-{row}",
+            av_tec=f"AT-{row}",
+            plantios=[PlantioItem(sequence=1, endereco=f"Area {row}", qtd_mudas="5")],
+        )
+        for row in range(2, 14)
+    ]
+    for record in records[::3]:
+        record.compensado = "SIM"
+    service.sync_workbook_snapshot(workbook_path, records)
+
+    filters = {"status": "Pendentes"}
+    expected_rows = [record.excel_row for record in records if record.compensado != "SIM"]
+    assert service.count_records_for_workbook(workbook_path, **filters) == len(expected_rows)
+    assert service.count_records_for_workbook(workbook_path) == len(records)
+
+    seen_rows: list[int] = []
+    after_excel_row = 0
+    while True:
+        page = service.query_record_page_for_workbook(
+            workbook_path,
+            after_excel_row=after_excel_row,
+            limit=3,
+            **filters,
+        )
+        if not page:
+            break
+        assert all(record.plantios == [] for record in page)
+        seen_rows.extend(record.excel_row for record in page)
+        after_excel_row = page[-1].excel_row
+    assert seen_rows == expected_rows
+
+    with_plantios = service.query_record_page_for_workbook(workbook_path, limit=1, include_plantios=True)
+    assert [item.endereco for item in with_plantios[0].plantios] == ["Area 2"]
+    assert [item.endereco for item in service.list_plantios_for_record(workbook_path, "uid-5")] == ["Area 5"]
+
+    source = service.record_page_source_for_workbook(workbook_path, **filters)
+    assert source.count() == len(expected_rows)
+    assert [record.excel_row for record in source.fetch_page(expected_rows[1], 2)] == expected_rows[2:4]
+    assert [record.excel_row for record in source.fetch_page_at(3, 2)] == expected_rows[3:5]
+    assert [uid.lower() for uid in source.uids()] == [f"uid-{row}" for row in expected_rows]
+
+    by_av_tec = source.with_sort("av_tec", descending=True)
+    descending_rows = sorted(expected_rows, key=lambda row: f"AT-{row}", reverse=True)
+    assert [record.excel_row for record in by_av_tec.fetch_page_at(0, 3)] == descending_rows[:3]
+    assert [record.excel_row for record in by_av_tec.fetch_page_at(3, 3)] == descending_rows[3:6]
+    assert source.with_sort("coluna_invalida").sort_key == ""
+
+
+def test_workbook_aggregates_do_not_drift_after_many_fractional_edits(tmp_path):
+    service = SqliteMirrorService(db_path=tmp_path / "mirror.db")
+    workbook_path = str(tmp_path / "base.xlsx")
+    records = [make_record(excel_row=row, uid=f"uid-{row}", av_tec=f"AT-{row}") for row in range(2, 6)]
+    service.sync_workbook_snapshot(workbook_path, records)
+
+    amounts = ("0,1", "0.2", "0,7", "1.3", "2,05", "0.33")
+    for step in range(240):
+        record = records[step % len(records)]
+        record.compensacao = amounts[step % len(amounts)]
+        record.compensado = "SIM" if step % 3 == 0 else ""
+        service.update_record_in_workbook(workbook_path, record)
+
+    with sqlite3.connect(service.db_path) as conn:
+        direct_total, direct_pendente = conn.execute(
+            "SELECT SUM(compensacao_value), SUM(CASE WHEN is_compensado = 1 THEN 0 ELSE compensacao_value END) "
+            "FROM records"
+        ).fetchone()
+    metrics = service.query_metrics_for_workbook(workbook_path)
+    assert metrics["total_geral"] == round(direct_total, 2)
+    assert metrics["total_pendente"] == round(direct_pendente, 2)
+    assert metrics["pend_micro_sorted"] == [("Gregorio", round(direct_pendente, 2))]
+
+
+def test_workbook_aggregates_replace_the_legacy_real_table_on_open(tmp_path):
+    db_path = tmp_path / "mirror.db"
+    workbook_path = str(tmp_path / "base.xlsx")
+    SqliteMirrorService(db_path=db_path).sync_workbook_snapshot(
+        workbook_path,
+        [make_record(excel_row=2, uid="uid-1", av_tec="AT-1")],
+    )
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("DROP TABLE workbook_aggregates")
+        conn.execute(
+            "CREATE TABLE workbook_aggregates (workbook_id INTEGER, dimension TEXT, label TEXT, "
+            "record_count INTEGER, compensados_count INTEGER, compensado_value REAL, pendente_value REAL, "
+            "without_coordinates_count INTEGER, PRIMARY KEY (workbook_id, dimension, label))"
+        )
+
+    service = SqliteMirrorService(db_path=db_path)
+
+    with sqlite3.connect(db_path) as conn:
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(workbook_aggregates)").fetchall()}
+    assert {"compensado_cents", "pendente_cents"}.issubset(columns)
+    assert service.query_metrics_for_workbook(workbook_path)["total_pendente"] == 12.0
@@ -1,4 +1,5 @@
 import os
+import sqlite3
 
 from app.services.sqlite_mirror_service_support import (
     build_unique_session_path,
@@ -9,7 +10,9 @@ from app.services.sqlite_mirror_service_support import (
     microbacia_key,
     normalize_session_path,
     read_source_file_identity,
+    record_content_hash,
     session_slug,
+    sql_real_value,
     stringify,
 )
 
@@ -47,3 +50,45 @@ def test_sqlite_mirror_service_support_reads_identity_and_decodes_json(tmp_path)
     assert decode_json_value("invalido") is None
     assert decode_json_object('{"a": 1}') == {"a": 1}
     assert decode_json_object("[1,2,3]") == {}
+
+
+def test_sqlite_mirror_service_support_hashes_record_content_without_row_position():
+    from app.models.compensacao import Compensacao
+    from app.models.plantio_item import PlantioItem
+
+    def build(excel_row: int, compensado: str = "") -> Compensacao:
+        return Compensacao(
+            excel_row=excel_row,
+            oficio_processo="1/2026",
+            eletronico="SIM",
+            caixa="CX-1",
+            av_tec="AT-1",
+            compensacao="10",
+            endereco="Rua A",
+            microbacia="Gregorio",
+            compensado=compensado,
+            uid="uid-1",
+            plantios=[PlantioItem(sequence=1, endereco="Area 1", qtd_mudas="10")],
+        )
+
+    base_hash = record_content_hash(build(2))
+    assert base_hash == record_content_hash(build(9))
+    assert base_hash != record_content_hash(build(2, compensado="SIM"))
+
+    changed_plantio = build(2)
+    changed_plantio.plantios[0].qtd_mudas = "11"
+    assert base_hash != record_content_hash(changed_plantio)
+
+
+def test_sqlite_mirror_service_support_parses_amounts_like_the_old_sql_cast():
+    samples = ["", "   ", " 1,5 ", "12abc", "abc", "-3.25", ".5", "1e3", "1.234,5", "R$ 10", "7.", "+2", "nan", "1_000"]
+    conn = sqlite3.connect(":memory:")
+    for sample in [None, *samples]:
+        expected = conn.execute(
+            "SELECT CAST(REPLACE(TRIM(COALESCE(?, '0')), ',', '.') AS REAL)",
+            (sample,),
+        ).fetchone()[0]
+        assert sql_real_value(sample) == expected, sample
+    assert sql_real_value("") == 0.0
+    assert sql_real_value("12abc") == 12.0
+    assert sql_real_value(4) == 4.0
@@ -0,0 +1,20 @@
+from app.application.use_cases.startup_timing import StartupTimeline
+
+
+def test_startup_timeline_records_first_paint_and_gis_ready_once():
+    ticks = iter([10.0, 10.25, 11.5, 12.0])
+    timeline = StartupTimeline(clock=lambda: next(ticks))
+
+    timeline.mark_gis_failed("antes de pintar")
+    assert timeline.mark_first_paint() is True
+    assert timeline.mark_first_paint() is False
+    timeline.mark_gis_ready(load_seconds=0.0064, source="cache")
+    timeline.mark_gis_ready(load_seconds=3.0, source="shapefiles")
+    timeline.mark_gis_failed("recarga")
+
+    snapshot = timeline.snapshot()
+    assert snapshot.first_paint_ms == 250.0
+    assert snapshot.gis_ready_ms == 1500.0
+    assert snapshot.gis_load_ms == 6.4
+    assert snapshot.gis_source == "cache"
+    assert snapshot.gis_error == ""
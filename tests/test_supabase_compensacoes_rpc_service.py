@@ -1,14 +1,29 @@
+import json
+import threading
 from types import SimpleNamespace
 
+import pytest
+
 from app.models.compensacao import Compensacao
 from app.models.plantio_item import PlantioItem
+from app.services import supabase_compensacoes_rpc_service
 from app.services.supabase_compensacoes_rpc_service import (
     SupabaseCompensacoesConflictError,
+    SupabaseCompensacoesImportInterruptedError,
     SupabaseCompensacoesRpcError,
     SupabaseCompensacoesRpcService,
 )
 
 
+@pytest.fixture(autouse=True)
+def _isolated_pending_imports(monkeypatch, tmp_path):
+    monkeypatch.setattr(
+        supabase_compensacoes_rpc_service,
+        "resolve_data_path",
+        lambda *parts: tmp_path.joinpath("data", *parts),
+    )
+
+
 class _FakeRpcQuery:
     def __init__(self, payload):
         self.payload = payload
@@ -48,6 +63,89 @@ class _SequenceRpcClient:
         return _FakeRpcQuery(response)
 
 
+class _StagedImportStub:
+    """Servidor em memoria com o protocolo de importacao em lotes (begin, stage, commit)."""
+
+    def __init__(self, *, fail_chunks=(), missing_functions=()):
+        self.fail_chunks = set(fail_chunks)
+        self.missing_functions = set(missing_functions)
+        self.sessions = {}
+        self.committed = []
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def rpc(self, function_name, params=None):
+        params = dict(params or {})
+        with self._lock:
+            self.calls.append((function_name, params))
+        return _StubRpcQuery(self, function_name, params)
+
+    def handle(self, function_name, params):
+        if function_name in self.missing_functions:
+            raise RuntimeError(
+                f"{{'message': 'Could not find the function public.{function_name}', 'code': 'PGRST202'}}"
+            )
+        if function_name == SupabaseCompensacoesRpcService.IMPORT_BEGIN_FUNCTION:
+            session = self.sessions.setdefault(
+                params["p_session_id"],
+                {"total_chunks": params["p_total_chunks"], "chunks": {}},
+            )
+            return {"session_id": params["p_session_id"], "acked_chunks": sorted(session["chunks"])}
+        if function_name == SupabaseCompensacoesRpcService.IMPORT_CHUNK_FUNCTION:
+            with self._lock:
+                if params["p_chunk_index"] in self.fail_chunks:
+                    self.fail_chunks.discard(params["p_chunk_index"])
+                    raise RuntimeError("statement timeout")
+                self.sessions[params["p_session_id"]]["chunks"][params["p_chunk_index"]] = list(params["p_records"])
+            return {"chunk_index": params["p_chunk_index"], "record_count": len(params["p_records"])}
+        if function_name == SupabaseCompensacoesRpcService.IMPORT_COMMIT_FUNCTION:
+            session = self.sessions.pop(params["p_session_id"])
+            assert sorted(session["chunks"]) == list(range(session["total_chunks"]))
+            records = [record for index in sorted(session["chunks"]) for record in session["chunks"][index]]
+            self.committed.append(records)
+            return {
+                "workbook_path": "session://banco-local",
+                "record_count": len(records),
+                "imported_count": len(records),
+                "audit_event_id": "evt-chunked",
+            }
+        if function_name == SupabaseCompensacoesRpcService.IMPORT_FUNCTION:
+            self.committed.append(list(params["p_records"]))
+            return {"workbook_path": "session://banco-local", "imported_count": len(params["p_records"])}
+        raise AssertionError(function_name)
+
+
+class _StubRpcQuery:
+    def __init__(self, server, function_name, params):
+        self.server = server
+        self.function_name = function_name
+        self.params = params
+
+    def execute(self):
+        return SimpleNamespace(data=self.server.handle(self.function_name, self.params))
+
+
+def _make_records(total: int) -> list[Compensacao]:
+    records = []
+    for index in range(total):
+        record = _make_record()
+        record.uid = f"uid-{index}"
+        record.excel_row = index + 2
+        records.append(record)
+    return records
+
+
+def _replace_in_chunks(service, client, records, progress):
+    return service.replace_records(
+        client,
+        workbook_path="session://banco-local",
+        records=records,
+        action="IMPORT",
+        summary="Importacao em lotes",
+        progress_callback=lambda done, total: progress.append((done, total)),
+    )
+
+
 def _make_record() -> Compensacao:
     return Compensacao(
         excel_row=12,
@@ -358,3 +456,111 @@ def test_legacy_signature_is_cached_after_first_schema_cache_mismatch():
     assert client.calls[0][1]["p_expected_updated_at"] == "2026-04-09T12:00:00+00:00"
     assert "p_expected_updated_at" not in client.calls[1][1]
     assert "p_expected_updated_at" not in client.calls[2][1]
+
+
+def test_replace_records_stages_chunks_and_commits_in_order():
+    service = SupabaseCompensacoesRpcService(import_chunk_size=10, import_upload_workers=3)
+    server = _StagedImportStub()
+    progress = []
+
+    result = _replace_in_chunks(service, server, _make_records(35), progress)
+
+    names = [name for name, _params in server.calls]
+    assert names[0] == service.IMPORT_BEGIN_FUNCTION
+    assert names.count(service.IMPORT_CHUNK_FUNCTION) == 4
+    assert names[-1] == service.IMPORT_COMMIT_FUNCTION
+    assert service.IMPORT_FUNCTION not in names
+    assert server.calls[0][1]["p_total_chunks"] == 4
+    assert server.calls[-1][1]["p_summary"] == "Importacao em lotes"
+    assert [record["uid"] for record in server.committed[0]] == [f"uid-{index}" for index in range(35)]
+    assert progress[0] == (0, 35)
+    assert progress[-1] == (35, 35)
+    assert result.imported_count == 35
+    assert result.audit_event_id == "evt-chunked"
+
+
+def test_replace_records_resumes_from_acked_chunks_after_failure():
+    service = SupabaseCompensacoesRpcService(import_chunk_size=10, import_upload_workers=1)
+    server = _StagedImportStub(fail_chunks={2})
+    records = _make_records(40)
+
+    with pytest.raises(SupabaseCompensacoesImportInterruptedError) as exc_info:
+        _replace_in_chunks(service, server, records, [])
+
+    session_id = exc_info.value.session_id
+    acked = sorted(server.sessions[session_id]["chunks"])
+    assert acked[:2] == [0, 1]
+    assert 2 not in acked
+    assert exc_info.value.acked_chunks == len(acked)
+    assert exc_info.value.total_chunks == 4
+    assert server.committed == []
+    server.calls.clear()
+    progress = []
+
+    result = _replace_in_chunks(service, server, records, progress)
+
+    staged = [params["p_chunk_index"] for name, params in server.calls if name == service.IMPORT_CHUNK_FUNCTION]
+    assert server.calls[0][1]["p_session_id"] == session_id
+    assert staged == [index for index in range(4) if index not in acked]
+    assert progress[0] == (10 * len(acked), 40)
+    assert len(server.committed[0]) == 40
+    assert result.imported_count == 40
+
+
+def test_replace_records_resumes_persisted_session_after_restart(tmp_path):
+    pending_path = tmp_path / "pending_imports.json"
+    server = _StagedImportStub(fail_chunks={2})
+    records = _make_records(40)
+    first = SupabaseCompensacoesRpcService(
+        import_chunk_size=10,
+        import_upload_workers=1,
+        pending_imports_path=pending_path,
+    )
+
+    with pytest.raises(SupabaseCompensacoesImportInterruptedError) as exc_info:
+        _replace_in_chunks(first, server, records, [])
+
+    saved = json.loads(pending_path.read_text(encoding="utf-8"))["session://banco-local"]
+    assert saved["session_id"] == exc_info.value.session_id
+    assert len(saved["acked_chunks"]) == exc_info.value.acked_chunks
+    server.calls.clear()
+
+    restarted = SupabaseCompensacoesRpcService(
+        import_chunk_size=10,
+        import_upload_workers=1,
+        pending_imports_path=pending_path,
+    )
+    result = _replace_in_chunks(restarted, server, records, [])
+
+    staged = [params["p_chunk_index"] for name, params in server.calls if name == restarted.IMPORT_CHUNK_FUNCTION]
+    assert server.calls[0][1]["p_session_id"] == exc_info.value.session_id
+    assert staged == [index for index in range(4) if index not in saved["acked_chunks"]]
+    assert result.imported_count == 40
+    assert not pending_path.exists()
+
+
+def test_replace_records_starts_new_session_when_payload_changes():
+    service = SupabaseCompensacoesRpcService(import_chunk_size=10, import_upload_workers=1)
+    server = _StagedImportStub(fail_chunks={0})
+
+    with pytest.raises(SupabaseCompensacoesImportInterruptedError) as exc_info:
+        _replace_in_chunks(service, server, _make_records(20), [])
+
+    _replace_in_chunks(service, server, _make_records(25), [])
+
+    begin_calls = [params for name, params in server.calls if name == service.IMPORT_BEGIN_FUNCTION]
+    assert begin_calls[-1]["p_session_id"] != exc_info.value.session_id
+    assert len(server.committed[0]) == 25
+
+
+def test_replace_records_falls_back_to_single_rpc_without_staging_functions():
+    service = SupabaseCompensacoesRpcService(import_chunk_size=10)
+    server = _StagedImportStub(missing_functions={SupabaseCompensacoesRpcService.IMPORT_BEGIN_FUNCTION})
+    progress = []
+
+    _replace_in_chunks(service, server, _make_records(25), progress)
+    _replace_in_chunks(service, server, _make_records(25), progress)
+
+    names = [name for name, _params in server.calls]
+    assert names == [service.IMPORT_BEGIN_FUNCTION, service.IMPORT_FUNCTION, service.IMPORT_FUNCTION]
+    assert progress == [(25, 25), (25, 25)]
@@ -0,0 +1,132 @@
+import os
+import uuid
+from pathlib import Path
+
+import pytest
+
+psycopg = pytest.importorskip("psycopg")
+
+
+MIGRATIONS_DIR = Path(__file__).resolve().parents[1] / "supabase" / "migrations"
+# Mesmo Postgres descartavel dos testes do sync; cada teste cria e apaga um banco proprio.
+TEST_DB_URL = os.getenv("SYNC_SQLITE_TEST_DB_URL", "")
+
+requires_postgres = pytest.mark.skipif(not TEST_DB_URL, reason="SYNC_SQLITE_TEST_DB_URL nao configurada")
+
+# Apenas o que as migrations de sincronizacao usam do schema completo do Supabase.
+BASE_SCHEMA = """
+create schema if not exists app_private;
+create function app_private.is_active_app_user() returns boolean language sql as $$ select true $$;
+create table public.workbooks (id bigserial primary key, workbook_path text not null);
+create table public.records (
+    id bigserial primary key,
+    workbook_id bigint not null references public.workbooks(id) on delete cascade,
+    uid text not null,
+    updated_at timestamptz not null default timezone('utc', now())
+);
+create table public.tcras (
+    id bigserial primary key,
+    uid text not null,
+    updated_at timestamptz not null default timezone('utc', now())
+);
+"""
+IMPORT_SESSION_SCHEMA = """
+create schema if not exists auth;
+create function auth.uid() returns uuid language sql stable
+as $$ select nullif(current_setting('test.uid', true), '')::uuid $$;
+create function app_private.can_write_app_data() returns boolean language sql as $$ select true $$;
+grant usage on schema auth, app_private to authenticated;
+grant execute on function auth.uid(), app_private.can_write_app_data() to authenticated;
+"""
+IMPORT_SESSION_MIGRATIONS = (
+    "20261018100000_chunked_compensacoes_import.sql",
+    "20261018120000_expire_stale_import_sessions.sql",
+    "20261018140000_restrict_expire_stale_import_sessions.sql",
+)
+TOMBSTONE_MIGRATIONS = (
+    "20261018090000_sync_deletion_tombstones.sql",
+    "20261018110000_scope_sync_tombstones_by_workbook.sql",
+    "20261018130000_drop_sync_tombstones_workbook_fk.sql",
+)
+
+
+@pytest.fixture
+def scratch_db():
+    database = f"migrations_test_{uuid.uuid4().hex[:12]}"
+    with psycopg.connect(TEST_DB_URL, autocommit=True) as admin:
+        admin.execute(f"CREATE DATABASE {database}")
+        if not admin.execute("SELECT 1 FROM pg_roles WHERE rolname = 'authenticated'").fetchone():
+            admin.execute("CREATE ROLE authenticated")
+    url = psycopg.conninfo.make_conninfo(TEST_DB_URL, dbname=database)
+    try:
+        yield url
+    finally:
+        with psycopg.connect(TEST_DB_URL, autocommit=True) as admin:
+            admin.execute(f"DROP DATABASE IF EXISTS {database} WITH (FORCE)")
+
+
+def _apply(conn, names) -> None:
+    for name in names:
+        conn.execute((MIGRATIONS_DIR / name).read_text(encoding="utf-8"))
+
+
+@requires_postgres
+def test_deleting_a_workbook_with_records_keeps_their_tombstones(scratch_db):
+    with psycopg.connect(scratch_db, autocommit=True) as conn:
+        conn.execute(BASE_SCHEMA)
+        _apply(conn, TOMBSTONE_MIGRATIONS)
+        workbook_id = conn.execute(
+            "INSERT INTO public.workbooks (workbook_path) VALUES ('session://banco-local') RETURNING id"
+        ).fetchone()[0]
+        conn.execute(
+            "INSERT INTO public.records (workbook_id, uid) VALUES (%s, 'UID-1'), (%s, 'uid-2')",
+            (workbook_id, workbook_id),
+        )
+
+        conn.execute("DELETE FROM public.workbooks WHERE id = %s", (workbook_id,))
+
+        assert conn.execute("SELECT COUNT(*) FROM public.records").fetchone()[0] == 0
+        tombstones = conn.execute(
+            "SELECT table_name, workbook_id, row_key FROM public.sync_tombstones ORDER BY row_key"
+        ).fetchall()
+        assert tombstones == [("records", workbook_id, "uid-1"), ("records", workbook_id, "uid-2")]
+
+
+@requires_postgres
+def test_only_the_begin_trigger_expires_stale_import_sessions(scratch_db):
+    owner = "00000000-0000-0000-0000-000000000001"
+    other = "00000000-0000-0000-0000-000000000002"
+    with psycopg.connect(scratch_db, autocommit=True) as conn:
+        conn.execute(BASE_SCHEMA)
+        conn.execute(IMPORT_SESSION_SCHEMA)
+        _apply(conn, IMPORT_SESSION_MIGRATIONS)
+        conn.execute("GRANT SELECT, INSERT, UPDATE, DELETE ON ALL TABLES IN SCHEMA public TO authenticated")
+        workbook_id = conn.execute(
+            "INSERT INTO public.workbooks (workbook_path) VALUES ('session://banco-local') RETURNING id"
+        ).fetchone()[0]
+        conn.execute(
+            """
+            INSERT INTO public.import_sessions
+                (session_id, workbook_id, created_by, total_chunks, total_records, last_activity_at)
+            VALUES
+                ('parada', %(workbook)s, %(other)s, 2, 2, now() - interval '2 days'),
+                ('em-andamento', %(workbook)s, %(other)s, 2, 2, now() - interval '1 hour')
+            """,
+            {"workbook": workbook_id, "other": other},
+        )
+
+        conn.execute("SET ROLE authenticated")
+        conn.execute(f"SET test.uid = '{owner}'")
+        with pytest.raises(psycopg.errors.UndefinedFunction):
+            conn.execute("SELECT app_private.expire_stale_import_sessions(interval '0 seconds')")
+        with pytest.raises(psycopg.errors.InsufficientPrivilege):
+            conn.execute("SELECT app_private.expire_stale_import_sessions()")
+
+        begun = conn.execute(
+            "SELECT public.rpc_begin_compensacoes_import('nova', 'session://banco-local', 1, 1)"
+        ).fetchone()[0]
+        conn.execute("RESET ROLE")
+
+        assert begun["acked_chunks"] == []
+        sessions = conn.execute("SELECT session_id FROM public.import_sessions ORDER BY session_id").fetchall()
+        assert sessions == [("em-andamento",), ("nova",)]
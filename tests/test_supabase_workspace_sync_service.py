@@ -1,25 +1,54 @@
 from types import SimpleNamespace
 
+import pytest
+
 from app.models.compensacao import Compensacao
 from app.services.sqlite_mirror_service import DEFAULT_SINGLETON_SESSION_PATH, SqliteMirrorService
 from app.services.supabase_workspace_sync_service import (
     PRODUCTION_CACHE_SESSION_PATH,
+    SupabaseWorkspaceSyncError,
     SupabaseWorkspaceSyncService,
 )
 from app.services.tcra_sqlite_service import TcraSqliteService
 
 
 class _FakeTableQuery:
-    def __init__(self, rows):
+    def __init__(self, rows, table_name=None, log=None, max_rows=None):
         self.rows = list(rows)
+        self.max_rows = max_rows
+        self._count = None
+        self.table_name = table_name
+        self.log = log if log is not None else []
+        self._filters = []
         self._start = None
         self._end = None
         self._limit = None
+        self._descending = False
+        self._order_by = None
+
+    def select(self, *args, count=None):
+        self._count = count
+        return self
+
+    def order(self, column, *, desc=False):
+        self._order_by = column
+        self._descending = desc
+        return self
+
+    def gte(self, column, value):
+        self._filters.append(("gte", column, value))
+        return self
+
+    def gt(self, column, value):
+        self._filters.append(("gt", column, value))
+        return self
 
-    def select(self, *args, **kwargs):
+    def in_(self, column, values):
+        self._filters.append(("in", column, tuple(values)))
         return self
 
-    def order(self, *args, **kwargs):
+    def or_(self, filters):
+        self._filters.append(("or", "", filters))
         return self
 
     def limit(self, value):
@@ -31,22 +60,53 @@ class _FakeTableQuery:
         self._end = int(end)
         return self
 
+    def _matches(self, row):
+        for operator, column, value in self._filters:
+            current = row.get(column)
+            if operator == "gte" and not str(current) >= str(value):
+                return False
+            if operator == "gt" and not int(current) > int(value):
+                return False
+            if operator == "in" and current not in value:
+                return False
+            if operator == "or" and not any(self._matches_clause(row, clause) for clause in value.split(",")):
+                return False
+        return True
+
+    @staticmethod
+    def _matches_clause(row, clause):
+        column, operator, value = clause.split(".", 2)
+        if operator == "is" and value == "null":
+            return row.get(column) is None
+        return operator == "eq" and str(row.get(column)) == value
+
     def execute(self):
+        self.log.append((self.table_name, tuple(self._filters), self._start))
+        rows = [row for row in self.rows if self._matches(row)]
+        if self._descending:
+            rows = sorted(rows, key=lambda row: row.get(self._order_by), reverse=True)
         if self._limit is not None:
-            data = self.rows[: self._limit]
+            data = rows[: self._limit]
         elif self._start is not None and self._end is not None:
-            data = self.rows[self._start : self._end + 1]
+            data = rows[self._start : self._end + 1]
         else:
-            data = self.rows
-        return SimpleNamespace(data=data)
+            data = rows
+        if self.max_rows is not None:
+            data = data[: self.max_rows]
+        return SimpleNamespace(data=data, count=len(rows) if self._count == "exact" else None)
 
 
 class _FakeSupabaseClient:
-    def __init__(self, table_rows):
+    def __init__(self, table_rows, max_rows=None):
         self.table_rows = dict(table_rows)
+        self.max_rows = max_rows
+        self.queries = []
 
     def table(self, table_name):
-        return _FakeTableQuery(self.table_rows.get(table_name, ()))
+        rows = self.table_rows.get(table_name, ())
+        if isinstance(rows, Exception):
+            raise rows
+        return _FakeTableQuery(rows, table_name, self.queries, self.max_rows)
 
 
 def test_sync_authenticated_client_resets_local_cache_and_loads_remote_snapshot(tmp_path):
@@ -197,3 +257,158 @@ def test_sync_authenticated_client_resets_local_cache_and_loads_remote_snapshot(
     assert tcras[0].eventos[0].protocolo == "SEI-123"
     assert tcras[0].eventos[0].documento_ref == "docs/relatorio.pdf"
     assert len(tcras[0].eventos) == 1
+
+
+def _remote_record(record_id, uid, excel_row, updated_at, **overrides):
+    row = {
+        "id": record_id,
+        "uid": uid,
+        "excel_row": excel_row,
+        "oficio_processo": f"{record_id}/2026",
+        "av_tec": f"AT-{record_id}",
+        "compensacao": "5",
+        "endereco": f"Rua {record_id}",
+        "updated_at": updated_at,
+    }
+    row.update(overrides)
+    return row
+
+
+def _incremental_client():
+    return _FakeSupabaseClient(
+        {
+            "workbooks": [{"id": 1, "workbook_path": "session://banco-local", "workbook_name": "Base oficial"}],
+            "records": [
+                _remote_record(11, "rec-001", 2, "2026-04-09T12:00:00+00:00"),
+                _remote_record(12, "rec-002", 3, "2026-04-09T12:00:00+00:00"),
+                _remote_record(13, "rec-003", 4, "2026-04-09T12:00:00+00:00"),
+            ],
+            "plantios": [{"id": 21, "record_id": 11, "sequence": 1, "endereco": "Praca", "qtd_mudas": "5"}],
+            "audit_events": [{"id": 31, "event_id": "evt-001", "timestamp": "2026-04-09T12:00:00+00:00"}],
+            "tcras": [{"uid": "tcra-001", "numero_tcra": "TCRA-01", "updated_at": "2026-04-09T12:00:00+00:00"}],
+            "tcra_eventos": [],
+            "sync_tombstones": [{"id": 7, "table_name": "records", "workbook_id": 1, "row_key": "antigo"}],
+        }
+    )
+
+
+def test_second_sync_pulls_only_changes_and_applies_them_in_place(tmp_path):
+    target_db = tmp_path / "prod-cache.db"
+    service = SupabaseWorkspaceSyncService(production_db_path=target_db)
+    client = _incremental_client()
+    assert service.sync_authenticated_client(client).strategy == "full"
+
+    client.table_rows["records"] = [
+        _remote_record(11, "rec-001", 2, "2026-04-09T12:30:00+00:00", endereco="Rua editada"),
+        _remote_record(12, "rec-002", 3, "2026-04-09T12:00:00+00:00"),
+        _remote_record(14, "rec-004", 5, "2026-04-09T12:31:00+00:00"),
+    ]
+    client.table_rows["plantios"] = [
+        {"id": 22, "record_id": 11, "sequence": 1, "endereco": "Praca nova", "qtd_mudas": "6"},
+        {"id": 23, "record_id": 11, "sequence": 2, "endereco": "Praca 2", "qtd_mudas": "1"},
+    ]
+    client.table_rows["audit_events"].append({"id": 32, "event_id": "evt-002", "timestamp": "2026-04-09T12:30:00"})
+    client.table_rows["sync_tombstones"].append(
+        {"id": 8, "table_name": "records", "workbook_id": 1, "row_key": "rec-003"}
+    )
+    client.queries.clear()
+
+    result = service.sync_authenticated_client(client)
+
+    records = SqliteMirrorService(db_path=target_db).list_records_for_workbook(DEFAULT_SINGLETON_SESSION_PATH)
+    assert result.strategy == "incremental"
+    assert [record.uid for record in records] == ["rec-001", "rec-002", "rec-004"]
+    assert records[0].endereco == "Rua editada"
+    assert [plantio.endereco for plantio in records[0].plantios] == ["Praca nova", "Praca 2"]
+    assert (result.record_count, result.plantio_count, result.audit_event_count) == (3, 2, 2)
+    assert result.tcra_count == 1
+    assert "workbooks" not in {table for table, _, _ in client.queries}
+    assert all(filters for table, filters, _ in client.queries if table in {"records", "plantios", "tcras"})
+
+    client.queries.clear()
+    service.sync_authenticated_client(client)
+    assert ("records", (("in", "uid", ("rec-003",)),), 0) not in client.queries
+
+
+def test_incremental_sync_applies_only_this_workbook_tombstones_by_lowercase_uid(tmp_path):
+    target_db = tmp_path / "prod-cache.db"
+    service = SupabaseWorkspaceSyncService(production_db_path=target_db)
+    client = _incremental_client()
+    client.table_rows["records"][0]["uid"] = "REC-001"
+    assert service.sync_authenticated_client(client).strategy == "full"
+
+    del client.table_rows["records"][0:2]
+    client.table_rows["sync_tombstones"] += [
+        {"id": 8, "table_name": "records", "workbook_id": 1, "row_key": "rec-001"},
+        {"id": 9, "table_name": "records", "workbook_id": 2, "row_key": "rec-002"},
+    ]
+    client.queries.clear()
+
+    result = service.sync_authenticated_client(client)
+
+    records = SqliteMirrorService(db_path=target_db).list_records_for_workbook(DEFAULT_SINGLETON_SESSION_PATH)
+    assert result.strategy == "incremental"
+    assert [record.uid for record in records] == ["rec-002", "rec-003"]
+    tombstone_filters = [filters for table, filters, _ in client.queries if table == "sync_tombstones"]
+    assert ("or", "", "workbook_id.eq.1,workbook_id.is.null") in tombstone_filters[0]
+
+
+def test_sync_stays_full_when_remote_has_no_tombstone_table(tmp_path):
+    target_db = tmp_path / "prod-cache.db"
+    service = SupabaseWorkspaceSyncService(production_db_path=target_db)
+    client = _incremental_client()
+    client.table_rows["sync_tombstones"] = RuntimeError("relation sync_tombstones does not exist")
+
+    assert service.sync_authenticated_client(client).strategy == "full"
+    client.table_rows["records"] = client.table_rows["records"][:1]
+
+    result = service.sync_authenticated_client(client)
+
+    assert result.strategy == "full"
+    assert result.record_count == 1
+
+
+def test_full_sync_fetches_every_page_when_server_caps_page_size(tmp_path):
+    target_db = tmp_path / "prod-cache.db"
+    service = SupabaseWorkspaceSyncService(production_db_path=target_db)
+    client = _incremental_client()
+    client.max_rows = 400
+    client.table_rows["records"] = [
+        _remote_record(index, f"rec-{index:04d}", index + 1, "2026-04-09T12:00:00+00:00") for index in range(1, 2501)
+    ]
+    client.table_rows["plantios"] = [
+        {"id": index, "record_id": index, "sequence": 1, "endereco": f"Praca {index}"} for index in range(1, 1001)
+    ]
+
+    result = service.sync_authenticated_client(client, full_refresh=True)
+
+    records = SqliteMirrorService(db_path=target_db).list_records_for_workbook(DEFAULT_SINGLETON_SESSION_PATH)
+    record_pages = sorted(start for table, _, start in client.queries if table == "records")
+    assert (result.record_count, result.plantio_count) == (2500, 1000)
+    assert [record.uid for record in records[:2]] == ["rec-0001", "rec-0002"]
+    assert records[999].plantios[0].endereco == "Praca 1000"
+    assert record_pages == list(range(0, 2500, 400))
+
+
+def test_full_sync_fails_instead_of_truncating_when_first_page_is_empty_but_counted(tmp_path):
+    target_db = tmp_path / "prod-cache.db"
+    service = SupabaseWorkspaceSyncService(production_db_path=target_db)
+    client = _incremental_client()
+    original_table = client.table
+
+    class EmptyFirstPageQuery(_FakeTableQuery):
+        def execute(self):
+            response = super().execute()
+            if self._start == 0 and self._count == "exact":
+                return SimpleNamespace(data=[], count=response.count)
+            return response
+
+    def table(table_name):
+        if table_name != "records":
+            return original_table(table_name)
+        return EmptyFirstPageQuery(client.table_rows["records"], table_name, client.queries)
+
+    client.table = table
+
+    with pytest.raises(SupabaseWorkspaceSyncError, match="3 linha"):
+        service.sync_authenticated_client(client, full_refresh=True)
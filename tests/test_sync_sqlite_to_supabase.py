@@ -0,0 +1,228 @@
+import importlib.util
+import os
+import sqlite3
+import sys
+import time
+import uuid
+from datetime import date, datetime, timezone
+from pathlib import Path
+
+import pytest
+
+psycopg = pytest.importorskip("psycopg")
+
+from app.models.compensacao import Compensacao
+from app.models.plantio_item import PlantioItem
+from app.models.tcra import Tcra, TcraEvento
+from app.services.sqlite_mirror_service import SqliteMirrorService
+from app.services.tcra_sqlite_service import TcraSqliteService
+
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+SCRIPT_PATH = PROJECT_ROOT / "scripts" / "sync_sqlite_to_supabase.py"
+INITIAL_MIGRATION = PROJECT_ROOT / "supabase" / "migrations" / "20260406083000_initial_compensacoes_schema.sql"
+# Postgres local descartavel, p.ex. postgresql://postgres@localhost/postgres; o teste cria e apaga um banco proprio.
+TEST_DB_URL = os.getenv("SYNC_SQLITE_TEST_DB_URL", "")
+SESSION_PATH = "session://banco-local"
+
+requires_postgres = pytest.mark.skipif(not TEST_DB_URL, reason="SYNC_SQLITE_TEST_DB_URL nao configurada")
+
+
+def _load_script():
+    spec = importlib.util.spec_from_file_location("sync_sqlite_to_supabase", SCRIPT_PATH)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def _make_record(index: int) -> Compensacao:
+    return Compensacao(
+        excel_row=index + 2,
+        oficio_processo=f"{index}/2026",
+        eletronico="SIM",
+        caixa="CX-1",
+        av_tec=f"AT-{index:04d}",
+        compensacao="10",
+        endereco=f"Rua {index}",
+        microbacia="Gregorio",
+        compensado="",
+        uid=f"uid-{index:04d}",
+        plantios=[PlantioItem(sequence=1, endereco=f"Area {index}", qtd_mudas="5")],
+    )
+
+
+def _make_tcra(uid: str) -> Tcra:
+    return Tcra(
+        uid=uid,
+        numero_processo="26207/2019",
+        numero_tcra=f"TCRA-{uid}",
+        status="Em acompanhamento",
+        data_assinatura=date(2019, 6, 1),
+        eventos=[TcraEvento(sequence=1, data_evento=date(2024, 4, 11), tipo_evento="Relatorio")],
+    )
+
+
+def _build_sqlite(tmp_path: Path, total: int) -> Path:
+    db_path = tmp_path / "compensacoes.db"
+    SqliteMirrorService(db_path=db_path).sync_workbook_snapshot(SESSION_PATH, [_make_record(i) for i in range(total)])
+    tcra_service = TcraSqliteService(db_path=db_path)
+    tcra_service.upsert_tcra(_make_tcra("tcra-1"))
+    tcra_service.upsert_tcra(_make_tcra("tcra-2"))
+    return db_path
+
+
+@pytest.fixture
+def target_db():
+    database = f"sync_sqlite_test_{uuid.uuid4().hex[:12]}"
+    with psycopg.connect(TEST_DB_URL, autocommit=True) as admin:
+        admin.execute(f"CREATE DATABASE {database}")
+    url = psycopg.conninfo.make_conninfo(TEST_DB_URL, dbname=database)
+    try:
+        with psycopg.connect(url, autocommit=True) as conn:
+            conn.execute("CREATE SCHEMA IF NOT EXISTS extensions")
+            try:
+                conn.execute(INITIAL_MIGRATION.read_text(encoding="utf-8"))
+            except psycopg.errors.FeatureNotSupported as exc:
+                pytest.skip(f"Postgres local sem as extensoes da migration inicial: {exc}")
+        yield url
+    finally:
+        with psycopg.connect(TEST_DB_URL, autocommit=True) as admin:
+            admin.execute(f"DROP DATABASE IF EXISTS {database} WITH (FORCE)")
+
+
+def _mark_since(script) -> str:
+    time.sleep(0.01)
+    since = script.normalize_since(datetime.now(timezone.utc).isoformat())
+    time.sleep(0.01)
+    return since
+
+
+def _resync_with_edit(sqlite_path: Path, total: int, edited_index: int, **changes) -> None:
+    records = [_make_record(index) for index in range(total)]
+    for field_name, value in changes.items():
+        setattr(records[edited_index], field_name, value)
+    SqliteMirrorService(db_path=sqlite_path).sync_workbook_snapshot(SESSION_PATH, records)
+
+
+def _spec(script, name: str):
+    return next(spec for spec in script.TABLE_SPECS if spec.name == name)
+
+
+def _copy_sync(script, sqlite_path: Path, url: str, **kwargs):
+    with script.open_sqlite(sqlite_path) as sqlite_conn, psycopg.connect(url) as pg_conn:
+        stats = script.copy_sync(sqlite_conn, pg_conn, "public", batch_size=7, **kwargs)
+        pg_conn.commit()
+    return {item.table: item.rows for item in stats}
+
+
+def test_since_filter_selects_only_rows_the_mirror_rewrote(tmp_path):
+    script = _load_script()
+    sqlite_path = _build_sqlite(tmp_path, 5)
+    since = _mark_since(script)
+    _resync_with_edit(sqlite_path, 5, 3, av_tec="AT-EDITADO")
+
+    with script.open_sqlite(sqlite_path) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM records WHERE modified_at = ''").fetchone()[0] == 0
+        assert conn.execute("SELECT COUNT(*) FROM records WHERE updated_at <> ''").fetchone()[0] == 0
+        assert script.count_rows(conn, _spec(script, "records"), since=since) == 1
+        assert script.count_rows(conn, _spec(script, "plantios"), since=since) == 1
+        changed = conn.execute(script.build_select_sql(_spec(script, "records"), since=since), {"since": since})
+        assert [row["uid"] for row in changed] == ["uid-0003"]
+
+
+def test_mirror_stamps_modified_at_when_rows_are_renumbered(tmp_path):
+    script = _load_script()
+    sqlite_path = _build_sqlite(tmp_path, 5)
+    since = _mark_since(script)
+
+    SqliteMirrorService(db_path=sqlite_path).delete_record_from_session(SESSION_PATH, _make_record(1))
+
+    with script.open_sqlite(sqlite_path) as conn:
+        changed = conn.execute(script.build_select_sql(_spec(script, "records"), since=since), {"since": since})
+        assert [row["uid"] for row in changed] == ["uid-0002", "uid-0003", "uid-0004"]
+
+
+def test_copy_mode_dry_run_counts_only_rows_changed_since(tmp_path, monkeypatch, capsys):
+    script = _load_script()
+    sqlite_path = _build_sqlite(tmp_path, 5)
+    since = _mark_since(script)
+    _resync_with_edit(sqlite_path, 5, 3, av_tec="AT-EDITADO")
+    monkeypatch.setattr(
+        sys,
+        "argv",
+        ["sync", "--sqlite-path", str(sqlite_path), "--copy", "--since", since, "--dry-run"],
+    )
+
+    assert script.main() == 0
+
+    output = capsys.readouterr().out
+    assert f"desde {since}" in output
+    assert "records: 1" in output
+    assert "plantios: 1" in output
+    assert "workbooks: 1" in output
+
+
+@requires_postgres
+def test_copy_mode_streams_full_load_into_postgres(tmp_path, target_db):
+    script = _load_script()
+    sqlite_path = _build_sqlite(tmp_path, 30)
+
+    copied = _copy_sync(script, sqlite_path, target_db)
+
+    assert copied["records"] == 30
+    assert copied["plantios"] == 30
+    assert copied["tcra_eventos"] == 2
+    with psycopg.connect(target_db) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM public.records").fetchone()[0] == 30
+        assert conn.execute("SELECT data_assinatura FROM public.tcras WHERE uid = 'tcra-1'").fetchone()[0] == date(
+            2019, 6, 1
+        )
+        next_id = conn.execute("SELECT nextval(pg_get_serial_sequence('public.records', 'id'))").fetchone()[0]
+        assert next_id == 31
+
+
+@requires_postgres
+def test_copy_mode_since_merges_changed_rows_and_replaces_their_children(tmp_path, target_db):
+    script = _load_script()
+    sqlite_path = _build_sqlite(tmp_path, 10)
+    _copy_sync(script, sqlite_path, target_db)
+    since = _mark_since(script)
+    _resync_with_edit(
+        sqlite_path,
+        10,
+        4,
+        av_tec="AT-EDITADO",
+        plantios=[PlantioItem(sequence=1, endereco="Area nova", qtd_mudas="9")],
+    )
+    with sqlite3.connect(sqlite_path) as conn:
+        record_id = conn.execute("SELECT id FROM records WHERE uid = 'uid-0004'").fetchone()[0]
+
+    copied = _copy_sync(script, sqlite_path, target_db, since=since)
+
+    assert copied["records"] == 1
+    assert copied["plantios"] == 1
+    with psycopg.connect(target_db) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM public.records").fetchone()[0] == 10
+        assert conn.execute("SELECT av_tec FROM public.records WHERE uid = 'uid-0004'").fetchone()[0] == "AT-EDITADO"
+        assert conn.execute(
+            "SELECT endereco FROM public.plantios WHERE record_id = %s", (record_id,)
+        ).fetchall() == [("Area nova",)]
+        assert conn.execute("SELECT COUNT(*) FROM public.plantios").fetchone()[0] == 10
+
+
+@requires_postgres
+def test_copy_mode_since_propagates_a_local_delete_that_renumbered_rows(tmp_path, target_db):
+    script = _load_script()
+    sqlite_path = _build_sqlite(tmp_path, 5)
+    _copy_sync(script, sqlite_path, target_db)
+    since = _mark_since(script)
+    SqliteMirrorService(db_path=sqlite_path).delete_record_from_session(SESSION_PATH, _make_record(1))
+
+    copied = _copy_sync(script, sqlite_path, target_db, since=since)
+
+    assert copied["records"] == 3
+    with psycopg.connect(target_db) as conn:
+        rows = conn.execute("SELECT uid, excel_row FROM public.records ORDER BY excel_row").fetchall()
+        assert rows == [("uid-0000", 2), ("uid-0002", 3), ("uid-0003", 4), ("uid-0004", 5)]
+        assert conn.execute("SELECT COUNT(*) FROM public.plantios").fetchone()[0] == 4
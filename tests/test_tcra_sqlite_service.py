@@ -4,6 +4,12 @@ import sqlite3
 from app.models.tcra import Tcra
 from app.models.tcra_evento import TcraEvento
 from app.services.sqlite_mirror_service import SqliteMirrorService
+from app.services.tcra_records_service import (
+    build_filter_facets,
+    build_record_overview,
+    compute_metrics,
+    filter_tcras,
+)
 from app.services.tcra_sqlite_service import TcraSqliteService
 
 
@@ -212,6 +218,110 @@ def test_tcra_sqlite_service_exposes_query_helpers_for_future_ui(tmp_path):
     assert overview.upcoming_reports[0].uid == "tcra-2"
 
 
+def _varied_tcras(total: int) -> list[Tcra]:
+    statuses = ("Em acompanhamento", "Cumprido", "Arquivado", "Prazo vencido", "Relatório pendente", "Sem validade", "", "Suspenso")
+    orgaos = ("CETESB", "MPSP", "", "Promotoria de Justiça", "SMAA")
+    records = []
+    for index in range(total):
+        records.append(
+            make_tcra(
+                uid=f"tcra-{index:03d}",
+                numero_processo=f"{100 + index}/20{18 + index % 6}",
+                numero_tcra="" if index % 7 == 0 else f"TCRA-{index % 11}",
+                local=f"Area {index % 5}",
+                bairro=("Centro", "Varjão", "varjao", "")[index % 4],
+                orgao_acompanhamento=orgaos[index % len(orgaos)],
+                status=statuses[index % len(statuses)],
+                data_assinatura=date(2019, 1 + index % 12, 1) if index % 9 else None,
+                prazo_final=date(2026, 1 + index % 12, 10) if index % 3 else None,
+                periodicidade_relatorio_meses=0 if index % 13 == 0 else 12,
+                data_ultimo_relatorio=date(2025, 1 + index % 12, 5) if index % 4 else None,
+                data_proximo_relatorio=date(2026, 1 + (index * 5) % 12, 1 + index % 27) if index % 5 else None,
+                responsavel_execucao="" if index % 6 == 0 else ("Secretaria Municipal", "Empreendedor")[index % 2],
+                mpsp_relacionado="Sim" if index % 8 == 0 else "",
+                inquerito_civil="IC 12/2020" if index % 10 == 0 else "",
+                eventos=[] if index % 3 == 0 else make_tcra().eventos,
+            )
+        )
+    return records
+
+
+def test_tcra_sqlite_service_sql_queries_match_python_rules(tmp_path):
+    service = TcraSqliteService(db_path=tmp_path / "local.db")
+    service.replace_all(_varied_tcras(120))
+    records = service.list_tcras()
+
+    for today in (date(2026, 1, 1), date(2026, 4, 3), date(2027, 2, 1)):
+        assert service.query_filter_facets(today=today) == build_filter_facets(records, today=today)
+        assert service.build_record_overview(today=today) == build_record_overview(records, today=today)
+        for filters in (
+            {},
+            {"status": "Prazo vencido"},
+            {"status": "Relatório pendente", "selected_year": "2020"},
+            {"status": "Cumprido"},
+            {"selected_orgaos": ["MPSP"], "selected_bairros": ["Varjão"]},
+            {"selected_responsaveis": ["Empreendedor"], "only_mpsp": True},
+            {"only_relatorio_pendente": True},
+            {"only_prazo_vencido": True, "text": "varjão"},
+        ):
+            expected = filter_tcras(
+                records,
+                text=filters.get("text", ""),
+                status=filters.get("status", "Todos"),
+                selected_orgaos=filters.get("selected_orgaos", ()),
+                selected_bairros=filters.get("selected_bairros", ()),
+                selected_responsaveis=filters.get("selected_responsaveis", ()),
+                selected_year=filters.get("selected_year", "Todos"),
+                only_mpsp=filters.get("only_mpsp", False),
+                only_relatorio_pendente=filters.get("only_relatorio_pendente", False),
+                only_prazo_vencido=filters.get("only_prazo_vencido", False),
+                today=today,
+            )
+            assert service.query_tcras(today=today, **filters) == expected
+            assert service.query_metrics(today=today, **filters) == compute_metrics(expected, today=today)
+
+
+def test_tcra_sqlite_service_backfills_query_columns_for_existing_rows(tmp_path):
+    db_path = tmp_path / "local.db"
+    service = TcraSqliteService(db_path=db_path)
+    service.replace_all([make_tcra(uid="tcra-1", orgao_acompanhamento="MPSP")])
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("UPDATE tcras SET orgao_key = '', processo_year = ''")
+        conn.execute("ALTER TABLE tcras DROP COLUMN mpsp_flag")
+
+    reopened = TcraSqliteService(db_path=db_path)
+
+    assert [item.uid for item in reopened.query_tcras(selected_orgaos=["mpsp"], selected_year="2019", only_mpsp=True)] == [
+        "tcra-1"
+    ]
+
+
+def test_query_tcras_uses_full_text_index_for_multi_term_search(tmp_path):
+    service = TcraSqliteService(db_path=tmp_path / "local.db")
+    service.replace_all(
+        [
+            make_tcra(uid="tcra-1", numero_tcra="TCRA-1", bairro="Jardim São Paulo"),
+            make_tcra(uid="tcra-2", numero_tcra="TCRA-2", bairro="Jardim Botânico", eventos=[]),
+            make_tcra(uid="tcra-3", numero_tcra="TCRA-3", bairro="Centro", orgao_acompanhamento="MPSP"),
+        ]
+    )
+
+    assert service.full_text_search_enabled is True
+    matches = service.query_tcras(text="jardim sao")
+    botanico = service.query_tcras(text="JARDIM botanico", rank_by_relevance=True)
+    service.full_text_search_enabled = False
+    fallback = service.query_tcras(text="jardim sao")
+
+    assert [record.uid for record in matches] == ["tcra-1"]
+    assert len(matches[0].eventos) == 1
+    assert [record.uid for record in botanico] == ["tcra-2"]
+    assert [record.uid for record in fallback] == ["tcra-1"]
+
+    service.full_text_search_enabled = True
+    service.delete_tcra("tcra-1")
+    assert service.query_tcras(text="jardim sao") == []
+
+
 def test_find_duplicate_tcra_checks_numero_tcra_and_processo_local(tmp_path):
     service = TcraSqliteService(db_path=tmp_path / "local.db")
     first = make_tcra(uid="tcra-1", numero_tcra="TCRA-2024-010", numero_processo="901/2024", local="Area Norte")
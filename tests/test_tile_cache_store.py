@@ -0,0 +1,103 @@
+from app.services.tile_cache_store import (
+    CachedTile,
+    TileCacheStore,
+    TileKey,
+    fetch_tile,
+)
+
+
+class FakeClock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class FakeResponse:
+    def __init__(self, status_code: int, content: bytes = b"", headers: dict | None = None):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers or {}
+
+
+def test_tile_store_reads_back_from_disk_and_counts_hits(tmp_path):
+    db_path = tmp_path / "tiles.mbtiles"
+    key = TileKey("satellite", 14, 6010, 9170)
+    store = TileCacheStore(db_path)
+    store.put(key, b"png-bytes", "image/png", etag='"v1"')
+
+    assert store.get(key).body == b"png-bytes"
+
+    reopened = TileCacheStore(db_path)
+    tile = reopened.get(key)
+    reopened.get(key)
+
+    assert tile == CachedTile(b"png-bytes", "image/png", etag='"v1"', fetched_at=tile.fetched_at)
+    assert reopened.get(TileKey("satellite", 14, 6010, 9171)) is None
+    stats = reopened.stats()
+    assert (stats.disk_hits, stats.memory_hits, stats.misses) == (1, 1, 1)
+    assert (stats.disk_tiles, stats.disk_bytes, stats.bytes_served) == (1, 9, 18)
+
+
+def test_tile_store_evicts_least_recently_used_tiles_past_byte_limit(tmp_path):
+    clock = FakeClock()
+    store = TileCacheStore(tmp_path / "tiles.mbtiles", max_bytes=250, memory_items=0, clock=clock)
+    keys = [TileKey("carto_light", 12, column, 2290) for column in range(3)]
+    for key in keys[:2]:
+        clock.now += 1
+        store.put(key, b"x" * 100, "image/png")
+    clock.now += 1
+    store.get(keys[0])
+    clock.now += 1
+    store.put(keys[2], b"x" * 100, "image/png")
+
+    reopened = TileCacheStore(tmp_path / "tiles.mbtiles")
+    assert reopened.get(keys[1]) is None
+    assert reopened.get(keys[0]) is not None
+    assert reopened.get(keys[2]) is not None
+    assert store.stats().evicted == 1
+    assert store.stats().disk_bytes == 200
+
+
+def test_tile_store_keeps_osm_tiles_only_in_memory_and_drops_legacy_files(tmp_path):
+    (tmp_path / "https_a.basemaps.cartocdn.com_light_all_1_2_3.png_abcd.bin").write_bytes(b"image/png\nold")
+    key = TileKey("osm", 1, 2, 3)
+    store = TileCacheStore(tmp_path / "tiles.mbtiles")
+    store.put(key, b"osm-bytes", "image/png")
+
+    assert store.get(key).body == b"osm-bytes"
+    assert TileCacheStore(tmp_path / "tiles.mbtiles").get(key) is None
+    assert list(tmp_path.glob("*.bin")) == []
+
+
+def test_fetch_tile_revalidates_stale_tiles_and_falls_back_when_offline(tmp_path):
+    clock = FakeClock()
+    store = TileCacheStore(tmp_path / "tiles.mbtiles", max_age_seconds=60, clock=clock)
+    key = TileKey("carto_dark", 13, 3005, 4585)
+    store.put(key, b"dark", "image/png", etag='"v1"', last_modified="Tue, 01 Sep 2026 10:00:00 GMT")
+    requests_seen = []
+
+    def not_modified(url, **kwargs):
+        requests_seen.append(kwargs["headers"])
+        return FakeResponse(304)
+
+    def offline(url, **kwargs):
+        raise ConnectionError("sem rede")
+
+    fresh = fetch_tile(store, key, get=offline, timeout=1)
+    clock.now += 120
+    revalidated = fetch_tile(store, key, get=not_modified, timeout=1)
+    clock.now += 120
+    stale = fetch_tile(store, key, get=offline, timeout=1)
+    missing = fetch_tile(store, TileKey("carto_dark", 13, 0, 0), get=offline, timeout=1)
+
+    assert fresh.source == "cache"
+    assert revalidated.source == "revalidated"
+    assert revalidated.body == b"dark"
+    assert requests_seen[0]["If-None-Match"] == '"v1"'
+    assert requests_seen[0]["If-Modified-Since"] == "Tue, 01 Sep 2026 10:00:00 GMT"
+    assert (stale.status, stale.source, stale.body) == (200, "stale", b"dark")
+    assert (missing.status, missing.source) == (502, "error")
+    assert store.stats().revalidated == 1
+    assert store.stats().stale_served == 1
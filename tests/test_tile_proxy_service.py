@@ -1,43 +1,83 @@
 import sys
-from pathlib import Path
+from io import BytesIO
 
+from app.services.tile_cache_store import TileCacheStore
 from app.services.tile_proxy_service import TileProxyService
+from app.services.tile_upstream import TileUpstream
 from app.services.tile_scheme_handler import TileSchemeHandler
 
 
-def test_disk_cache_path_uses_safe_filename_and_roundtrips(tmp_path):
-    service = TileProxyService()
-    service._disk_cache_dir = str(tmp_path)
+class FakeResponse:
+    def __init__(self, status_code: int, content: bytes = b"", headers: dict | None = None):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers or {}
 
-    key = "https://server.arcgisonline.com/ArcGIS/rest/services/World_Imagery/MapServer/tile/1/3/2"
-    path = Path(service._get_disk_cache_path(key))
 
-    service._write_to_disk(key, b"tile-bytes", "image/png")
+class FakeHandler:
+    def __init__(self, path: str):
+        self.path = path
+        self.status = None
+        self.wfile = BytesIO()
 
-    assert ":" not in path.name
-    assert path.exists()
-    assert service._read_from_disk(key) == (b"tile-bytes", "image/png")
+    def send_response(self, status):
+        self.status = status
 
+    def send_header(self, *_args):
+        return
 
-def test_tile_proxy_does_not_persist_official_osm_tiles_to_disk(tmp_path):
-    service = TileProxyService()
-    service._disk_cache_dir = str(tmp_path)
-    key = "https://tile.openstreetmap.org/1/2/3.png"
+    def end_headers(self):
+        return
 
-    service._write_to_disk(key, b"tile-bytes", "image/png")
 
-    assert not Path(service._get_disk_cache_path(key)).exists()
-    assert service._read_from_disk(key) is None
+class FakeSession:
+    def __init__(self, get):
+        self.get = get
+
+    def mount(self, *_args):
+        return
+
+    def close(self):
+        return
+
+
+def test_tile_proxy_serves_tiles_from_shared_store_when_offline(tmp_path):
+    calls = []
+
+    def online_get(url, **kwargs):
+        calls.append(url)
+        return FakeResponse(200, b"tile-bytes", {"Content-Type": "image/png"})
+
+    def offline_get(url, **kwargs):
+        raise ConnectionError("offline")
+
+    service = TileProxyService(
+        store=TileCacheStore(tmp_path / "tiles.mbtiles"),
+        upstream=TileUpstream(session_factory=lambda: FakeSession(online_get)),
+    )
+    online = FakeHandler("/tiles/satellite/1/3/2.png")
+    service._handle_request(online, head_only=False)
+
+    offline_service = TileProxyService(
+        store=TileCacheStore(tmp_path / "tiles.mbtiles"),
+        upstream=TileUpstream(session_factory=lambda: FakeSession(offline_get)),
+    )
+    offline = FakeHandler("/tiles/satellite/1/3/2.png")
+    offline_service._handle_request(offline, head_only=False)
+
+    assert calls == ["https://server.arcgisonline.com/ArcGIS/rest/services/World_Imagery/MapServer/tile/1/2/3"]
+    assert online.status == offline.status == 200
+    assert offline.wfile.getvalue() == b"tile-bytes"
 
 
 def test_tile_proxy_service_uses_user_data_dir_when_frozen(tmp_path, monkeypatch):
     monkeypatch.setenv("LOCALAPPDATA", str(tmp_path))
     monkeypatch.setattr(sys, "frozen", True, raising=False)
 
-    service = TileProxyService()
+    store = TileCacheStore()
 
-    assert Path(service._disk_cache_dir) == (
-        tmp_path / "CompensacoesApp" / "CompensacoesDesktop" / "data" / "tiles_cache"
+    assert store.db_path == (
+        tmp_path / "CompensacoesApp" / "CompensacoesDesktop" / "data" / "tiles_cache" / "tiles.mbtiles"
     )
 
 
@@ -0,0 +1,110 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from app.services.tile_cache_store import TileCacheStore, TileKey
+from app.services.tile_seed_service import (
+    SAO_CARLOS_BOUNDS,
+    TileBounds,
+    TileSeeder,
+    TileSeedPolicy,
+    plan_tile_seed,
+    tile_range,
+    tile_xy,
+)
+
+
+@pytest.fixture
+def stub_tile_server():
+    requests_seen = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *_args):
+            return
+
+        def do_GET(self):
+            requests_seen.append(self.path)
+            if self.path.endswith("/404"):
+                self.send_response(404)
+                self.end_headers()
+                return
+            body = self.path.encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "image/png")
+            self.send_header("ETag", '"stub"')
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address
+    try:
+        yield f"http://{host}:{port}", requests_seen
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_tile_range_covers_sao_carlos_and_plan_honours_memory_only_providers():
+    columns, rows = tile_range(SAO_CARLOS_BOUNDS, 12)
+
+    assert tile_xy(-22.0175, -47.8909, 12) == (1503, 2304)
+    assert 1503 in columns and 2304 in rows
+    plan = plan_tile_seed(min_zoom=10, max_zoom=12)
+    assert "osm" not in plan.providers
+    assert plan.skipped_providers == ("osm",)
+    assert {key.provider for key in plan.keys} == set(plan.providers)
+    assert {key.z for key in plan.keys} == {10, 11, 12}
+
+
+def test_tile_seeder_downloads_missing_tiles_and_resumes(tmp_path, stub_tile_server):
+    base_url, requests_seen = stub_tile_server
+    policies = {
+        "carto_light": TileSeedPolicy("carto_light", rate_per_second=1000.0),
+        "satellite": TileSeedPolicy("satellite", rate_per_second=1000.0, max_zoom=11),
+        "osm": TileSeedPolicy("osm", persist=False),
+    }
+    plan = plan_tile_seed(TileBounds(-22.05, -47.95, -21.98, -47.85), min_zoom=11, max_zoom=12, policies=policies)
+    failing = TileKey("carto_light", 12, 0, 404)
+    store = TileCacheStore(tmp_path / "tiles.mbtiles")
+
+    def url_for(key: TileKey) -> str:
+        return f"{base_url}/{key.provider}/{key.z}/{key.x}/{key.y}"
+
+    progress = []
+    first = TileSeeder(store, policies=policies, max_workers=3, url_for=url_for).seed(
+        plan.keys + (failing,),
+        on_progress=progress.append,
+    )
+    requests_after_first = len(requests_seen)
+    second = TileSeeder(TileCacheStore(tmp_path / "tiles.mbtiles"), policies=policies, url_for=url_for).seed(
+        plan.keys
+    )
+
+    assert {key.provider for key in plan.keys} == {"carto_light", "satellite"}
+    assert max(key.z for key in plan.keys if key.provider == "satellite") == 11
+    assert (first.fetched, first.skipped, first.failed, first.cancelled) == (len(plan.keys), 0, 1, False)
+    assert progress[-1].completed == len(plan.keys) + 1
+    assert first.cache_tiles == len(plan.keys)
+    assert first.cache_bytes > 0
+    assert (second.fetched, second.skipped) == (0, len(plan.keys))
+    assert len(requests_seen) == requests_after_first
+    assert store.get(plan.keys[0]).etag == '"stub"'
+
+
+def test_tile_seeder_stops_when_cancelled(tmp_path):
+    store = TileCacheStore(tmp_path / "tiles.mbtiles")
+    keys = [TileKey("satellite", 14, column, 9170) for column in range(20)]
+
+    def get(url, **kwargs):
+        seeder.cancel()
+        return type("Response", (), {"status_code": 200, "content": b"tile", "headers": {}})()
+
+    seeder = TileSeeder(store, get=get, max_workers=1, url_for=lambda key: f"stub://{key.x}")
+    outcome = seeder.seed(keys)
+
+    assert outcome.cancelled is True
+    assert outcome.fetched < len(keys)
+    assert outcome.failed == 0
@@ -0,0 +1,154 @@
+import io
+import threading
+import time
+
+import app.services.tile_upstream as tile_upstream
+from app.services.tile_cache_store import TileCacheStore, TileKey
+from app.services.tile_proxy_service import TileProxyService
+from app.services.tile_seed_service import TileSeeder, TileSeedPolicy
+from app.services.tile_upstream import TileUpstream
+
+
+class FakeResponse:
+    def __init__(self, content: bytes):
+        self.status_code = 200
+        self.content = content
+        self.headers = {"Content-Type": "image/png"}
+
+
+class FakeSession:
+    def __init__(self, get):
+        self.get = get
+        self.adapters = []
+
+    def mount(self, prefix, adapter):
+        self.adapters.append((prefix, adapter))
+
+    def close(self):
+        return
+
+
+def run_concurrently(count: int, target) -> list:
+    results = [None] * count
+
+    def worker(index: int) -> None:
+        results[index] = target(index)
+
+    threads = [threading.Thread(target=worker, args=(index,)) for index in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    return results
+
+
+def test_tile_upstream_coalesces_identical_requests_in_flight(tmp_path):
+    release = threading.Event()
+    calls = []
+
+    def get(url, **kwargs):
+        calls.append(url)
+        release.wait(5)
+        return FakeResponse(b"tile")
+
+    upstream = TileUpstream(session_factory=lambda: FakeSession(get))
+    store = TileCacheStore(tmp_path / "tiles.mbtiles")
+    key = TileKey("carto_light", 14, 6010, 9170)
+
+    def request(_index):
+        return upstream.fetch(store, key, timeout=1)
+
+    threading.Timer(0.3, release.set).start()
+    results = run_concurrently(6, request)
+
+    assert len(calls) == 1
+    assert {result.body for result in results} == {b"tile"}
+    assert upstream.stats().upstream_calls == 1
+    assert upstream.stats().coalesced == 5
+
+
+def test_tile_upstream_bounds_concurrency_and_reuses_session_per_provider(tmp_path):
+    lock = threading.Lock()
+    active = {"now": 0, "max": 0}
+    sessions = []
+
+    def get(url, **kwargs):
+        with lock:
+            active["now"] += 1
+            active["max"] = max(active["max"], active["now"])
+        time.sleep(0.02)
+        with lock:
+            active["now"] -= 1
+        return FakeResponse(url.encode("utf-8"))
+
+    def session_factory():
+        sessions.append(FakeSession(get))
+        return sessions[-1]
+
+    upstream = TileUpstream(max_concurrency=3, session_factory=session_factory)
+    store = TileCacheStore(tmp_path / "tiles.mbtiles")
+
+    def fetch(index):
+        provider = "satellite" if index % 2 else "carto_dark"
+        return upstream.fetch(store, TileKey(provider, 14, index, 1), timeout=1)
+
+    results = run_concurrently(12, fetch)
+
+    assert all(result.status == 200 for result in results)
+    assert active["max"] <= 3
+    assert upstream.stats().max_in_flight <= 3
+    assert len(sessions) == 2
+    assert {adapter._pool_maxsize for session in sessions for _prefix, adapter in session.adapters} == {3}
+
+
+class FakeProxyRequest:
+    def __init__(self, path: str):
+        self.path = path
+        self.status = None
+        self.wfile = io.BytesIO()
+
+    def send_response(self, status):
+        self.status = status
+
+    def send_header(self, _name, _value):
+        return
+
+    def end_headers(self):
+        return
+
+
+def test_map_proxy_and_tile_seeder_share_one_upstream_fetch(tmp_path, monkeypatch):
+    release = threading.Event()
+    started = threading.Event()
+    calls = []
+
+    def get(url, **kwargs):
+        calls.append(url)
+        started.set()
+        release.wait(5)
+        return FakeResponse(b"tile")
+
+    monkeypatch.setattr(tile_upstream, "_SHARED_UPSTREAM", TileUpstream(session_factory=lambda: FakeSession(get)))
+    store = TileCacheStore(tmp_path / "tiles.mbtiles")
+    proxy = TileProxyService(store=store)
+    seeder = TileSeeder(store, policies={"carto_light": TileSeedPolicy("carto_light", rate_per_second=1000.0)})
+    key = TileKey("carto_light", 14, 6010, 9170)
+    request = FakeProxyRequest("/tiles/carto_light/14/6010/9170.png")
+
+    proxy_thread = threading.Thread(target=proxy._handle_request, args=(request,), kwargs={"head_only": False})
+    proxy_thread.start()
+    assert started.wait(5)
+    seed_thread = threading.Thread(target=lambda: seeder.seed([key]))
+    seed_thread.start()
+    deadline = time.monotonic() + 5
+    while tile_upstream.get_shared_tile_upstream().stats().coalesced < 1 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    release.set()
+    proxy_thread.join(5)
+    seed_thread.join(5)
+
+    assert len(calls) == 1
+    assert request.status == 200
+    assert request.wfile.getvalue() == b"tile"
+    assert store.get(key).body == b"tile"
+    assert tile_upstream.get_shared_tile_upstream().stats().coalesced == 1
@@ -162,7 +162,7 @@ def test_table_selection_can_cancel_discarding_pending_changes(ui_window_factory
         make_record(excel_row=3, oficio_processo="456/2026", av_tec="AT-2", uid="workflow-uid-4"),
     ]
     window.filtered_records = list(window.records)
-    window.data_tab.table_model.update_data(window.filtered_records)
+    window.data_tab.show_records(window.filtered_records)
     window.selected = window.records[0]
     window._fill_form(window.selected)
     window.data_tab.in_oficio.setText("ALTERADO")
@@ -189,7 +189,7 @@ def test_table_selection_can_hydrate_selected_record_from_sqlite_detail(ui_windo
     )
     window.records = [stale_record]
     window.filtered_records = list(window.records)
-    window.data_tab.table_model.update_data(window.filtered_records)
+    window.data_tab.show_records(window.filtered_records)
 
     monkeypatch.setattr(
         window.shell_controller.local_record_queries,
@@ -221,7 +221,7 @@ def test_table_selection_rebinds_runtime_persistence_service_after_swap(ui_windo
     window.session_runtime.path = str(workbook_path)
     window.records = [stale_record]
     window.filtered_records = list(window.records)
-    window.data_tab.table_model.update_data(window.filtered_records)
+    window.data_tab.show_records(window.filtered_records)
 
     class SwappedPersistenceService:
         def get_workbook_snapshot_summary(self, workbook_path):
@@ -7,13 +7,16 @@ def test_geocode_worker_uses_configurable_generic_geocoder(monkeypatch):
 
     monkeypatch.setattr(
         "app.ui.components.workers.geocode_address",
-        lambda address, timeout=10: calls.append((address, timeout)) or (-22.01, -47.89),
+        lambda address, timeout=10, requester=None, rate_limit_seconds=1.0: calls.append(
+            (address, timeout, requester, rate_limit_seconds)
+        )
+        or (-22.01, -47.89),
     )
 
     worker = GeocodeWorker([])
 
     assert worker._geocode_api("Rua Teste") == (-22.01, -47.89)
-    assert calls == [("Rua Teste", 8)]
+    assert calls == [("Rua Teste", 8, worker.engine.requester, 0.0)]
 
 
 def test_updater_worker_skips_when_no_source_is_configured():
@@ -103,3 +106,38 @@ def test_updater_worker_emits_failure_for_invalid_payload():
     worker.run()
 
     assert failures == ["Resposta de atualização sem versão válida."]
+
+
+def test_geocode_worker_run_emits_assembled_results_from_the_engine():
+    from app.models.compensacao import Compensacao
+    from app.services.batch_geocode_service import BatchGeocodeEngine
+
+    records = [
+        Compensacao(
+            excel_row=row,
+            oficio_processo="1/2026",
+            eletronico="",
+            caixa="",
+            av_tec="",
+            compensacao="",
+            endereco="Rua Repetida, 10",
+            microbacia="",
+            compensado="",
+        )
+        for row in (2, 3)
+    ]
+    calls = []
+    worker = GeocodeWorker(
+        records,
+        engine=BatchGeocodeEngine(geocoder=lambda address, **kwargs: calls.append(address) or (-22.0, -47.9), limiters={}),
+    )
+    finished = []
+    progress = []
+    worker.finished_process.connect(finished.append)
+    worker.progress_update.connect(lambda current, message: progress.append(current))
+
+    worker.run()
+
+    assert calls == ["Rua Repetida, 10"]
+    assert finished == [{2: {"main": (-22.0, -47.9)}, 3: {"main": (-22.0, -47.9)}}]
+    assert progress == [1]
@@ -0,0 +1,124 @@
+import zipfile
+from datetime import datetime
+
+import openpyxl
+import pytest
+
+from app.services.xlsx_stream_reader import XlsxStreamError, XlsxStreamReader
+
+
+MAIN_NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+REL_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+PACKAGE_REL_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+
+
+def strip_trailing_none(rows):
+    stripped = []
+    for row in rows:
+        values = list(row)
+        while values and values[-1] is None:
+            values.pop()
+        stripped.append(tuple(values))
+    while stripped and not stripped[-1]:
+        stripped.pop()
+    return stripped
+
+
+def openpyxl_rows(path, sheet_name):
+    workbook = openpyxl.load_workbook(path, read_only=True, data_only=False)
+    try:
+        return strip_trailing_none(workbook[sheet_name].iter_rows(values_only=True))
+    finally:
+        workbook.close()
+
+
+def write_package(path, sheet_xml, shared_strings_xml):
+    content_types = (
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '<Override PartName="/xl/sharedStrings.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sharedStrings+xml"/>'
+        "</Types>"
+    )
+    package_rels = (
+        f'<Relationships xmlns="{PACKAGE_REL_NS}">'
+        f'<Relationship Id="rId1" Type="{REL_NS}/officeDocument" Target="xl/workbook.xml"/>'
+        "</Relationships>"
+    )
+    workbook_xml = (
+        f'<workbook xmlns="{MAIN_NS}" xmlns:r="{REL_NS}">'
+        '<sheets><sheet name="Dados" sheetId="1" r:id="rId1"/></sheets></workbook>'
+    )
+    workbook_rels = (
+        f'<Relationships xmlns="{PACKAGE_REL_NS}">'
+        f'<Relationship Id="rId1" Type="{REL_NS}/worksheet" Target="worksheets/sheet1.xml"/>'
+        f'<Relationship Id="rId2" Type="{REL_NS}/sharedStrings" Target="/xl/sharedStrings.xml"/>'
+        "</Relationships>"
+    )
+    with zipfile.ZipFile(path, "w") as archive:
+        archive.writestr("[Content_Types].xml", content_types)
+        archive.writestr("_rels/.rels", package_rels)
+        archive.writestr("xl/workbook.xml", workbook_xml)
+        archive.writestr("xl/_rels/workbook.xml.rels", workbook_rels)
+        archive.writestr(
+            "xl/worksheets/sheet1.xml",
+            f'<worksheet xmlns="{MAIN_NS}"><sheetData>{sheet_xml}</sheetData></worksheet>',
+        )
+        archive.writestr("xl/sharedStrings.xml", f'<sst xmlns="{MAIN_NS}">{shared_strings_xml}</sst>')
+
+
+def test_rows_match_openpyxl_for_workbook_saved_by_openpyxl(tmp_path):
+    path = tmp_path / "tipos.xlsx"
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.title = "Dados"
+    sheet.append(["Texto", "Inteiro", "Real", "Logico", "Data", "Formula", "Vazio"])
+    sheet.append(["Rua A", 8, 2.5, True, datetime(2026, 3, 14, 9, 30), "=B2*2", ""])
+    sheet.cell(row=5, column=3).value = "pulou linhas"
+    sheet.cell(row=6, column=30).value = -1e-05
+    workbook.create_sheet("Outra").append(["x"])
+    workbook.save(path)
+
+    with XlsxStreamReader(str(path)) as reader:
+        assert reader.sheetnames == ["Dados", "Outra"]
+        assert reader.active_sheet == "Dados"
+        streamed = strip_trailing_none(reader.iter_rows("Dados"))
+
+    assert streamed == openpyxl_rows(path, "Dados")
+    assert streamed[1][:6] == ("Rua A", 8, 2.5, True, datetime(2026, 3, 14, 9, 30), "=B2*2")
+    assert streamed[2] == () and streamed[4][2] == "pulou linhas"
+
+
+def test_shared_strings_rich_text_and_shared_formulas_match_openpyxl(tmp_path):
+    path = tmp_path / "excel.xlsx"
+    write_package(
+        path,
+        '<row r="1"><c r="A1" t="s"><v>0</v></c><c r="C1" t="s"><v>1</v></c></row>'
+        '<row r="3"><c r="A3"><f t="shared" ref="A3:A4" si="0">B3+1</f><v>2</v></c><c r="B3"><v>1</v></c>'
+        '<c r="D3" t="b"><v>0</v></c><c r="E3" t="e"><v>#N/A</v></c></row>'
+        '<row r="4"><c r="A4"><f t="shared" si="0"/><v>3</v></c><c r="B4"><v>2</v></c></row>',
+        '<si><t>Compensação</t></si>'
+        '<si><r><t>Rua </t></r><r><rPr><b/></rPr><t>Azul</t></r><rPh sb="0" eb="1"><t>x</t></rPh></si>',
+    )
+
+    with XlsxStreamReader(str(path)) as reader:
+        streamed = strip_trailing_none(reader.iter_rows("Dados"))
+
+    assert streamed == openpyxl_rows(path, "Dados")
+    assert streamed[0] == ("Compensação", None, "Rua Azul")
+    assert streamed[2] == ("=B3+1", 1, None, False, "#N/A")
+    assert streamed[3] == ("=B4+1", 2)
+
+
+def test_array_formula_is_left_to_openpyxl(tmp_path):
+    path = tmp_path / "array.xlsx"
+    write_package(path, '<row r="1"><c r="A1"><f t="array" ref="A1:A2">B1:B2*2</f><v>2</v></c></row>', "")
+
+    with XlsxStreamReader(str(path)) as reader:
+        with pytest.raises(XlsxStreamError):
+            list(reader.iter_rows("Dados"))